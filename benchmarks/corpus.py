@@ -0,0 +1,124 @@
+"""
+Provide named JSON documents for benchmarking `json_indent`:py:mod:.
+
+Each case is a function returning raw JSON text; documents are generated
+deterministically, so timings are comparable from run to run.
+"""
+
+from __future__ import absolute_import
+
+import json
+import random
+from collections import OrderedDict
+
+SEED = 20240601
+
+# Fraction of the containers in the "tree" case which are arrays rather than objects
+TREE_ARRAY_FRACTION = 0.5
+
+# Deep enough to overflow any recursive parser or encoder
+STRESS_DEPTH = 100000
+
+# Deep, but within reach of the standard recursive parser and encoder
+MODERATE_DEPTH = 500
+
+
+def _records(count=30000):
+    return [
+        OrderedDict(
+            [
+                ("id", i),
+                ("name", "name-{}".format(i)),
+                ("tags", ["alpha", "beta"] if i % 2 else []),
+                ("score", i * 1.5),
+                ("active", i % 3 == 0),
+                ("parent", None),
+            ]
+        )
+        for i in range(count)
+    ]
+
+
+def _tree(rng, depth):
+    if depth == 0:
+        return rng.choice([0, 1.25, "leaf", None, True, "x" * 20])
+    if rng.random() < TREE_ARRAY_FRACTION:
+        return [_tree(rng, depth - 1) for _ in range(5)]
+    return OrderedDict(("k{}".format(i), _tree(rng, depth - 1)) for i in range(5))
+
+
+def records(count=30000):
+    """Many small objects, as in a typical API response."""
+    return json.dumps(_records(count))
+
+
+def tree():
+    """A bushy tree of mixed arrays and objects."""
+    return json.dumps(_tree(random.Random(SEED), 7))
+
+
+def numbers():
+    """One long array of numbers."""
+    rng = random.Random(SEED)
+    return json.dumps([rng.choice([rng.randint(-(10**6), 10**6), rng.random()]) for _ in range(200000)])
+
+
+def int_arrays():
+    """A few long arrays of integers, as in telemetry (counters and timestamps)."""
+    rng = random.Random(SEED)
+    return json.dumps(
+        OrderedDict(("series{}".format(i), [rng.randint(0, 10**9) for _ in range(50000)]) for i in range(8))
+    )
+
+
+def float_arrays():
+    """A few long arrays of floats, as in telemetry (sensor readings)."""
+    rng = random.Random(SEED)
+    return json.dumps(OrderedDict(("series{}".format(i), [rng.gauss(0, 100) for _ in range(50000)]) for i in range(8)))
+
+
+def strings():
+    """One long array of strings, some needing escapes."""
+    return json.dumps(['string {} with "quotes" and é\n'.format(i) for i in range(100000)])
+
+
+def moderately_deep():
+    """Arrays and objects nested a few hundred levels deep."""
+    data = [1, {"a": "b"}]
+    for i in range(MODERATE_DEPTH):
+        data = [data, {"k": i}]
+    return json.dumps(data)
+
+
+def deep_arrays():
+    """Arrays nested far beyond the recursion limit."""
+    return "[" * STRESS_DEPTH + "]" * STRESS_DEPTH
+
+
+def deep_objects():
+    """Objects nested far beyond the recursion limit."""
+    return '{"a": ' * STRESS_DEPTH + "null" + "}" * STRESS_DEPTH
+
+
+def deep_mixed():
+    """Alternating arrays and objects, with siblings, nested beyond the recursion limit."""
+    return '[1, {"k": ' * (STRESS_DEPTH // 2) + "[]" + "}, 2]" * (STRESS_DEPTH // 2)
+
+
+CASES = OrderedDict(
+    [
+        ("records", records),
+        ("tree", tree),
+        ("numbers", numbers),
+        ("int-arrays", int_arrays),
+        ("float-arrays", float_arrays),
+        ("strings", strings),
+        ("moderately-deep", moderately_deep),
+        ("deep-arrays", deep_arrays),
+        ("deep-objects", deep_objects),
+        ("deep-mixed", deep_mixed),
+    ]
+)
+
+# Cases which are too deep for the standard library's recursive parser and encoder
+DEPTH_STRESS_CASES = frozenset(["deep-arrays", "deep-objects", "deep-mixed"])
@@ -0,0 +1,89 @@
+"""
+Measure the memory allocated loading JSON from bytes-like buffers.
+
+Usage::
+
+    python3 -m benchmarks.run_allocations [--repeat N] [CASE ...]
+
+Each case is encoded in UTF-8, UTF-16, and UTF-32, and held in a larger
+buffer, as if received from a socket or mapped from a file.  Loading a memory
+view of it straight away is compared with copying it to `bytes` and decoding
+that to a string first; the peak memory allocated by each, beyond the buffer
+itself, is shown with the best time.
+"""
+
+from __future__ import absolute_import, print_function
+
+import argparse
+import json
+import sys
+import timeit
+import tracemalloc
+
+from json_indent.json_indent import load_json, load_json_text
+
+from benchmarks.corpus import CASES
+
+DEFAULT_REPEAT = 3
+
+DEFAULT_CASES = ["records", "strings"]
+
+ENCODINGS = ["utf-8", "utf-16", "utf-32"]
+
+# Bytes of slack around the document in the buffer it is received into
+SLACK = 4096
+
+
+def _decode_first(view):
+    copied = bytes(view)
+    return load_json_text(copied.decode(json.detect_encoding(copied)))
+
+
+def _load_view(view):
+    return load_json(view)
+
+
+METHODS = [("decode first", _decode_first), ("load view", _load_view)]
+
+
+def _peak_allocated(func, view):
+    """Return the peak memory in MiB allocated by `func(view)` (including what it returns)."""
+    tracemalloc.start()
+    try:
+        func(view)
+        return tracemalloc.get_traced_memory()[1] / float(1 << 20)
+    finally:
+        tracemalloc.stop()
+
+
+def main(*args):
+    parser = argparse.ArgumentParser(description="Measure memory allocated loading JSON from bytes-like buffers")
+    parser.add_argument(
+        "cases", metavar="CASE", nargs="*", help="Cases to run (default: {})".format(", ".join(DEFAULT_CASES))
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=DEFAULT_REPEAT, help="Runs per timing (default: {})".format(DEFAULT_REPEAT)
+    )
+    cli_args = parser.parse_args(args or None)
+    unknown = [name for name in cli_args.cases if name not in CASES]
+    if unknown:
+        parser.error("unknown case(s): {} (choose from: {})".format(", ".join(unknown), ", ".join(CASES)))
+
+    print("{:<10} {:<8} {:<14} {:>10} {:>10}".format("case", "encoding", "method", "peak MiB", "ms"))
+    for name in cli_args.cases or DEFAULT_CASES:
+        text = CASES[name]()
+        for encoding in ENCODINGS:
+            encoded = text.encode(encoding)
+            buffer = bytearray(SLACK) + encoded + bytearray(SLACK)
+            view = memoryview(buffer)[SLACK : SLACK + len(encoded)]
+            for method, func in METHODS:
+                peak = _peak_allocated(func, view)
+                milliseconds = 1000.0 * min(
+                    timeit.repeat(lambda: func(view), number=1, repeat=cli_args.repeat)  # noqa: B023
+                )
+                print("{:<10} {:<8} {:<14} {:>10.1f} {:>10.1f}".format(name, encoding, method, peak, milliseconds))
+                sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Time `json_indent`:py:mod: against the standard `json`:py:mod: module.
+
+Usage::
+
+    python3 -m benchmarks.run_benchmarks [--repeat N] [CASE ...]
+"""
+
+from __future__ import absolute_import, print_function
+
+import argparse
+import json
+import sys
+import timeit
+from collections import OrderedDict
+
+from json_indent.json_indent import dump_json_text, format_json_text, load_json_text
+
+from benchmarks.corpus import CASES, DEPTH_STRESS_CASES
+
+DEFAULT_REPEAT = 5
+
+NOT_APPLICABLE = "n/a"
+
+
+def _best_time(func, repeat):
+    """Return the best time in milliseconds from several runs of `func`, or `None` if it fails."""
+    try:
+        return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000.0
+    except RecursionError:
+        return None
+
+
+def _format_time(milliseconds):
+    return NOT_APPLICABLE if milliseconds is None else "{:.1f}".format(milliseconds)
+
+
+def run_case(name, repeat=DEFAULT_REPEAT):
+    """
+    Time loading, dumping, and formatting one case from the corpus.
+
+    :Returns:
+        A list of ``(operation, json_indent_ms, stdlib_ms)`` tuples, where
+        times are `None` if the operation failed with `RecursionError`
+    """
+    text = CASES[name]()
+    # Indenting a very deep document makes its output quadratic in size
+    indent = None if name in DEPTH_STRESS_CASES else 4
+    data = load_json_text(text)
+    tape = load_json_text(text, model="tape")
+    return [
+        (
+            "load",
+            _best_time(lambda: load_json_text(text), repeat),
+            # load_json_text() preserves key order the same way
+            _best_time(lambda: json.loads(text, object_pairs_hook=OrderedDict), repeat),
+        ),
+        (
+            "dump",
+            _best_time(lambda: dump_json_text(data, indent=indent), repeat),
+            _best_time(lambda: json.dumps(data, indent=indent), repeat),
+        ),
+        (
+            "tape load",
+            _best_time(lambda: load_json_text(text, model="tape"), repeat),
+            _best_time(lambda: json.loads(text, object_pairs_hook=OrderedDict), repeat),
+        ),
+        (
+            "tape dump",
+            _best_time(lambda: dump_json_text(tape, indent=indent), repeat),
+            _best_time(lambda: json.dumps(data, indent=indent), repeat),
+        ),
+        (
+            "lossless",
+            _best_time(lambda: format_json_text(text, lossless=True, indent=indent), repeat),
+            None,
+        ),
+    ]
+
+
+def main(*args):
+    parser = argparse.ArgumentParser(description="Time json_indent against the standard json module")
+    parser.add_argument("cases", metavar="CASE", nargs="*", help="Cases to run (default: all)")
+    parser.add_argument(
+        "--repeat", type=int, default=DEFAULT_REPEAT, help="Runs per timing (default: {})".format(DEFAULT_REPEAT)
+    )
+    cli_args = parser.parse_args(args or None)
+    unknown = [name for name in cli_args.cases if name not in CASES]
+    if unknown:
+        parser.error("unknown case(s): {} (choose from: {})".format(", ".join(unknown), ", ".join(CASES)))
+
+    print("{:<16} {:<10} {:>14} {:>14}".format("case", "operation", "json_indent ms", "json ms"))
+    for name in cli_args.cases or CASES:
+        for operation, ours, theirs in run_case(name, cli_args.repeat):
+            print("{:<16} {:<10} {:>14} {:>14}".format(name, operation, _format_time(ours), _format_time(theirs)))
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Time formatting a large file with each I/O profile.
+
+Usage::
+
+    python3 -m benchmarks.run_io [--repeat N] [--size MIB]
+
+A file of records is formatted to another file with each engine, under each
+of the ``--io-profile`` settings.  On a local disk whose pages are cached, the
+profiles differ little, and the "large" one can even lose, as it drops the
+input from the page cache once read, so each repeat reads it from disk again.
+Its large buffers, sequential read-ahead, and preallocation pay off on files
+bigger than memory (whose pages would only push others out of the cache) and
+on storage where each request is slow (as on network volumes).
+"""
+
+from __future__ import absolute_import, print_function
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+from json_indent.iofile import IO_PROFILES
+from json_indent.json_indent import cli
+
+from benchmarks.corpus import records
+
+DEFAULT_REPEAT = 3
+
+# Size of the input file, in MiB
+DEFAULT_SIZE = 64
+
+ENGINES = ["memory", "bounded"]
+
+
+def _write_input(path, size):
+    """Write a file of at least `size` MiB of records, as one array."""
+    text = records()[1:-1]
+    with open(path, "w") as f:
+        f.write("[")
+        written = 0
+        while written < size << 20:
+            if written:
+                f.write(",")
+            f.write(text)
+            written += len(text)
+        f.write("]\n")
+    return os.path.getsize(path)
+
+
+def main(*args):
+    parser = argparse.ArgumentParser(description="Time formatting a large file with each I/O profile")
+    parser.add_argument(
+        "--repeat", type=int, default=DEFAULT_REPEAT, help="Runs per timing (default: {})".format(DEFAULT_REPEAT)
+    )
+    parser.add_argument(
+        "--size", type=int, default=DEFAULT_SIZE, help="MiB of input (default: {})".format(DEFAULT_SIZE)
+    )
+    cli_args = parser.parse_args(args or None)
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        input_path = os.path.join(temp_dir, "input.json")
+        output_path = os.path.join(temp_dir, "output.json")
+        size = _write_input(input_path, cli_args.size)
+        print("input: {:.1f} MiB".format(size / float(1 << 20)))
+        print("{:<8} {:<8} {:>10} {:>10}".format("engine", "profile", "ms", "MiB/s"))
+        for engine in ENGINES:
+            for profile in IO_PROFILES:
+                argv = ["--engine", engine, "--io-profile", profile, "-o", output_path, input_path]
+                seconds = min(timeit.repeat(lambda: cli(*argv), number=1, repeat=cli_args.repeat))  # noqa: B023
+                print(
+                    "{:<8} {:<8} {:>10.1f} {:>10.1f}".format(
+                        engine, profile, 1000.0 * seconds, size / float(1 << 20) / seconds
+                    )
+                )
+                sys.stdout.flush()
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Measure the memory held by many small documents loaded with and without a key cache.
+
+Usage::
+
+    python3 -m benchmarks.run_key_cache [--repeat N] [--count N]
+
+Each record of the "records" case is loaded as a document of its own, as
+from a queue or a file of JSON lines, and all the loaded records are kept.
+Without a `~json_indent.keycache.KeyCache`:py:class:, each record holds its
+own copy of every key; with one, all records share them.  The memory held by
+the loaded records is shown with the best time to load them, for ordered
+(`collections.OrderedDict`:py:class:) and unordered (`dict`) objects.
+"""
+
+from __future__ import absolute_import, print_function
+
+import argparse
+import json
+import sys
+import timeit
+import tracemalloc
+
+from json_indent.json_indent import load_json
+from json_indent.keycache import KeyCache
+
+from benchmarks.corpus import records
+
+DEFAULT_REPEAT = 3
+
+DEFAULT_COUNT = 100000
+
+
+def _load_all(texts, key_cache, unordered):
+    return [load_json(text, key_cache=key_cache, unordered=unordered) for text in texts]
+
+
+def _held(texts, key_cache, unordered):
+    """Return the memory in MiB held by the loaded documents (and the cache)."""
+    tracemalloc.start()
+    try:
+        loaded = _load_all(texts, key_cache() if key_cache else None, unordered)
+        held = tracemalloc.get_traced_memory()[0] / float(1 << 20)
+        del loaded
+        return held
+    finally:
+        tracemalloc.stop()
+
+
+def main(*args):
+    parser = argparse.ArgumentParser(description="Measure memory held by documents loaded with a key cache")
+    parser.add_argument(
+        "--repeat", type=int, default=DEFAULT_REPEAT, help="Runs per timing (default: {})".format(DEFAULT_REPEAT)
+    )
+    parser.add_argument(
+        "--count", type=int, default=DEFAULT_COUNT, help="Documents to load (default: {})".format(DEFAULT_COUNT)
+    )
+    cli_args = parser.parse_args(args or None)
+
+    # Keys made afresh for each document, as when each is read from its own buffer
+    texts = [json.dumps(record) for record in json.loads(records(cli_args.count))]
+    print("{:<10} {:<10} {:>10} {:>10}".format("objects", "keys", "held MiB", "ms"))
+    for unordered in [False, True]:
+        for key_cache in [None, KeyCache]:
+            held = _held(texts, key_cache, unordered)
+            milliseconds = 1000.0 * min(
+                timeit.repeat(
+                    lambda: _load_all(texts, key_cache() if key_cache else None, unordered),  # noqa: B023
+                    number=1,
+                    repeat=cli_args.repeat,
+                )
+            )
+            print(
+                "{:<10} {:<10} {:>10.1f} {:>10.1f}".format(
+                    "dict" if unordered else "ordered", "cached" if key_cache else "copied", held, milliseconds
+                )
+            )
+            sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Time formatting many documents serially, in threads, and in processes.
+
+Usage::
+
+    python3 -m benchmarks.run_parallel [--repeat N] [--jobs N] [WORKLOAD ...]
+
+Threads win only where the GIL is disabled (free-threaded CPython 3.13 and
+later); processes pay to pickle each document and result, which dominates for
+many small documents.
+"""
+
+from __future__ import absolute_import, print_function
+
+import argparse
+import sys
+import timeit
+from collections import OrderedDict
+
+from json_indent.json_indent import format_texts
+from json_indent.parallel import BACKEND_PROCESSES, BACKEND_SERIAL, BACKEND_THREADS, default_jobs, gil_enabled
+
+from benchmarks.corpus import records
+
+DEFAULT_REPEAT = 3
+
+BACKENDS = [BACKEND_SERIAL, BACKEND_THREADS, BACKEND_PROCESSES]
+
+
+def many_small():
+    """Thousands of small documents, as in a repository of fixtures."""
+    return [records(5) for _ in range(5000)]
+
+
+def few_large():
+    """A handful of multi-megabyte documents."""
+    return [records() for _ in range(8)]
+
+
+WORKLOADS = OrderedDict([("many-small", many_small), ("few-large", few_large)])
+
+
+def main(*args):
+    parser = argparse.ArgumentParser(description="Time formatting many documents in parallel")
+    parser.add_argument("workloads", metavar="WORKLOAD", nargs="*", help="Workloads to run (default: all)")
+    parser.add_argument(
+        "--repeat", type=int, default=DEFAULT_REPEAT, help="Runs per timing (default: {})".format(DEFAULT_REPEAT)
+    )
+    parser.add_argument("--jobs", type=int, default=default_jobs(), help="Workers (default: the number of CPUs)")
+    cli_args = parser.parse_args(args or None)
+    unknown = [name for name in cli_args.workloads if name not in WORKLOADS]
+    if unknown:
+        parser.error("unknown workload(s): {} (choose from: {})".format(", ".join(unknown), ", ".join(WORKLOADS)))
+
+    print("GIL enabled: {}; jobs: {}".format(gil_enabled(), cli_args.jobs))
+    print("{:<12} {:<10} {:>10}".format("workload", "backend", "ms"))
+    for name in cli_args.workloads or WORKLOADS:
+        texts = WORKLOADS[name]()
+        for backend in BACKENDS:
+            milliseconds = 1000.0 * min(
+                timeit.repeat(
+                    lambda: format_texts(texts, jobs=cli_args.jobs, backend=backend, indent=2),  # noqa: B023
+                    number=1,
+                    repeat=cli_args.repeat,
+                )
+            )
+            print("{:<12} {:<10} {:>10.1f}".format(name, backend, milliseconds))
+            sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Provide `asyncio`:py:mod: counterparts of the `json_indent`:py:mod: library functions.
+
+Parsing and formatting large documents takes long enough to stall an event
+loop, so the work is done in an executor: a thread pool by default, or any
+`concurrent.futures.Executor`:py:class: (e.g., a process pool, which is not
+limited by the GIL).  Files are read and written in the event loop's default
+executor, so the loop itself never waits on the disk.
+
+Cancelling a call which is still waiting for its turn means its work is
+never started; work already started in an executor runs to completion, but
+its result is dropped (and files are not written).
+"""
+
+from __future__ import absolute_import
+
+import asyncio
+import functools
+import io
+import os
+
+from json_indent.iofile import make_temp_file, replace_file
+from json_indent.json_indent import dump_json_text, format_json_text, load_json_text
+
+
+def _read_text(path):
+    with io.open(path, "r", encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def _is_same_file(path, other_path):
+    try:
+        return os.path.samefile(path, other_path)
+    except OSError:
+        return False
+
+
+def _write_text(path, text, newline, atomic=False):
+    """Write a file; atomically (see `~json_indent.iofile.replace_file()`:py:func:), if it is to be rewritten."""
+    if not atomic:
+        with io.open(path, "w", encoding="utf-8", newline=newline) as f:
+            f.write(text)
+        return
+    (fd, temp_path) = make_temp_file(path)
+    try:
+        with io.open(fd, "w", encoding="utf-8", newline=newline) as f:
+            f.write(text)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    replace_file(temp_path, path)
+
+
+class AsyncJsonFormatter(object):
+    """
+    Provide asynchronous loading, dumping, and formatting of JSON.
+
+    :Args:
+        executor
+            (optional) A `concurrent.futures.Executor`:py:class: to do the
+            parsing and formatting in (default: the event loop's default
+            executor)
+
+        max_concurrency
+            (optional) The most calls to run at once; others wait their turn
+            (default: no limit beyond that of the executor)
+    """
+
+    def __init__(self, executor=None, max_concurrency=None):
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+
+    @property
+    def semaphore(self):
+        # Created on first use, inside the event loop
+        if self._semaphore is None and self.max_concurrency is not None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _run(self, executor, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+    async def _limited(self, coroutine_function, *args, **kwargs):
+        """Await ``coroutine_function(*args, **kwargs)`` once fewer than `max_concurrency` calls are running."""
+        semaphore = self.semaphore
+        if semaphore is None:
+            return await coroutine_function(*args, **kwargs)
+        async with semaphore:
+            return await coroutine_function(*args, **kwargs)
+
+    async def load_text(self, text, filename=None, **kwargs):
+        """Do `~json_indent.load_json_text()`:py:func: asynchronously."""
+        return await self._limited(self._run, self.executor, load_json_text, text, filename, **kwargs)
+
+    async def dump_text(self, data, **kwargs):
+        """Do `~json_indent.dump_json_text()`:py:func: asynchronously."""
+        return await self._limited(self._run, self.executor, dump_json_text, data, **kwargs)
+
+    async def format_text(self, text, filename=None, lossless=False, **kwargs):
+        """Do `~json_indent.format_json_text()`:py:func: asynchronously."""
+        return await self._limited(
+            self._run, self.executor, format_json_text, text, filename=filename, lossless=lossless, **kwargs
+        )
+
+    async def _format_file(self, path, output_path, newline, lossless, kwargs):
+        input_text = await self._run(None, _read_text, path)
+        output_text = await self._run(
+            self.executor, format_json_text, input_text, filename=path, lossless=lossless, **kwargs
+        )
+        if output_path is not None:
+            # Files formatted in place are replaced atomically, as by the command line
+            atomic = _is_same_file(path, output_path)
+            await self._run(None, _write_text, output_path, output_text, newline, atomic)
+        return output_text
+
+    async def format_file(self, path, output_path=None, newline=None, lossless=False, **kwargs):
+        """
+        Read, parse, and format JSON text from a file.
+
+        :Args:
+            path
+                Path of the file to read
+
+            output_path
+                (optional) Path of a file to write the formatted text to
+                (which may be `path` itself, to format the file in place,
+                atomically, keeping its mode and ownership)
+
+            newline
+                (optional) The newline convention used in writing (see
+                `io.open()`:py:func:)
+
+            lossless
+                (optional) See `~json_indent.format_json_text()`:py:func:
+
+            kwargs
+                (optional) Keyword arguments, passed to
+                `~json_indent.format_json_text()`:py:func:
+
+        :Returns:
+            The formatted JSON text (with ``\\n`` newlines)
+
+        :Raises:
+            - `JsonParseError`:py:exc: if the file cannot be parsed
+            - `OSError`:py:exc: if the file cannot be read or written
+        """
+        return await self._limited(self._format_file, path, output_path, newline, lossless, kwargs)
+
+
+async def load_json_text_async(text, filename=None, executor=None, **kwargs):
+    """
+    Do `~json_indent.load_json_text()`:py:func: without blocking the event loop.
+
+    :Args:
+        executor
+            (optional) A `concurrent.futures.Executor`:py:class: to parse in
+            (default: the event loop's default executor)
+
+    See `AsyncJsonFormatter`:py:class: for bounded concurrency.
+    """
+    return await AsyncJsonFormatter(executor).load_text(text, filename, **kwargs)
+
+
+async def dump_json_text_async(data, executor=None, **kwargs):
+    """
+    Do `~json_indent.dump_json_text()`:py:func: without blocking the event loop.
+
+    :Args:
+        executor
+            (optional) A `concurrent.futures.Executor`:py:class: to format in
+            (default: the event loop's default executor)
+    """
+    return await AsyncJsonFormatter(executor).dump_text(data, **kwargs)
+
+
+async def format_text_async(text, filename=None, lossless=False, executor=None, **kwargs):
+    """
+    Do `~json_indent.format_json_text()`:py:func: without blocking the event loop.
+
+    :Args:
+        executor
+            (optional) A `concurrent.futures.Executor`:py:class: to format in
+            (default: the event loop's default executor)
+    """
+    return await AsyncJsonFormatter(executor).format_text(text, filename=filename, lossless=lossless, **kwargs)
+
+
+async def format_file_async(path, output_path=None, newline=None, lossless=False, executor=None, **kwargs):
+    """
+    Read, parse, and format JSON text from a file without blocking the event loop.
+
+    See `AsyncJsonFormatter.format_file()`:py:meth: for the arguments.
+
+    :Args:
+        executor
+            (optional) A `concurrent.futures.Executor`:py:class: to format in
+            (default: the event loop's default executor)
+    """
+    return await AsyncJsonFormatter(executor).format_file(
+        path, output_path=output_path, newline=newline, lossless=lossless, **kwargs
+    )
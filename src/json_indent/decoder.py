@@ -0,0 +1,129 @@
+"""
+Provide a non-recursive JSON decoder.
+"""
+
+from __future__ import absolute_import
+
+import json
+from json.decoder import scanstring
+
+from json_indent.parser import TokenParser
+from json_indent.tokens import (
+    KIND_BEGIN_OBJECT,
+    KIND_LITERAL,
+    KIND_NUMBER,
+    KIND_STRING,
+    iter_tokens,
+)
+
+# Keyword arguments of `json.loads()`:py:func: which `decode_json()`:py:func: supports
+DECODE_JSON_KWARGS = frozenset(["object_hook", "object_pairs_hook", "parse_float", "parse_int", "parse_constant"])
+
+_LITERAL_VALUES = {"true": True, "false": False, "null": None}
+
+_CONSTANT_VALUES = {"NaN": float("nan"), "Infinity": float("inf"), "-Infinity": float("-inf")}
+
+
+class _Decoder(TokenParser):
+    """
+    Provide the machinery behind `decode_json()`:py:func:.
+
+    Each entry in `stack`:py:attr: is a list::
+
+        [kind, item_count, items, key]
+
+    where `items` is a list of values (for an array) or of key/value pairs
+    (for an object), and `key` is the key of the member being parsed.
+    """
+
+    def __init__(self, object_hook=None, object_pairs_hook=None, parse_float=None, parse_int=None, parse_constant=None):
+        super(_Decoder, self).__init__()
+        self.object_hook = object_hook
+        self.object_pairs_hook = object_pairs_hook
+        self.parse_float = float if parse_float is None else parse_float
+        self.parse_int = int if parse_int is None else parse_int
+        self.parse_constant = _CONSTANT_VALUES.__getitem__ if parse_constant is None else parse_constant
+        self.flat_kwargs = {
+            "object_hook": object_hook,
+            "object_pairs_hook": object_pairs_hook,
+            "parse_float": parse_float,
+            "parse_int": parse_int,
+            "parse_constant": parse_constant,
+        }
+        self.result = None
+
+    def _add(self, value):
+        stack = self.stack
+        if not stack:
+            self.result = value
+            return
+        frame = stack[-1]
+        if frame[0] == KIND_BEGIN_OBJECT:
+            frame[2].append((frame[3], value))
+        else:
+            frame[2].append(value)
+
+    def begin_container(self, frame, token):
+        frame.extend(([], None))
+
+    def end_container(self, frame, token):
+        (kind, _item_count, items, _key) = frame
+        if kind != KIND_BEGIN_OBJECT:
+            self._add(items)
+        elif self.object_pairs_hook is not None:
+            self._add(self.object_pairs_hook(items))
+        elif self.object_hook is not None:
+            self._add(self.object_hook(dict(items)))
+        else:
+            self._add(dict(items))
+
+    def key(self, frame, token):
+        frame[3] = scanstring(token, 1)[0]
+
+    def value(self, kind, token):
+        if kind == KIND_STRING:
+            value = scanstring(token, 1)[0]
+        elif kind == KIND_NUMBER:
+            if "." in token or "e" in token or "E" in token:
+                value = self.parse_float(token)
+            else:
+                value = self.parse_int(token)
+        elif kind == KIND_LITERAL:
+            value = _LITERAL_VALUES[token] if token in _LITERAL_VALUES else self.parse_constant(token)
+        else:
+            # A flat array or object holds no containers, so the (recursive)
+            # standard decoder can take it from here
+            value = json.loads(token, **self.flat_kwargs)
+        self._add(value)
+
+
+def decode_json(text, **kwargs):
+    """
+    Parse and deserialize JSON text without recursion.
+
+    The result is the same as from `json.loads()`:py:func:, but nesting depth
+    is limited only by available memory.
+
+    :Args:
+        text
+            Raw JSON text
+
+        kwargs
+            (optional) Keyword arguments with the same meanings as for
+            `json.loads()`:py:func:; only those in ``DECODE_JSON_KWARGS``
+            are supported
+
+    :Returns:
+        The JSON data parsed from `text`
+
+    :Raises:
+        - `json.JSONDecodeError`:py:exc: if `text` cannot be parsed
+        - `TypeError`:py:exc: if an unsupported keyword argument is given
+    """
+    unsupported = sorted(set(kwargs) - DECODE_JSON_KWARGS)
+    if unsupported:
+        raise TypeError("unsupported keyword argument(s) for decode_json(): {}".format(", ".join(unsupported)))
+    decoder = _Decoder(**kwargs)
+    decoder.feed(iter_tokens(text, coalesce=True))
+    decoder.finish()
+    return decoder.result
@@ -0,0 +1,107 @@
+"""
+Provide emitting several variants of each formatted file from one parse.
+
+An asset pipeline may want, say, a pretty copy of each file for people to read
+and a compact copy (under a name carrying a hash of its contents) to serve.
+Rather than formatting each file once per variant, each file is decoded once
+and every variant is encoded from the same data.
+"""
+
+from __future__ import absolute_import
+
+import collections
+import hashlib
+import os
+
+VARIANT_PRETTY = "pretty"
+VARIANT_COMPACT = "compact"
+VARIANTS = [VARIANT_PRETTY, VARIANT_COMPACT]
+
+# Number of hex digits of a variant's SHA-256 digest that ``{hash}`` stands for
+HASH_DIGITS = 16
+
+# What each placeholder in a path template stands for
+PLACEHOLDERS = {
+    "dir": "the input file's directory",
+    "name": "the input file's name",
+    "stem": "the input file's name without its extension",
+    "hash": "the first {} hex digits of the SHA-256 digest of the variant's contents".format(HASH_DIGITS),
+}
+
+# What the placeholders stand for when reading from stdin
+STDIN_NAME = "stdin"
+
+EmitSpec = collections.namedtuple("EmitSpec", ["variant", "template"])
+
+
+def parse_emit_spec(text):
+    """
+    Parse an emit specification.
+
+    :Args:
+        text
+            A string of the form ``VARIANT:TEMPLATE``, where ``VARIANT`` is
+            one of ``VARIANTS`` and ``TEMPLATE`` is the path to write the
+            variant to, with placeholders (see `emit_path()`:py:func:)
+
+    :Returns:
+        An `EmitSpec`:py:class: tuple
+
+    :Raises:
+        `ValueError`:py:exc: if `text` is not a valid specification
+    """
+    (variant, colon, template) = text.partition(":")
+    if not (colon and template):
+        raise ValueError(
+            "{}: emit must be given as VARIANT:PATH (e.g., 'compact:{{dir}}/{{stem}}.min.json')".format(text)
+        )
+    if variant not in VARIANTS:
+        raise ValueError("{}: variant must be one of: {}".format(text, ", ".join(VARIANTS)))
+    try:
+        template.format(**{key: "" for key in PLACEHOLDERS})
+    except (AttributeError, IndexError, KeyError, ValueError):
+        raise ValueError(
+            "{}: path placeholders must be among: {}".format(text, ", ".join("{" + key + "}" for key in PLACEHOLDERS))
+        )
+    return EmitSpec(variant, template)
+
+
+def variant_dump_kwargs(variant, indent, sort_keys=False):
+    """
+    Return the keyword arguments for `json.dumps()`:py:func: which make a variant.
+
+    :Args:
+        indent
+            The indent for the pretty variant
+    """
+    if variant == VARIANT_COMPACT:
+        return {"indent": None, "separators": (",", ":"), "sort_keys": sort_keys}
+    return {"indent": indent, "separators": (",", ": "), "sort_keys": sort_keys}
+
+
+def emit_path(template, input_filename, contents):
+    """
+    Return the path a variant is written to.
+
+    :Args:
+        template
+            The path, with any of the placeholders in ``PLACEHOLDERS`` (e.g.,
+            ``{dir}/{stem}.{hash}.json``)
+
+        input_filename
+            The input file's path, or ``-`` for stdin (which is taken to be
+            a file named ``stdin`` in the current directory)
+
+        contents
+            The variant's contents, as written (in bytes)
+    """
+    if input_filename == "-":
+        (directory, name) = (os.curdir, STDIN_NAME)
+    else:
+        (directory, name) = os.path.split(input_filename)
+    return template.format(
+        dir=directory or os.curdir,
+        name=name,
+        stem=os.path.splitext(name)[0],
+        hash=hashlib.sha256(contents).hexdigest()[:HASH_DIGITS],
+    )
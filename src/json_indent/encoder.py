@@ -0,0 +1,394 @@
+"""
+Provide a non-recursive JSON encoder.
+"""
+
+from __future__ import absolute_import
+
+import math
+from json.encoder import encode_basestring, encode_basestring_ascii
+
+from json_indent.formatter import Layout
+
+# Keyword arguments of `json.dumps()`:py:func: which `encode_json()`:py:func: supports
+ENCODE_JSON_KWARGS = frozenset(
+    ["skipkeys", "ensure_ascii", "check_circular", "allow_nan", "indent", "separators", "default", "sort_keys"]
+)
+
+# Characters of text after which `iter_encode_json()`:py:func: yields a piece
+DEFAULT_PIECE_SIZE = 64 * 1024
+
+# Flat arrays at least this long are checked for holding only ints (or only
+# floats), whose texts are then made in bulk rather than one at a time
+BULK_MIN_SIZE = 8
+
+_INFINITY = float("inf")
+
+_CONTAINER_TYPES = frozenset([list, tuple, dict])
+
+_CONSTANT_KEYS = {True: "true", False: "false", None: "null"}
+
+_int_repr = int.__repr__
+_float_repr = float.__repr__
+
+
+def _default(o):
+    raise TypeError("Object of type {} is not JSON serializable".format(o.__class__.__name__))
+
+
+def _float_text(o, allow_nan):
+    if math.isnan(o):
+        text = "NaN"
+    elif o == _INFINITY:
+        text = "Infinity"
+    elif o == -_INFINITY:
+        text = "-Infinity"
+    else:
+        return _float_repr(o)
+    if not allow_nan:
+        raise ValueError("Out of range float values are not JSON compliant: " + repr(o))
+    return text
+
+
+def _bool_text(o):
+    return "true" if o else "false"
+
+
+def _null_text(_o):
+    return "null"
+
+
+def _key_text(key, allow_nan, skipkeys):
+    """Return `key` converted to a string, or `None` if it is to be skipped."""
+    if isinstance(key, str):
+        return key
+    if isinstance(key, float):
+        return _float_text(key, allow_nan)
+    if key is True or key is False or key is None:
+        return _CONSTANT_KEYS[key]
+    if isinstance(key, int):
+        return _int_repr(key)
+    if skipkeys:
+        return None
+    raise TypeError("keys must be str, int, float, bool or None, not {}".format(key.__class__.__name__))
+
+
+def _bulk_number_texts(o):
+    """
+    Return the texts of the items of an array holding only ints, or only finite floats.
+
+    The texts are made by mapping the types' own ``__repr__()`` over the
+    array, without a call from Python for each item.
+
+    :Returns:
+        A list of texts, or `None` if the array is short or holds anything
+        else
+    """
+    if len(o) < BULK_MIN_SIZE:
+        return None
+    cls = o[0].__class__
+    if cls is not int and cls is not float:
+        return None
+    types = set(map(type, o))
+    if types == {int}:
+        return list(map(_int_repr, o))
+    if types == {float} and all(map(math.isfinite, o)):
+        return list(map(_float_repr, o))
+    return None
+
+
+class _Encoder(object):
+    """
+    Provide the machinery behind `encode_json()`:py:func:.
+
+    Each entry in `stack`:py:attr: is a list::
+
+        [iterator, is_object, started, marker_ids]
+
+    where `iterator` yields the items (or key/value pairs) still to be written
+    and `marker_ids` are removed from `markers`:py:attr: when the container is
+    finished.
+    """
+
+    def __init__(
+        self,
+        skipkeys=False,
+        ensure_ascii=True,
+        check_circular=True,
+        allow_nan=True,
+        indent=None,
+        separators=None,
+        default=None,
+        sort_keys=False,
+    ):
+        self.skipkeys = skipkeys
+        self.encode_string = encode_basestring_ascii if ensure_ascii else encode_basestring
+        self.markers = {} if check_circular else None
+        self.allow_nan = allow_nan
+        self.layout = Layout(indent=indent, separators=separators)
+        self.default = _default if default is None else default
+        self.sort_keys = sort_keys
+        self.chunks = []
+        self.stack = []
+        # Scalars of these exact types take the fast path
+        self.scalar_writers = {
+            str: self.encode_string,
+            int: _int_repr,
+            float: self._float_text,
+            bool: _bool_text,
+            type(None): _null_text,
+        }
+
+    def _float_text(self, o):
+        return _float_text(o, self.allow_nan)
+
+    def _mark(self, o, marker_ids):
+        markers = self.markers
+        if markers is not None:
+            marker_id = id(o)
+            if marker_id in markers:
+                raise ValueError("Circular reference detected")
+            markers[marker_id] = o
+            marker_ids.append(marker_id)
+
+    def _unmark(self, marker_ids):
+        for marker_id in marker_ids:
+            del self.markers[marker_id]
+
+    def _write_value(self, o):
+        """
+        Write a value the slow way.
+
+        :Returns:
+            `True` if a container was started (and pushed onto the stack),
+            else `False`
+        """
+        chunks = self.chunks
+        marker_ids = []
+        while True:
+            if isinstance(o, str):
+                chunks.append(self.encode_string(o))
+            elif o is None:
+                chunks.append("null")
+            elif o is True or o is False:
+                chunks.append(_bool_text(o))
+            elif isinstance(o, int):
+                chunks.append(_int_repr(o))
+            elif isinstance(o, float):
+                chunks.append(self._float_text(o))
+            elif isinstance(o, (list, tuple, dict)):
+                if not o:
+                    chunks.append("{}" if isinstance(o, dict) else "[]")
+                elif self._begin(o, marker_ids):
+                    return True
+            else:
+                self._mark(o, marker_ids)
+                o = self.default(o)
+                continue
+            break
+        if marker_ids:
+            self._unmark(marker_ids)
+        return False
+
+    def _write_flat_array(self, o):
+        """
+        Write an array holding only scalars of exact built-in types.
+
+        :Returns:
+            `True` if the array was written, or `False` if it holds anything
+            else
+        """
+        texts = _bulk_number_texts(o)
+        if texts is None:
+            get_writer = self.scalar_writers.get
+            try:
+                texts = [get_writer(item.__class__)(item) for item in o]
+            except TypeError:
+                # No writer for some item
+                return False
+        depth = len(self.stack)
+        layout = self.layout
+        self.chunks.append(
+            "["
+            + layout.newline_indent(depth + 1)
+            + layout.item_break(depth + 1).join(texts)
+            + layout.newline_indent(depth)
+            + "]"
+        )
+        return True
+
+    def _begin(self, o, marker_ids):
+        """
+        Start writing a non-empty container.
+
+        :Returns:
+            `True` if the container was started, or `False` if it was
+            written all at once
+        """
+        if isinstance(o, dict):
+            is_object = True
+            items = sorted(o.items()) if self.sort_keys else o.items()
+            self.chunks.append("{")
+        elif self._write_flat_array(o):
+            return False
+        else:
+            is_object = False
+            items = o
+            self.chunks.append("[")
+        self._mark(o, marker_ids)
+        self.stack.append([iter(items), is_object, False, marker_ids])
+        self.chunks.append(self.layout.newline_indent(len(self.stack)))
+        return True
+
+    def _end(self):
+        """Finish writing the innermost container."""
+        (_iterator, is_object, _started, marker_ids) = self.stack.pop()
+        self.chunks.append(self.layout.newline_indent(len(self.stack)))
+        self.chunks.append("}" if is_object else "]")
+        self._unmark(marker_ids)
+
+    def _write_items(self, frame):
+        """
+        Write items from `frame` until one of them is a non-empty container.
+
+        :Returns:
+            `True` if a container was started, or `False` if `frame` has no
+            more items
+        """
+        (iterator, is_object, started, _marker_ids) = frame
+        frame[2] = True
+        chunks = self.chunks
+        append = chunks.append
+        item_break = self.layout.item_break(len(self.stack))
+        get_writer = self.scalar_writers.get
+        write_value = self._write_value
+        begin = self._begin
+        if not is_object:
+            for item in iterator:
+                if started:
+                    append(item_break)
+                started = True
+                cls = item.__class__
+                writer = get_writer(cls)
+                if writer is not None:
+                    append(writer(item))
+                elif cls in _CONTAINER_TYPES and item:
+                    if begin(item, []):
+                        return True
+                elif write_value(item):
+                    return True
+            return False
+        encode_string = self.encode_string
+        key_separator = self.layout.key_separator
+        for original_key, value in iterator:
+            key = original_key
+            if key.__class__ is not str:
+                key = _key_text(original_key, self.allow_nan, self.skipkeys)
+                if key is None:
+                    continue
+            if started:
+                append(item_break)
+            started = True
+            append(encode_string(key) + key_separator)
+            cls = value.__class__
+            writer = get_writer(cls)
+            if writer is not None:
+                append(writer(value))
+            elif cls in _CONTAINER_TYPES and value:
+                if begin(value, []):
+                    return True
+            elif write_value(value):
+                return True
+        return False
+
+    def encode(self, o):
+        stack = self.stack
+        if not self._write_value(o):
+            return self.chunks
+        while stack:
+            if not self._write_items(stack[-1]):
+                self._end()
+        return self.chunks
+
+    def iterencode(self, o, piece_size):
+        """Like `encode()`:py:meth:, but yield the text in pieces as soon as each has `piece_size` characters."""
+        (stack, chunks) = (self.stack, self.chunks)
+        (size, counted) = (0, 0)
+        if self._write_value(o):
+            while stack:
+                if not self._write_items(stack[-1]):
+                    self._end()
+                size += sum(map(len, chunks[counted:]))
+                counted = len(chunks)
+                if size >= piece_size:
+                    yield "".join(chunks)
+                    del chunks[:]
+                    (size, counted) = (0, 0)
+        if chunks:
+            yield "".join(chunks)
+            del chunks[:]
+
+
+def _check_kwargs(kwargs):
+    unsupported = sorted(set(kwargs) - ENCODE_JSON_KWARGS)
+    if unsupported:
+        raise TypeError("unsupported keyword argument(s) for encode_json(): {}".format(", ".join(unsupported)))
+
+
+def encode_json(data, **kwargs):
+    """
+    Serialize data as JSON text without recursion.
+
+    The result is the same as from `json.dumps()`:py:func:, but nesting depth
+    is limited only by available memory.
+
+    :Args:
+        data
+            Data to serialize
+
+        kwargs
+            (optional) Keyword arguments with the same meanings as for
+            `json.dumps()`:py:func:; only those in ``ENCODE_JSON_KWARGS``
+            are supported
+
+    :Returns:
+        The serialized JSON text (without a trailing newline)
+
+    :Raises:
+        - `TypeError`:py:exc: if an unsupported keyword argument is given, or
+          if `data` holds something that cannot be serialized
+        - `ValueError`:py:exc: if `data` holds a circular reference or (when
+          not allowed) an out-of-range float
+    """
+    _check_kwargs(kwargs)
+    return "".join(_Encoder(**kwargs).encode(data))
+
+
+def iter_encode_json(data, piece_size=DEFAULT_PIECE_SIZE, **kwargs):
+    """
+    Serialize data as JSON text without recursion, a piece at a time.
+
+    Only one piece of the text is held at a time, so the whole text need
+    never be, as when writing it to a file or socket.
+
+    :Args:
+        data
+            Data to serialize
+
+        piece_size
+            (optional) The number of characters after which a piece is
+            yielded; pieces may be longer, as they end only where an object or
+            array starts or ends (or shorter, at the end of the text)
+
+        kwargs
+            (optional) See `encode_json()`:py:func:
+
+    :Returns:
+        An iterator of the pieces of the serialized JSON text (without a
+        trailing newline), which joined together are what
+        `encode_json()`:py:func: returns
+
+    :Raises:
+        See `encode_json()`:py:func:
+    """
+    _check_kwargs(kwargs)
+    return _Encoder(**kwargs).iterencode(data, piece_size)
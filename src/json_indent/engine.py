@@ -0,0 +1,121 @@
+"""
+Provide choosing how to format each file, given how much memory it may use.
+
+The ``memory`` engine decodes a whole file into Python objects and encodes
+them again, which is fastest, but needs many times the size of the file in
+memory.  The ``bounded`` engine (see `json_indent.extsort`:py:mod:) streams
+the file through, holding only so much of it in memory, at the cost of
+speed.  The ``auto`` engine picks ``memory`` for files whose estimated needs
+fit the memory budget, and ``bounded`` for the rest; of the budget, the
+``bounded`` engine holds objects in all but what it needs to read, tokenize,
+and write the file (see `bounded_memory_limit()`:py:func:).
+"""
+
+from __future__ import absolute_import
+
+import io
+import os
+
+from json_indent.extsort import DEFAULT_MEMORY_LIMIT
+
+ENGINE_AUTO = "auto"
+ENGINE_MEMORY = "memory"
+ENGINE_BOUNDED = "bounded"
+ENGINES = [ENGINE_AUTO, ENGINE_MEMORY, ENGINE_BOUNDED]
+
+# Bytes of memory needed per byte of a file formatted by the ``memory`` engine
+# (measured peaks run from about 20 to 30, most for many small objects)
+MEMORY_ENGINE_OVERHEAD = 32
+
+# By default, all jobs together may use this fraction of physical memory
+DEFAULT_MEMORY_FRACTION = 0.5
+
+# Memory (in bytes) the ``bounded`` engine uses besides the objects it holds
+# and its I/O: the token being read, and the buffers of the temporary files
+# being merged
+BOUNDED_ENGINE_RESERVE = 1024 * 1024
+
+
+def physical_memory():
+    """Return the size of physical memory, in bytes, or `None` if it is unknown."""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def default_memory_budget(jobs=1):
+    """
+    Return how much memory formatting each file may use by default.
+
+    :Args:
+        jobs
+            (optional) The number of files formatted at once, which share
+            the memory
+
+    :Returns:
+        A share of physical memory, in bytes (or, if that is unknown,
+        ``DEFAULT_MEMORY_LIMIT``)
+    """
+    memory = physical_memory()
+    if memory is None:
+        return DEFAULT_MEMORY_LIMIT
+    return max(1, int(memory * DEFAULT_MEMORY_FRACTION) // max(1, jobs))
+
+
+def bounded_memory_limit(memory_budget, io_profile=None):
+    """
+    Return the memory limit for holding objects in the ``bounded`` engine.
+
+    :Args:
+        memory_budget
+            How much memory, in bytes, formatting a file may use in all
+
+        io_profile
+            (optional) The `~json_indent.iofile.IOProfile`:py:class: the file
+            is read and written with, whose chunks and buffers take memory too
+
+    :Returns:
+        A limit for `~json_indent.extsort.format_sorted()`:py:func:, in
+        bytes; at least half of `memory_budget` (and at least 1)
+    """
+    reserve = BOUNDED_ENGINE_RESERVE
+    if io_profile is not None:
+        buffer_size = io.DEFAULT_BUFFER_SIZE if io_profile.buffer_size < 0 else io_profile.buffer_size
+        # The chunk being read (as bytes, then as text, then joined to what
+        # is left of the last one), and the input and output buffers
+        reserve += 3 * io_profile.chunk_size + 2 * buffer_size
+    return max(1, memory_budget // 2, memory_budget - reserve)
+
+
+def estimate_memory(size):
+    """Estimate how much memory the ``memory`` engine needs for a file of `size` bytes."""
+    return size * MEMORY_ENGINE_OVERHEAD
+
+
+def choose_engine(size, memory_budget, engine=ENGINE_AUTO):
+    """
+    Choose how to format a file.
+
+    :Args:
+        size
+            The size of the file in bytes, or `None` if it is unknown (as
+            for standard input)
+
+        memory_budget
+            How much memory, in bytes, formatting the file may use, or
+            `None` for no limit
+
+        engine
+            (optional) One of ``ENGINES``; ``auto`` means ``memory`` if the
+            file's estimated needs fit `memory_budget` (or its size is
+            unknown), else ``bounded``
+
+    :Returns:
+        Either ``memory`` or ``bounded``
+    """
+    if engine != ENGINE_AUTO:
+        return engine
+    if size is None or memory_budget is None or estimate_memory(size) <= memory_budget:
+        return ENGINE_MEMORY
+    return ENGINE_BOUNDED
@@ -0,0 +1,131 @@
+"""
+Provide observing what json-indent does, as structured events.
+
+A program embedding json-indent (say, a service exporting its own metrics)
+registers an observer, which is any function taking one `Event`:py:class:.
+Each event is passed to every registered observer, in the thread (and
+process) where it happens; with the ``processes`` backend (see
+`json_indent.parallel`:py:mod:), observers registered in the parent do not
+see the events of documents formatted in other processes.
+
+Events come from parsing and serializing (`~json_indent.load_json_text()`,
+`~json_indent.dump_json_text()`, and everything built on them, including
+`~json_indent.cli()`:py:func:) and, from `~json_indent.cli()`:py:func:, for
+each file formatted.  When no observer is registered, each costs one test of
+whether any is.
+
+An observer which raises stops what it was observing; it should do as little
+as it can (e.g., update counters) and return.
+"""
+
+from __future__ import absolute_import
+
+import collections
+import contextlib
+
+# A JSON document was parsed; data: ``size`` (of the text, in characters, or
+# bytes if given bytes) and ``seconds``
+EVENT_LOAD = "load"
+
+# Data was serialized to JSON text; data: ``size`` (of the text, in
+# characters) and ``seconds``
+EVENT_DUMP = "dump"
+
+# A JSON document was reformatted losslessly, without being decoded; data:
+# ``size`` (of the input text), ``output_size``, and ``seconds``
+EVENT_REFORMAT = "reformat"
+
+# A JSON document could not be parsed; data: ``message``
+EVENT_SYNTAX_ERROR = "syntax-error"
+
+# A file is about to be formatted; data: ``size`` (in bytes, or `None` if
+# not known) and ``engine``
+EVENT_FILE_START = "file-start"
+
+# A file has been formatted; data: ``status`` (see
+# `~json_indent.cli()`:py:func:) and ``seconds``
+EVENT_FILE_END = "file-end"
+
+# A formatted file turned out to differ from (or to be the same as) its input
+EVENT_CHANGED = "changed"
+EVENT_UNCHANGED = "unchanged"
+
+EVENTS = [
+    EVENT_LOAD,
+    EVENT_DUMP,
+    EVENT_REFORMAT,
+    EVENT_SYNTAX_ERROR,
+    EVENT_FILE_START,
+    EVENT_FILE_END,
+    EVENT_CHANGED,
+    EVENT_UNCHANGED,
+]
+
+Event = collections.namedtuple("Event", ["kind", "filename", "data"])
+Event.__doc__ = """
+Something json-indent did.
+
+:Args:
+    kind
+        One of ``EVENTS``
+
+    filename
+        The file (or the filename given with the text) it was done to, or
+        `None`
+
+    data
+        A dictionary of what else there is to tell (see ``EVENTS``)
+"""
+
+
+class _Registry(object):
+    """
+    Hold the registered observers.
+
+    They are held in a tuple, which is replaced (never changed) when one is
+    added or removed, so that emitting needs no lock.
+    """
+
+    observers = ()
+
+
+_registry = _Registry()
+
+
+def add_observer(observer):
+    """Register a function to call with each `Event`:py:class:."""
+    _registry.observers = _registry.observers + (observer,)
+
+
+def remove_observer(observer):
+    """
+    Unregister an observer.
+
+    :Raises:
+        `ValueError`:py:exc: if `observer` is not registered
+    """
+    observers = list(_registry.observers)
+    observers.remove(observer)
+    _registry.observers = tuple(observers)
+
+
+@contextlib.contextmanager
+def observing(observer):
+    """Register an observer for the duration of a ``with`` block."""
+    add_observer(observer)
+    try:
+        yield observer
+    finally:
+        remove_observer(observer)
+
+
+def is_observed():
+    """Tell whether any observer is registered (and so whether events are worth gathering)."""
+    return bool(_registry.observers)
+
+
+def emit(kind, filename=None, **data):
+    """Pass an event to each registered observer."""
+    event = Event(kind, filename, data)
+    for observer in _registry.observers:
+        observer(event)
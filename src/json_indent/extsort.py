@@ -0,0 +1,595 @@
+"""
+Provide formatting of JSON text in bounded memory, with sorted keys or not.
+
+Sorting keys means holding the members of each object until the object is
+complete.  Here, members are held in memory only up to a limit; beyond that,
+they are sorted and written to temporary files ("runs"), which are merged
+when the object is complete.  Input is read and output written as it goes,
+so neither has to fit in memory either.
+
+The output is the same as from decoding the text with
+`~json_indent.load_json_text()`:py:func: and encoding it with
+`json.dumps()`:py:func:: values are decoded and re-encoded, and of members
+with equal keys, only the last one is kept, where the first one was.  So
+even when keys are not sorted, members are held and sorted by key the same
+way (to find equal keys); then, in a second pass (also in bounded memory),
+they are put back in the order of where their keys first appear.
+
+The memory limit covers the Python objects holding text, not only the text:
+an object of many small members takes several times its size in memory.
+"""
+
+from __future__ import absolute_import
+
+import heapq
+import math
+import struct
+import sys
+import tempfile
+from json.decoder import scanstring
+from json.encoder import encode_basestring, encode_basestring_ascii
+
+from json_indent.formatter import Layout
+from json_indent.parser import TokenParser
+from json_indent.tokens import KIND_BEGIN_OBJECT, KIND_LITERAL, KIND_NUMBER, KIND_STRING
+
+# Keyword arguments of `json.dumps()`:py:func: which `format_sorted()`:py:func: supports
+FORMAT_SORTED_KWARGS = frozenset(["indent", "separators", "sort_keys", "ensure_ascii", "allow_nan"])
+
+DEFAULT_MEMORY_LIMIT = 256 * 1024 * 1024
+
+# Most runs merged at once; beyond this, runs are first merged into bigger runs
+MAX_MERGE_RUNS = 64
+
+# A member being written is moved to a temporary file once it holds more than
+# this fraction of the memory limit
+MEMBER_SPILL_FRACTION = 16
+
+# Memory (in bytes) taken by each piece of text held, beyond its characters:
+# an empty string, and a place in a list
+TEXT_OVERHEAD = sys.getsizeof("") + 8
+
+# Memory (in bytes) taken by each member held, beyond the text of its key and
+# value: the member, its list of pieces, and its entry in its object (as
+# measured on 64-bit CPython, with some room to spare)
+MEMBER_OVERHEAD = 256
+
+# Header of each member in a run: key length, sequence number, text length
+RUN_RECORD_HEADER = struct.Struct(">QQQ")
+
+COPY_CHUNK_SIZE = 64 * 1024
+
+SIZE_SUFFIXES = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+
+# Strings are encoded with "surrogatepass", as JSON strings may hold lone surrogates
+_ENCODING = "utf-8"
+_ERRORS = "surrogatepass"
+
+_CONSTANT_TEXTS = {"true": "true", "false": "false", "null": "null"}
+
+_NAN_TEXTS = {"NaN": "NaN", "Infinity": "Infinity", "-Infinity": "-Infinity"}
+
+
+def parse_size(text):
+    """
+    Parse a size, such as a memory limit.
+
+    :Args:
+        text
+            A whole number, optionally followed by ``K``, ``M``, or ``G``
+            (for multiples of 1024, 1024², or 1024³)
+
+    :Returns:
+        The size as an integer
+
+    :Raises:
+        `ValueError`:py:exc: if `text` is not a valid size
+    """
+    (number, suffix) = (text[:-1], text[-1:].upper()) if text[-1:].isalpha() else (text, "")
+    if suffix not in SIZE_SUFFIXES or not number.isdigit() or int(number) < 1:
+        raise ValueError("{}: size must be a positive whole number, optionally followed by K, M, or G".format(text))
+    return int(number) * SIZE_SUFFIXES[suffix]
+
+
+def _encode(text):
+    return text.encode(_ENCODING, _ERRORS)
+
+
+def _decode(data):
+    return data.decode(_ENCODING, _ERRORS)
+
+
+class _Member(object):
+    """
+    Provide the text of one object member, held in memory or (once large) in a file.
+
+    `size`:py:attr: is the memory taken by the text in memory (see
+    ``TEXT_OVERHEAD``).
+
+    :Args:
+        owner
+            The `_SortingFormatter`:py:class: which accounts for memory
+    """
+
+    __slots__ = ("owner", "parts", "size", "file")
+
+    def __init__(self, owner):
+        self.owner = owner
+        self.parts = []
+        self.size = 0
+        self.file = None
+
+    def write(self, text):
+        if self.file is not None:
+            self.file.write(_encode(text))
+            return
+        self.parts.append(text)
+        size = len(text) + TEXT_OVERHEAD
+        self.size += size
+        self.owner.account(size)
+        if self.size > self.owner.member_spill_size:
+            self.spill()
+
+    def finish(self):
+        """Join the text held in memory into one piece, once the member is complete."""
+        if self.file is not None or len(self.parts) <= 1:
+            return
+        text = "".join(self.parts)
+        size = len(text) + TEXT_OVERHEAD
+        self.owner.account(size - self.size)
+        (self.parts, self.size) = ([text], size)
+
+    def spill(self):
+        """Move the text to a temporary file."""
+        if self.file is not None:
+            return
+        self.file = tempfile.TemporaryFile(dir=self.owner.temp_dir)
+        self.file.write(_encode("".join(self.parts)))
+        self.owner.account(-self.size)
+        self.parts = []
+        self.size = 0
+
+    def text(self):
+        """Return the text, if held in memory, else `None`."""
+        return None if self.file is not None else "".join(self.parts)
+
+    def copy_to(self, write):
+        """Write the text (which may be in a file) using `write`."""
+        if self.file is None:
+            write("".join(self.parts))
+            return
+        self.file.seek(0)
+        while True:
+            data = self.file.read(COPY_CHUNK_SIZE)
+            if not data:
+                break
+            write(_decode(data))
+        self.file.close()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+    def byte_size(self):
+        """Return the size of the text once encoded (moving to the end of any file)."""
+        if self.file is None:
+            return len(_encode("".join(self.parts)))
+        return self.file.seek(0, 2)
+
+
+class _Run(object):
+    """Provide a sorted run of members in a temporary file."""
+
+    def __init__(self, temp_dir):
+        self.file = tempfile.TemporaryFile(dir=temp_dir)
+
+    def append(self, key, seq, text=None, member=None, source=None):
+        """Write a member, from text, a `_Member`:py:class:, or another run's current member."""
+        key_data = _encode(key)
+        if text is not None:
+            text_data = _encode(text)
+            self.file.write(RUN_RECORD_HEADER.pack(len(key_data), seq, len(text_data)) + key_data + text_data)
+        elif member is not None:
+            size = member.byte_size()
+            self.file.write(RUN_RECORD_HEADER.pack(len(key_data), seq, size) + key_data)
+            member.copy_to(lambda text: self.file.write(_encode(text)))
+        else:
+            self.file.write(RUN_RECORD_HEADER.pack(len(key_data), seq, source.text_size) + key_data)
+            source.copy_text(self.file.write, raw=True)
+
+
+class _RunReader(object):
+    """Read members back from a run, one at a time; the text is read only when asked for."""
+
+    def __init__(self, run):
+        self.file = run.file
+        self.file.seek(0)
+        self.text_size = 0
+
+    def next(self):
+        """Read the key and sequence number of the next member; return them, or `None` at the end."""
+        header = self.file.read(RUN_RECORD_HEADER.size)
+        if not header:
+            self.file.close()
+            return None
+        (key_size, seq, self.text_size) = RUN_RECORD_HEADER.unpack(header)
+        return (_decode(self.file.read(key_size)), seq)
+
+    def copy_text(self, write, raw=False):
+        remaining = self.text_size
+        while remaining:
+            data = self.file.read(min(remaining, COPY_CHUNK_SIZE))
+            remaining -= len(data)
+            write(data if raw else _decode(data))
+
+    def skip_text(self):
+        self.file.seek(self.text_size, 1)
+
+
+class _MemoryReader(object):
+    """Read members from a sorted list in memory, like `_RunReader`:py:class:."""
+
+    def __init__(self, members):
+        self.members = iter(members)
+        self.member = None
+
+    def next(self):
+        item = next(self.members, None)
+        if item is None:
+            return None
+        (key, seq, self.member) = item
+        return (key, seq)
+
+    def copy_text(self, write, raw=False):
+        if raw:
+            self.member.copy_to(lambda text: write(_encode(text)))
+        else:
+            self.member.copy_to(write)
+
+    @property
+    def text_size(self):
+        return self.member.byte_size()
+
+    def skip_text(self):
+        self.member.close()
+
+
+def _merge(readers, emit):
+    """
+    Merge members from sorted readers, calling ``emit(key, seq, reader)`` for each.
+
+    Of members with equal keys, only the last one (by sequence number) is
+    emitted, as when decoding into a dictionary, but with the sequence number
+    of the first one (which is where its key first appeared).
+    """
+    heap = []
+    for index, reader in enumerate(readers):
+        item = reader.next()
+        if item is not None:
+            heap.append((item[0], item[1], index))
+    heapq.heapify(heap)
+    first_seq = None
+    while heap:
+        (key, seq, index) = heapq.heappop(heap)
+        reader = readers[index]
+        if first_seq is None:
+            first_seq = seq
+        if heap and heap[0][0] == key:
+            # A later member has the same key
+            reader.skip_text()
+        else:
+            emit(key, first_seq, reader)
+            first_seq = None
+        item = reader.next()
+        if item is not None:
+            heapq.heappush(heap, (item[0], item[1], index))
+
+
+class _ObjectSorter(object):
+    """
+    Provide the members of one object, in sorted order once it is complete.
+
+    :Args:
+        owner
+            The `_SortingFormatter`:py:class: which accounts for memory
+
+        sort_keys
+            Whether to write members in the order of their keys, rather than
+            of where their keys first appear
+    """
+
+    def __init__(self, owner, sort_keys):
+        self.owner = owner
+        self.sort_keys = sort_keys
+        self.members = []
+        self.size = 0
+        self.runs = []
+        self.count = 0
+
+    def add(self, key, member):
+        member.finish()
+        self.members.append((key, self.count, member))
+        self.count += 1
+        # The member's own text is already accounted for
+        size = len(key) + TEXT_OVERHEAD + MEMBER_OVERHEAD
+        self.size += member.size + size
+        self.owner.account(size)
+
+    def spill(self):
+        """Write the members held in memory to a new sorted run."""
+        if not self.members:
+            return
+        run = _Run(self.owner.temp_dir)
+        for key, seq, member in _sorted_members(self.members):
+            text = member.text()
+            if text is None:
+                run.append(key, seq, member=member)
+            else:
+                run.append(key, seq, text=text)
+        self.owner.account(-self.size)
+        self.members = []
+        self.size = 0
+        self.runs.append(run)
+        if len(self.runs) >= MAX_MERGE_RUNS:
+            merged = _Run(self.owner.temp_dir)
+            _merge(
+                [_RunReader(run) for run in self.runs],
+                lambda key, seq, reader: merged.append(key, seq, source=reader),
+            )
+            self.runs = [merged]
+
+    def close(self):
+        """Close any temporary files, when formatting stops early."""
+        for member in self.members:
+            member[2].close()
+        for run in self.runs:
+            run.file.close()
+
+    def write_sorted(self, write, item_break):
+        """Write the members, in order, with `item_break` between them."""
+        if not self.sort_keys and self.runs:
+            # Putting the members back in order takes a second pass, which
+            # needs the memory of those still held
+            self.spill()
+            self._write_by_position(write, item_break)
+            return
+        members = _sorted_members(self.members)
+        if not self.sort_keys:
+            # Each key's (last) member goes where the key first appeared
+            members.sort(key=_member_seq)
+        _write_merged([_RunReader(run) for run in self.runs] + [_MemoryReader(members)], write, item_break)
+        self.owner.account(-self.size)
+
+    def _write_by_position(self, write, item_break):
+        """Write members merged from sorted runs in the order of where their keys first appear."""
+        readers = [_RunReader(run) for run in self.runs]
+        owner = self.owner
+        positions = _ObjectSorter(owner, sort_keys=True)
+
+        def emit(_key, first_seq, reader):
+            member = _Member(owner)
+            reader.copy_text(member.write)
+            # Zero-padded, so that positions sort as text the way they do as numbers
+            positions.add("{:020d}".format(first_seq), member)
+            if owner.buffered > owner.memory_limit:
+                positions.spill()
+
+        try:
+            _merge(readers, emit)
+            positions.write_sorted(write, item_break)
+        finally:
+            positions.close()
+
+
+def _write_merged(readers, write, item_break):
+    """Write the members merged from sorted readers, with `item_break` between them."""
+    state = {"started": False}
+
+    def emit(_key, _seq, reader):
+        if state["started"]:
+            write(item_break)
+        state["started"] = True
+        reader.copy_text(write)
+
+    _merge(readers, emit)
+
+
+def _member_seq(member):
+    return member[1]
+
+
+def _sorted_members(members):
+    """
+    Sort members by key, keeping only the last of those with equal keys.
+
+    As with `_merge()`:py:func:, each member kept takes the sequence number
+    of the first with its key.
+    """
+    # By key, then sequence number (which is never the same), so the members
+    # themselves are never compared, and no sort keys need be made
+    members.sort()
+    kept = []
+    first_seq = None
+    for index, item in enumerate(members):
+        if first_seq is None:
+            first_seq = item[1]
+        if index + 1 < len(members) and members[index + 1][0] == item[0]:
+            item[2].close()
+            continue
+        # (Most keys are not repeated, and keep their entries)
+        kept.append(item if first_seq == item[1] else (item[0], first_seq, item[2]))
+        first_seq = None
+    return kept
+
+
+class _SortingFormatter(TokenParser):
+    """
+    Provide the machinery behind `format_sorted()`:py:func:.
+
+    Each entry in `stack`:py:attr: is a list::
+
+        [kind, item_count, parent_write, sorter, key, member]
+
+    where, for an object, `sorter` collects its members, and `key` and
+    `member` are those of the member being parsed.
+    """
+
+    def __init__(
+        self,
+        write,
+        memory_limit,
+        temp_dir,
+        indent=None,
+        separators=None,
+        sort_keys=True,
+        ensure_ascii=True,
+        allow_nan=True,
+    ):
+        super(_SortingFormatter, self).__init__()
+        self.root_write = write
+        self.write = write
+        self.memory_limit = memory_limit
+        self.member_spill_size = max(1, memory_limit // MEMBER_SPILL_FRACTION)
+        self.temp_dir = temp_dir
+        self.layout = Layout(indent=indent, separators=separators)
+        self.sort_keys = sort_keys
+        self.ensure_ascii = ensure_ascii
+        self.encode_string = encode_basestring_ascii if ensure_ascii else encode_basestring
+        self.allow_nan = allow_nan
+        self.buffered = 0
+
+    def account(self, size):
+        """Note a change in the amount of text held in memory, spilling if over the limit."""
+        self.buffered += size
+        if size > 0 and self.buffered > self.memory_limit:
+            self._spill()
+
+    def _spill(self):
+        objects = [frame for frame in self.stack if frame[0] == KIND_BEGIN_OBJECT]
+        for frame in objects:
+            frame[3].spill()
+        if self.buffered > self.memory_limit:
+            # What remains is in members still being parsed
+            for frame in objects:
+                if frame[5] is not None:
+                    frame[5].spill()
+
+    def close(self):
+        """Close any temporary files, when formatting stops early."""
+        for frame in self.stack:
+            if frame[0] == KIND_BEGIN_OBJECT:
+                frame[3].close()
+                if frame[5] is not None:
+                    frame[5].close()
+
+    def begin_item(self, frame):
+        if frame[0] != KIND_BEGIN_OBJECT:
+            depth = len(self.stack)
+            self.write(self.layout.item_break(depth) if frame[1] else self.layout.newline_indent(depth))
+
+    def begin_container(self, frame, token):
+        self.write(token)
+        if frame[0] == KIND_BEGIN_OBJECT:
+            frame.extend((self.write, _ObjectSorter(self, self.sort_keys), None, None))
+
+    def _end_member(self, frame):
+        if frame[5] is not None:
+            frame[3].add(frame[4], frame[5])
+            frame[5] = None
+
+    def key(self, frame, token):
+        self._end_member(frame)
+        key = scanstring(token, 1)[0]
+        member = _Member(self)
+        frame[4] = key
+        frame[5] = member
+        self.write = member.write
+        member.write(self.encode_string(key) + self.layout.key_separator)
+
+    def _string_text(self, token):
+        if "\\" not in token and (not self.ensure_ascii or token.isascii()):
+            return token
+        return self.encode_string(scanstring(token, 1)[0])
+
+    def _constant_text(self, text):
+        if not self.allow_nan:
+            raise ValueError("Out of range float values are not JSON compliant: " + text)
+        return text
+
+    def _number_text(self, token):
+        if "." not in token and "e" not in token and "E" not in token:
+            return int.__repr__(int(token))
+        value = float(token)
+        if math.isinf(value):
+            return self._constant_text("Infinity" if value > 0 else "-Infinity")
+        return float.__repr__(value)
+
+    def value(self, kind, token):
+        if kind == KIND_STRING:
+            self.write(self._string_text(token))
+        elif kind == KIND_NUMBER:
+            self.write(self._number_text(token))
+        elif kind == KIND_LITERAL:
+            self.write(_CONSTANT_TEXTS.get(token) or self._constant_text(_NAN_TEXTS[token]))
+        else:
+            raise ValueError("unexpected token kind: {!r}".format(kind))
+
+    def end_container(self, frame, token):
+        depth = len(self.stack)
+        if frame[0] != KIND_BEGIN_OBJECT:
+            if frame[1]:
+                self.write(self.layout.newline_indent(depth))
+            self.write(token)
+            return
+        self._end_member(frame)
+        self.write = frame[2]
+        sorter = frame[3]
+        if sorter.count:
+            self.write(self.layout.newline_indent(depth + 1))
+            sorter.write_sorted(self.write, self.layout.item_break(depth + 1))
+            self.write(self.layout.newline_indent(depth))
+        self.write(token)
+
+
+def format_sorted(tokens, write, memory_limit=DEFAULT_MEMORY_LIMIT, temp_dir=None, **kwargs):
+    """
+    Format a stream of JSON tokens, holding only so much in memory.
+
+    :Args:
+        tokens
+            An iterable of tokens, as from
+            `~json_indent.tokens.iter_tokens_from_chunks()`:py:func:
+
+        write
+            A function to call with each piece of formatted text (without a
+            trailing newline)
+
+        memory_limit
+            (optional) About how much memory (in bytes) to use for text held
+            in memory, before writing sorted runs to temporary files
+
+        temp_dir
+            (optional) Directory for temporary files (default: as for
+            `tempfile.TemporaryFile()`:py:func:)
+
+        kwargs
+            (optional) Keyword arguments with the same meanings as for
+            `json.dumps()`:py:func:; only those in ``FORMAT_SORTED_KWARGS``
+            are supported, and ``sort_keys`` defaults to `True`
+
+    :Raises:
+        - `json.JSONDecodeError`:py:exc: if the tokens do not make up exactly
+          one JSON value
+        - `TypeError`:py:exc: if an unsupported keyword argument is given
+        - `ValueError`:py:exc: if (when not allowed) the text holds an
+          out-of-range float
+    """
+    unsupported = sorted(set(kwargs) - FORMAT_SORTED_KWARGS)
+    if unsupported:
+        raise TypeError("unsupported keyword argument(s) for format_sorted(): {}".format(", ".join(unsupported)))
+    formatter = _SortingFormatter(write, memory_limit, temp_dir, **kwargs)
+    try:
+        formatter.feed(tokens)
+        formatter.finish()
+    finally:
+        formatter.close()
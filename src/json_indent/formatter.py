@@ -0,0 +1,193 @@
+"""
+Provide token-level formatting of JSON text.
+"""
+
+from __future__ import absolute_import
+
+from json.decoder import scanstring
+
+from json_indent.parser import TokenParser
+from json_indent.tokens import KIND_BEGIN_OBJECT, KIND_FLAT_ARRAY, KIND_FLAT_OBJECT, MEMBER_RE, SCALAR_RE
+from json_indent.util import is_string
+
+
+class Layout(object):
+    """
+    Provide the whitespace and separators used between JSON tokens.
+
+    These follow the same conventions as `json.dumps()`:py:func:.
+
+    :Args:
+        indent
+            (optional) Number of spaces or string for indenting, or `None`
+            for no newlines at all
+
+        separators
+            (optional) A tuple of ``(item_separator, key_separator)``
+    """
+
+    def __init__(self, indent=None, separators=None):
+        if indent is not None and not is_string(indent):
+            indent = " " * indent
+        if separators is None:
+            separators = (",", ": ") if indent is not None else (", ", ": ")
+        self.indent = indent
+        (self.item_separator, self.key_separator) = separators
+        self._newline_indents = []
+        self._item_breaks = []
+
+    def newline_indent(self, depth):
+        """Return the text that starts a line at the given nesting depth."""
+        if self.indent is None:
+            return ""
+        while len(self._newline_indents) <= depth:
+            self._newline_indents.append("\n" + self.indent * len(self._newline_indents))
+        return self._newline_indents[depth]
+
+    def item_break(self, depth):
+        """Return the text that separates items at the given nesting depth."""
+        while len(self._item_breaks) <= depth:
+            self._item_breaks.append(self.item_separator + self.newline_indent(len(self._item_breaks)))
+        return self._item_breaks[depth]
+
+
+def _decode_key(key_token):
+    return scanstring(key_token, 1)[0]
+
+
+def _split_flat_array(token):
+    """Return the text of each item in a flat array token."""
+    if '"' in token:
+        return SCALAR_RE.findall(token, 1, len(token) - 1)
+    # Numbers and literals contain neither whitespace nor commas.
+    inner = "".join(token[1:-1].split())
+    return inner.split(",") if inner else []
+
+
+def _member_key(member):
+    return member[0]
+
+
+class _Reformatter(TokenParser):
+    """
+    Provide the machinery behind `reformat_tokens()`:py:func:.
+
+    Output is collected in `result`:py:attr:.  When sorting keys, each member
+    of an object is collected separately, and the members are written to the
+    enclosing output once the object is complete.
+
+    Each entry in `stack`:py:attr: is a list::
+
+        [kind, item_count, parent_out, members]
+    """
+
+    def __init__(self, layout, sort_keys):
+        super(_Reformatter, self).__init__()
+        self.layout = layout
+        self.sort_keys = sort_keys
+        self.result = []
+        self.out = self.result
+
+    def begin_item(self, frame):
+        if frame[1]:
+            self.out.append(self.layout.item_break(len(self.stack)))
+        else:
+            self.out.append(self.layout.newline_indent(len(self.stack)))
+
+    def begin_container(self, frame, token):
+        self.out.append(token)
+        if self.sort_keys and frame[0] == KIND_BEGIN_OBJECT:
+            frame.extend((self.out, []))
+        else:
+            frame.extend((None, None))
+
+    def key(self, frame, token):
+        layout = self.layout
+        newline_indent = layout.newline_indent(len(self.stack))
+        if frame[3] is not None:
+            self.out = [newline_indent, token, layout.key_separator]
+            frame[3].append((_decode_key(token), self.out))
+        else:
+            if frame[1]:
+                self.out.append(layout.item_separator)
+            self.out.append(newline_indent)
+            self.out.append(token)
+            self.out.append(layout.key_separator)
+
+    def value(self, kind, token):
+        if kind == KIND_FLAT_ARRAY:
+            self._write_flat(_split_flat_array(token), "[", "]")
+        elif kind == KIND_FLAT_OBJECT:
+            members = MEMBER_RE.findall(token)
+            if self.sort_keys:
+                members.sort(key=_member_key_decoded)
+            self._write_flat(list(map(self.layout.key_separator.join, members)), "{", "}")
+        else:
+            self.out.append(token)
+
+    def _write_flat(self, items, begin, end):
+        out = self.out
+        if not items:
+            out.append(begin + end)
+            return
+        depth = len(self.stack)
+        layout = self.layout
+        out.append(
+            begin
+            + layout.newline_indent(depth + 1)
+            + layout.item_break(depth + 1).join(items)
+            + layout.newline_indent(depth)
+            + end
+        )
+
+    def end_container(self, frame, token):
+        (_kind, item_count, parent_out, members) = frame
+        if members is not None:
+            self.out = parent_out
+            members.sort(key=_member_key)
+            for i, (_key, member) in enumerate(members):
+                if i:
+                    parent_out.append(self.layout.item_separator)
+                parent_out.extend(member)
+        if item_count:
+            self.out.append(self.layout.newline_indent(len(self.stack)))
+        self.out.append(token)
+
+
+def reformat_tokens(tokens, layout, sort_keys=False):
+    """
+    Format a stream of JSON tokens, changing only whitespace and key order.
+
+    Scalar tokens are copied verbatim, and duplicate keys are kept, so the
+    formatted text represents exactly the same values as the original.  The
+    work is done with an explicit stack, so nesting depth is limited only by
+    available memory.
+
+    :Args:
+        tokens
+            An iterable of tokens, as from
+            `~json_indent.tokens.iter_tokens()`:py:func:
+
+        layout
+            A `Layout`:py:class: describing the whitespace to use
+
+        sort_keys
+            (optional) Whether to sort object members by key (default:
+            `False`); members with equal keys keep their original order
+
+    :Returns:
+        A list of strings which, when joined, make up the formatted text
+        (without a trailing newline)
+
+    :Raises:
+        `json.JSONDecodeError`:py:exc: if the tokens do not make up exactly
+        one JSON value
+    """
+    reformatter = _Reformatter(layout, sort_keys)
+    reformatter.feed(tokens)
+    reformatter.finish()
+    return reformatter.result
+
+
+def _member_key_decoded(member):
+    return _decode_key(member[0])
@@ -0,0 +1,335 @@
+"""
+Provide access to files staged in a git repository.
+"""
+
+from __future__ import absolute_import
+
+import collections
+import hashlib
+import os
+import subprocess
+
+# Modes of staged entries which are regular files (not symlinks or submodules)
+REGULAR_FILE_MODES = frozenset(["100644", "100755"])
+
+JSON_SUFFIX = ".json"
+
+# Fields in each header from ``git cat-file --batch`` (for an object which exists)
+BATCH_HEADER_FIELDS = ("id", "type", "size")
+
+# Status tag (from ``git ls-files -v``) of an ordinary index entry, i.e., not
+# marked "assume unchanged" or "skip worktree", and not unmerged
+CACHED_TAG = "H"
+
+# Hash functions used for object IDs, by the length of an ID in hex digits
+OBJECT_ID_HASHES = {40: "sha1", 64: "sha256"}
+
+# Most bytes of paths to pass to git on its command line (which is limited,
+# to as little as 32 KiB on Windows); past that, git lists every file and the
+# list is filtered here
+MAX_PATHSPEC_BYTES = 16 * 1024
+
+StagedFile = collections.namedtuple("StagedFile", ["path", "blob_id"])
+
+
+class GitError(Exception):
+    """
+    Provide exception raised when a git command fails.
+
+    :Args:
+        command
+            The git command (as a list of arguments) that failed
+
+        message
+            A string containing an explanation of the failure
+    """
+
+    def __init__(self, command, message):
+        self.command = command
+        message = "{command}: {message}".format(command=" ".join(command), message=message.strip())
+        super(GitError, self).__init__(message)
+
+
+def _run_git(args, cwd=None):
+    """Run a git command and return its (binary) output."""
+    command = ["git"] + list(args)
+    try:
+        # No shell is involved, so paths are passed to git as they are
+        process = subprocess.run(  # noqa: S603
+            command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False
+        )
+    except OSError as e:
+        raise GitError(command, str(e))
+    if process.returncode != 0:
+        raise GitError(command, process.stderr.decode("utf-8", "replace"))
+    return process.stdout
+
+
+def list_staged_files(paths=None, cwd=None):
+    """
+    List files whose contents are staged for the next commit.
+
+    Paths are relative to the current directory (or `cwd`), and only staged
+    files at or below it are listed.  Deleted files, symbolic links, and
+    submodules are left out.
+
+    :Args:
+        paths
+            (optional) Paths of the files to consider; if none are given,
+            consider every staged file whose name ends in ``.json``
+
+        cwd
+            (optional) Directory to run git in (default: the current
+            directory)
+
+    :Returns:
+        A list of `StagedFile`:py:class: tuples, each holding a path and the
+        ID of the blob staged for it
+
+    :Raises:
+        `GitError`:py:exc: if git fails (e.g., outside a repository)
+    """
+    args = ["--literal-pathspecs", "diff", "--cached", "--raw", "-z", "--no-abbrev", "--no-renames", "--relative"]
+    args.extend(["--diff-filter=AMT", "--"])
+    if paths:
+        args.extend(paths)
+    fields = _run_git(args, cwd=cwd).split(b"\0")
+    staged_files = []
+    # Fields alternate between ":old_mode new_mode old_id new_id status" and a path
+    for info, raw_path in zip(fields[0::2], fields[1::2]):
+        (_old_mode, new_mode, _old_id, new_id, _status) = info.decode("ascii").split()
+        path = os.fsdecode(raw_path)
+        if new_mode not in REGULAR_FILE_MODES:
+            continue
+        if not paths and not path.lower().endswith(JSON_SUFFIX):
+            continue
+        staged_files.append(StagedFile(path, new_id))
+    return staged_files
+
+
+def get_repo_paths(git_path, cwd=None):
+    """
+    Find the top level of a repository, and a path inside its git directory.
+
+    :Args:
+        git_path
+            A path relative to the git directory (e.g., ``json-indent``)
+
+        cwd
+            (optional) Directory to run git in (default: the current
+            directory)
+
+    :Returns:
+        A tuple::
+
+            (top_level_dir, git_path)
+
+        where both paths are absolute.
+
+    :Raises:
+        `GitError`:py:exc: if git fails (e.g., outside a repository)
+    """
+    cwd = os.getcwd() if cwd is None else cwd
+    output = _run_git(["rev-parse", "--show-toplevel", "--git-path", git_path], cwd=cwd)
+    (top_level_dir, git_path) = os.fsdecode(output).splitlines()
+    return (os.path.abspath(top_level_dir), os.path.abspath(os.path.join(cwd, git_path)))
+
+
+def _fits_command_line(paths):
+    """Tell whether paths are few enough to pass to git as arguments."""
+    return sum(len(os.fsencode(path)) + 1 for path in paths) <= MAX_PATHSPEC_BYTES
+
+
+def _path_filter(paths, top_level_dir, cwd=None):
+    """
+    Make a filter for paths relative to the top level of a repository, as git pathspecs would filter them.
+
+    :Args:
+        paths
+            Paths of files or directories (relative to the current directory,
+            or `cwd`) to keep, along with everything below them
+
+    :Returns:
+        A function which takes a path relative to the top level and returns
+        whether it is kept
+    """
+    base_dir = os.path.realpath(os.getcwd() if cwd is None else cwd)
+    prefix = os.path.join(top_level_dir, "")
+    wanted = set()
+    for path in paths:
+        full_path = os.path.normpath(os.path.join(base_dir, path))
+        if full_path == top_level_dir:
+            wanted.add("")
+        elif full_path.startswith(prefix):
+            wanted.add(full_path[len(prefix) :])
+
+    def is_kept(path):
+        while path not in wanted:
+            if not path:
+                return False
+            path = os.path.dirname(path)
+        return True
+
+    return is_kept
+
+
+def list_index_entries(paths, cwd=None):
+    """
+    Find the blob IDs in the index for tracked regular files.
+
+    Files marked "assume unchanged" or "skip worktree", unmerged files,
+    symbolic links, and submodules are left out.
+
+    :Args:
+        paths
+            Paths of the files to look up
+
+        cwd
+            (optional) Directory to run git in (default: the current
+            directory)
+
+    :Returns:
+        A dictionary mapping the absolute path of each file to its blob ID
+
+    :Raises:
+        `GitError`:py:exc: if git fails (e.g., outside a repository)
+    """
+    (top_level_dir, _git_path) = get_repo_paths("", cwd=cwd)
+    args = ["--literal-pathspecs", "ls-files", "--stage", "-v", "-z", "--full-name", "--"]
+    if _fits_command_line(paths):
+        (output, is_kept) = (_run_git(args + list(paths), cwd=cwd), None)
+    else:
+        (output, is_kept) = (_run_git(args, cwd=top_level_dir), _path_filter(paths, top_level_dir, cwd=cwd))
+    entries = {}
+    for entry in output.split(b"\0"):
+        if not entry:
+            continue
+        (info, raw_path) = entry.split(b"\t", 1)
+        (tag, mode, blob_id, stage) = info.decode("ascii").split()
+        if tag != CACHED_TAG or mode not in REGULAR_FILE_MODES or stage != "0":
+            continue
+        path = os.path.normpath(os.fsdecode(raw_path))
+        if is_kept is None or is_kept(path):
+            entries[os.path.join(top_level_dir, path)] = blob_id
+    return entries
+
+
+def list_modified_files(paths, cwd=None):
+    """
+    Find tracked files which may differ from what is in the index.
+
+    Git decides this from the stat data it keeps in the index, so files are
+    not read unless their stat data is ambiguous.
+
+    :Args:
+        paths
+            Paths of the files to consider
+
+        cwd
+            (optional) Directory to run git in (default: the current
+            directory)
+
+    :Returns:
+        A set of the absolute paths of files which may have been modified
+
+    :Raises:
+        `GitError`:py:exc: if git fails (e.g., outside a repository)
+    """
+    (top_level_dir, _git_path) = get_repo_paths("", cwd=cwd)
+    args = ["--literal-pathspecs", "diff-files", "--name-only", "-z", "--"]
+    if _fits_command_line(paths):
+        (output, is_kept) = (_run_git(args + list(paths), cwd=cwd), None)
+    else:
+        (output, is_kept) = (_run_git(args, cwd=top_level_dir), _path_filter(paths, top_level_dir, cwd=cwd))
+    modified_paths = set()
+    for raw_path in output.split(b"\0"):
+        path = os.path.normpath(os.fsdecode(raw_path)) if raw_path else None
+        if path is not None and (is_kept is None or is_kept(path)):
+            modified_paths.add(os.path.join(top_level_dir, path))
+    return modified_paths
+
+
+def compute_blob_id(contents, like_blob_id):
+    """
+    Compute the ID git would give a blob with the given contents.
+
+    :Args:
+        contents
+            The (binary) contents of the blob
+
+        like_blob_id
+            Another blob ID from the same repository, to tell which hash
+            function the repository uses
+
+    :Returns:
+        The blob ID, in hex digits
+    """
+    hash_name = OBJECT_ID_HASHES[len(like_blob_id)]
+    hasher = hashlib.new(hash_name, usedforsecurity=False)
+    hasher.update("blob {}\0".format(len(contents)).encode("ascii"))
+    hasher.update(contents)
+    return hasher.hexdigest()
+
+
+class BlobReader(object):
+    """
+    Provide a reader of git objects through one long-lived git process.
+
+    This avoids starting a process (or opening a file) for each object.  Use
+    it as a context manager, or call `close()`:py:meth: when done.
+
+    :Args:
+        cwd
+            (optional) Directory to run git in (default: the current
+            directory)
+    """
+
+    command = ["git", "cat-file", "--batch"]
+
+    def __init__(self, cwd=None):
+        try:
+            self.process = subprocess.Popen(  # noqa: S603
+                self.command, cwd=cwd, stdin=subprocess.PIPE, stdout=subprocess.PIPE
+            )
+        except OSError as e:
+            raise GitError(self.command, str(e))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def read(self, object_name):
+        """
+        Read the contents of an object.
+
+        :Args:
+            object_name
+                An object ID, or any other name git understands (e.g.,
+                ``:path/to/file`` for a staged file)
+
+        :Returns:
+            The (binary) contents of the object
+
+        :Raises:
+            `GitError`:py:exc: if the object does not exist
+        """
+        self.process.stdin.write(object_name.encode("utf-8") + b"\n")
+        self.process.stdin.flush()
+        header = self.process.stdout.readline()
+        fields = header.split()
+        if len(fields) != len(BATCH_HEADER_FIELDS):
+            message = header.decode("utf-8", "replace") or "no response"
+            raise GitError(self.command, message)
+        size = int(fields[BATCH_HEADER_FIELDS.index("size")])
+        contents = self.process.stdout.read(size)
+        self.process.stdout.read(1)  # newline after the contents
+        return contents
+
+    def close(self):
+        """Stop the git process."""
+        if self.process.stdin and not self.process.stdin.closed:
+            self.process.stdin.close()
+        self.process.wait()
+        self.process.stdout.close()
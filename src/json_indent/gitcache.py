@@ -0,0 +1,154 @@
+"""
+Provide a cache of files already known to be formatted, keyed by git blob ID.
+
+Git already keeps a content hash (the blob ID) of every tracked file in its
+index, along with stat data telling whether the file has changed since.  So a
+clean, tracked file whose blob ID has been seen formatted before (under the
+same options) can be skipped without being opened at all.
+"""
+
+from __future__ import absolute_import
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from json_indent import get_version
+from json_indent.git import compute_blob_id, get_repo_paths, list_index_entries, list_modified_files
+
+logger = logging.getLogger(__name__)
+
+# Directory (inside the git directory) where stores are kept
+STORE_DIR = "json-indent"
+
+STORE_PREFIX = "formatted-"
+
+# Blob IDs kept in a store; older ones are dropped first
+DEFAULT_MAX_ENTRIES = 100000
+
+
+def compute_options_key(options):
+    """
+    Compute a key for a set of formatting options.
+
+    :Args:
+        options
+            A dictionary of formatting options (JSON-serializable)
+
+    :Returns:
+        A string which changes whenever the options (or the version of
+        `json_indent`:py:mod:) do
+    """
+    text = json.dumps([get_version(), options], sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _path_key(path, cwd=None):
+    return os.path.normcase(os.path.realpath(os.path.join(cwd or os.curdir, path)))
+
+
+class FormattedBlobCache(object):
+    """
+    Provide a cache of git blob IDs known to be formatted under some options.
+
+    :Args:
+        paths
+            Paths of the files about to be formatted
+
+        options
+            A dictionary of the formatting options in effect; a separate
+            store is kept for each set of options
+
+        cwd
+            (optional) Directory to run git in, and which `paths` are
+            relative to (default: the current directory)
+
+        max_entries
+            (optional) Most blob IDs to keep in the store
+
+    :Raises:
+        `GitError`:py:exc: if git fails (e.g., outside a repository)
+    """
+
+    def __init__(self, paths, options, cwd=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cwd = cwd
+        self.max_entries = max_entries
+        (_top_level_dir, store_dir) = get_repo_paths(STORE_DIR, cwd=cwd)
+        self.store_path = os.path.join(store_dir, STORE_PREFIX + compute_options_key(options))
+        self.index_entries = {
+            os.path.normcase(path): blob_id for path, blob_id in list_index_entries(paths, cwd=cwd).items()
+        }
+        self.modified_paths = set(os.path.normcase(path) for path in list_modified_files(paths, cwd=cwd))
+        self.known_blob_ids = set(self._load())
+        self.new_blob_ids = []
+
+    def _load(self):
+        """Read the store; return its blob IDs, oldest first."""
+        try:
+            with open(self.store_path, "r") as f:
+                return f.read().split()
+        except (IOError, OSError):
+            return []
+
+    def _known_blob_id(self, path):
+        """Return the index's blob ID for `path` if it is known to be formatted, else `None`."""
+        blob_id = self.index_entries.get(_path_key(path, self.cwd))
+        if blob_id is None or blob_id not in self.known_blob_ids:
+            return None
+        return blob_id
+
+    def is_formatted(self, path):
+        """
+        Tell, from git's index alone, whether a file is known to be formatted.
+
+        :Returns:
+            `True` if the file is unmodified since it was staged and its
+            staged contents are known to be formatted, else `False`
+        """
+        if _path_key(path, self.cwd) in self.modified_paths:
+            return False
+        return self._known_blob_id(path) is not None
+
+    def contents_are_formatted(self, path, contents):
+        """
+        Tell whether the (binary) contents of a file are known to be formatted.
+
+        This catches files which git only suspects of being modified (e.g.,
+        because they were touched).
+        """
+        blob_id = self._known_blob_id(path)
+        return blob_id is not None and compute_blob_id(contents, blob_id) == blob_id
+
+    def add(self, path, contents):
+        """
+        Note that the (binary) contents of a file are formatted.
+
+        Only contents matching what is staged are recorded, as only those can
+        be skipped later.
+        """
+        blob_id = self.index_entries.get(_path_key(path, self.cwd))
+        if blob_id is None or blob_id in self.known_blob_ids:
+            return
+        if compute_blob_id(contents, blob_id) == blob_id:
+            self.known_blob_ids.add(blob_id)
+            self.new_blob_ids.append(blob_id)
+
+    def save(self):
+        """Write the store (atomically), if anything has been added."""
+        if not self.new_blob_ids:
+            return
+        blob_ids = (self._load() + self.new_blob_ids)[-self.max_entries :]
+        store_dir = os.path.dirname(self.store_path)
+        try:
+            if not os.path.isdir(store_dir):
+                os.makedirs(store_dir)
+            (fd, temp_path) = tempfile.mkstemp(dir=store_dir, prefix=STORE_PREFIX, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                f.write("".join(blob_id + "\n" for blob_id in blob_ids))
+            os.replace(temp_path, self.store_path)
+        except (IOError, OSError) as e:
+            # A cache which cannot be written just makes the next run slower
+            logger.debug("Could not write {path}: {e}".format(path=self.store_path, e=e))
+        self.new_blob_ids = []
@@ -2,8 +2,70 @@
 Provide IOFile class and related exceptions.
 """
 
+import codecs
+import collections
+import contextlib
 import io
+import logging
+import os
+import shutil
+import stat
 import sys
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# When files written atomically are flushed to disk: never (leaving it to the
+# operating system, so a crash may still leave files empty or truncated), all
+# at once at the end of a run (see `fsync_batch()`:py:func:), or each one
+# before it replaces the original
+FSYNC_NEVER = "never"
+FSYNC_BATCH = "batch"
+FSYNC_ALWAYS = "always"
+FSYNC_POLICIES = [FSYNC_NEVER, FSYNC_BATCH, FSYNC_ALWAYS]
+
+IOProfile = collections.namedtuple("IOProfile", ["buffer_size", "chunk_size", "fadvise", "fallocate"])
+IOProfile.__doc__ = """
+How files are read and written.
+
+:Args:
+    buffer_size
+        The buffer size for reading and writing (see `io.open()`:py:func:),
+        or -1 for Python's default
+
+    chunk_size
+        The size of chunks read when a file is streamed, as with
+        `read_text_chunks()`:py:func:
+
+    fadvise
+        Whether to tell the operating system that files are read sequentially,
+        and that their pages are not needed once read (where
+        `os.posix_fadvise()`:py:func: is available)
+
+    fallocate
+        Whether to preallocate output files (where
+        `os.posix_fallocate()`:py:func: is available), when the output size is
+        known ahead
+"""
+
+IO_PROFILE_DEFAULT = "default"
+IO_PROFILE_LARGE = "large"
+
+# The default profile leaves everything as Python does it; the large one
+# suits multi-gigabyte files, and storage with high latency (as on network
+# volumes), where each request should move a lot of data
+IO_PROFILES = collections.OrderedDict(
+    [
+        (IO_PROFILE_DEFAULT, IOProfile(buffer_size=-1, chunk_size=DEFAULT_CHUNK_SIZE, fadvise=False, fallocate=False)),
+        (IO_PROFILE_LARGE, IOProfile(buffer_size=4 << 20, chunk_size=4 << 20, fadvise=True, fallocate=True)),
+    ]
+)
+
+# Read buffers for each thread, reused from file to file
+_read_buffers = threading.local()
 
 
 class IOFileError(Exception):
@@ -46,6 +108,201 @@ class IOFileOpenError(IOFileError):
         super(IOFileOpenError, self).__init__(path, message)
 
 
+def shared_read_buffer(size):
+    """
+    Return a buffer of at least `size` bytes to read into, shared by everything read in this thread.
+
+    Reading each file of a batch run into the same buffer saves allocating
+    (and zeroing) a new one for each.
+    """
+    buffer = getattr(_read_buffers, "buffer", None)
+    if buffer is None or len(buffer) < size:
+        buffer = _read_buffers.buffer = bytearray(size)
+    return buffer
+
+
+def _fadvise(fileish, advice_name):
+    """Give the operating system advice about an open file, where it takes advice."""
+    advice = getattr(os, advice_name, None)
+    if advice is None or not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        os.posix_fadvise(fileish.fileno(), 0, 0, advice)
+    except (OSError, ValueError) as e:
+        logger.debug("Could not advise {advice_name}: {e}".format(advice_name=advice_name, e=e))
+
+
+def _fallocate(fileish, size):
+    """Preallocate an open file, where the file system allows it."""
+    if not hasattr(os, "posix_fallocate") or size <= 0:
+        return
+    try:
+        os.posix_fallocate(fileish.fileno(), 0, size)
+    except OSError as e:
+        logger.debug("Could not preallocate {size} bytes: {e}".format(size=size, e=e))
+
+
+def _fsync_path(path, flags=os.O_RDONLY):
+    fd = os.open(path, flags)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _fsync_dir(path):
+    """Flush a directory's entries to disk, where the platform allows it."""
+    try:
+        _fsync_path(path)
+    except OSError as e:
+        # E.g., on Windows, directories cannot be opened
+        logger.debug("Could not flush directory {path}: {e}".format(path=path, e=e))
+
+
+class _Batch(object):
+    """
+    Hold the temporary files waiting to replace files written under ``FSYNC_BATCH``.
+
+    ``pending`` is a list of ``(temp_path, path)`` pairs while a batch is
+    open (see `fsync_batch()`:py:func:), in the process ``pid`` which opened
+    it, or `None` otherwise.
+    """
+
+    pid = None
+    pending = None
+
+
+_batch = _Batch()
+
+
+def _batch_is_open():
+    # A process forked while a batch is open has a copy of it, which is never replaced
+    return _batch.pending is not None and _batch.pid == os.getpid()
+
+
+@contextlib.contextmanager
+def fsync_batch(fsync):
+    """
+    Flush the files written in a ``with`` block under an fsync policy of ``FSYNC_BATCH`` to disk, all at once.
+
+    Their temporary files replace the originals only at the end of the
+    block, once all of them are flushed, so that a crash leaves each file
+    with either its old contents or its new, never an empty or truncated
+    file; then the replacements are flushed too.  Files written in other
+    processes, or where `os.sync()`:py:func: is missing, are flushed one by
+    one before they replace the originals.
+
+    :Args:
+        fsync
+            One of ``FSYNC_POLICIES``; anything but ``FSYNC_BATCH`` makes the
+            block run as it is
+    """
+    if fsync != FSYNC_BATCH or not hasattr(os, "sync") or _batch_is_open():
+        yield
+        return
+    (_batch.pid, _batch.pending) = (os.getpid(), [])
+    try:
+        yield
+    finally:
+        (pending, _batch.pending) = (_batch.pending, None)
+        if pending:
+            os.sync()
+            for temp_path, path in pending:
+                _replace_file(temp_path, path, FSYNC_NEVER)
+            os.sync()
+
+
+def can_write_atomically(path):
+    """
+    Tell whether a file can be written atomically (by replacing it with a new file).
+
+    Only regular files (or files not yet there) can be; a file with other
+    hard links to it would be split from them.  Symbolic links are followed.
+    """
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        return True
+    return stat.S_ISREG(stat_result.st_mode) and stat_result.st_nlink == 1
+
+
+def make_temp_file(path):
+    """
+    Create a temporary file to replace a file with.
+
+    :Returns:
+        A tuple of the temporary file's descriptor (open for writing) and
+        path, which is in the same directory as `path` (following symbolic
+        links), so that it can replace it atomically
+    """
+    target = os.path.realpath(path)
+    return tempfile.mkstemp(dir=os.path.dirname(target), prefix=".{}.".format(os.path.basename(target)), suffix=".tmp")
+
+
+def _copy_attributes(path, temp_path):
+    """Give a temporary file the mode and ownership of the file it is to replace; return whether it worked."""
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        # There is nothing to keep
+        return True
+    os.chmod(temp_path, stat.S_IMODE(stat_result.st_mode))
+    owner = (stat_result.st_uid, stat_result.st_gid)
+    temp_stat_result = os.stat(temp_path)
+    if not hasattr(os, "chown") or owner == (temp_stat_result.st_uid, temp_stat_result.st_gid):
+        return True
+    try:
+        os.chown(temp_path, *owner)
+    except OSError:
+        return False
+    return True
+
+
+def replace_file(temp_path, path, fsync=FSYNC_NEVER):
+    """
+    Replace a file with a (closed) temporary file, keeping the file's mode and ownership.
+
+    The replacement is atomic, so readers see either the old contents or the
+    new, and a crash leaves one or the other.  If the file cannot be written
+    atomically (see `can_write_atomically()`:py:func:), or its ownership
+    cannot be given to the temporary file, it is rewritten in place instead.
+
+    :Args:
+        temp_path
+            The temporary file, from `make_temp_file()`:py:func:
+
+        path
+            The file to replace (following symbolic links)
+
+        fsync
+            (optional) One of ``FSYNC_POLICIES``; with ``FSYNC_BATCH``, the
+            file is replaced at the end of the batch open in this process
+            (see `fsync_batch()`:py:func:), if any, or else flushed by itself
+    """
+    if fsync == FSYNC_BATCH and _batch_is_open():
+        # (Appending to a list is safe from several threads)
+        _batch.pending.append((temp_path, path))
+        return
+    _replace_file(temp_path, path, fsync)
+
+
+def _replace_file(temp_path, path, fsync):
+    """Replace a file with a temporary file now; see `replace_file()`:py:func:."""
+    target = os.path.realpath(path)
+    if not (can_write_atomically(target) and _copy_attributes(target, temp_path)):
+        logger.debug("Rewriting {path} in place, to keep its links and owner".format(path=path))
+        shutil.copyfile(temp_path, target)
+        os.remove(temp_path)
+        if fsync != FSYNC_NEVER:
+            _fsync_path(target, os.O_RDWR)
+        return
+    if fsync != FSYNC_NEVER:
+        _fsync_path(temp_path, os.O_RDWR)
+    os.replace(temp_path, target)
+    if fsync == FSYNC_ALWAYS:
+        _fsync_dir(os.path.dirname(target))
+
+
 class IOFile(object):
     """
     Provide object model for files that should be read, then written in place.
@@ -53,12 +310,35 @@ class IOFile(object):
     :Args:
         path
             The path to the file to open for input or output
+
+        atomic
+            (optional) If `True`-ish, output goes to a temporary file, which
+            replaces the file when closed (see `replace_file()`:py:func:);
+            if the file cannot be written atomically (see
+            `can_write_atomically()`:py:func:), it is written directly
+
+        fsync
+            (optional) One of ``FSYNC_POLICIES``, for atomic output
+
+        io_profile
+            (optional) An `IOProfile`:py:class: (default: the
+            ``IO_PROFILE_DEFAULT`` one in ``IO_PROFILES``)
+
+        output_size
+            (optional) The expected size of the output (in bytes), for
+            preallocating it; the file is truncated to what is written when
+            closed
     """
 
-    def __init__(self, path):
+    def __init__(self, path, atomic=False, fsync=FSYNC_NEVER, io_profile=None, output_size=None):
         self.path = path
         self.mode = None
         self.file = None
+        self.atomic = atomic
+        self.fsync = fsync
+        self.temp_path = None
+        self.io_profile = IO_PROFILES[IO_PROFILE_DEFAULT] if io_profile is None else io_profile
+        self.output_size = output_size
 
         self._io_properties = {
             "input": {"target_mode": "r", "stdio_stream": sys.stdin},
@@ -115,15 +395,33 @@ class IOFile(object):
         if self.mode not in {None, target_mode}:
             self._raise_open_error(purpose)
         if self.file is None:
-            self.file = (
-                self._get_io_property(purpose, "stdio_stream")
-                if self.path == "-"
-                # pylint: disable=consider-using-with
-                else open(self.path, target_mode, encoding="utf-8")
-            )
+            if self.path == "-":
+                self.file = self._get_io_property(purpose, "stdio_stream")
+            else:
+                self.file = open(  # pylint: disable=consider-using-with
+                    self._output_fileish(purpose),
+                    target_mode,
+                    buffering=self.io_profile.buffer_size,
+                    encoding="utf-8",
+                )
+                self._tune(purpose)
             self.mode = target_mode
         return self.file
 
+    def _tune(self, purpose):
+        """Apply the I/O profile to a newly opened file."""
+        if purpose == "input" and self.io_profile.fadvise:
+            _fadvise(self.file, "POSIX_FADV_SEQUENTIAL")
+        elif purpose == "output" and self.io_profile.fallocate and self.output_size:
+            _fallocate(self.file, self.output_size)
+
+    def _output_fileish(self, purpose):
+        """Return what to open for a purpose: the path, or a temporary file's descriptor for atomic output."""
+        if purpose != "output" or not self.atomic or not can_write_atomically(self.path):
+            return self.path
+        (fd, self.temp_path) = make_temp_file(self.path)
+        return fd
+
     def open_for_input(self):
         """Open `self.file`:py:attr: for input."""
         return self._open_for_purpose("input")
@@ -133,12 +431,42 @@ class IOFile(object):
         return self._open_for_purpose("output")
 
     def close(self):
-        """Close `self.file`:py:attr:."""
+        """Close `self.file`:py:attr: (and, for atomic output, replace the file with what was written)."""
         if self.file is not None:
-            if self.path != "-":
-                self.file.close()
-            self.file = None
-            self.mode = None
+            try:
+                if self.path != "-":
+                    self._untune()
+                    self.file.close()
+            except BaseException:
+                # What was written did not all make it to the temporary file
+                if self.temp_path is not None:
+                    (temp_path, self.temp_path) = (self.temp_path, None)
+                    os.remove(temp_path)
+                raise
+            finally:
+                self.file = None
+                self.mode = None
+        if self.temp_path is not None:
+            (temp_path, self.temp_path) = (self.temp_path, None)
+            replace_file(temp_path, self.path, fsync=self.fsync)
+
+    def _untune(self):
+        """Undo what the I/O profile did to a file about to be closed."""
+        if self.mode in ("r", "rt") and self.io_profile.fadvise:
+            # What was read need not stay in the page cache
+            _fadvise(self.file, "POSIX_FADV_DONTNEED")
+        elif self.mode in ("w", "wt") and self.io_profile.fallocate and self.output_size:
+            # Less may have been written than was preallocated
+            self.file.truncate()
+
+    def discard(self):
+        """Close `self.file`:py:attr:, leaving the file as it was if output is atomic."""
+        if self.temp_path is not None:
+            (temp_path, self.temp_path) = (self.temp_path, None)
+            self.close()
+            os.remove(temp_path)
+        else:
+            self.close()
 
 
 class TextIOFile(IOFile):
@@ -156,10 +484,24 @@ class TextIOFile(IOFile):
         output_newline
             (optional) The newline convention used on output (see
             `io.open()`:py:meth:)
+
+        atomic, fsync, io_profile, output_size
+            (optional) See `IOFile`:py:class:
     """
 
-    def __init__(self, path, input_newline=None, output_newline=None):
-        super(TextIOFile, self).__init__(path)
+    def __init__(
+        self,
+        path,
+        input_newline=None,
+        output_newline=None,
+        atomic=False,
+        fsync=FSYNC_NEVER,
+        io_profile=None,
+        output_size=None,
+    ):
+        super(TextIOFile, self).__init__(
+            path, atomic=atomic, fsync=fsync, io_profile=io_profile, output_size=output_size
+        )
 
         self._io_properties = {
             "input": {
@@ -197,14 +539,62 @@ class TextIOFile(IOFile):
                 fileish = self._get_io_property(purpose, "stdio_stream").fileno()
                 closefd = False
             else:
-                fileish = self.path
+                fileish = self._output_fileish(purpose)
                 closefd = True
             self.file = io.open(  # pylint: disable=consider-using-with
                 fileish,
                 mode=target_mode,
+                buffering=self.io_profile.buffer_size,
                 newline=newline,
                 closefd=closefd,
                 encoding="utf-8",
             )
+            if closefd:
+                self._tune(purpose)
             self.mode = target_mode
         return self.file
+
+
+def read_text_chunks(fileish, chunk_size=DEFAULT_CHUNK_SIZE, on_read=None):
+    """
+    Read text from an open file-ish in chunks of at most `chunk_size`.
+
+    When the file-ish is a text wrapper around a buffered binary stream (as
+    with files opened by `TextIOFile`:py:class:), each chunk holds whatever is
+    available without waiting for a full chunk, so that input from a pipe can
+    be processed as it arrives.  No newline translation is done in that case.
+
+    :Args:
+        fileish
+            An open file-ish to read from
+
+        chunk_size
+            (optional) The maximum size of each chunk
+
+        on_read
+            (optional) A function to call with the number of bytes (or, for
+            other file-ishes, characters) read, after each read
+
+    :Returns:
+        An iterator of non-empty strings
+    """
+    readinto1 = getattr(getattr(fileish, "buffer", None), "readinto1", None)
+    if readinto1 is None:
+        while True:
+            chunk = fileish.read(chunk_size)
+            if not chunk:
+                return
+            if on_read is not None:
+                on_read(len(chunk))
+            yield chunk
+    decoder = codecs.getincrementaldecoder(getattr(fileish, "encoding", None) or "utf-8")()
+    view = memoryview(shared_read_buffer(chunk_size))[:chunk_size]
+    while True:
+        size = readinto1(view)
+        if on_read is not None:
+            on_read(size)
+        chunk = decoder.decode(view[:size], final=not size)
+        if chunk:
+            yield chunk
+        if not size:
+            return
@@ -6,25 +6,82 @@ from __future__ import absolute_import, print_function
 
 import argparse
 import collections
+import concurrent.futures
 import difflib
+import filecmp
+import functools
+import io
 import json
 import logging
 import os.path
 import sys
+import time
 
 import argcomplete
 
 from json_indent import completion, get_version
-from json_indent.iofile import TextIOFile
-from json_indent.util import is_string, pop_with_default, to_unicode
+from json_indent.decoder import DECODE_JSON_KWARGS, decode_json
+from json_indent.emit import PLACEHOLDERS, emit_path, parse_emit_spec, variant_dump_kwargs
+from json_indent.encoder import DEFAULT_PIECE_SIZE, ENCODE_JSON_KWARGS, encode_json, iter_encode_json
+from json_indent.engine import (
+    ENGINES,
+    ENGINE_AUTO,
+    ENGINE_BOUNDED,
+    ENGINE_MEMORY,
+    bounded_memory_limit,
+    choose_engine,
+    default_memory_budget,
+)
+from json_indent.events import (
+    EVENT_CHANGED,
+    EVENT_DUMP,
+    EVENT_FILE_END,
+    EVENT_FILE_START,
+    EVENT_LOAD,
+    EVENT_REFORMAT,
+    EVENT_SYNTAX_ERROR,
+    EVENT_UNCHANGED,
+    emit,
+    is_observed,
+)
+from json_indent.extsort import format_sorted, parse_size
+from json_indent.formatter import Layout, reformat_tokens
+from json_indent.git import JSON_SUFFIX, BlobReader, GitError, list_staged_files
+from json_indent.gitcache import FormattedBlobCache
+from json_indent.iofile import (
+    DEFAULT_CHUNK_SIZE,
+    FSYNC_NEVER,
+    FSYNC_POLICIES,
+    IO_PROFILES,
+    IO_PROFILE_DEFAULT,
+    TextIOFile,
+    fsync_batch,
+    make_temp_file,
+    read_text_chunks,
+    replace_file,
+)
+from json_indent.lazy import LAZY_VIEW_TYPES, load_lazy
+from json_indent.mirror import MirrorManifest, hash_contents, make_dirs, mirror_paths, read_input
+from json_indent.parallel import BACKENDS, BACKEND_AUTO, BACKEND_PROCESSES, choose_backend, map_parallel
+from json_indent.progress import LINE_INTERVAL, Progress
+from json_indent.shard import SHARD_BY_HASH, SHARD_STRATEGIES, parse_shard_spec, select_shard
+from json_indent.tape import ENCODE_TAPE_KWARGS, TAPE_VIEW_TYPES, encode_tape, load_tape
+from json_indent.tokens import iter_documents, iter_tokens, iter_tokens_from_chunks
+from json_indent.util import decode_json_bytes, is_bytes_like, is_string, pop_with_default, to_unicode
+from json_indent.verify import is_formatted
+from json_indent.watch import watch_paths
 
 __all__ = [
     "cli",
     "dump_json",
     "dump_json_file",
     "dump_json_text",
+    "format_files",
+    "format_json_text",
+    "format_texts",
     "load_json",
     "load_json_file",
+    "load_json_stream",
     "load_json_text",
     "main",
 ]
@@ -39,8 +96,33 @@ STATUS_CHANGED = 99
 
 JSON_TEXT_DEFAULT_FILENAME = "<text>"
 
+FormatResult = collections.namedtuple("FormatResult", ["path", "input_text", "output_text", "error"])
+
+LOSSLESS_FORMAT_KWARGS = frozenset(["indent", "separators", "sort_keys"])
+
+MODEL_PYTHON = "python"
+MODEL_TAPE = "tape"
+MODELS = [MODEL_PYTHON, MODEL_TAPE]
+
 DIFF_CONTEXT_LINES = 3
 
+CONCAT_NDJSON = "ndjson"
+CONCAT_FRAMED = "framed"
+CONCAT_FORMATS = [CONCAT_NDJSON, CONCAT_FRAMED]
+
+# Characters of concatenated output gathered before each write
+CONCAT_BUFFER_SIZE = 1024 * 1024
+
+# Input files formatted at once for concatenated output, per job
+CONCAT_BATCH_FILES = 16
+
+# Keys of the object each document is wrapped in with '--tag-paths'
+TAG_PATH_KEY = "path"
+TAG_DATA_KEY = "data"
+
+# Input files read ahead of the one being formatted, for '--output-dir'
+MIRROR_READ_AHEAD = 8
+
 NEWLINE_FORMAT_LINUX = "linux"
 NEWLINE_FORMAT_MICROSOFT = "microsoft"
 NEWLINE_FORMAT_NATIVE = "native"
@@ -81,6 +163,10 @@ class JsonParseError(ValueError):
         self.msg = "{filename}: {exception}".format(filename=filename, exception=exception)
         super(JsonParseError, self).__init__(self.msg)
 
+    def __reduce__(self):
+        # So that it survives being passed back from another process
+        return (JsonParseError, (self.filename, self.exception))
+
 
 def load_json_text(text, filename=None, **kwargs):
     """
@@ -88,7 +174,8 @@ def load_json_text(text, filename=None, **kwargs):
 
     :Args:
         text
-            Raw JSON text
+            Raw JSON text, either a string or a bytes-like buffer (see
+            `~json_indent.util.decode_json_bytes()`:py:func:)
 
         filename
             (optional) Input filename associated with the JSON text, if any
@@ -107,21 +194,110 @@ def load_json_text(text, filename=None, **kwargs):
             (`False`) preserve the order of keys from the JSON data (default:
             `False`, i.e., preserve key order).
 
+        model
+            How to represent the JSON data: as Python objects (``python``,
+            the default), or as a compact tape (``tape``; see
+            `json_indent.tape`:py:mod:), for which no other keyword
+            arguments are supported.
+
+        lazy
+            Whether to decode large objects and arrays only when they are
+            first accessed (default: `False`; see `json_indent.lazy`:py:mod:).
+            Only the ``python`` model can be loaded lazily, and only the
+            ``parse_*`` keyword arguments of `json.loads()`:py:func: are
+            supported.
+
+        key_cache
+            A `~json_indent.keycache.KeyCache`:py:class: shared by the
+            documents loaded with it, so that equal object keys in all of
+            them are one string (default: `None`, i.e., keys are shared only
+            within each document).  Only the ``python`` model, loaded
+            eagerly, can share keys.
+
     :Returns:
         The JSON data parsed from `text`.
+
+    Text nested too deeply for `json.loads()`:py:func: is parsed again
+    without recursion, unless `kwargs` include arguments which
+    `~json_indent.decoder.decode_json()`:py:func: does not support.
+
+    Observers (see `json_indent.events`:py:mod:) are told of the text
+    parsed, or of the syntax error.
     """
     filename = JSON_TEXT_DEFAULT_FILENAME if filename is None else filename
+    if not is_observed():
+        return _load_json_text(text, filename, kwargs)
+    start = time.perf_counter()
+    try:
+        data = _load_json_text(text, filename, kwargs)
+    except JsonParseError as e:
+        emit(EVENT_SYNTAX_ERROR, filename, message=str(e))
+        raise
+    emit(EVENT_LOAD, filename, size=len(text), seconds=time.perf_counter() - start)
+    return data
+
+
+def _load_json_text(text, filename, kwargs):
+    if is_bytes_like(text):
+        text = _decode_json_bytes(text, filename)
     sort_keys = pop_with_default(kwargs, "sort_keys", False)
     unordered = pop_with_default(kwargs, "unordered", False)
-    if sort_keys or not unordered:
-        kwargs["object_pairs_hook"] = collections.OrderedDict
+    model = pop_with_default(kwargs, "model", MODEL_PYTHON)
+    lazy = pop_with_default(kwargs, "lazy", False)
+    key_cache = pop_with_default(kwargs, "key_cache", None)
+    if model not in MODELS:
+        raise ValueError("{}: unknown model (choose from: {})".format(model, ", ".join(MODELS)))
+    if key_cache is not None and (lazy or model == MODEL_TAPE):
+        raise ValueError("keys can be cached only when loading the {} model eagerly".format(MODEL_PYTHON))
+    if lazy:
+        if model == MODEL_TAPE:
+            raise ValueError("a tape cannot be loaded lazily")
+        return _load_json_lazy(text, filename, unordered and not sort_keys, kwargs)
+    if model == MODEL_TAPE:
+        return _load_json_tape(text, filename, kwargs)
+    factory = collections.OrderedDict if sort_keys or not unordered else None
+    if key_cache is not None:
+        kwargs["object_pairs_hook"] = key_cache.object_pairs_hook(factory or dict)
+    elif factory is not None:
+        kwargs["object_pairs_hook"] = factory
     try:
-        data = json.loads(text, **kwargs)
+        try:
+            if key_cache is not None and len(kwargs) == 1:
+                data = key_cache.decoder(factory or dict).decode(text)
+            else:
+                data = json.loads(text, **kwargs)
+        except RecursionError:
+            if not DECODE_JSON_KWARGS.issuperset(kwargs):
+                raise
+            data = decode_json(text, **kwargs)
     except json.JSONDecodeError as e:
         raise JsonParseError(filename, e)
     return data
 
 
+def _decode_json_bytes(buffer, filename):
+    try:
+        return decode_json_bytes(buffer)
+    except UnicodeDecodeError as e:
+        raise JsonParseError(filename, e)
+
+
+def _load_json_lazy(text, filename, unordered, kwargs):
+    try:
+        return load_lazy(text, unordered=unordered, **kwargs)
+    except json.JSONDecodeError as e:
+        raise JsonParseError(filename, e)
+
+
+def _load_json_tape(text, filename, kwargs):
+    if kwargs:
+        raise TypeError("unsupported keyword argument(s) for the tape model: {}".format(", ".join(sorted(kwargs))))
+    try:
+        return load_tape(text)
+    except json.JSONDecodeError as e:
+        raise JsonParseError(filename, e)
+
+
 def load_json_file(infile, **kwargs):
     """
     Parse and deserialize JSON data from a file.
@@ -154,7 +330,9 @@ def load_json(thing, with_text=False, **kwargs):
 
     :Args:
         thing
-            Either a (Unicode) string or an open file-ish to load JSON data from
+            Either a (Unicode) string, a bytes-like buffer (``bytes``,
+            ``bytearray``, ``memoryview``, or ``mmap``), or an open file-ish to
+            load JSON data from
 
         with_text
             See *Returns* below.
@@ -168,12 +346,12 @@ def load_json(thing, with_text=False, **kwargs):
 
             (json_data, json_text)
 
-        where `json_text` is the original text read from `infile`, and
-        `json_data` is the parsed result.
+        where `json_text` is `thing` itself, or the original text read from
+        it if it is a file-ish, and `json_data` is the parsed result.
 
         Otherwise (the default), return just `json_data`.
     """
-    if is_string(thing):
+    if is_string(thing) or is_bytes_like(thing):
         text = thing
         data = load_json_text(text, **kwargs)
     else:
@@ -182,6 +360,40 @@ def load_json(thing, with_text=False, **kwargs):
     return (data, text) if with_text else data
 
 
+def load_json_stream(infile, chunk_size=DEFAULT_CHUNK_SIZE, **kwargs):
+    """
+    Parse and deserialize a stream of concatenated JSON values from a file.
+
+    Values may be separated by whitespace or simply follow one another (e.g.,
+    ``{...}{...}``).  The file is read incrementally, and each value is
+    yielded as soon as it is complete, so this works with endless pipes.
+
+    :Args:
+        infile
+            Open file-ish to load JSON data from
+
+        chunk_size
+            (optional) The maximum amount of text to read at a time
+
+        kwargs
+            Keyword arguments, passed unchanged to
+            `~json_indent.load_json_text()`:py:func:
+
+    :Returns:
+        An iterator of the JSON data parsed from each value in `infile`
+
+    :Raises:
+        `JsonParseError`:py:exc: if a value cannot be parsed
+    """
+    filename = getattr(infile, "name", None)
+    tokens = iter_tokens_from_chunks(read_text_chunks(infile, chunk_size))
+    try:
+        for text in iter_documents(tokens):
+            yield load_json_text(text, filename=filename, **kwargs)
+    except json.JSONDecodeError as e:
+        raise JsonParseError(JSON_TEXT_DEFAULT_FILENAME if filename is None else filename, e)
+
+
 def dump_json_text(data, **kwargs):
     """
     Serialize and format JSON text from a possibly structured object.
@@ -198,13 +410,129 @@ def dump_json_text(data, **kwargs):
 
     :Returns:
         The serialized JSON text
+
+    When indenting, or when `data` is nested too deeply for
+    `json.dumps()`:py:func:, we use the (faster, non-recursive)
+    `~json_indent.encoder.encode_json()`:py:func: instead, unless `kwargs`
+    include arguments which it does not support.  Data loaded as a tape is
+    serialized straight from the tape (see
+    `~json_indent.tape.encode_tape()`:py:func:), where `kwargs` allow.  Data
+    loaded lazily is decoded in full first.
+
+    Observers (see `json_indent.events`:py:mod:) are told of the text
+    serialized.
     """
-    text = json.dumps(data, **kwargs)
+    if not is_observed():
+        return _dump_json_text(data, kwargs)
+    start = time.perf_counter()
+    text = _dump_json_text(data, kwargs)
+    emit(EVENT_DUMP, size=len(text), seconds=time.perf_counter() - start)
+    return text
+
+
+def _dump_json_text(data, kwargs):
+    if isinstance(data, LAZY_VIEW_TYPES):
+        data = data.to_python()
+    if isinstance(data, TAPE_VIEW_TYPES):
+        if ENCODE_TAPE_KWARGS.issuperset(kwargs):
+            return to_unicode(encode_tape(data, **kwargs) + "\n")
+        data = data.to_python()
+    iterative = ENCODE_JSON_KWARGS.issuperset(kwargs)
+    if iterative and kwargs.get("indent") is not None:
+        text = encode_json(data, **kwargs)
+    else:
+        try:
+            text = json.dumps(data, **kwargs)
+        except RecursionError:
+            if not iterative:
+                raise
+            text = encode_json(data, **kwargs)
     text += "\n"
     text = to_unicode(text)
     return text
 
 
+def _iter_json_text(data, piece_size, kwargs):
+    """Return the text `dump_json_text()`:py:func: would, in pieces, without holding it whole if possible."""
+    if isinstance(data, LAZY_VIEW_TYPES):
+        data = data.to_python()
+    if isinstance(data, TAPE_VIEW_TYPES) or kwargs.get("indent") is None or not ENCODE_JSON_KWARGS.issuperset(kwargs):
+        text = dump_json_text(data, **kwargs)
+        for start in range(0, len(text), piece_size):
+            yield text[start : start + piece_size]
+        return
+    pieces = iter_encode_json(data, piece_size, **kwargs)
+    previous = next(pieces)
+    for piece in pieces:
+        yield previous
+        previous = piece
+    yield previous + "\n"
+
+
+def iter_json_bytes(data, piece_size=DEFAULT_PIECE_SIZE, **kwargs):
+    """
+    Serialize and format JSON text from a possibly structured object, as UTF-8, a piece at a time.
+
+    The text is the same as from `dump_json_text()`:py:func:.  When indenting
+    (with keyword arguments which `~json_indent.encoder.encode_json()`:py:func:
+    supports), it is encoded a piece at a time, so neither it nor its bytes
+    are ever held whole; otherwise, the text is serialized whole first.
+
+    :Args:
+        data
+            Data to serialize
+
+        piece_size
+            (optional) About how many characters to encode at a time (see
+            `~json_indent.encoder.iter_encode_json()`:py:func:)
+
+        kwargs
+            Keyword arguments, passed to `dump_json_text()`:py:func:
+
+    :Returns:
+        An iterator of `bytes` pieces, which may be written one at a time,
+        or (as a list) passed to ``writelines()`` or `socket.sendmsg()`:py:meth:
+    """
+    for text in _iter_json_text(data, piece_size, kwargs):
+        yield text.encode("utf-8")
+
+
+def dump_json_bytes(data, outfile=None, piece_size=DEFAULT_PIECE_SIZE, **kwargs):
+    """
+    Serialize, format, and encode JSON text as UTF-8, and write it to a binary file-ish or return it.
+
+    :Args:
+        data
+            Data to serialize
+
+        outfile
+            (optional) Anything with a ``write()`` method taking `bytes`
+            (such as a binary file, or a socket's ``makefile("wb")``), to
+            write the encoded text to a piece at a time
+
+        piece_size
+            (optional) See `iter_json_bytes()`:py:func:
+
+        kwargs
+            Keyword arguments, passed to `dump_json_text()`:py:func: (but
+            ``fp`` is ignored, as for `dump_json()`:py:func:)
+
+    :Returns:
+        If `outfile` is given, the number of bytes written to it; otherwise,
+        the encoded text
+    """
+    if "fp" in kwargs:
+        kwargs.pop("fp")
+    buffer = io.BytesIO() if outfile is None else None
+    write = buffer.write if outfile is None else outfile.write
+    size = 0
+    for piece in iter_json_bytes(data, piece_size, **kwargs):
+        write(piece)
+        size += len(piece)
+    # (The buffer's bytes are returned without a copy)
+    return size if buffer is None else buffer.getvalue()
+
+
 def dump_json_file(data, outfile, **kwargs):
     """
     Serialize, format, and write JSON text to a file from an object.
@@ -273,6 +601,219 @@ def dump_json(data, outfile=None, **kwargs):
     return text
 
 
+def format_json_text(text, filename=None, lossless=False, **kwargs):
+    """
+    Parse JSON text and format it anew.
+
+    We do this according to parameters in keyword arguments, and we add a final
+    trailing newline.
+
+    :Args:
+        text
+            Raw JSON text, either a string or a bytes-like buffer (see
+            `~json_indent.load_json_text()`:py:func:)
+
+        filename
+            (optional) Input filename associated with the JSON text, if any
+
+        lossless
+            (optional) If `True`-ish, copy number and string tokens verbatim
+            and change only whitespace (and key order, if sorting keys),
+            rather than decoding and re-encoding values (default: `False`).
+            Duplicate keys are kept, and only the ``indent``, ``separators``,
+            and ``sort_keys`` keyword arguments are supported.
+
+        kwargs
+            Keyword arguments, passed to `json.dumps()`:py:func:; ``sort_keys``
+            is also passed to `~json_indent.load_json_text()`:py:func:
+
+    :Returns:
+        The formatted JSON text
+
+    :Raises:
+        - `JsonParseError`:py:exc: if `text` cannot be parsed
+        - `TypeError`:py:exc: if `lossless` is `True`-ish and an unsupported
+          keyword argument is given
+    """
+    if not lossless:
+        data = load_json_text(text, filename=filename, sort_keys=kwargs.get("sort_keys", False))
+        return dump_json_text(data, **kwargs)
+
+    return _format_lossless(text, filename, [kwargs])[0]
+
+
+def _format_lossless(text, filename, kwargs_sets):
+    """
+    Format JSON text losslessly in several ways, tokenizing it only once.
+
+    :Returns:
+        A list of the formatted texts, one for each set of keyword arguments
+    """
+    for kwargs in kwargs_sets:
+        unsupported = sorted(set(kwargs) - LOSSLESS_FORMAT_KWARGS)
+        if unsupported:
+            raise TypeError(
+                "unsupported keyword argument(s) for lossless formatting: {}".format(", ".join(unsupported))
+            )
+    filename = JSON_TEXT_DEFAULT_FILENAME if filename is None else filename
+    if not is_observed():
+        return _reformat_lossless(text, filename, kwargs_sets)
+    start = time.perf_counter()
+    try:
+        texts = _reformat_lossless(text, filename, kwargs_sets)
+    except JsonParseError as e:
+        emit(EVENT_SYNTAX_ERROR, filename, message=str(e))
+        raise
+    emit(
+        EVENT_REFORMAT,
+        filename,
+        size=len(text),
+        output_size=sum(len(x) for x in texts),
+        seconds=time.perf_counter() - start,
+    )
+    return texts
+
+
+def _reformat_lossless(text, filename, kwargs_sets):
+    if is_bytes_like(text):
+        text = _decode_json_bytes(text, filename)
+    tokens = iter_tokens(text, coalesce=True)
+    if len(kwargs_sets) > 1:
+        tokens = list(tokens)
+    texts = []
+    try:
+        for kwargs in kwargs_sets:
+            layout = Layout(indent=kwargs.get("indent"), separators=kwargs.get("separators"))
+            parts = reformat_tokens(tokens, layout, sort_keys=kwargs.get("sort_keys", False))
+            parts.append("\n")
+            texts.append(to_unicode("".join(parts)))
+    except json.JSONDecodeError as e:
+        error = e
+        try:
+            # Prefer the standard parser's error, which knows where it happened
+            json.loads(text)
+        except json.JSONDecodeError as e:
+            error = e
+        raise JsonParseError(filename, error)
+    return texts
+
+
+class _TextFormatter(object):
+    """Format one text (a picklable stand-in for a closure)."""
+
+    def __init__(self, lossless, kwargs):
+        self.lossless = lossless
+        self.kwargs = kwargs
+
+    def __call__(self, text):
+        return format_json_text(text, lossless=self.lossless, **self.kwargs)
+
+
+class _FileFormatter(object):
+    """Format one file, returning an error rather than raising it."""
+
+    def __init__(self, inplace, newline, lossless, kwargs, fsync=FSYNC_NEVER):
+        self.inplace = inplace
+        self.newline = newline
+        self.lossless = lossless
+        self.kwargs = kwargs
+        self.fsync = fsync
+
+    def __call__(self, path):
+        input_text = None
+        try:
+            with io.open(path, "r", encoding="utf-8", newline="") as f:
+                input_text = f.read()
+            output_text = format_json_text(input_text, filename=path, lossless=self.lossless, **self.kwargs)
+            if self.inplace:
+                output_iofile = TextIOFile(path, output_newline=self.newline, atomic=True, fsync=self.fsync)
+                try:
+                    output_iofile.open_for_output().write(output_text)
+                except BaseException:
+                    output_iofile.discard()
+                    raise
+                output_iofile.close()
+        except (ValueError, IOError, OSError) as e:
+            return FormatResult(path, input_text, None, e)
+        return FormatResult(path, input_text, output_text, None)
+
+
+def format_texts(texts, jobs=None, backend=BACKEND_AUTO, lossless=False, **kwargs):
+    """
+    Parse and format several JSON texts, in parallel.
+
+    :Args:
+        texts
+            Raw JSON texts, as strings or bytes-like buffers (of which memory
+            views and memory maps are copied to ``bytes`` to send them to
+            other processes)
+
+        jobs
+            (optional) The number of workers (default: the number of CPUs)
+
+        backend
+            (optional) How to run the workers: ``threads``, ``processes``,
+            ``serial``, or ``auto`` (threads if the GIL is disabled, else
+            processes); see `~json_indent.parallel.choose_backend()`:py:func:
+
+        lossless
+            (optional) See `format_json_text()`:py:func:
+
+        kwargs
+            (optional) Keyword arguments, passed to
+            `format_json_text()`:py:func:
+
+    :Returns:
+        A list of the formatted texts, in the same order as `texts`
+
+    :Raises:
+        `JsonParseError`:py:exc: if any text cannot be parsed
+    """
+    if choose_backend(backend, jobs) == BACKEND_PROCESSES:
+        texts = [
+            bytes(text) if is_bytes_like(text) and not isinstance(text, (bytes, bytearray)) else text for text in texts
+        ]
+    return map_parallel(_TextFormatter(lossless, kwargs), texts, jobs=jobs, backend=backend)
+
+
+def format_files(
+    paths, inplace=False, newline=None, jobs=None, backend=BACKEND_AUTO, lossless=False, fsync=FSYNC_NEVER, **kwargs
+):
+    """
+    Read, parse, and format several JSON files, in parallel.
+
+    :Args:
+        paths
+            Paths of the files
+
+        inplace
+            (optional) If `True`-ish, write each formatted file back in place
+            (atomically, keeping its mode and ownership)
+
+        newline
+            (optional) The newline convention used in writing (see
+            `io.open()`:py:func:)
+
+        fsync
+            (optional) When files written in place are flushed to disk: one
+            of ``never`` (leaving it to the operating system), ``batch`` (all
+            at once, at the end, before they replace the originals), or
+            ``always`` (each one before it replaces the original)
+
+        jobs, backend, lossless, kwargs
+            (optional) See `format_texts()`:py:func:
+
+    :Returns:
+        A list of `FormatResult`:py:class: tuples, in the same order as
+        `paths`; each one holds a path, the input and output text, and the
+        exception (if any) which kept the file from being formatted
+    """
+    with fsync_batch(fsync):
+        return map_parallel(
+            _FileFormatter(inplace, newline, lossless, kwargs, fsync=fsync), paths, jobs=jobs, backend=backend
+        )
+
+
 def _compute_diff(filename, input_text, output_text, context_lines=DIFF_CONTEXT_LINES):
     input_filename = os.path.join("a", filename)
     output_filename = os.path.join("b", filename)
@@ -291,12 +832,115 @@ def _compute_diff(filename, input_text, output_text, context_lines=DIFF_CONTEXT_
     )
 
 
+def _add_output_arguments(argp):
+    """Add the options for writing formatted files other than one at a time."""
+    default_emit = None
+    default_concat = None
+    default_tag_paths = False
+    default_output_dir = None
+
+    output_group = argp.add_argument_group(title="output options")
+    output_group.add_argument(
+        "--output-dir",
+        action="store",
+        default=default_output_dir,
+        metavar="DIR",
+        help=(
+            "write formatted copies of the input files (and '*.json' files in input directories) under DIR, "
+            "at the same paths relative to the input directory (or, with several inputs, to the current "
+            "directory); copies already made from the same input contents (with the same options) are not "
+            "made again (default: {})".format(default_output_dir)
+        ),
+    )
+    output_group.add_argument(
+        "--emit",
+        action="append",
+        default=default_emit,
+        metavar="VARIANT:PATH",
+        help=(
+            "also write a variant ('pretty' or 'compact') of each formatted file to PATH, which may hold "
+            "placeholders: {}; may be given more than once, and each file is still parsed only once; "
+            "without '--inplace' or '--output', only the variants are written (default: {})".format(
+                ", ".join("{" + key + "}" for key in PLACEHOLDERS), default_emit
+            )
+        ),
+    )
+    output_group.add_argument(
+        "--concat",
+        action="store",
+        choices=CONCAT_FORMATS,
+        default=default_concat,
+        help=(
+            "format any number of input files (and '*.json' files in input directories) into the one output, "
+            "each document compacted onto its own line ('{}') or formatted as usual, one after another ('{}') "
+            "(default: {})".format(CONCAT_NDJSON, CONCAT_FRAMED, default_concat)
+        ),
+    )
+    output_group.add_argument(
+        "--tag-paths",
+        action="store_true",
+        default=default_tag_paths,
+        help=(
+            "with '--concat', wrap each document in an object holding its input file's path under '{}' "
+            "and the document under '{}' (default: {})".format(TAG_PATH_KEY, TAG_DATA_KEY, default_tag_paths)
+        ),
+    )
+
+
+def _add_parallel_arguments(argp):
+    """Add the options for formatting many files at once."""
+    default_jobs = 1
+    default_parallel_backend = BACKEND_AUTO
+    default_progress = False
+
+    parallel_group = argp.add_argument_group(title="parallelism options")
+    parallel_group.add_argument(
+        "-j",
+        "--jobs",
+        action="store",
+        type=int,
+        default=default_jobs,
+        metavar="N",
+        help="with '--inplace' or '--concat', format up to N files at once (default: {})".format(default_jobs),
+    )
+    parallel_group.add_argument(
+        "--parallel-backend",
+        action="store",
+        choices=BACKENDS,
+        default=default_parallel_backend,
+        help=(
+            "how to format files at once: in threads, in processes, or 'auto' (threads if the GIL is "
+            "disabled, else processes) (default: {})".format(default_parallel_backend)
+        ),
+    )
+    parallel_group.add_argument(
+        "--progress",
+        action="store_true",
+        default=default_progress,
+        help=(
+            "report files and bytes done, throughput, and the time left on stderr, in place on a terminal, "
+            "else as a line every {:g} seconds (default: {})".format(LINE_INTERVAL, default_progress)
+        ),
+    )
+
+
 def _setup_argparser(prog):
     default_indent = 2
     default_inplace = False
+    default_stream = False
+    default_git_staged = False
+    default_git_cache = False
+    default_watch = False
+    default_fsync = FSYNC_NEVER
+    default_io_profile = IO_PROFILE_DEFAULT
+    default_shard = None
+    default_shard_by = SHARD_BY_HASH
     default_newlines = NEWLINE_FORMAT_NATIVE
     default_sort = False
+    default_memory_limit = None
+    default_engine = ENGINE_AUTO
     default_compact = False
+    default_lossless = False
     default_debug = False
 
     argp = argparse.ArgumentParser(add_help=True, description="Parse/indent/pretty-print JSON data.")
@@ -317,7 +961,7 @@ def _setup_argparser(prog):
         dest="output_filename",
         default=None,
         metavar="OUTPUTFILE",
-        help=("output file, or '-' for stdout (default: stdout); " "conflicts with '--inplace'"),
+        help=("output file, or '-' for stdout (default: stdout); conflicts with '--inplace'"),
     )
     file_group.add_argument(
         "-I",
@@ -327,12 +971,97 @@ def _setup_argparser(prog):
         default=default_inplace,
         help="write changes to input file in place (default: {})".format(default_inplace),
     )
+    file_group.add_argument(
+        "--stream",
+        action="store_true",
+        default=default_stream,
+        help=(
+            "read a stream of concatenated JSON values and write each one as soon as it is complete "
+            "(default: {}); conflicts with '--inplace'".format(default_stream)
+        ),
+    )
+    file_group.add_argument(
+        "--git-staged",
+        action="store_true",
+        default=default_git_staged,
+        help=(
+            "check the contents staged in git (of the input files, or else of all staged '*.json' files) "
+            "rather than the working tree; with '--inplace', also rewrite working-tree files whose "
+            "contents match what is staged (default: {})".format(default_git_staged)
+        ),
+    )
+    file_group.add_argument(
+        "--git-cache",
+        action="store_true",
+        default=default_git_cache,
+        help=(
+            "with '--inplace', remember (in the git directory) which staged contents are already formatted, "
+            "and skip files which still hold them (default: {})".format(default_git_cache)
+        ),
+    )
+    file_group.add_argument(
+        "--watch",
+        action="store_true",
+        default=default_watch,
+        help=(
+            "watch the input files (and '*.json' files in input directories), and reformat each one in place "
+            "as soon as it changes; implies '--inplace' (default: {})".format(default_watch)
+        ),
+    )
+    file_group.add_argument(
+        "--fsync",
+        action="store",
+        choices=FSYNC_POLICIES,
+        default=default_fsync,
+        help=(
+            "files written in place are always replaced atomically; flush them to disk never (leaving it to "
+            "the operating system, so a crash soon after may still leave files empty or truncated), in one "
+            "batch before they all replace the originals at the end, or each one before it replaces the "
+            "original (default: {})".format(default_fsync)
+        ),
+    )
+    file_group.add_argument(
+        "--io-profile",
+        action="store",
+        choices=list(IO_PROFILES),
+        default=default_io_profile,
+        help=(
+            "how to read and write files: as Python does by default, or tuned for large files (with "
+            "megabyte buffers, sequential read-ahead, and preallocated output) (default: {})".format(default_io_profile)
+        ),
+    )
     file_group.add_argument(
         "--pre-commit",
         action="store_true",
         help="Shortcut for '--inplace --changed'",
     )
 
+    _add_output_arguments(argp)
+
+    shard_group = argp.add_argument_group(title="sharding options")
+    shard_group.add_argument(
+        "--shard",
+        action="store",
+        default=default_shard,
+        metavar="INDEX/COUNT",
+        help=(
+            "process only the input files in shard INDEX (counting from 1) of COUNT, so that COUNT runs "
+            "with the same files and options cover each file once (default: {})".format(default_shard)
+        ),
+    )
+    shard_group.add_argument(
+        "--shard-by",
+        action="store",
+        choices=SHARD_STRATEGIES,
+        default=default_shard_by,
+        help=(
+            "assign files to shards by a stable hash of their paths, or so that shards hold about the same "
+            "number of bytes (default: {})".format(default_shard_by)
+        ),
+    )
+
+    _add_parallel_arguments(argp)
+
     diff_group = argp.add_argument_group(title="diff options")
     diff_mutex_group = diff_group.add_mutually_exclusive_group()
     diff_mutex_group.add_argument(
@@ -404,6 +1133,15 @@ def _setup_argparser(prog):
         default=default_indent,
         help="number of spaces or string for indenting (default: {})".format(default_indent),
     )
+    json_group.add_argument(
+        "--lossless",
+        action="store_true",
+        default=default_lossless,
+        help=(
+            "copy numbers and strings exactly as written and change only whitespace "
+            "(and key order, with '--sort-keys') (default: {})".format(default_lossless)
+        ),
+    )
     json_group.add_argument(
         "-s",
         "--sort-keys",
@@ -411,6 +1149,26 @@ def _setup_argparser(prog):
         default=default_sort,
         help="sort output alphabetically by key (default: same order as read)",
     )
+    json_group.add_argument(
+        "--memory-limit",
+        action="store",
+        default=default_memory_limit,
+        metavar="SIZE",
+        help=(
+            "let formatting each file use about SIZE bytes (with an optional K, M, or G suffix) of memory; "
+            "larger files are streamed, holding objects in temporary files "
+            "(default: half of physical memory, shared among jobs)"
+        ),
+    )
+    json_group.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default=default_engine,
+        help=(
+            "how to format each file: decode it whole in memory, or stream it in bounded memory; "
+            "'{}' picks by file size and '--memory-limit' (default: {})".format(ENGINE_AUTO, default_engine)
+        ),
+    )
 
     completion_group = argp.add_argument_group(title="autocompletion options")
     completion_group.add_argument(
@@ -447,11 +1205,29 @@ def _normalize_path(path):
     return path
 
 
+def _emits_only(cli_args):
+    """Tell whether only variants of the input files are written (see ``--emit``)."""
+    return bool(cli_args.emit) and not cli_args.inplace and cli_args.output_filename is None
+
+
 def _check_input_and_output_filenames(cli_args):
     """Check args found by `argparse.ArgumentParser`:py:class: and regularize."""
     if len(cli_args.input_filenames) == 0:
         cli_args.input_filenames.append("-")  # default to stdin
 
+    if cli_args.output_dir is not None:
+        if "-" in cli_args.input_filenames:
+            raise RuntimeError("reading from stdin does not make sense with '--output-dir'")
+        return
+
+    if _emits_only(cli_args) or cli_args.concat:
+        # Any number of input files will do
+        if cli_args.input_filenames.count("-") > 1:
+            raise RuntimeError("stdin can only be read once")
+        if cli_args.concat:
+            _check_concat_output_filename(cli_args)
+        return
+
     if not cli_args.inplace:
         if cli_args.output_filename is None:
             cli_args.output_filename = "-"  # default to stdout
@@ -460,7 +1236,7 @@ def _check_input_and_output_filenames(cli_args):
         output_filename = _normalize_path(cli_args.output_filename)
         input_filename = _normalize_path(cli_args.input_filenames[0])
         if input_filename != "-" and input_filename == output_filename:
-            raise RuntimeError("input file and output file are the same; " "use '--inplace' to modify files in place")
+            raise RuntimeError("input file and output file are the same; use '--inplace' to modify files in place")
     else:
         if cli_args.output_filename is not None:
             raise RuntimeError("output files do not make sense with '--inplace'")
@@ -470,6 +1246,140 @@ def _check_input_and_output_filenames(cli_args):
                 raise RuntimeError("reading from stdin does not make sense with '--inplace'")
 
 
+def _check_concat_output_filename(cli_args):
+    if cli_args.output_filename is None:
+        cli_args.output_filename = "-"  # default to stdout
+    output_filename = _normalize_path(cli_args.output_filename)
+    if output_filename != "-" and output_filename in (_normalize_path(x) for x in cli_args.input_filenames):
+        raise RuntimeError("the output file is also an input file")
+
+
+def _check_concat_args(cli_args):
+    if not cli_args.concat:
+        if cli_args.tag_paths:
+            raise RuntimeError("'--tag-paths' only makes sense with '--concat'")
+        return
+    for option in ["inplace", "stream", "git_staged", "git_cache", "watch", "emit"]:
+        if getattr(cli_args, option):
+            raise RuntimeError("'--concat' does not make sense with '--{}'".format(option.replace("_", "-")))
+    if cli_args.engine == ENGINE_BOUNDED:
+        raise RuntimeError("'--concat' does not make sense with '--engine={}'".format(ENGINE_BOUNDED))
+
+
+def _check_output_dir_args(cli_args):
+    if cli_args.output_dir is None:
+        return
+    if cli_args.output_filename is not None:
+        raise RuntimeError("output files do not make sense with '--output-dir'")
+    for option in ["inplace", "stream", "git_staged", "git_cache", "watch", "emit", "concat"]:
+        if getattr(cli_args, option):
+            raise RuntimeError("'--output-dir' does not make sense with '--{}'".format(option.replace("_", "-")))
+    if cli_args.engine == ENGINE_BOUNDED:
+        raise RuntimeError("'--output-dir' does not make sense with '--engine={}'".format(ENGINE_BOUNDED))
+
+
+def _check_stream_args(cli_args):
+    if cli_args.stream and cli_args.inplace:
+        raise RuntimeError("'--stream' does not make sense with '--inplace'")
+
+
+def _check_git_staged_args(cli_args):
+    if not cli_args.git_staged:
+        return
+    if cli_args.stream:
+        raise RuntimeError("'--git-staged' does not make sense with '--stream'")
+    if cli_args.output_filename is not None:
+        raise RuntimeError("output files do not make sense with '--git-staged'")
+    if "-" in cli_args.input_filenames:
+        raise RuntimeError("reading from stdin does not make sense with '--git-staged'")
+
+
+def _check_git_cache_args(cli_args):
+    if cli_args.git_cache and not cli_args.inplace:
+        raise RuntimeError("'--git-cache' only makes sense with '--inplace'")
+    if cli_args.git_cache and cli_args.git_staged:
+        raise RuntimeError("'--git-cache' does not make sense with '--git-staged'")
+
+
+def _check_watch_args(cli_args):
+    if not cli_args.watch:
+        return
+    if cli_args.stream:
+        raise RuntimeError("'--watch' does not make sense with '--stream'")
+    if cli_args.git_staged:
+        raise RuntimeError("'--watch' does not make sense with '--git-staged'")
+    if cli_args.git_cache:
+        raise RuntimeError("'--watch' does not make sense with '--git-cache'")
+    if not cli_args.input_filenames:
+        raise RuntimeError("'--watch' needs files or directories to watch")
+    cli_args.inplace = True
+
+
+def _check_emit_args(cli_args):
+    if not cli_args.emit:
+        return
+    for option in ["stream", "git_staged", "git_cache", "watch"]:
+        if getattr(cli_args, option):
+            raise RuntimeError("'--emit' does not make sense with '--{}'".format(option.replace("_", "-")))
+    if cli_args.engine == ENGINE_BOUNDED:
+        raise RuntimeError("'--emit' does not make sense with '--engine={}'".format(ENGINE_BOUNDED))
+    try:
+        cli_args.emit = [parse_emit_spec(text) for text in cli_args.emit]
+    except ValueError as e:
+        raise RuntimeError(str(e))
+
+
+def _check_shard_args(cli_args):
+    if cli_args.shard is None:
+        return
+    if not (cli_args.inplace or cli_args.git_staged):
+        raise RuntimeError("'--shard' only makes sense with '--inplace' or '--git-staged'")
+    if cli_args.watch:
+        raise RuntimeError("'--shard' does not make sense with '--watch'")
+    if not (cli_args.input_filenames or cli_args.git_staged):
+        raise RuntimeError("'--shard' needs input files or directories")
+    try:
+        cli_args.shard = parse_shard_spec(cli_args.shard)
+    except ValueError as e:
+        raise RuntimeError(str(e))
+
+
+def _check_progress_args(cli_args):
+    if not cli_args.progress:
+        return
+    for option in ["stream", "git_staged", "watch"]:
+        if getattr(cli_args, option):
+            raise RuntimeError("'--progress' does not make sense with '--{}'".format(option.replace("_", "-")))
+
+
+def _check_jobs_args(cli_args):
+    if cli_args.jobs < 1:
+        raise RuntimeError("'--jobs' must be at least 1")
+
+
+def _check_memory_limit_args(cli_args):
+    if cli_args.memory_limit is None:
+        cli_args.memory_limit = default_memory_budget(cli_args.jobs)
+        return
+    for option in ["lossless", "stream", "git_staged", "git_cache"]:
+        if getattr(cli_args, option):
+            raise RuntimeError("'--memory-limit' does not make sense with '--{}'".format(option.replace("_", "-")))
+    try:
+        cli_args.memory_limit = parse_size(cli_args.memory_limit)
+    except ValueError as e:
+        raise RuntimeError(str(e))
+
+
+def _check_engine_args(cli_args):
+    if cli_args.engine != ENGINE_BOUNDED:
+        return
+    for option in ["lossless", "stream", "git_staged", "git_cache"]:
+        if getattr(cli_args, option):
+            raise RuntimeError(
+                "'--engine={}' does not make sense with '--{}'".format(ENGINE_BOUNDED, option.replace("_", "-"))
+            )
+
+
 def _check_completion_args(cli_args):
     return any([cli_args.completion_help, cli_args.bash_completion])
 
@@ -490,10 +1400,12 @@ def _check_pre_commit_args(cli_args):
 
 
 def _check_diff_args(cli_args):
-    if cli_args.show_changed and not cli_args.inplace:
-        raise RuntimeError("'-C/--show-changed' only makes sense with '--inplace'")
-    if cli_args.show_diff and not cli_args.inplace:
-        raise RuntimeError("'-D/--show-diff' only makes sense with '--inplace'")
+    if cli_args.inplace or cli_args.git_staged:
+        return
+    if cli_args.show_changed:
+        raise RuntimeError("'-C/--show-changed' only makes sense with '--inplace' or '--git-staged'")
+    if cli_args.show_diff:
+        raise RuntimeError("'-D/--show-diff' only makes sense with '--inplace' or '--git-staged'")
 
 
 def _check_program_args(program_args):
@@ -512,6 +1424,30 @@ def _check_program_args(program_args):
     return (program, program_args)
 
 
+def _expand_input_dirs(input_filenames):
+    """Replace each directory among the input files with the '*.json' files in and below it, in sorted order."""
+    filenames = []
+    for input_filename in input_filenames:
+        if input_filename == "-" or not os.path.isdir(input_filename):
+            filenames.append(input_filename)
+            continue
+        for dir_path, dir_names, file_names in os.walk(input_filename):
+            dir_names.sort()
+            filenames.extend(
+                os.path.join(dir_path, name) for name in sorted(file_names) if name.lower().endswith(JSON_SUFFIX)
+            )
+    return filenames
+
+
+def _indent(cli_args):
+    """Return the indent given on the command line, as a number of spaces or a string."""
+    try:
+        return int(cli_args.indent)
+    except ValueError:
+        # invalid literal for int() with base 10
+        return cli_args.indent
+
+
 def _compose_kwargs(cli_args):
     load_kwargs = {}
     dump_kwargs = {}
@@ -523,11 +1459,7 @@ def _compose_kwargs(cli_args):
     else:
         item_separator = ","
         key_separator = ": "
-        try:
-            indent = int(cli_args.indent)
-        except ValueError:
-            # invalid literal for int() with base 10
-            indent = cli_args.indent
+        indent = _indent(cli_args)
 
     load_kwargs["sort_keys"] = cli_args.sort_keys
 
@@ -538,6 +1470,709 @@ def _compose_kwargs(cli_args):
     return (load_kwargs, dump_kwargs)
 
 
+def _combine_statuses(*statuses):
+    """Combine per-file statuses; a syntax error trumps a change, which trumps success."""
+    if STATUS_SYNTAX_ERROR in statuses:
+        return STATUS_SYNTAX_ERROR
+    if STATUS_CHANGED in statuses:
+        return STATUS_CHANGED
+    return STATUS_OK
+
+
+def _translate_newlines(text, newline):
+    """Translate newlines in text the way writing it with `newline` would."""
+    newline = os.linesep if newline is None else newline
+    return text if newline == "\n" else text.replace("\n", newline)
+
+
+def _newline(cli_args):
+    """Return the newline which formatted text is written with."""
+    return _translate_newlines("\n", NEWLINE_VALUES[cli_args.newlines])
+
+
+def _is_formatted_text(input_text, cli_args, dump_kwargs):
+    """
+    Tell whether JSON text is already formatted, without decoding it.
+
+    Text which this cannot tell is formatted (including text which is not
+    valid JSON) is left for `_format_text()`:py:func: to format or reject.
+    """
+    return is_formatted(input_text, newline=_newline(cli_args), lossless=cli_args.lossless, **dump_kwargs)
+
+
+def _format_text(input_text, filename, cli_args, load_kwargs, dump_kwargs):
+    """Format JSON text; return the output text."""
+    return _format_text_variants(input_text, filename, cli_args, load_kwargs, [dump_kwargs])[0]
+
+
+def _format_text_variants(input_text, filename, cli_args, load_kwargs, kwargs_sets):
+    """Format JSON text in several ways, parsing it only once; return the output texts."""
+    if cli_args.lossless:
+        return _format_lossless(input_text, filename, kwargs_sets)
+    data = load_json_text(input_text, filename=filename, **load_kwargs)
+    return [dump_json_text(data, **dump_kwargs) for dump_kwargs in kwargs_sets]
+
+
+def _format_emitted(input_text, filename, cli_args, load_kwargs, dump_kwargs):
+    """
+    Format JSON text as the output and each variant to emit, parsing it only once.
+
+    :Returns:
+        A tuple of the output text (or `None` if only variants are written),
+        and a list of ``(EmitSpec, text)`` tuples for the variants
+    """
+    indent = _indent(cli_args)
+    kwargs_sets = [variant_dump_kwargs(spec.variant, indent, sort_keys=cli_args.sort_keys) for spec in cli_args.emit]
+    if not _emits_only(cli_args):
+        kwargs_sets.append(dump_kwargs)
+    texts = _format_text_variants(input_text, filename, cli_args, load_kwargs, kwargs_sets)
+    output_text = None if _emits_only(cli_args) else texts.pop()
+    return (output_text, list(zip(cli_args.emit, texts)))
+
+
+def _write_emitted(input_filename, cli_args, emitted):
+    """Write the variants of a formatted file to their paths."""
+    newline = NEWLINE_VALUES[cli_args.newlines]
+    for spec, text in emitted:
+        contents = _translate_newlines(text, newline).encode("utf-8")
+        path = emit_path(spec.template, input_filename, contents)
+        logger.debug("Emitting {} variant of {} to {}".format(spec.variant, input_filename, path))
+        with open(path, "wb") as f:
+            f.write(contents)
+
+
+def _write_output(output_iofile, output_text):
+    """Write output text to a file, leaving the file as it was if writing fails (and it is written atomically)."""
+    output_iofile.open_for_output()
+    try:
+        output_iofile.file.write(output_text)
+    except BaseException:
+        output_iofile.discard()
+        raise
+    output_iofile.close()
+
+
+def _report_change(filename, input_text, output_text, cli_args, verb="Reformatted"):
+    """Note that a file has changed, showing a diff if asked to."""
+    print("{} {}".format(verb, filename), file=sys.stderr)
+    if cli_args.show_diff:
+        for line in _compute_diff(filename, input_text, output_text):
+            print(line)
+
+
+def _cli_stream(cli_args, load_kwargs, dump_kwargs):
+    """Format each value in a stream of JSON values as soon as it is read."""
+    input_iofile = TextIOFile(cli_args.input_filenames[0], input_newline="")
+    output_iofile = TextIOFile(
+        cli_args.output_filename,
+        input_newline="",
+        output_newline=NEWLINE_VALUES[cli_args.newlines],
+    )
+
+    input_iofile.open_for_input()
+    output_iofile.open_for_output()
+    try:
+        if cli_args.lossless:
+            filename = input_iofile.file.name
+            tokens = iter_tokens_from_chunks(read_text_chunks(input_iofile.file), with_whitespace=True)
+            for text in iter_documents(tokens):
+                output_iofile.file.write(format_json_text(text, filename=filename, lossless=True, **dump_kwargs))
+                output_iofile.file.flush()
+        else:
+            for data in load_json_stream(input_iofile.file, **load_kwargs):
+                dump_json(data, output_iofile.file, **dump_kwargs)
+                output_iofile.file.flush()
+    except ValueError as e:
+        raise SystemExit(e)
+    finally:
+        output_iofile.close()
+        input_iofile.close()
+
+    return STATUS_OK
+
+
+def _working_file_matches(path, contents):
+    """Tell whether a working-tree file holds exactly the given (binary) contents."""
+    try:
+        with open(path, "rb") as f:
+            return f.read() == contents
+    except (IOError, OSError):
+        return False
+
+
+def _decode_contents(contents, path):
+    """
+    Decode a file's (binary) contents as UTF-8.
+
+    :Raises:
+        `JsonParseError`:py:exc: (naming the file) if they cannot be decoded
+    """
+    try:
+        return contents.decode("utf-8")
+    except UnicodeDecodeError as e:
+        raise JsonParseError(path, e)
+
+
+def _format_staged_file(staged_file, contents, cli_args, load_kwargs, dump_kwargs):
+    """Format or check the staged contents of one file; return its status."""
+    path = staged_file.path
+    try:
+        input_text = _decode_contents(contents, path)
+        if _is_formatted_text(input_text, cli_args, dump_kwargs):
+            output_text = input_text
+        else:
+            output_text = _format_text(input_text, path, cli_args, load_kwargs, dump_kwargs)
+            output_text = _translate_newlines(output_text, NEWLINE_VALUES[cli_args.newlines])
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return STATUS_SYNTAX_ERROR
+
+    if output_text == input_text:
+        return STATUS_OK
+
+    if not cli_args.inplace:
+        _report_change(path, input_text, output_text, cli_args, verb="Would reformat")
+        return STATUS_CHANGED
+
+    if not _working_file_matches(path, contents):
+        # Writing the file would clobber changes which are not staged
+        print("{}: not reformatted, as the working tree differs from what is staged".format(path), file=sys.stderr)
+        return STATUS_CHANGED
+
+    output_iofile = TextIOFile(path, output_newline="", atomic=True, fsync=cli_args.fsync)
+    _write_output(output_iofile, output_text)
+    if not (cli_args.show_changed or cli_args.show_diff):
+        return STATUS_OK
+    _report_change(path, input_text, output_text, cli_args)
+    return STATUS_CHANGED
+
+
+def _cli_git_staged(cli_args, load_kwargs, dump_kwargs):
+    """Format or check the staged contents of files, reading them all through one git process."""
+    statuses = []
+    try:
+        staged_files = list_staged_files(cli_args.input_filenames)
+        if cli_args.shard is not None:
+            staged_files = select_shard(
+                staged_files, cli_args.shard, strategy=cli_args.shard_by, get_path=lambda x: x.path
+            )
+        with BlobReader() as blob_reader, fsync_batch(cli_args.fsync):
+            for staged_file in staged_files:
+                contents = blob_reader.read(staged_file.blob_id)
+                statuses.append(_format_staged_file(staged_file, contents, cli_args, load_kwargs, dump_kwargs))
+    except GitError as e:
+        raise SystemExit(e)
+    return _combine_statuses(*statuses)
+
+
+def _formatting_options(cli_args, load_kwargs, dump_kwargs):
+    """Return the options which formatted output depends on, for keying caches."""
+    return {
+        "load": load_kwargs,
+        "dump": dump_kwargs,
+        "lossless": cli_args.lossless,
+        "newline": _translate_newlines("\n", NEWLINE_VALUES[cli_args.newlines]),
+    }
+
+
+def _open_git_cache(cli_args, load_kwargs, dump_kwargs):
+    """Open the cache of formatted git blobs, if asked to; return it, or `None` if it is unavailable."""
+    if not cli_args.git_cache:
+        return None
+    options = _formatting_options(cli_args, load_kwargs, dump_kwargs)
+    try:
+        return FormattedBlobCache(cli_args.input_filenames, options)
+    except GitError as e:
+        print("Not using the git cache: {e}".format(e=e), file=sys.stderr)
+        return None
+
+
+def _io_profile(cli_args):
+    """Return the `IOProfile`:py:class: chosen with '--io-profile'."""
+    return IO_PROFILES[cli_args.io_profile]
+
+
+def _start_progress(cli_args, sizes):
+    """
+    Start reporting progress, if asked to.
+
+    :Args:
+        sizes
+            The size of each input file (`None` for those not known)
+
+    :Returns:
+        A `Progress`:py:class:, or `None` if progress is not reported
+    """
+    if not cli_args.progress:
+        return None
+    total_bytes = None if None in sizes else sum(sizes)
+    return Progress(len(sizes), total_bytes)
+
+
+def _replace_if_changed(input_filename, temp_path, cli_args):
+    """
+    Replace an input file with the temporary file it was formatted to in bounded memory; return its status.
+
+    The input file is left alone (and the temporary file removed) if they
+    are the same.
+    """
+    try:
+        changed = not filecmp.cmp(input_filename, temp_path, False)
+        if is_observed():
+            emit(EVENT_CHANGED if changed else EVENT_UNCHANGED, input_filename)
+        if not changed:
+            # Rewriting the file would only make it (and git) look changed
+            logger.debug("Not rewriting {} (already formatted)".format(input_filename))
+            os.remove(temp_path)
+            return STATUS_OK
+        file_status = STATUS_OK
+        if cli_args.show_changed or cli_args.show_diff:
+            file_status = STATUS_CHANGED
+            if cli_args.show_diff:
+                with io.open(input_filename, encoding="utf-8", newline="") as f:
+                    input_text = f.read()
+                with io.open(temp_path, encoding="utf-8", newline="") as f:
+                    output_text = f.read()
+            else:
+                (input_text, output_text) = (None, None)
+            _report_change(input_filename, input_text, output_text, cli_args)
+        replace_file(temp_path, input_filename, fsync=cli_args.fsync)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return file_status
+
+
+def _cli_file_bounded(input_filename, cli_args, dump_kwargs, progress=None):
+    """
+    Format one input file in bounded memory (see '--memory-limit'); return its status.
+
+    Output is written as it is formatted, so when writing in place, it goes
+    to a temporary file which then replaces the input file, if they differ.
+    Bytes read are counted in `progress` (if any) as they are read.
+    """
+    newline = NEWLINE_VALUES[cli_args.newlines]
+    io_profile = _io_profile(cli_args)
+    input_iofile = TextIOFile(input_filename, input_newline="", io_profile=io_profile)
+    input_iofile.open_for_input()
+    if cli_args.inplace:
+        (fd, temp_path) = make_temp_file(input_filename)
+        output_file = io.open(fd, "w", buffering=io_profile.buffer_size, encoding="utf-8", newline=newline)
+        output_iofile = None
+    else:
+        output_iofile = TextIOFile(cli_args.output_filename, output_newline=newline, io_profile=io_profile)
+        output_file = output_iofile.open_for_output()
+
+    try:
+        try:
+            on_read = None if progress is None else progress.add_bytes
+            tokens = iter_tokens_from_chunks(read_text_chunks(input_iofile.file, io_profile.chunk_size, on_read))
+            memory_limit = bounded_memory_limit(cli_args.memory_limit, io_profile)
+            format_sorted(tokens, output_file.write, memory_limit=memory_limit, **dump_kwargs)
+            output_file.write("\n")
+        finally:
+            input_iofile.close()
+            if output_iofile is None:
+                output_file.close()
+            else:
+                output_iofile.close()
+    except ValueError as e:
+        error = JsonParseError(input_filename, e)
+        if is_observed():
+            emit(EVENT_SYNTAX_ERROR, input_filename, message=str(error))
+        if not cli_args.inplace:
+            raise SystemExit(error)
+        os.remove(temp_path)
+        print(error, file=sys.stderr)
+        return STATUS_SYNTAX_ERROR
+    except BaseException:
+        if cli_args.inplace:
+            os.remove(temp_path)
+        raise
+
+    if not cli_args.inplace:
+        return STATUS_OK
+    return _replace_if_changed(input_filename, temp_path, cli_args)
+
+
+def _file_size(input_filename):
+    """Return the size of an input file, or `None` if it is unknown."""
+    if input_filename == "-":
+        return None
+    try:
+        return os.path.getsize(input_filename)
+    except OSError:
+        # Opening it will report why
+        return None
+
+
+def _cli_file(input_filename, cli_args, load_kwargs, dump_kwargs, git_cache=None, progress=None):
+    """
+    Format one input file (in place, or to the output file) with the engine it needs; return its status.
+
+    The bytes of the file are counted in `progress` (if any), but not the
+    file itself.  Observers (see `json_indent.events`:py:mod:) are told when
+    the file is started and finished.
+    """
+    # Only the memory engine copies numbers and strings exactly, knows the git cache, and emits variants
+    can_stream = not (cli_args.lossless or cli_args.emit) and git_cache is None
+    size = _file_size(input_filename)
+    engine = choose_engine(size, cli_args.memory_limit, cli_args.engine) if can_stream else ENGINE_MEMORY
+    logger.debug(
+        "Formatting {} ({} bytes) with engine: {}".format(input_filename, "?" if size is None else size, engine)
+    )
+    observed = is_observed()
+    if observed:
+        emit(EVENT_FILE_START, input_filename, size=size, engine=engine)
+        start = time.perf_counter()
+    if engine == ENGINE_BOUNDED:
+        file_status = _cli_file_bounded(input_filename, cli_args, dump_kwargs, progress=progress)
+    else:
+        # Standard input cannot be read again
+        fallback = can_stream and size is not None
+        file_status = _cli_file_in_memory(
+            input_filename, cli_args, load_kwargs, dump_kwargs, git_cache, fallback=fallback
+        )
+        if progress is not None and size is not None:
+            progress.add_bytes(size)
+    if observed:
+        emit(EVENT_FILE_END, input_filename, status=file_status, seconds=time.perf_counter() - start)
+    return file_status
+
+
+def _format_input_text(input_text, filename, cli_args, load_kwargs, dump_kwargs):
+    """
+    Format an input file's text, and any variants of it to emit.
+
+    :Returns:
+        A tuple of the output text (or `None` if the text is already
+        formatted, or if only variants are written), and the variants (see
+        `_format_emitted()`:py:func:; `None` if none are emitted)
+    """
+    if cli_args.emit:
+        return _format_emitted(input_text, filename, cli_args, load_kwargs, dump_kwargs)
+    if _is_formatted_text(input_text, cli_args, dump_kwargs):
+        return (None, None)
+    return (_format_text(input_text, filename, cli_args, load_kwargs, dump_kwargs), None)
+
+
+def _cli_file_in_memory(input_filename, cli_args, load_kwargs, dump_kwargs, git_cache=None, fallback=False):
+    """
+    Format one input file, decoding it whole in memory; return its status.
+
+    If memory runs out while formatting (before anything is written), and
+    `fallback` is `True`-ish, the file is formatted in bounded memory instead.
+    """
+    if git_cache is not None and git_cache.is_formatted(input_filename):
+        logger.debug("Skipping {} (already formatted)".format(input_filename))
+        return STATUS_OK
+
+    file_status = STATUS_OK
+    emitted = None
+    input_iofile = TextIOFile(
+        input_filename,
+        input_newline="",
+        output_newline=NEWLINE_VALUES[cli_args.newlines],
+        atomic=cli_args.inplace,
+        fsync=cli_args.fsync,
+        io_profile=_io_profile(cli_args),
+    )
+    output_iofile = (
+        input_iofile
+        if cli_args.inplace
+        else TextIOFile(
+            cli_args.output_filename,
+            input_newline="",
+            output_newline=NEWLINE_VALUES[cli_args.newlines],
+            io_profile=_io_profile(cli_args),
+        )
+    )
+
+    input_iofile.open_for_input()
+
+    try:
+        try:
+            input_text = to_unicode(input_iofile.file.read())
+        except UnicodeDecodeError as e:
+            raise JsonParseError(input_filename, e)
+        if git_cache is not None and git_cache.contents_are_formatted(input_filename, input_text.encode("utf-8")):
+            input_iofile.close()
+            return STATUS_OK
+        (output_text, emitted) = _format_input_text(
+            input_text, input_iofile.file.name, cli_args, load_kwargs, dump_kwargs
+        )
+    except ValueError as e:
+        if not (cli_args.inplace or _emits_only(cli_args)):
+            raise SystemExit(e)
+        file_status = STATUS_SYNTAX_ERROR
+        print(e, file=sys.stderr)
+    except MemoryError:
+        input_iofile.close()
+        if not fallback:
+            raise
+        print(
+            "Not enough memory to format {} with engine: {}; retrying with engine: {}".format(
+                input_filename, ENGINE_MEMORY, ENGINE_BOUNDED
+            ),
+            file=sys.stderr,
+        )
+        return _cli_file_bounded(input_filename, cli_args, dump_kwargs)
+
+    input_iofile.close()
+
+    if emitted is not None:
+        _write_emitted(input_filename, cli_args, emitted)
+    if file_status == STATUS_SYNTAX_ERROR or _emits_only(cli_args):
+        return file_status
+
+    if output_text is None:
+        unchanged = True
+        output_text = input_text.replace(_newline(cli_args), "\n")
+    else:
+        unchanged = _translate_newlines(output_text, NEWLINE_VALUES[cli_args.newlines]) == input_text
+    if is_observed():
+        emit(EVENT_UNCHANGED if unchanged else EVENT_CHANGED, input_filename)
+    if unchanged and git_cache is not None:
+        git_cache.add(input_filename, input_text.encode("utf-8"))
+    if unchanged and (cli_args.inplace or git_cache is not None):
+        # Rewriting the file would only make it (and git) look changed
+        logger.debug("Not rewriting {} (already formatted)".format(input_filename))
+        return file_status
+
+    # Close enough to preallocate (the file is truncated to what is written)
+    output_iofile.output_size = len(output_text)
+    _write_output(output_iofile, output_text)
+    if cli_args.inplace and (cli_args.show_changed or cli_args.show_diff) and not unchanged:
+        # Not read back from the file: under ``--fsync batch`` it is only
+        # replaced once the whole batch is written
+        file_status = STATUS_CHANGED
+        output_text = _translate_newlines(output_text, NEWLINE_VALUES[cli_args.newlines])
+        _report_change(output_iofile.path, input_text, output_text, cli_args)
+    return file_status
+
+
+def _tag_text(text, path, dump_kwargs):
+    """Wrap formatted JSON text in an object which also holds the path of the file it came from."""
+    layout = Layout(indent=dump_kwargs.get("indent"), separators=dump_kwargs.get("separators"))
+    members = [
+        (TAG_PATH_KEY, json.dumps(path)),
+        # Newlines in formatted text only ever start lines, so indenting it is easy
+        (TAG_DATA_KEY, text[:-1].replace("\n", layout.newline_indent(1))),
+    ]
+    if dump_kwargs.get("sort_keys"):
+        members.sort()
+    parts = (json.dumps(key) + layout.key_separator + value for key, value in members)
+    return "{" + layout.newline_indent(1) + layout.item_break(1).join(parts) + layout.newline_indent(0) + "}\n"
+
+
+def _concat_file(input_filename, cli_args, load_kwargs, dump_kwargs):
+    """
+    Format one input file for concatenated output.
+
+    :Returns:
+        A tuple of the file's status and its formatted text (`None` if it
+        could not be parsed)
+    """
+    input_iofile = TextIOFile(input_filename, input_newline="")
+    input_iofile.open_for_input()
+    try:
+        input_text = to_unicode(input_iofile.file.read())
+        (output_text, _) = _format_input_text(input_text, input_iofile.file.name, cli_args, load_kwargs, dump_kwargs)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return (STATUS_SYNTAX_ERROR, None)
+    finally:
+        input_iofile.close()
+    if output_text is None:
+        output_text = input_text.replace(_newline(cli_args), "\n")
+    if cli_args.tag_paths:
+        output_text = _tag_text(output_text, input_filename, dump_kwargs)
+    return (STATUS_OK, output_text)
+
+
+def _cli_concat(cli_args, load_kwargs, dump_kwargs):
+    """Format every input file into the one output, one document after another; return their combined status."""
+    if cli_args.concat == CONCAT_NDJSON:
+        dump_kwargs = dict(dump_kwargs, indent=None, separators=(",", ":"))
+    input_filenames = cli_args.input_filenames
+    backend = choose_backend(cli_args.parallel_backend, min(cli_args.jobs, len(input_filenames)))
+    logger.debug("Concatenating {} file(s) with backend: {}".format(len(input_filenames), backend))
+    concat_file = functools.partial(_concat_file, cli_args=cli_args, load_kwargs=load_kwargs, dump_kwargs=dump_kwargs)
+    output_iofile = TextIOFile(cli_args.output_filename, output_newline=NEWLINE_VALUES[cli_args.newlines])
+    output_iofile.open_for_output()
+    sizes = [_file_size(x) for x in input_filenames]
+    progress = _start_progress(cli_args, sizes)
+    statuses = []
+    # Many small documents are written in few large writes
+    pending = []
+    pending_size = 0
+    batch_size = CONCAT_BATCH_FILES * cli_args.jobs
+    try:
+        for start in range(0, len(input_filenames), batch_size):
+            batch = input_filenames[start : start + batch_size]
+            results = map_parallel(concat_file, batch, jobs=cli_args.jobs, backend=backend)
+            for (status, text), size in zip(results, sizes[start : start + batch_size]):
+                statuses.append(status)
+                if progress is not None:
+                    progress.file_done(size or 0)
+                if text is None:
+                    continue
+                pending.append(text)
+                pending_size += len(text)
+                if pending_size >= CONCAT_BUFFER_SIZE:
+                    output_iofile.file.write("".join(pending))
+                    pending = []
+                    pending_size = 0
+        output_iofile.file.write("".join(pending))
+    finally:
+        output_iofile.close()
+        if progress is not None:
+            progress.close()
+    return _combine_statuses(*statuses)
+
+
+def _write_binary(path, contents):
+    with open(path, "wb") as f:
+        f.write(contents)
+
+
+def _mirror_file(input_path, contents, cli_args, load_kwargs, dump_kwargs):
+    """
+    Format one input file's (binary) contents for its copy.
+
+    :Returns:
+        The contents of the copy, or `None` if the input could not be decoded
+        or parsed
+    """
+    try:
+        input_text = _decode_contents(contents, input_path)
+        (output_text, _) = _format_input_text(input_text, input_path, cli_args, load_kwargs, dump_kwargs)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return None
+    if output_text is None:
+        # Already formatted, newlines and all
+        return contents
+    return _translate_newlines(output_text, NEWLINE_VALUES[cli_args.newlines]).encode("utf-8")
+
+
+def _cli_output_dir(cli_args, load_kwargs, dump_kwargs):
+    """
+    Write formatted copies of the input files under the output directory; return their combined status.
+
+    Input files are read ahead, and copies written behind, in other threads,
+    while files are formatted in this one.  Inputs which cannot be read (and
+    copies which cannot be written) are reported, and the others still
+    copied.
+    """
+    output_dir = cli_args.output_dir
+    try:
+        pairs = mirror_paths(cli_args.input_filenames, output_dir)
+    except ValueError as e:
+        raise SystemExit(e)
+    manifest = MirrorManifest(output_dir, _formatting_options(cli_args, load_kwargs, dump_kwargs))
+    pairs = [x for x in pairs if not manifest.is_up_to_date(*x)]
+    logger.debug("Copying {} out-of-date file(s) to {}".format(len(pairs), output_dir))
+    make_dirs(output_dir, [output_path for (_, output_path) in pairs])
+    progress = _start_progress(cli_args, [_file_size(input_path) for (input_path, _) in pairs])
+    statuses = []
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as reader:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as writer:
+                reads = collections.deque()
+                writes = []
+                for index, (input_path, output_path) in enumerate(pairs):
+                    for read_path, _ in pairs[index + len(reads) : index + 1 + MIRROR_READ_AHEAD]:
+                        reads.append(reader.submit(read_input, read_path))
+                    try:
+                        (input_stat_data, contents) = reads.popleft().result()
+                    except (IOError, OSError) as e:
+                        print(e, file=sys.stderr)
+                        statuses.append(STATUS_SYNTAX_ERROR)
+                        continue
+                    if progress is not None:
+                        progress.file_done(len(contents))
+                    digest = hash_contents(contents)
+                    if manifest.contents_are_unchanged(input_stat_data, output_path, digest):
+                        continue
+                    output_contents = _mirror_file(input_path, contents, cli_args, load_kwargs, dump_kwargs)
+                    if output_contents is None:
+                        statuses.append(STATUS_SYNTAX_ERROR)
+                        continue
+                    write = writer.submit(_write_binary, os.path.join(output_dir, output_path), output_contents)
+                    writes.append((write, input_stat_data, output_path, digest))
+                for write, input_stat_data, output_path, digest in writes:
+                    try:
+                        write.result()
+                    except (IOError, OSError) as e:
+                        print(e, file=sys.stderr)
+                        statuses.append(STATUS_SYNTAX_ERROR)
+                        continue
+                    manifest.add(input_stat_data, output_path, digest)
+    finally:
+        # Record the copies made, even if others failed
+        manifest.save()
+        if progress is not None:
+            progress.close()
+    return _combine_statuses(*statuses)
+
+
+def _cli_files(cli_args, load_kwargs, dump_kwargs, git_cache):
+    """Format each input file, several at once if asked to; return their statuses."""
+    input_filenames = cli_args.input_filenames
+    backend = choose_backend(cli_args.parallel_backend, min(cli_args.jobs, len(input_filenames)))
+    logger.debug("Formatting {} file(s) with backend: {}".format(len(input_filenames), backend))
+    if backend == BACKEND_PROCESSES and git_cache is not None:
+        # Other processes cannot record formatted files in the cache, but can skip those already in it
+        input_filenames = [x for x in input_filenames if not git_cache.is_formatted(x)]
+        git_cache = None
+    format_file = functools.partial(
+        _cli_file, cli_args=cli_args, load_kwargs=load_kwargs, dump_kwargs=dump_kwargs, git_cache=git_cache
+    )
+    sizes = [_file_size(x) for x in input_filenames]
+    progress = _start_progress(cli_args, sizes)
+    if progress is None:
+        return map_parallel(format_file, input_filenames, jobs=cli_args.jobs, backend=backend)
+    if backend == BACKEND_PROCESSES:
+        # Other processes cannot count the bytes they read, so each file counts whole once done
+        remaining_sizes = iter(sizes)
+
+        def file_done(_):
+            progress.file_done(next(remaining_sizes) or 0)
+
+    else:
+        format_file = functools.partial(format_file, progress=progress)
+
+        def file_done(_):
+            progress.file_done()
+
+    try:
+        return map_parallel(format_file, input_filenames, jobs=cli_args.jobs, backend=backend, callback=file_done)
+    finally:
+        progress.close()
+
+
+def _cli_watch(cli_args, load_kwargs, dump_kwargs, should_stop=None):
+    """Reformat watched files in place whenever they change, until interrupted."""
+
+    def reformat(paths):
+        with fsync_batch(cli_args.fsync):
+            for path in paths:
+                logger.debug("Changed: {}".format(path))
+                try:
+                    _cli_file(path, cli_args, load_kwargs, dump_kwargs)
+                except (IOError, OSError) as e:
+                    # The file may have gone again; keep watching the others
+                    print(e, file=sys.stderr)
+
+    try:
+        watch_paths(cli_args.input_filenames, reformat, should_stop=should_stop)
+    except KeyboardInterrupt:
+        pass
+    return STATUS_OK
+
+
 def cli(*program_args):
     """Process command-line."""
     (prog, program_args) = _check_program_args(program_args)
@@ -550,65 +2185,53 @@ def cli(*program_args):
         return STATUS_OK
 
     _check_pre_commit_args(cli_args)
+    _check_watch_args(cli_args)
     _check_diff_args(cli_args)
+    _check_stream_args(cli_args)
+    _check_git_staged_args(cli_args)
+    _check_git_cache_args(cli_args)
+    _check_emit_args(cli_args)
+    _check_concat_args(cli_args)
+    _check_output_dir_args(cli_args)
+    _check_shard_args(cli_args)
+    _check_jobs_args(cli_args)
+    _check_progress_args(cli_args)
+    _check_memory_limit_args(cli_args)
+    _check_engine_args(cli_args)
     _check_newlines(cli_args)
-    _check_input_and_output_filenames(cli_args)
 
     (load_kwargs, dump_kwargs) = _compose_kwargs(cli_args)
 
-    overall_status = STATUS_OK
+    if cli_args.git_staged:
+        return _cli_git_staged(cli_args, load_kwargs, dump_kwargs)
 
-    for input_filename in cli_args.input_filenames:
-        file_status = STATUS_OK
-        input_iofile = TextIOFile(
-            input_filename,
-            input_newline="",
-            output_newline=NEWLINE_VALUES[cli_args.newlines],
-        )
-        output_iofile = (
-            input_iofile
-            if cli_args.inplace
-            else TextIOFile(
-                cli_args.output_filename,
-                input_newline="",
-                output_newline=NEWLINE_VALUES[cli_args.newlines],
-            )
-        )
+    if (cli_args.inplace or cli_args.concat) and not cli_args.watch:
+        cli_args.input_filenames = _expand_input_dirs(cli_args.input_filenames)
 
-        input_iofile.open_for_input()
+    if cli_args.shard is not None:
+        cli_args.input_filenames = select_shard(cli_args.input_filenames, cli_args.shard, strategy=cli_args.shard_by)
+        if not cli_args.input_filenames:
+            logger.debug("No input files in shard {}/{}".format(*cli_args.shard))
+            return STATUS_OK
 
-        try:
-            (data, input_text) = load_json(input_iofile.file, with_text=True, **load_kwargs)
-        except ValueError as e:
-            if not cli_args.inplace:
-                raise SystemExit(e)
-            overall_status = STATUS_SYNTAX_ERROR
-            file_status = STATUS_SYNTAX_ERROR
-            print(e, file=sys.stderr)
-
-        input_iofile.close()
-
-        if file_status != STATUS_SYNTAX_ERROR:
-            output_iofile.open_for_output()
-            dump_json(data, output_iofile.file, **dump_kwargs)
-            output_iofile.close()
-            if cli_args.inplace and (cli_args.show_changed or cli_args.show_diff):
-                output_iofile.open_for_input()
-                output_text = output_iofile.file.read()
-                if input_text != output_text:
-                    file_status = STATUS_CHANGED
-                    if overall_status != STATUS_SYNTAX_ERROR:
-                        overall_status = file_status
-                    print(
-                        "Reformatted {}".format(output_iofile.file.name),
-                        file=sys.stderr,
-                    )
-                    if cli_args.show_diff:
-                        for line in _compute_diff(output_iofile.file.name, input_text, output_text):
-                            print(line)
-                output_iofile.close()
+    _check_input_and_output_filenames(cli_args)
 
-    return overall_status
+    for option, run in [
+        ("stream", _cli_stream),
+        ("watch", _cli_watch),
+        ("concat", _cli_concat),
+        ("output_dir", _cli_output_dir),
+    ]:
+        if getattr(cli_args, option):
+            return run(cli_args, load_kwargs, dump_kwargs)
+
+    git_cache = _open_git_cache(cli_args, load_kwargs, dump_kwargs)
+    with fsync_batch(cli_args.fsync if cli_args.inplace else FSYNC_NEVER):
+        statuses = _cli_files(cli_args, load_kwargs, dump_kwargs, git_cache)
+    if git_cache is not None:
+        git_cache.save()
+
+    return _combine_statuses(*statuses)
 
 
 def main(*program_args):
@@ -0,0 +1,137 @@
+"""
+Provide sharing object keys across many loaded documents.
+
+`json.loads()`:py:func: shares equal keys within one document, but each
+document gets its own copy of every key, so loading millions of small records
+with the same fields holds millions of copies of each field name.  A
+`KeyCache`:py:class: passed to each load (see
+`~json_indent.load_json_text()`:py:func:) makes them all share one copy.
+
+The cache also remembers the "shapes" of objects (their keys, in order): an
+object with a shape seen before takes all its keys from that shape in one
+lookup, rather than one lookup per key.  Both tables are bounded, and evict
+the least recently used entries first, so documents with ever-changing keys
+cost a bounded amount of memory.
+"""
+
+from __future__ import absolute_import
+
+import collections
+import json
+import threading
+
+# Default number of distinct keys kept
+DEFAULT_MAX_KEYS = 65536
+
+# Default number of distinct object shapes kept
+DEFAULT_MAX_SHAPES = 4096
+
+# Objects with more keys than this are not worth remembering the shape of
+MAX_SHAPE_SIZE = 64
+
+
+class KeyCache(object):
+    """
+    Provide a bounded table of object keys (and shapes) shared by the documents loaded with it.
+
+    The cache may be shared by threads.
+
+    :Args:
+        max_keys
+            (optional) The number of distinct keys to keep
+
+        max_shapes
+            (optional) The number of distinct object shapes to keep
+    """
+
+    def __init__(self, max_keys=DEFAULT_MAX_KEYS, max_shapes=DEFAULT_MAX_SHAPES):
+        self.max_keys = max_keys
+        self.max_shapes = max_shapes
+        self.keys = collections.OrderedDict()
+        self.shapes = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._decoders = {}
+
+    def _intern(self, key):
+        """Return the cached copy of a key, caching it first if need be."""
+        keys = self.keys
+        cached = keys.get(key)
+        if cached is not None:
+            keys.move_to_end(key)
+            return cached
+        keys[key] = key
+        if len(keys) > self.max_keys:
+            keys.popitem(last=False)
+        return key
+
+    def intern_shape(self, shape):
+        """
+        Return the cached copy of an object's shape.
+
+        :Args:
+            shape
+                A tuple of an object's keys, in order
+
+        :Returns:
+            An equal tuple of the cached copies of the keys
+        """
+        with self._lock:
+            shapes = self.shapes
+            cached = shapes.get(shape)
+            if cached is not None:
+                self.hits += 1
+                shapes.move_to_end(shape)
+                return cached
+            self.misses += 1
+            cached = tuple([self._intern(key) for key in shape])
+            if len(shape) <= MAX_SHAPE_SIZE:
+                shapes[cached] = cached
+                if len(shapes) > self.max_shapes:
+                    shapes.popitem(last=False)
+            return cached
+
+    def object_pairs_hook(self, factory=dict):
+        """
+        Return a hook for `json.loads()`:py:func: which builds objects with cached keys.
+
+        :Args:
+            factory
+                (optional) The mapping type to build, from ``(key, value)``
+                pairs (e.g., `collections.OrderedDict`:py:class:)
+        """
+        intern_shape = self.intern_shape
+
+        def object_pairs_hook(pairs):
+            if not pairs:
+                return factory()
+            (shape, values) = zip(*pairs)
+            return factory(zip(intern_shape(shape), values))
+
+        return object_pairs_hook
+
+    def decoder(self, factory=dict):
+        """
+        Return a decoder which builds objects with cached keys.
+
+        Decoding many small documents with the same decoder saves making a
+        new one for each, as `json.loads()`:py:func: does.
+
+        :Args:
+            factory
+                (optional) See `object_pairs_hook()`:py:meth:
+
+        :Returns:
+            A `json.JSONDecoder`:py:class:
+        """
+        decoder = self._decoders.get(factory)
+        if decoder is None:
+            decoder = self._decoders[factory] = json.JSONDecoder(object_pairs_hook=self.object_pairs_hook(factory))
+        return decoder
+
+    def clear(self):
+        """Forget every cached key and shape."""
+        with self._lock:
+            self.keys.clear()
+            self.shapes.clear()
@@ -0,0 +1,620 @@
+"""
+Provide lazy loading of JSON documents, decoding each part only when it is accessed.
+
+Loading first scans the text once for the boundaries of its objects and
+arrays, without decoding anything.  Each large object or array then stands
+for itself as a proxy (`LazyObject`:py:class: or `LazyArray`:py:class:),
+which decodes just its own level with `json.loads()` when accessed, and
+caches the result: its scalars become Python values, and its large objects
+and arrays become proxies in turn.  Small objects and arrays are decoded
+along with the level holding them.  An object's level is decoded whole on
+first access, but an array is split into chunks of elements (about as large
+as the smallest large object or array), and each chunk is decoded only when
+an element in it is accessed.
+
+So the cost of parsing, and the memory used, grow with what is accessed,
+rather than with the size of the document.  Only the scan is done up front,
+so most syntax errors are found only when the part holding them is
+accessed.
+"""
+
+from __future__ import absolute_import
+
+import array
+import bisect
+import collections
+import json
+import operator
+import re
+from collections.abc import Mapping, Sequence
+
+from json_indent.decoder import DECODE_JSON_KWARGS, decode_json
+
+# Keyword arguments of `json.loads()`:py:func: which `load_lazy()`:py:func: supports
+LOAD_LAZY_KWARGS = frozenset(["parse_float", "parse_int", "parse_constant"])
+
+# Objects and arrays with fewer characters than this are decoded along with their parents
+LAZY_MIN_SIZE = 4096
+
+# Stands in for a large object or array while decoding the level holding it
+_PLACEHOLDER = "[]"
+
+# Strings passed over at most in one match of a regex (as the regex engine
+# keeps memory for each, to backtrack to)
+_MAX_STRINGS = 1000
+
+# Matches up to and including the next bracket outside of strings, or else
+# as far as it can within `_MAX_STRINGS` strings; unrolled, so that failing
+# to match takes linear time
+_STRUCTURE_RE = re.compile(r'[^"\[\]{}]*(?:"[^"\\]*(?:\\[\s\S][^"\\]*)*"[^"\[\]{}]*){0,%d}([\[\]{}])?' % _MAX_STRINGS)
+
+# Matches text holding no brackets outside of strings (unrolled, as above)
+_FLAT = r'[^"\[\]{}]*(?:"[^"\\]*(?:\\[\s\S][^"\\]*)*"[^"\[\]{}]*)*'
+
+# Objects and arrays nested at most this deep (counting themselves) are
+# skipped in one step while scanning, if they are small
+_SKIP_DEPTH = 4
+
+
+def _nested_re(depth):
+    """Compile a regex matching an object or array nested at most `depth` deep."""
+    pattern = None
+    for _ in range(depth):
+        inner = _FLAT if pattern is None else _FLAT + "(?:(?:" + pattern + ")" + _FLAT + ")*"
+        pattern = r"\[" + inner + r"\]|\{" + inner + r"\}"
+    return re.compile(pattern)
+
+
+_NESTED_RE = _nested_re(_SKIP_DEPTH)
+
+# Commas tried in turn by decoding, to find one which is outside of strings
+_COMMA_TRIES = 4
+
+# Matches a string (unrolled, as above)
+_STRING_RE = re.compile(r'"[^"\\]*(?:\\[\s\S][^"\\]*)*"')
+
+# In text holding no brackets outside of strings, match as far as can be
+# without ending inside a string, and up to and including the next comma
+# outside of strings
+_STRINGS_RE = re.compile(r'[^"]*(?:"[^"\\]*(?:\\[\s\S][^"\\]*)*"[^"]*)*')
+_NEXT_COMMA_RE = re.compile(r'[^",]*(?:"[^"\\]*(?:\\[\s\S][^"\\]*)*"[^",]*)*,')
+
+_CLOSERS = {"[": "]", "{": "}"}
+
+_WHITESPACE = " \t\n\r"
+
+
+def _raise_syntax_error(message, text, pos):
+    raise json.JSONDecodeError(message, text, pos)
+
+
+class _Document(object):
+    """
+    Provide the text of a lazily loaded document, and the boundaries of its large objects and arrays.
+
+    Entries for objects and arrays are in the order they start; for each,
+    `starts`:py:attr: and `ends`:py:attr: hold where its text starts and ends
+    (just after its closing bracket), and `skips`:py:attr: holds the index of
+    the entry after its last descendant.  The descendants of small objects
+    and arrays are not recorded.
+    """
+
+    __slots__ = ("text", "starts", "ends", "skips", "min_size", "mapping", "json_kwargs", "decoders", "outer_pairs")
+
+    def __init__(self, text, min_size=LAZY_MIN_SIZE, mapping=collections.OrderedDict, json_kwargs=None):
+        self.text = text
+        self.starts = array.array("q")
+        self.ends = array.array("q")
+        self.skips = array.array("q")
+        self.min_size = min_size
+        self.mapping = mapping
+        self.json_kwargs = json_kwargs or {}
+        # A decoder for each object_pairs_hook (json.loads() would set up a new one for every level)
+        self.decoders = {}
+        self.outer_pairs = None
+
+    def scan(self):
+        """
+        Find the boundaries of the objects and arrays in the text.
+
+        :Raises:
+            `json.JSONDecodeError`:py:exc: if brackets are unbalanced or
+            there is text after the first value
+        """
+        text = self.text
+        (starts, ends, skips) = (self.starts, self.ends, self.skips)
+        min_size = self.min_size
+        match_structure = _STRUCTURE_RE.match
+        match_nested = _NESTED_RE.match
+        # The indices of the entries for the objects and arrays still open
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        pos = 0
+        while True:
+            m = match_structure(text, pos)
+            bracket = m.group(1)
+            if bracket is None:
+                if m.end() == pos:
+                    # The end of the text (or a string which is never closed)
+                    break
+                pos = m.end()
+                continue
+            pos = m.end()
+            if bracket in _CLOSERS:
+                if not stack and starts:
+                    _raise_syntax_error("Extra data", text, pos - 1)
+                # A small object or array is passed over whole, if it is not too deep
+                m = match_nested(text, pos - 1, pos - 2 + min_size)
+                starts.append(pos - 1)
+                if m is not None:
+                    pos = m.end()
+                    ends.append(pos)
+                    skips.append(len(starts))
+                    continue
+                push(len(starts) - 1)
+                ends.append(0)
+                skips.append(0)
+                continue
+            if not stack or _CLOSERS[text[starts[stack[-1]]]] != bracket:
+                _raise_syntax_error("Unbalanced '{}'".format(bracket), text, pos - 1)
+            index = pop()
+            ends[index] = pos
+            if pos - starts[index] < min_size and len(starts) > index + 1:
+                # The object or array will be decoded whole, so its descendants need no entries
+                del starts[index + 1 :], ends[index + 1 :], skips[index + 1 :]
+            skips[index] = len(starts)
+        if stack:
+            _raise_syntax_error("Unbalanced '{}'".format(text[starts[stack[-1]]]), text, len(text))
+
+    def loads(self, text):
+        kwargs = dict(self.json_kwargs, object_pairs_hook=self.mapping)
+        try:
+            return json.loads(text, **kwargs)
+        except RecursionError:
+            if not DECODE_JSON_KWARGS.issuperset(kwargs):
+                raise
+            return decode_json(text, **kwargs)
+
+    def proxy(self, index):
+        """Return a proxy for the object or array with entry `index`."""
+        return (LazyArray if self.text[self.starts[index]] == "[" else LazyObject)(self, index)
+
+    def _raise_located_error(self, start, end, is_chunk=False):
+        """Raise the error from decoding text (or a chunk of array elements) whole, located within the document."""
+        text = self.text[start:end]
+        try:
+            self.loads("[" + text + "]" if is_chunk else text)
+        except json.JSONDecodeError as e:
+            _raise_syntax_error(e.msg, self.text, start + e.pos - (1 if is_chunk else 0))
+        raise AssertionError("decoding a level failed, but decoding it whole did not")
+
+    def _split(self, pos, end, child, stop):
+        """
+        Split text into pieces which leave out the large objects and arrays in it.
+
+        :Args:
+            pos, end
+                Where the text starts and ends
+
+            child, stop
+                The entries for the objects and arrays which may be in the
+                text: from `child`, following `skips`:py:attr:, up to `stop`
+
+        :Returns:
+            A tuple of the pieces, with a placeholder for each large object
+            or array, and a list of the proxy (or, for small objects and
+            arrays, `None`) for each object or array directly in the text, in
+            order
+        """
+        text = self.text
+        (starts, ends, skips) = (self.starts, self.ends, self.skips)
+        min_size = self.min_size
+        pieces = []
+        children = []
+        while child < stop and starts[child] < end:
+            if ends[child] - starts[child] >= min_size:
+                pieces.append(text[pos : starts[child]])
+                pieces.append(_PLACEHOLDER)
+                pos = ends[child]
+                children.append(self.proxy(child))
+            else:
+                children.append(None)
+            child = skips[child]
+        pieces.append(text[pos:end])
+        return (pieces, children)
+
+    def _loads_level(self, text, object_pairs_hook):
+        decoder = self.decoders.get(object_pairs_hook)
+        if decoder is None:
+            decoder = json.JSONDecoder(object_pairs_hook=object_pairs_hook, **self.json_kwargs)
+            self.decoders[object_pairs_hook] = decoder
+        try:
+            return decoder.decode(text)
+        except RecursionError:
+            return decode_json(text, **dict(self.json_kwargs, object_pairs_hook=object_pairs_hook))
+
+    def _keep_pairs(self, pairs):
+        # Objects are decoded inside out, so the last pairs kept are the outermost object's
+        self.outer_pairs = pairs
+        return self.mapping(pairs)
+
+    def decode_level(self, index):
+        """
+        Decode one level of the object with entry `index`.
+
+        :Returns:
+            A mapping, holding proxies for any large objects or arrays in it
+
+        :Raises:
+            `json.JSONDecodeError`:py:exc: if the level cannot be parsed
+        """
+        (start, end) = (self.starts[index], self.ends[index])
+        (pieces, children) = self._split(start, end, index + 1, self.skips[index])
+        try:
+            self._loads_level("".join(pieces), self._keep_pairs)
+        except json.JSONDecodeError:
+            self._raise_located_error(start, end)
+        # The members of this object, before duplicate keys are merged
+        (pairs, self.outer_pairs) = (self.outer_pairs, None)
+        values = list(_with_proxies((value for (_, value) in pairs), children))
+        mapping = self.mapping(zip((key for (key, _) in pairs), values))
+        if len(mapping) < len(values):
+            # Values replaced by a later one for the same key are never accessed, so are checked now
+            kept = set(id(value) for value in mapping.values())
+            for value in values:
+                if isinstance(value, _LazyContainer) and id(value) not in kept:
+                    self.check(value._index)
+        return mapping
+
+    def check(self, index):
+        """
+        Check that the object or array with entry `index` can be decoded, without keeping it.
+
+        :Raises:
+            `json.JSONDecodeError`:py:exc: if it cannot be parsed
+        """
+        (start, end) = (self.starts[index], self.ends[index])
+        try:
+            self.loads(self.text[start:end])
+        except json.JSONDecodeError as e:
+            _raise_syntax_error(e.msg, self.text, start + e.pos)
+
+    def index_elements(self, index):
+        """
+        Split the elements of the array with entry `index` into chunks, to decode one at a time.
+
+        Chunks are cut at the first comma after at least `min_size`:py:attr:
+        characters of elements.
+
+        :Returns:
+            A tuple ``(bounds, firsts, children)`` of arrays: chunk ``i``
+            holds the text from ``bounds[i]`` up to (not including) the comma
+            or closing bracket at ``bounds[i + 1] - 1``; ``firsts[i]`` is the
+            position of its first element in the array, and ``firsts[-1]``
+            the length of the array; and ``children[i]`` is the entry for
+            the first object or array which may be in it
+        """
+        text = self.text
+        (starts, ends, skips) = (self.starts, self.ends, self.skips)
+        min_size = self.min_size
+        pos = starts[index] + 1
+        (bounds, firsts, children) = (array.array("q", [pos]), array.array("q", [0]), array.array("q", [index + 1]))
+        # Commas (outside of strings and nested objects and arrays) so far
+        count = 0
+        (child, stop) = (index + 1, skips[index])
+        while True:
+            # The text before the next object or array in the array holds no brackets
+            gap_end = starts[child] if child < stop else ends[index] - 1
+            while True:
+                found = _find_comma(text, pos, max(pos, bounds[-1] + min_size - 1), gap_end)
+                if found is None:
+                    break
+                count += found[1] + 1
+                pos = found[0] + 1
+                bounds.append(pos)
+                firsts.append(count)
+                children.append(child)
+            count += _count_commas(text, pos, gap_end)
+            if child >= stop:
+                break
+            pos = ends[child]
+            child = skips[child]
+        # There is one more element than commas, unless there are none
+        empty = count == 0 and stop == index + 1 and not text[bounds[0] : ends[index] - 1].strip(_WHITESPACE)
+        bounds.append(ends[index])
+        firsts.append(0 if empty else count + 1)
+        return (bounds, firsts, children)
+
+    def decode_chunk(self, index, elements_index, chunk):
+        """
+        Decode one chunk of the elements of the array with entry `index`.
+
+        :Args:
+            elements_index
+                The chunks of the array, from `index_elements()`:py:meth:
+
+            chunk
+                The position of the chunk among them
+
+        :Returns:
+            A list of the elements, holding proxies for any large objects or
+            arrays among them
+
+        :Raises:
+            `json.JSONDecodeError`:py:exc: if the chunk cannot be parsed
+        """
+        (bounds, firsts, children) = elements_index
+        (start, end) = (bounds[chunk], bounds[chunk + 1] - 1)
+        (pieces, children) = self._split(start, end, children[chunk], self.skips[index])
+        try:
+            values = self._loads_level("[" + "".join(pieces) + "]", self.mapping)
+        except json.JSONDecodeError:
+            self._raise_located_error(start, end, is_chunk=True)
+        if len(values) != firsts[chunk + 1] - firsts[chunk]:
+            # Only if elements are missing (e.g., before a comma a chunk was cut at)
+            self._raise_located_error(self.starts[index], self.ends[index])
+        return list(_with_proxies(values, children))
+
+
+def _decoded_commas(text, pos, end):
+    """
+    Count the commas outside of strings in text holding no brackets outside of strings, by decoding the elements in it.
+
+    Decoding passes over strings quicker than a regex.
+
+    :Returns:
+        The number of commas, or `None` if the text cannot be decoded (as
+        when it ends inside a string)
+    """
+    elements = text[pos:end].strip(_WHITESPACE)
+    (lead, trail) = (elements.startswith(","), elements.endswith(","))
+    core = elements[lead : len(elements) - trail]
+    if not core.strip(_WHITESPACE):
+        return elements.count(",")
+    try:
+        return lead + trail + len(json.loads("[" + core + "]")) - 1
+    except ValueError:
+        return None
+
+
+def _count_commas(text, pos, end):
+    """Count the commas outside of strings in text holding no brackets outside of strings."""
+    commas = text.count(",", pos, end)
+    if commas and text.find('"', pos, end) >= 0:
+        decoded_commas = _decoded_commas(text, pos, end)
+        commas = _STRING_RE.sub("", text[pos:end]).count(",") if decoded_commas is None else decoded_commas
+    return commas
+
+
+def _find_comma(text, pos, start, end):
+    """
+    Find the first comma outside of strings from `start`, in text holding no brackets outside of strings.
+
+    :Args:
+        pos
+            A position before `start`, outside of strings
+
+    :Returns:
+        A tuple of the position of the comma, and the number of commas
+        (outside of strings) between `pos` and it; or `None` if there is no
+        such comma before `end`
+    """
+    comma = text.find(",", start, end)
+    if comma >= 0 and text.find('"', pos, comma) < 0:
+        return (comma, text.count(",", pos, comma))
+    for _ in range(_COMMA_TRIES):
+        if comma < 0:
+            return None
+        # A comma inside a string leaves the string before it unclosed
+        commas = _decoded_commas(text, pos, comma)
+        if commas is not None:
+            return (comma, commas)
+        comma = text.find(",", comma + 1, end)
+    # Many commas in strings (or text which cannot be decoded): pass over the strings
+    m = _NEXT_COMMA_RE.match(text, _STRINGS_RE.match(text, pos, start).end(), end)
+    if m is None:
+        return None
+    return (m.end() - 1, _count_commas(text, pos, m.end() - 1))
+
+
+def _with_proxies(values, children):
+    """
+    Put proxies in place of the placeholders among decoded values.
+
+    :Args:
+        children
+            A list of the proxy (or `None`) for each object or array among
+            the values, in order (see `_Document._split()`:py:meth:)
+    """
+    # Objects and arrays decoded are in the same order as `children`
+    children = iter(children)
+    for value in values:
+        proxy = next(children) if isinstance(value, (list, dict)) else None
+        yield value if proxy is None else proxy
+
+
+class _LazyContainer(object):
+    """Provide what `LazyObject`:py:class: and `LazyArray`:py:class: have in common."""
+
+    __slots__ = ()
+
+    def to_python(self):
+        """Return the whole object or array, decoded as `json.loads()`:py:func: would."""
+        document = self._document
+        return document.loads(document.text[document.starts[self._index] : document.ends[self._index]])
+
+    def __repr__(self):
+        state = "decoded" if self.is_decoded else "not yet decoded"
+        return "<{} ({})>".format(self.__class__.__name__, state)
+
+
+class LazyObject(_LazyContainer, Mapping):
+    """
+    Provide read-only, dict-like access to an object which is decoded on first access.
+
+    As with `json.loads()`:py:func:, when a key appears more than once, the
+    last value is used.
+    """
+
+    __slots__ = ("_document", "_index", "_value")
+
+    def __init__(self, document, index):
+        self._document = document
+        self._index = index
+        self._value = None
+
+    def _decoded(self):
+        if self._value is None:
+            self._value = self._document.decode_level(self._index)
+        return self._value
+
+    @property
+    def is_decoded(self):
+        """Tell whether this object has been decoded yet."""
+        return self._value is not None
+
+    def __len__(self):
+        return len(self._decoded())
+
+    def __getitem__(self, key):
+        return self._decoded()[key]
+
+    def __iter__(self):
+        return iter(self._decoded())
+
+    def __contains__(self, key):
+        return key in self._decoded()
+
+
+class LazyArray(_LazyContainer, Sequence):
+    """
+    Provide read-only, list-like access to an array whose elements are decoded a chunk at a time, on access.
+
+    Slices are returned as lists.
+    """
+
+    __slots__ = ("_document", "_index", "_elements_index", "_chunks")
+
+    def __init__(self, document, index):
+        self._document = document
+        self._index = index
+        self._elements_index = None
+        # The decoded elements of each chunk (`None` for those not decoded yet)
+        self._chunks = None
+
+    def _indexed(self):
+        if self._elements_index is None:
+            self._elements_index = self._document.index_elements(self._index)
+            self._chunks = [None] * (len(self._elements_index[0]) - 1)
+        return self._elements_index
+
+    def _chunk(self, chunk):
+        elements = self._chunks[chunk]
+        if elements is None:
+            elements = self._chunks[chunk] = self._document.decode_chunk(self._index, self._elements_index, chunk)
+        return elements
+
+    @property
+    def is_decoded(self):
+        """Tell whether every element of this array has been decoded yet."""
+        return self._chunks is not None and None not in self._chunks
+
+    def __len__(self):
+        return self._indexed()[1][-1]
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[x] for x in range(*position.indices(len(self)))]
+        position = operator.index(position)
+        firsts = self._indexed()[1]
+        if position < 0:
+            position += firsts[-1]
+        if not 0 <= position < firsts[-1]:
+            raise IndexError("list index out of range")
+        chunk = bisect.bisect_right(firsts, position) - 1
+        return self._chunk(chunk)[position - firsts[chunk]]
+
+    def __iter__(self):
+        self._indexed()
+        for chunk in range(len(self._chunks)):
+            yield from self._chunk(chunk)
+
+    def iter_chunks(self):
+        """
+        Yield the elements of each chunk in turn, as lists, without keeping chunks decoded only for this.
+
+        Unlike iterating over the array, a single pass over an array too
+        large to keep decoded needs only one chunk at a time.
+        """
+        (_bounds, firsts, _children) = self._indexed()
+        for chunk in range(len(firsts) - 1):
+            elements = self._chunks[chunk]
+            if elements is None:
+                elements = self._document.decode_chunk(self._index, self._elements_index, chunk)
+            yield elements
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, tuple, LazyArray)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+
+LAZY_VIEW_TYPES = (LazyObject, LazyArray)
+
+
+def load_lazy(text, min_size=None, unordered=False, **kwargs):
+    """
+    Load JSON text lazily.
+
+    :Args:
+        text
+            Raw JSON text
+
+        min_size
+            (optional) Objects and arrays with fewer characters than this
+            are decoded along with the level holding them (default:
+            ``LAZY_MIN_SIZE``)
+
+        unordered
+            (optional) Whether decoded objects need not keep the order of
+            their keys (default: `False`)
+
+        kwargs
+            (optional) Keyword arguments with the same meanings as for
+            `json.loads()`:py:func:; only those in ``LOAD_LAZY_KWARGS`` are
+            supported
+
+    :Returns:
+        A `LazyObject`:py:class: or `LazyArray`:py:class: proxy for the
+        document; or, if the document is a scalar or smaller than
+        `min_size`, the fully decoded document
+
+    :Raises:
+        - `json.JSONDecodeError`:py:exc: if the structure of `text` is
+          invalid (other errors are raised on access)
+        - `TypeError`:py:exc: if an unsupported keyword argument is given
+    """
+    unsupported = sorted(set(kwargs) - LOAD_LAZY_KWARGS)
+    if unsupported:
+        raise TypeError("unsupported keyword argument(s) for load_lazy(): {}".format(", ".join(unsupported)))
+    min_size = LAZY_MIN_SIZE if min_size is None else min_size
+    document = _Document(text, min_size, dict if unordered else collections.OrderedDict, kwargs)
+    start = len(text) - len(text.lstrip(_WHITESPACE))
+    if text[start : start + 1] not in _CLOSERS:
+        return document.loads(text)
+    document.scan()
+    if document.starts[0] != start:
+        _raise_syntax_error("Expecting value", text, start)
+    end = document.ends[0]
+    if text[end:].strip(_WHITESPACE):
+        _raise_syntax_error("Extra data", text, end)
+    if end - start < min_size:
+        return document.loads(text)
+    return document.proxy(0)
@@ -0,0 +1,219 @@
+"""
+Provide mirroring trees of JSON files into an output directory.
+
+Formatted copies of the input files are written under the output directory,
+at the same paths relative to the input directory they were found in (or,
+with several inputs, to the current directory).  A
+manifest kept there records the stat data and content hash of the input each
+copy was made from (under which options), so that a later run need only
+format the inputs which have changed since: an input whose stat data is
+unchanged is skipped without being opened, and one whose contents are
+unchanged (say, after a fresh checkout) without being decoded.
+"""
+
+from __future__ import absolute_import
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from json_indent.git import JSON_SUFFIX
+from json_indent.gitcache import compute_options_key
+
+logger = logging.getLogger(__name__)
+
+# Name of the manifest file in the output directory
+MANIFEST_NAME = ".json-indent-mirror"
+
+
+def _real_path(path):
+    return os.path.normcase(os.path.realpath(path))
+
+
+def _input_output_path(path):
+    """Return the relative path the copy of an input file or directory goes to, among several inputs."""
+    path = os.path.normpath(path)
+    if os.path.isabs(path):
+        try:
+            path = os.path.relpath(path)
+        except ValueError:
+            # On another drive (on Windows)
+            return os.path.basename(path)
+    if path == os.pardir or path.startswith(os.pardir + os.sep):
+        # Only paths inside the current directory can be mirrored as they are
+        return os.path.basename(path)
+    return path
+
+
+def _check_output_paths(pairs):
+    """
+    Drop inputs listed more than once, and check that no two inputs are copied to the same path.
+
+    :Raises:
+        `ValueError`:py:exc: if two different input files would be copied to
+        the same path
+    """
+    inputs_by_output = {}
+    checked_pairs = []
+    for input_path, output_path in pairs:
+        other_input_path = inputs_by_output.setdefault(os.path.normcase(output_path), input_path)
+        if other_input_path is input_path:
+            checked_pairs.append((input_path, output_path))
+        elif _real_path(other_input_path) != _real_path(input_path):
+            raise ValueError("{} and {} would both be copied to {}".format(other_input_path, input_path, output_path))
+    return checked_pairs
+
+
+def mirror_paths(input_filenames, output_dir):
+    """
+    List input files, each with the path its copy goes to.
+
+    Each directory among the input files stands for the ``*.json`` files in
+    and below it, in sorted order.  If it is the only input, their copies
+    keep their paths relative to it; otherwise, as with the copies of input
+    files, their paths are kept relative to the current directory (or
+    below just the name of an input outside it).  The output directory
+    itself is not searched for input files.
+
+    :Returns:
+        A list of ``(input_path, output_path)`` tuples, where each output path
+        is relative to `output_dir`
+
+    :Raises:
+        `ValueError`:py:exc: if two different input files would be copied to
+        the same path
+    """
+    skipped_dir = _real_path(output_dir)
+    pairs = []
+    for input_filename in input_filenames:
+        if not os.path.isdir(input_filename):
+            pairs.append((input_filename, _input_output_path(input_filename)))
+            continue
+        output_prefix = _input_output_path(input_filename) if len(input_filenames) > 1 else os.curdir
+        for dir_path, dir_names, file_names in os.walk(input_filename):
+            dir_names[:] = sorted(x for x in dir_names if _real_path(os.path.join(dir_path, x)) != skipped_dir)
+            relative_dir = os.path.join(output_prefix, os.path.relpath(dir_path, input_filename))
+            pairs.extend(
+                (os.path.join(dir_path, name), os.path.normpath(os.path.join(relative_dir, name)))
+                for name in sorted(file_names)
+                if name.lower().endswith(JSON_SUFFIX)
+            )
+    return _check_output_paths(pairs)
+
+
+def make_dirs(output_dir, output_paths):
+    """Create the directories which the given output paths (relative to `output_dir`) go in, each once."""
+    dir_paths = sorted(set(os.path.dirname(os.path.join(output_dir, x)) for x in output_paths))
+    for dir_path in dir_paths:
+        if not os.path.isdir(dir_path):
+            os.makedirs(dir_path)
+
+
+def _stat_data(path):
+    """Return what tells whether a file has changed, or `None` if it is not there."""
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        return None
+    return [stat_result.st_size, stat_result.st_mtime_ns]
+
+
+def read_input(path):
+    """
+    Read an input file.
+
+    :Returns:
+        A tuple of the file's stat data (taken before reading it, so that a
+        change while reading shows up next time) and its binary contents
+    """
+    stat_data = _stat_data(path)
+    with open(path, "rb") as f:
+        return (stat_data, f.read())
+
+
+def hash_contents(contents):
+    """Return the hash of an input file's (binary) contents which the manifest records."""
+    return hashlib.sha256(contents).hexdigest()
+
+
+class MirrorManifest(object):
+    """
+    Provide the record of which inputs the copies in an output directory were made from.
+
+    :Args:
+        output_dir
+            The output directory, where the manifest is kept
+
+        options
+            A dictionary of the formatting options in effect; copies made
+            under other options are taken to be out of date
+    """
+
+    def __init__(self, output_dir, options):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.options_key = compute_options_key(options)
+        self.entries = self._load()
+        self.changed = False
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                manifest = json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+        if not isinstance(manifest, dict) or manifest.get("options") != self.options_key:
+            return {}
+        return manifest.get("files", {})
+
+    def _entry(self, output_path):
+        """Return the entry for a copy, if the copy is still as it was written."""
+        key = output_path.replace(os.sep, "/")
+        entry = self.entries.get(key)
+        if entry is None or entry["output"] != _stat_data(os.path.join(self.output_dir, output_path)):
+            return None
+        return entry
+
+    def is_up_to_date(self, input_path, output_path):
+        """Tell whether a copy was made from an input whose stat data is unchanged since."""
+        entry = self._entry(output_path)
+        return entry is not None and entry["input"] == _stat_data(input_path)
+
+    def contents_are_unchanged(self, input_stat_data, output_path, digest):
+        """
+        Tell whether a copy was made from the same contents an input now holds.
+
+        If so, the input's new stat data (from `read_input()`:py:func:) is
+        recorded, so that the next run need not open it.
+        """
+        entry = self._entry(output_path)
+        if entry is None or entry["sha256"] != digest:
+            return False
+        entry["input"] = input_stat_data
+        self.changed = True
+        return True
+
+    def add(self, input_stat_data, output_path, digest):
+        """Record that a copy has just been written from an input with the given stat data and contents."""
+        self.entries[output_path.replace(os.sep, "/")] = {
+            "input": input_stat_data,
+            "output": _stat_data(os.path.join(self.output_dir, output_path)),
+            "sha256": digest,
+        }
+        self.changed = True
+
+    def save(self):
+        """Write the manifest (atomically), if anything has changed."""
+        if not self.changed:
+            return
+        try:
+            (fd, temp_path) = tempfile.mkstemp(dir=self.output_dir, prefix=MANIFEST_NAME, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump({"options": self.options_key, "files": self.entries}, f, sort_keys=True)
+            os.replace(temp_path, self.path)
+        except (IOError, OSError) as e:
+            # A manifest which cannot be written just makes the next run slower
+            logger.debug("Could not write {path}: {e}".format(path=self.path, e=e))
+        self.changed = False
@@ -0,0 +1,111 @@
+"""
+Provide running work on many documents at once, in threads or processes.
+
+On CPython builds with the GIL, only one thread runs Python code at a time,
+so parsing and formatting scale only across processes (which pay to pickle
+each document and result).  On free-threaded builds (CPython 3.13 and later,
+with the GIL disabled), threads scale without that cost.  The ``auto``
+backend picks whichever suits the running interpreter.
+"""
+
+from __future__ import absolute_import
+
+import concurrent.futures
+import os
+import sys
+
+BACKEND_AUTO = "auto"
+BACKEND_THREADS = "threads"
+BACKEND_PROCESSES = "processes"
+BACKEND_SERIAL = "serial"
+BACKENDS = [BACKEND_AUTO, BACKEND_THREADS, BACKEND_PROCESSES, BACKEND_SERIAL]
+
+# Documents handed to a process at a time, per worker, to spread pickling costs
+CHUNKS_PER_WORKER = 4
+
+
+def gil_enabled():
+    """Tell whether the running interpreter has the GIL enabled."""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+
+def default_jobs():
+    """Return the number of CPUs this process may use."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def choose_backend(backend=BACKEND_AUTO, jobs=None):
+    """
+    Choose how to run work in parallel.
+
+    :Args:
+        backend
+            (optional) One of ``BACKENDS``; ``auto`` means threads if the GIL
+            is disabled, else processes
+
+        jobs
+            (optional) The number of workers (default: the number of CPUs)
+
+    :Returns:
+        One of ``threads``, ``processes``, or ``serial`` (for a single job)
+    """
+    jobs = default_jobs() if jobs is None else jobs
+    if jobs <= 1 or backend == BACKEND_SERIAL:
+        return BACKEND_SERIAL
+    if backend == BACKEND_AUTO:
+        return BACKEND_PROCESSES if gil_enabled() else BACKEND_THREADS
+    return backend
+
+
+def _collect(results, callback):
+    """Return a list of results, calling `callback` (if any) with each as it is ready."""
+    if callback is None:
+        return list(results)
+    collected = []
+    for result in results:
+        callback(result)
+        collected.append(result)
+    return collected
+
+
+def map_parallel(func, items, jobs=None, backend=BACKEND_AUTO, callback=None):
+    """
+    Apply a function to each of several items, in parallel.
+
+    :Args:
+        func
+            A function of one argument; for the ``processes`` backend, it and
+            its arguments and results must be picklable
+
+        items
+            The items to apply `func` to
+
+        jobs
+            (optional) The number of workers (default: the number of CPUs)
+
+        backend
+            (optional) One of ``BACKENDS`` (see `choose_backend()`:py:func:)
+
+        callback
+            (optional) A function to call (in this thread) with each result,
+            in order, as soon as it is ready
+
+    :Returns:
+        A list of the results, in the same order as `items`
+    """
+    items = list(items)
+    jobs = default_jobs() if jobs is None else jobs
+    jobs = min(jobs, len(items))
+    backend = choose_backend(backend, jobs)
+    if backend == BACKEND_SERIAL:
+        return _collect((func(item) for item in items), callback)
+    if backend == BACKEND_THREADS:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+            return _collect(executor.map(func, items), callback)
+    chunksize = max(1, len(items) // (jobs * CHUNKS_PER_WORKER))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        return _collect(executor.map(func, items, chunksize=chunksize), callback)
@@ -0,0 +1,188 @@
+"""
+Provide a non-recursive parser for streams of JSON tokens.
+"""
+
+from __future__ import absolute_import
+
+import json
+
+from json_indent.tokens import (
+    KIND_BEGIN_ARRAY,
+    KIND_BEGIN_OBJECT,
+    KIND_END_ARRAY,
+    KIND_END_OBJECT,
+    KIND_FLAT_ARRAY,
+    KIND_FLAT_OBJECT,
+    KIND_LITERAL,
+    KIND_NAME_SEPARATOR,
+    KIND_NUMBER,
+    KIND_STRING,
+    KIND_VALUE_SEPARATOR,
+    KIND_WHITESPACE,
+)
+
+# Parser states
+EXPECT_VALUE = 0
+EXPECT_VALUE_OR_END = 1
+EXPECT_KEY = 2
+EXPECT_KEY_OR_END = 3
+EXPECT_NAME_SEPARATOR = 4
+EXPECT_SEPARATOR_OR_END = 5
+EXPECT_NOTHING = 6
+
+VALUE_KINDS = frozenset([KIND_STRING, KIND_NUMBER, KIND_LITERAL, KIND_FLAT_ARRAY, KIND_FLAT_OBJECT])
+
+_BEGIN_KINDS = frozenset([KIND_BEGIN_OBJECT, KIND_BEGIN_ARRAY])
+
+_END_KINDS = {KIND_BEGIN_OBJECT: KIND_END_OBJECT, KIND_BEGIN_ARRAY: KIND_END_ARRAY}
+
+_STATE_MESSAGES = {
+    EXPECT_VALUE: "Expecting value",
+    EXPECT_VALUE_OR_END: "Expecting value",
+    EXPECT_KEY: "Expecting property name enclosed in double quotes",
+    EXPECT_KEY_OR_END: "Expecting property name enclosed in double quotes",
+    EXPECT_NAME_SEPARATOR: "Expecting ':' delimiter",
+    EXPECT_SEPARATOR_OR_END: "Expecting ',' delimiter",
+    EXPECT_NOTHING: "Extra data",
+}
+
+
+class TokenParser(object):
+    """
+    Provide a grammar checker for JSON tokens which calls hooks as it goes.
+
+    Containers are tracked with an explicit stack rather than by recursion,
+    so nesting depth is limited only by available memory.  Subclasses
+    override the hook methods to do something useful with what is parsed.
+
+    Each entry in `stack`:py:attr: is a list whose first two elements are the
+    kind of container (``KIND_BEGIN_OBJECT`` or ``KIND_BEGIN_ARRAY``) and the
+    number of items seen in it so far; hooks may append more elements.
+    """
+
+    def __init__(self):
+        self.stack = []
+        self.state = EXPECT_VALUE
+        self.handlers = {
+            EXPECT_VALUE: self._on_value,
+            EXPECT_VALUE_OR_END: self._on_value_or_end,
+            EXPECT_KEY: self._on_key,
+            EXPECT_KEY_OR_END: self._on_key_or_end,
+            EXPECT_NAME_SEPARATOR: self._on_name_separator,
+            EXPECT_SEPARATOR_OR_END: self._on_separator_or_end,
+            EXPECT_NOTHING: self._on_nothing,
+        }
+
+    def feed(self, tokens):
+        """
+        Parse some tokens.
+
+        :Args:
+            tokens
+                An iterable of tokens, as from
+                `~json_indent.tokens.iter_tokens()`:py:func:
+
+        :Raises:
+            `json.JSONDecodeError`:py:exc: if the tokens do not fit the
+            grammar
+        """
+        handlers = self.handlers
+        for kind, token in tokens:
+            if kind != KIND_WHITESPACE:
+                handlers[self.state](kind, token)
+
+    def finish(self):
+        """
+        Check that a complete value has been parsed.
+
+        :Raises:
+            `json.JSONDecodeError`:py:exc: if the value is incomplete (or
+            missing)
+        """
+        if self.state != EXPECT_NOTHING:
+            self.raise_syntax_error("")
+
+    def raise_syntax_error(self, token):
+        """Raise an error about an unexpected token."""
+        raise json.JSONDecodeError(_STATE_MESSAGES[self.state], token, 0)
+
+    # Hooks
+
+    def begin_container(self, frame, token):
+        """Handle the start of an object or array, after `frame` is pushed."""
+
+    def end_container(self, frame, token):
+        """Handle the end of an object or array, after `frame` is popped."""
+
+    def begin_item(self, frame):
+        """Handle the start of an array item in `frame`, before it is counted."""
+
+    def key(self, frame, token):
+        """Handle an object key in `frame`, before it is counted."""
+
+    def value(self, kind, token):
+        """Handle a scalar value (or a flat container)."""
+
+    # State handlers
+
+    def _after_value(self):
+        self.state = EXPECT_SEPARATOR_OR_END if self.stack else EXPECT_NOTHING
+
+    def _on_value(self, kind, token):
+        stack = self.stack
+        if stack and stack[-1][0] == KIND_BEGIN_ARRAY:
+            frame = stack[-1]
+            self.begin_item(frame)
+            frame[1] += 1
+        if kind in VALUE_KINDS:
+            self.value(kind, token)
+            self._after_value()
+        elif kind in _BEGIN_KINDS:
+            frame = [kind, 0]
+            stack.append(frame)
+            self.begin_container(frame, token)
+            self.state = EXPECT_KEY_OR_END if kind == KIND_BEGIN_OBJECT else EXPECT_VALUE_OR_END
+        else:
+            self.raise_syntax_error(token)
+
+    def _on_value_or_end(self, kind, token):
+        if kind == KIND_END_ARRAY:
+            self._end_container(token)
+        else:
+            self._on_value(kind, token)
+
+    def _on_key(self, kind, token):
+        if kind != KIND_STRING:
+            self.raise_syntax_error(token)
+        frame = self.stack[-1]
+        self.key(frame, token)
+        frame[1] += 1
+        self.state = EXPECT_NAME_SEPARATOR
+
+    def _on_key_or_end(self, kind, token):
+        if kind == KIND_END_OBJECT:
+            self._end_container(token)
+        else:
+            self._on_key(kind, token)
+
+    def _on_name_separator(self, kind, token):
+        if kind != KIND_NAME_SEPARATOR:
+            self.raise_syntax_error(token)
+        self.state = EXPECT_VALUE
+
+    def _on_separator_or_end(self, kind, token):
+        frame = self.stack[-1]
+        if kind == KIND_VALUE_SEPARATOR:
+            self.state = EXPECT_KEY if frame[0] == KIND_BEGIN_OBJECT else EXPECT_VALUE
+        elif kind == _END_KINDS[frame[0]]:
+            self._end_container(token)
+        else:
+            self.raise_syntax_error(token)
+
+    def _on_nothing(self, kind, token):
+        self.raise_syntax_error(token)
+
+    def _end_container(self, token):
+        frame = self.stack.pop()
+        self.end_container(frame, token)
+        self._after_value()
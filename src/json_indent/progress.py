@@ -0,0 +1,154 @@
+"""
+Provide reporting the progress of long batch runs.
+
+The code that reads and formats files feeds a `Progress`:py:class: with
+counts of the files finished and the bytes read, which cost an addition and
+a clock reading each.  At most once per interval, a line showing files and
+bytes done, the current throughput, and an estimate of the time left is
+written to stderr: redrawn in place on a terminal, or appended (less often)
+anywhere else, such as a CI log.
+"""
+
+from __future__ import absolute_import
+
+import sys
+import threading
+import time
+
+# Time (in seconds) between reports on a terminal, where each replaces the last
+TTY_INTERVAL = 0.25
+
+# Time (in seconds) between reports elsewhere, where each adds a line
+LINE_INTERVAL = 10.0
+
+# Weight of the latest throughput measurement in the reported throughput
+RATE_SMOOTHING = 0.3
+
+MIB = float(1 << 20)
+
+
+def _is_tty(stream):
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+def format_duration(seconds):
+    """Format a (non-negative) number of seconds as ``H:MM:SS``."""
+    (minutes, seconds) = divmod(int(seconds + 0.5), 60)
+    (hours, minutes) = divmod(minutes, 60)
+    return "{}:{:02d}:{:02d}".format(hours, minutes, seconds)
+
+
+class Progress(object):
+    """
+    Provide counting and reporting how far a batch run has got.
+
+    Counts may be fed from several threads; a count lost to a race only
+    makes a report a little behind.
+
+    :Args:
+        total_files
+            The number of files in the run
+
+        total_bytes
+            (optional) The number of bytes in those files, or `None` if not
+            known (as when reading from stdin)
+
+        stream
+            (optional) The stream to report on (default: stderr)
+
+        interval
+            (optional) The least time (in seconds) between reports (default:
+            ``TTY_INTERVAL`` if `stream` is a terminal, else
+            ``LINE_INTERVAL``)
+
+        clock
+            (optional) A function returning the time in seconds (default:
+            `time.monotonic()`:py:func:)
+    """
+
+    def __init__(self, total_files, total_bytes=None, stream=None, interval=None, clock=time.monotonic):
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.stream = sys.stderr if stream is None else stream
+        self.is_tty = _is_tty(self.stream)
+        if interval is None:
+            interval = TTY_INTERVAL if self.is_tty else LINE_INTERVAL
+        self.interval = interval
+        self.clock = clock
+        self.files_done = 0
+        self.bytes_done = 0
+        self.rate = None
+        self.start_time = self.last_time = clock()
+        self.next_time = self.start_time + interval
+        self.last_bytes = 0
+        self._lock = threading.Lock()
+        self._width = 0
+
+    def add_bytes(self, count):
+        """Count bytes read (and report, if it is time to)."""
+        self.bytes_done += count
+        if self.clock() >= self.next_time:
+            self.report()
+
+    def file_done(self, size=0):
+        """Count a file finished, and any of its bytes not already counted (and report, if it is time to)."""
+        self.files_done += 1
+        self.add_bytes(size)
+
+    def _update_rate(self, now):
+        elapsed = now - self.last_time
+        if elapsed <= 0:
+            return
+        rate = (self.bytes_done - self.last_bytes) / float(elapsed)
+        self.rate = rate if self.rate is None else RATE_SMOOTHING * rate + (1 - RATE_SMOOTHING) * self.rate
+        (self.last_time, self.last_bytes) = (now, self.bytes_done)
+
+    def _eta(self, now):
+        """Return the estimated seconds left, or `None` if there is no telling."""
+        if self.total_bytes is not None and self.rate:
+            return max(0, self.total_bytes - self.bytes_done) / float(self.rate)
+        if self.files_done:
+            return (now - self.start_time) / float(self.files_done) * max(0, self.total_files - self.files_done)
+        return None
+
+    def format_line(self, now, final=False):
+        """Return the text of a report (at time `now`)."""
+        parts = ["{}/{} files".format(self.files_done, self.total_files)]
+        if self.total_bytes is None:
+            parts.append("{:.1f} MiB".format(self.bytes_done / MIB))
+        else:
+            parts.append("{:.1f}/{:.1f} MiB".format(self.bytes_done / MIB, self.total_bytes / MIB))
+        if final:
+            elapsed = now - self.start_time
+            rate = self.bytes_done / float(elapsed) if elapsed > 0 else None
+            parts.append("{} MiB/s".format("?" if rate is None else "{:.1f}".format(rate / MIB)))
+            parts.append("done in {}".format(format_duration(elapsed)))
+        else:
+            parts.append("{} MiB/s".format("?" if self.rate is None else "{:.1f}".format(self.rate / MIB)))
+            eta = self._eta(now)
+            parts.append("ETA {}".format("?" if eta is None else format_duration(eta)))
+        return ", ".join(parts)
+
+    def report(self, final=False):
+        """Write a report (unless another thread has just written one)."""
+        with self._lock:
+            now = self.clock()
+            if not final and now < self.next_time:
+                return
+            self.next_time = now + self.interval
+            self._update_rate(now)
+            line = self.format_line(now, final=final)
+            if self.is_tty:
+                # Overwrite the last report, blanking whatever of it is longer
+                self.stream.write("\r" + line.ljust(self._width) + ("\n" if final else ""))
+                self._width = len(line)
+            else:
+                self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def close(self):
+        """Write the final report."""
+        self.report(final=True)
@@ -0,0 +1,118 @@
+"""
+Provide deterministic assignment of files to shards.
+
+When formatting is split across several machines (e.g., CI runners), each one
+is given the same list of files and its own shard index; every file then
+falls in exactly one shard, with no coordination between the machines.
+"""
+
+from __future__ import absolute_import
+
+import collections
+import hashlib
+import heapq
+import os
+
+SHARD_BY_HASH = "hash"
+SHARD_BY_SIZE = "size"
+SHARD_STRATEGIES = [SHARD_BY_HASH, SHARD_BY_SIZE]
+
+ShardSpec = collections.namedtuple("ShardSpec", ["index", "count"])
+
+
+def parse_shard_spec(text):
+    """
+    Parse a shard specification.
+
+    :Args:
+        text
+            A string of the form ``INDEX/COUNT``, where ``INDEX`` counts
+            from 1 (e.g., ``2/4`` for the second of four shards)
+
+    :Returns:
+        A `ShardSpec`:py:class: tuple
+
+    :Raises:
+        `ValueError`:py:exc: if `text` is not a valid specification
+    """
+    try:
+        (index, count) = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise ValueError("{}: shard must be given as INDEX/COUNT (e.g., '1/4')".format(text))
+    if not 1 <= index <= count:
+        raise ValueError("{}: shard index must be between 1 and the shard count".format(text))
+    return ShardSpec(index, count)
+
+
+def shard_key(path):
+    """Return the form of `path` that is hashed, which is the same on every platform."""
+    return os.path.normpath(path).replace(os.sep, "/")
+
+
+def hash_shard(path, count):
+    """
+    Tell which shard a file falls in, by a stable hash of its path.
+
+    :Returns:
+        The shard index (counting from 1)
+    """
+    digest = hashlib.sha256(shard_key(path).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def size_shards(paths, count, get_size=_file_size):
+    """
+    Assign files to shards so that each shard gets about the same number of bytes.
+
+    The largest files are assigned first, each to the shard with the fewest
+    bytes so far.  Ties are broken by path, so that the assignment depends
+    only on the paths and sizes.
+
+    :Returns:
+        A dictionary mapping each path to its shard index (counting from 1)
+    """
+    loads = [(0, index) for index in range(1, count + 1)]
+    shards = {}
+    for size, _key, path in sorted((-get_size(path), shard_key(path), path) for path in set(paths)):
+        (load, index) = heapq.heappop(loads)
+        shards[path] = index
+        heapq.heappush(loads, (load - size, index))
+    return shards
+
+
+def select_shard(items, spec, strategy=SHARD_BY_HASH, get_path=None):
+    """
+    Select the items (e.g., files) that fall in a shard.
+
+    :Args:
+        items
+            The items to choose from; every machine should have the same
+            items, with the same paths
+
+        spec
+            A `ShardSpec`:py:class: tuple
+
+        strategy
+            (optional) How to assign items to shards: by a hash of their
+            paths (``hash``), or so that shards hold about the same number
+            of bytes (``size``)
+
+        get_path
+            (optional) A function returning the path of an item (default:
+            the items are paths)
+
+    :Returns:
+        A list of the items in the shard, in their original order
+    """
+    get_path = get_path or (lambda item: item)
+    if strategy == SHARD_BY_SIZE:
+        shards = size_shards([get_path(item) for item in items], spec.count)
+        return [item for item in items if shards[get_path(item)] == spec.index]
+    return [item for item in items if hash_shard(get_path(item), spec.count) == spec.index]
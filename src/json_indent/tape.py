@@ -0,0 +1,662 @@
+"""
+Provide a compact, array-backed model of parsed JSON documents (a "tape").
+
+Loading a document the usual way creates a Python object for every value,
+which for large documents costs many times the size of the text, and keeps
+the garbage collector busy.  A tape instead records each value (and key) of
+the document as one entry in a few flat arrays:
+
+- its kind (a byte, with a flag for objects and arrays holding only scalars),
+- a value: for strings and keys, an index into a table of the document's
+  distinct strings; for integers, the integer itself (or, if it is too large,
+  an index into a table of such integers); for other numbers, an index into
+  an array of floats; for literals, which one; and for objects and arrays,
+  the index of the entry after their last descendant, and
+- a size: for objects and arrays, their number of items.
+
+The tape does not keep the text.  It is built from the document decoded a
+chunk at a time (see `json_indent.lazy`:py:mod:), so no more than a chunk of
+the document is ever held as Python objects.  The price is time: a tape takes
+several times as long to load as Python objects do (and documents nested
+thousands of levels deep, longer still), so it is worth using only when
+memory is what runs short.
+
+`TapeObject`:py:class: and `TapeArray`:py:class: give read-only, dict- and
+list-like access to the objects and arrays in a tape; strings, large integers
+and floats become Python objects only when accessed.  `encode_tape()`:py:func:
+serializes straight from the tape, without building Python objects.
+"""
+
+from __future__ import absolute_import
+
+import array
+import collections
+import itertools
+import math
+from collections.abc import Mapping, Sequence
+from json.encoder import encode_basestring, encode_basestring_ascii
+
+from json_indent.formatter import Layout
+from json_indent.lazy import LazyArray, load_lazy
+
+# Keyword arguments of `json.dumps()`:py:func: which `encode_tape()`:py:func:
+# supports (those that cannot matter for parsed JSON are accepted and ignored)
+ENCODE_TAPE_KWARGS = frozenset(
+    ["skipkeys", "ensure_ascii", "check_circular", "allow_nan", "indent", "separators", "default", "sort_keys"]
+)
+
+# Kinds of tape entries
+TAPE_OBJECT = 0
+TAPE_ARRAY = 1
+TAPE_KEY = 2
+TAPE_STRING = 3
+TAPE_NUMBER = 4  # an integer small enough to be the entry's value
+TAPE_LITERAL = 5
+TAPE_FLOAT = 6
+TAPE_BIG_NUMBER = 7  # an integer too large to be the entry's value
+
+# Flag for objects and arrays
+TAPE_FLAT = 0x10  # holds only scalars
+
+_ARRAY_KINDS = frozenset([TAPE_ARRAY, TAPE_ARRAY | TAPE_FLAT])
+
+_CONTAINER_KINDS = frozenset([TAPE_OBJECT, TAPE_OBJECT | TAPE_FLAT, TAPE_ARRAY, TAPE_ARRAY | TAPE_FLAT])
+
+# Literals, by the value of their entries
+_LITERALS = (False, True, None)
+_LITERAL_TEXTS = ("false", "true", "null")
+
+# Objects with at most this many members are searched rather than indexed
+SMALL_OBJECT_SIZE = 8
+
+# Largest text (in characters) for which 32-bit arrays suffice
+_SMALL_TEXT_LIMIT = 2**31 - 1
+
+_INFINITY = float("inf")
+
+_float_repr = float.__repr__
+_int_repr = int.__repr__
+
+
+class Tape(object):
+    """
+    Provide the entries recorded for a parsed JSON document.
+
+    :Args:
+        text_size
+            The length of the JSON text the tape is for (which bounds the
+            number of entries)
+    """
+
+    __slots__ = ("kinds", "values", "sizes", "strings", "floats", "big_numbers")
+
+    def __init__(self, text_size):
+        typecode = "i" if text_size <= _SMALL_TEXT_LIMIT else "q"
+        self.kinds = bytearray()
+        self.values = array.array(typecode)
+        self.sizes = array.array(typecode)
+        self.strings = []
+        self.floats = array.array("d")
+        self.big_numbers = []
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def next_index(self, index):
+        """Return the index of the entry after the value at `index` (and its descendants)."""
+        return self.values[index] if self.kinds[index] in _CONTAINER_KINDS else index + 1
+
+    def value(self, index):
+        """Return the value at `index`: a view for an object or array, else a Python scalar."""
+        kind = self.kinds[index]
+        value = self.values[index]
+        if kind == TAPE_STRING:
+            return self.strings[value]
+        if kind == TAPE_NUMBER:
+            return value
+        if kind == TAPE_FLOAT:
+            return self.floats[value]
+        if kind == TAPE_LITERAL:
+            return _LITERALS[value]
+        if kind == TAPE_BIG_NUMBER:
+            return self.big_numbers[value]
+        return (TapeArray if kind in _ARRAY_KINDS else TapeObject)(self, index)
+
+    def iter_members(self, index):
+        """Yield ``(key, value_index)`` for each member of the object at `index`."""
+        strings = self.strings
+        values = self.values
+        next_index = self.next_index
+        i = index + 1
+        end = values[index]
+        while i < end:
+            yield (strings[values[i]], i + 1)
+            i = next_index(i + 1)
+
+    def iter_items(self, index):
+        """Yield the index of each item of the array at `index`."""
+        next_index = self.next_index
+        i = index + 1
+        end = self.values[index]
+        while i < end:
+            yield i
+            i = next_index(i)
+
+    def is_flat(self, index):
+        """Tell whether the object or array at `index` holds only scalars."""
+        return bool(self.kinds[index] & TAPE_FLAT)
+
+    def to_python(self, index=0, object_pairs_hook=collections.OrderedDict):
+        """
+        Build Python objects (as `json.loads()`:py:func: would) for the value at `index`, without recursion.
+
+        :Args:
+            index
+                (optional) The index of the value
+
+            object_pairs_hook
+                (optional) A function to build objects from lists of
+                key/value pairs
+        """
+        if self.kinds[index] not in _CONTAINER_KINDS:
+            return self.value(index)
+        # Each entry in the stack: [items, is_object, end, key]
+        stack = []
+        result = None
+        kinds = self.kinds
+        values = self.values
+        strings = self.strings
+        i = index
+        while True:
+            kind = kinds[i]
+            if kind in _CONTAINER_KINDS:
+                stack.append([[], kind not in _ARRAY_KINDS, values[i], None])
+                i += 1
+            elif kind == TAPE_KEY:
+                stack[-1][3] = strings[values[i]]
+                i += 1
+                continue
+            else:
+                value = self.value(i)
+                frame = stack[-1]
+                frame[0].append((frame[3], value) if frame[1] else value)
+                i += 1
+            while stack and i == stack[-1][2]:
+                (items, is_object, _end, _key) = stack.pop()
+                value = object_pairs_hook(items) if is_object else items
+                if not stack:
+                    result = value
+                    break
+                frame = stack[-1]
+                frame[0].append((frame[3], value) if frame[1] else value)
+            if not stack:
+                return result
+
+
+class _TapeBuilder(object):
+    """
+    Provide the machinery behind `load_tape()`:py:func:.
+
+    Values are added as they are decoded: Python objects, with lazy proxies
+    (see `json_indent.lazy`:py:mod:) for large objects and arrays.  Objects
+    and arrays are flagged as flat until something other than a scalar turns
+    up in them.
+    """
+
+    def __init__(self, text_size):
+        self.tape = Tape(text_size)
+        # The index of each distinct string, in order
+        self.string_indices = {}
+        bits = self.tape.values.itemsize * 8
+        self.number_range = range(-(2 ** (bits - 1)), 2 ** (bits - 1))
+
+    def _begin(self, container):
+        """
+        Add the entry for an object or array.
+
+        :Returns:
+            A tuple ``(items, is_object, tape_index)``, where `items` yields
+            the items still to be added (for an object, ``(key, value)``
+            pairs)
+        """
+        container_type = type(container)
+        if container_type is dict:
+            (kind, items) = (TAPE_OBJECT, iter(container.items()))
+        elif container_type is list:
+            (kind, items) = (TAPE_ARRAY, self._iter_elements([container]))
+        elif container_type is LazyArray:
+            (kind, items) = (TAPE_ARRAY, self._iter_elements(container.iter_chunks()))
+        else:
+            (kind, items) = (TAPE_OBJECT, iter(container.items()))
+        tape = self.tape
+        tape.kinds.append(kind | TAPE_FLAT)
+        tape.values.append(0)
+        tape.sizes.append(len(container))
+        return (items, kind == TAPE_OBJECT, len(tape) - 1)
+
+    def _iter_elements(self, chunks):
+        """
+        Yield the elements of an array, given as lists, except for lists which `_add_scalars()`:py:meth: adds.
+
+        Each list is taken only once the elements before it have been added.
+        """
+        for chunk in chunks:
+            if not self._add_scalars(chunk):
+                yield from chunk
+
+    def _add_scalars(self, elements):
+        """
+        Add a list of elements all at once, if they are all integers (small enough to be entries' values), all floats, or all strings.
+
+        :Returns:
+            Whether the elements were added
+        """
+        element_types = set(map(type, elements))
+        if len(element_types) != 1:
+            return not elements
+        element_type = element_types.pop()
+        tape = self.tape
+        values = tape.values
+        count = len(elements)
+        if element_type is int:
+            try:
+                values.extend(elements)
+            except OverflowError:
+                del values[len(tape.kinds) :]
+                return False
+            kind = TAPE_NUMBER
+        elif element_type is float:
+            values.extend(range(len(tape.floats), len(tape.floats) + count))
+            tape.floats.extend(elements)
+            kind = TAPE_FLOAT
+        elif element_type is str:
+            (string_indices, string_index) = (self.string_indices, self.string_indices.setdefault)
+            values.extend([string_index(element, len(string_indices)) for element in elements])
+            kind = TAPE_STRING
+        else:
+            return False
+        tape.kinds.extend(bytes([kind]) * count)
+        tape.sizes.extend(itertools.repeat(0, count))
+        return True
+
+    def add(self, value):
+        """Add a decoded document (a scalar, or an object or array, maybe with lazy proxies in it)."""
+        tape = self.tape
+        kinds = tape.kinds
+        (add_kind, add_value, add_size) = (kinds.append, tape.values.append, tape.sizes.append)
+        string_indices = self.string_indices
+        string_index = string_indices.setdefault
+        number_range = self.number_range
+        # The frames of the objects and arrays still open, outside the current one
+        stack = []
+        (items, is_object, index) = (iter([value]), False, None)
+        while True:
+            for item in items:
+                if is_object:
+                    add_kind(TAPE_KEY)
+                    add_value(string_index(item[0], len(string_indices)))
+                    add_size(0)
+                    value = item[1]
+                else:
+                    value = item
+                value_type = type(value)
+                if value_type is str:
+                    add_kind(TAPE_STRING)
+                    add_value(string_index(value, len(string_indices)))
+                elif value_type is int and value in number_range:
+                    add_kind(TAPE_NUMBER)
+                    add_value(value)
+                elif value_type is float:
+                    add_kind(TAPE_FLOAT)
+                    add_value(len(tape.floats))
+                    tape.floats.append(value)
+                elif value_type is bool or value is None:
+                    add_kind(TAPE_LITERAL)
+                    add_value(2 if value is None else value)
+                elif value_type is int:
+                    add_kind(TAPE_BIG_NUMBER)
+                    add_value(len(tape.big_numbers))
+                    tape.big_numbers.append(value)
+                else:
+                    if index is not None:
+                        kinds[index] &= ~TAPE_FLAT
+                    stack.append((items, is_object, index))
+                    (items, is_object, index) = self._begin(value)
+                    break
+                add_size(0)
+            else:
+                if not stack:
+                    tape.strings[:] = string_indices
+                    return
+                tape.values[index] = len(kinds)
+                (items, is_object, index) = stack.pop()
+
+
+def load_tape(text):
+    """
+    Parse JSON text into a tape.
+
+    :Args:
+        text
+            Raw JSON text
+
+    :Returns:
+        A `TapeObject`:py:class: or `TapeArray`:py:class: view of the
+        document, or (if the document is a scalar) its Python value
+
+    :Raises:
+        `json.JSONDecodeError`:py:exc: if `text` cannot be parsed
+    """
+    builder = _TapeBuilder(len(text))
+    builder.add(load_lazy(text, unordered=True))
+    return builder.tape.value(0)
+
+
+class TapeObject(Mapping):
+    """
+    Provide read-only, dict-like access to an object in a tape.
+
+    As with `json.loads()`:py:func:, when a key appears more than once in the
+    text, the last value is used, and the key keeps its first position.
+
+    :Args:
+        tape
+            The `Tape`:py:class:
+
+        index
+            The index of the object's entry in the tape
+    """
+
+    __slots__ = ("tape", "index", "_value_indices")
+
+    def __init__(self, tape, index):
+        self.tape = tape
+        self.index = index
+        self._value_indices = None
+
+    def value_indices(self):
+        """Return an (ordered) dictionary of the tape index of each key's value."""
+        if self._value_indices is None:
+            self._value_indices = collections.OrderedDict(self.tape.iter_members(self.index))
+        return self._value_indices
+
+    def iter_members(self):
+        """Yield ``(key, value_index)`` for each member, in order, as `json.loads()`:py:func: would keep them."""
+        return self.tape.iter_members(self.index)
+
+    def __getitem__(self, key):
+        tape = self.tape
+        if self._value_indices is None and tape.sizes[self.index] <= SMALL_OBJECT_SIZE:
+            for member_key, value_index in tape.iter_members(self.index):
+                if member_key == key:
+                    return tape.value(value_index)
+            raise KeyError(key)
+        return tape.value(self.value_indices()[key])
+
+    def __iter__(self):
+        for key, _value_index in self.iter_members():
+            yield key
+
+    def __len__(self):
+        return self.tape.sizes[self.index]
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def items(self):
+        tape = self.tape
+        return [(key, tape.value(value_index)) for key, value_index in self.iter_members()]
+
+    def values(self):
+        tape = self.tape
+        return [tape.value(value_index) for _key, value_index in self.iter_members()]
+
+    def __repr__(self):
+        return "<{} with {} member(s)>".format(self.__class__.__name__, len(self))
+
+    def to_python(self, object_pairs_hook=collections.OrderedDict):
+        """Return the object as Python objects (see `Tape.to_python()`:py:meth:)."""
+        return self.tape.to_python(self.index, object_pairs_hook)
+
+
+class TapeArray(Sequence):
+    """
+    Provide read-only, list-like access to an array in a tape.
+
+    :Args:
+        tape
+            The `Tape`:py:class:
+
+        index
+            The index of the array's entry in the tape
+    """
+
+    __slots__ = ("tape", "index", "_item_indices")
+
+    def __init__(self, tape, index):
+        self.tape = tape
+        self.index = index
+        self._item_indices = None
+
+    def _item_index(self, position):
+        tape = self.tape
+        if tape.is_flat(self.index):
+            return self.index + 1 + position
+        if self._item_indices is None:
+            self._item_indices = array.array(tape.values.typecode, tape.iter_items(self.index))
+        return self._item_indices[position]
+
+    def __getitem__(self, position):
+        length = len(self)
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(length))]
+        if position < 0:
+            position += length
+        if not 0 <= position < length:
+            raise IndexError("array index out of range")
+        return self.tape.value(self._item_index(position))
+
+    def __iter__(self):
+        value = self.tape.value
+        for index in self.tape.iter_items(self.index):
+            yield value(index)
+
+    def __len__(self):
+        return self.tape.sizes[self.index]
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, tuple, TapeArray)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "<{} with {} item(s)>".format(self.__class__.__name__, len(self))
+
+    def to_python(self, object_pairs_hook=collections.OrderedDict):
+        """Return the array as Python objects (see `Tape.to_python()`:py:meth:)."""
+        return self.tape.to_python(self.index, object_pairs_hook)
+
+
+TAPE_VIEW_TYPES = (TapeObject, TapeArray)
+
+
+class _TapeEncoder(object):
+    """
+    Provide the machinery behind `encode_tape()`:py:func:.
+
+    Each entry in `stack`:py:attr: is a list::
+
+        [iterator, is_object, started]
+
+    where `iterator` yields the tape index of each item still to be written
+    (or, for an object, ``(key, value_index)`` pairs).
+    """
+
+    def __init__(self, tape, ensure_ascii=True, allow_nan=True, indent=None, separators=None, sort_keys=False):
+        self.tape = tape
+        self.encode_string = encode_basestring_ascii if ensure_ascii else encode_basestring
+        self.allow_nan = allow_nan
+        self.layout = Layout(indent=indent, separators=separators)
+        self.sort_keys = sort_keys
+        self.chunks = []
+        self.stack = []
+
+    def _nan_text(self, text):
+        if not self.allow_nan:
+            raise ValueError("Out of range float values are not JSON compliant: " + text)
+        return text
+
+    def scalar_text(self, index):
+        tape = self.tape
+        kind = tape.kinds[index]
+        if kind == TAPE_STRING:
+            return self.encode_string(tape.strings[tape.values[index]])
+        if kind == TAPE_LITERAL:
+            return _LITERAL_TEXTS[tape.values[index]]
+        if kind != TAPE_FLOAT:
+            return _int_repr(tape.value(index))
+        value = tape.floats[tape.values[index]]
+        if math.isnan(value):
+            return self._nan_text("NaN")
+        if value in (_INFINITY, -_INFINITY):
+            return self._nan_text("Infinity" if value > 0 else "-Infinity")
+        return _float_repr(value)
+
+    def _members(self, index):
+        members = self.tape.iter_members(index)
+        return iter(sorted(members)) if self.sort_keys else members
+
+    def _write_flat(self, index):
+        tape = self.tape
+        depth = len(self.stack)
+        layout = self.layout
+        scalar_text = self.scalar_text
+        if tape.kinds[index] in _ARRAY_KINDS:
+            (opener, closer) = ("[", "]")
+            texts = [scalar_text(i) for i in range(index + 1, tape.values[index])]
+        else:
+            (opener, closer) = ("{", "}")
+            key_separator = layout.key_separator
+            encode_string = self.encode_string
+            texts = [encode_string(key) + key_separator + scalar_text(i) for key, i in self._members(index)]
+        self.chunks.append(
+            opener
+            + layout.newline_indent(depth + 1)
+            + layout.item_break(depth + 1).join(texts)
+            + layout.newline_indent(depth)
+            + closer
+        )
+
+    def _write_value(self, index):
+        """
+        Write the value at `index`.
+
+        :Returns:
+            `True` if a container was started (and pushed onto the stack),
+            else `False`
+        """
+        tape = self.tape
+        kind = tape.kinds[index]
+        if kind not in _CONTAINER_KINDS:
+            self.chunks.append(self.scalar_text(index))
+            return False
+        is_object = kind not in _ARRAY_KINDS
+        if not tape.sizes[index]:
+            self.chunks.append("{}" if is_object else "[]")
+            return False
+        if tape.is_flat(index):
+            self._write_flat(index)
+            return False
+        self.chunks.append("{" if is_object else "[")
+        items = self._members(index) if is_object else tape.iter_items(index)
+        self.stack.append([items, is_object, False])
+        self.chunks.append(self.layout.newline_indent(len(self.stack)))
+        return True
+
+    def _end(self):
+        (_iterator, is_object, _started) = self.stack.pop()
+        self.chunks.append(self.layout.newline_indent(len(self.stack)))
+        self.chunks.append("}" if is_object else "]")
+
+    def _write_items(self, frame):
+        """
+        Write items from `frame` until one of them is a non-empty container.
+
+        :Returns:
+            `True` if a container was started, or `False` if `frame` has no
+            more items
+        """
+        (iterator, is_object, started) = frame
+        frame[2] = True
+        append = self.chunks.append
+        item_break = self.layout.item_break(len(self.stack))
+        write_value = self._write_value
+        if not is_object:
+            for index in iterator:
+                if started:
+                    append(item_break)
+                started = True
+                if write_value(index):
+                    return True
+            return False
+        encode_string = self.encode_string
+        key_separator = self.layout.key_separator
+        for key, index in iterator:
+            if started:
+                append(item_break)
+            started = True
+            append(encode_string(key) + key_separator)
+            if write_value(index):
+                return True
+        return False
+
+    def encode(self, index):
+        stack = self.stack
+        if not self._write_value(index):
+            return self.chunks
+        while stack:
+            if not self._write_items(stack[-1]):
+                self._end()
+        return self.chunks
+
+
+def encode_tape(view, **kwargs):
+    """
+    Serialize an object or array in a tape as JSON text, straight from the tape.
+
+    The result is the same as from `json.dumps()`:py:func: of the Python
+    objects the tape stands for.
+
+    :Args:
+        view
+            A `TapeObject`:py:class: or `TapeArray`:py:class:
+
+        kwargs
+            (optional) Keyword arguments with the same meanings as for
+            `json.dumps()`:py:func:; only those in ``ENCODE_TAPE_KWARGS``
+            are supported
+
+    :Returns:
+        The serialized JSON text (without a trailing newline)
+
+    :Raises:
+        - `TypeError`:py:exc: if an unsupported keyword argument is given
+        - `ValueError`:py:exc: if (when not allowed) the tape holds an
+          out-of-range float
+    """
+    unsupported = sorted(set(kwargs) - ENCODE_TAPE_KWARGS)
+    if unsupported:
+        raise TypeError("unsupported keyword argument(s) for encode_tape(): {}".format(", ".join(unsupported)))
+    for ignored in ["skipkeys", "check_circular", "default"]:
+        kwargs.pop(ignored, None)
+    return "".join(_TapeEncoder(view.tape, **kwargs).encode(view.index))
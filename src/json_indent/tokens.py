@@ -0,0 +1,327 @@
+"""
+Provide a lexical tokenizer for JSON text.
+"""
+
+from __future__ import absolute_import
+
+import json
+import re
+
+KIND_WHITESPACE = "w"
+KIND_STRING = "s"
+KIND_NUMBER = "n"
+KIND_LITERAL = "l"
+KIND_BEGIN_OBJECT = "{"
+KIND_END_OBJECT = "}"
+KIND_BEGIN_ARRAY = "["
+KIND_END_ARRAY = "]"
+KIND_NAME_SEPARATOR = ":"
+KIND_VALUE_SEPARATOR = ","
+
+# Flat containers hold only scalars; see `iter_tokens()`:py:func:
+KIND_FLAT_OBJECT = "O"
+KIND_FLAT_ARRAY = "A"
+
+# Literals accepted by `json.loads()`:py:func: (including the non-standard ones)
+LITERALS = ("true", "false", "null", "NaN", "Infinity", "-Infinity")
+
+_WHITESPACE_PATTERN = r"[ \t\n\r]"
+_STRING_PATTERN = r'"[^"\\\x00-\x1f]*(?:\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4})[^"\\\x00-\x1f]*)*"'
+_NUMBER_PATTERN = r"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?"
+_LITERAL_PATTERN = r"true|false|null|NaN|Infinity|-Infinity"
+_SCALAR_PATTERN = "(?:{string}|{number}|{literal})".format(
+    string=_STRING_PATTERN, number=_NUMBER_PATTERN, literal=_LITERAL_PATTERN
+)
+_MEMBER_PATTERN = "{string}{ws}*:{ws}*{scalar}".format(
+    string=_STRING_PATTERN, ws=_WHITESPACE_PATTERN, scalar=_SCALAR_PATTERN
+)
+_FLAT_ARRAY_PATTERN = r"\[{ws}*(?:{scalar}(?:{ws}*,{ws}*{scalar})*{ws}*)?\]".format(
+    ws=_WHITESPACE_PATTERN, scalar=_SCALAR_PATTERN
+)
+_FLAT_OBJECT_PATTERN = r"\{{{ws}*(?:{member}(?:{ws}*,{ws}*{member})*{ws}*)?\}}".format(
+    ws=_WHITESPACE_PATTERN, member=_MEMBER_PATTERN
+)
+_TOKEN_PATTERN = r"{ws}+|{string}|[{{}}\[\]:,]|{number}|{literal}".format(
+    ws=_WHITESPACE_PATTERN, string=_STRING_PATTERN, number=_NUMBER_PATTERN, literal=_LITERAL_PATTERN
+)
+
+_TOKEN_RE = re.compile(_TOKEN_PATTERN)
+_FLAT_TOKEN_RE = re.compile("{}|{}|{}".format(_FLAT_ARRAY_PATTERN, _FLAT_OBJECT_PATTERN, _TOKEN_PATTERN))
+
+# When splitting text, anything which is not a token is swept up along with
+# the rest of the text, so that the pieces always add up to the whole
+_SPLIT_RE = re.compile(r"(?:{})|[\s\S]+".format(_TOKEN_PATTERN))
+_FLAT_SPLIT_RE = re.compile(r"(?:{})|[\s\S]+".format(_FLAT_TOKEN_RE.pattern))
+
+# Patterns for picking apart flat containers which are already known to be valid
+_VALID_STRING_PATTERN = r'"[^"\\]*(?:\\.[^"\\]*)*"'
+SCALAR_RE = re.compile(r"{string}|[^\s,\]]+".format(string=_VALID_STRING_PATTERN))
+MEMBER_RE = re.compile(r"({string})\s*:\s*({string}|[^\s,}}]+)".format(string=_VALID_STRING_PATTERN))
+
+_STRING_PREFIX_RE = re.compile(r'"(?:[^"\\\x00-\x1f]|\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4}))*(?:\\(?:u[0-9a-fA-F]{0,3})?)?')
+
+# Text which might continue a number token that has matched so far (e.g., "1" followed by "e-")
+_NUMBER_TAIL_RE = re.compile(r"[0-9.eE+-]*")
+
+_KINDS_BY_FIRST_CHARACTER = {c: KIND_WHITESPACE for c in " \t\n\r"}
+_KINDS_BY_FIRST_CHARACTER.update({c: KIND_NUMBER for c in "0123456789"})
+_KINDS_BY_FIRST_CHARACTER.update({c: KIND_LITERAL for c in "tfnNI"})
+_KINDS_BY_FIRST_CHARACTER.update({c: c for c in "{}[]:,"})
+_KINDS_BY_FIRST_CHARACTER['"'] = KIND_STRING
+_KINDS_BY_FIRST_CHARACTER["-"] = "-"  # number or literal
+
+# Kinds which need a closer look than the first character
+_AMBIGUOUS_KINDS = frozenset([KIND_BEGIN_ARRAY, KIND_BEGIN_OBJECT, "-"])
+
+_OPENERS = frozenset([KIND_BEGIN_ARRAY, KIND_BEGIN_OBJECT])
+_CLOSERS = frozenset([KIND_END_ARRAY, KIND_END_OBJECT])
+_BRACKETS = frozenset("[]{}")
+_NUMBER_FIRST_CHARACTERS = frozenset("-0123456789")
+
+# Amount of text to split into tokens at a time
+_WINDOW_SIZE = 1024 * 1024
+
+
+def _raise_invalid_token(text, pos):
+    raise json.JSONDecodeError("Expecting value", text, pos)
+
+
+def kind_of(token):
+    """
+    Tell what kind of token a token is.
+
+    :Args:
+        token
+            The text of a valid token
+
+    :Returns:
+        One of the ``KIND_*`` constants
+    """
+    kind = _KINDS_BY_FIRST_CHARACTER[token[0]]
+    if kind not in _AMBIGUOUS_KINDS:
+        return kind
+    if kind == "-":
+        # "-Infinity" is the only token starting with "-I"
+        return KIND_LITERAL if token[1:2] == "I" else KIND_NUMBER
+    if len(token) == 1:
+        return kind
+    return KIND_FLAT_ARRAY if kind == KIND_BEGIN_ARRAY else KIND_FLAT_OBJECT
+
+
+def _find_window_cut(pieces):
+    """
+    Find where to cut the pieces of a window that was split short of the end.
+
+    The last piece may be incomplete, as may a number just before it (e.g.,
+    ``1`` and ``e+`` from ``1e+20``), unless it is a whole token ending in a
+    closing bracket (as when the window was ended by `_extend_window()`:py:func:).
+    So may a flat container whose start is in the window but whose end is
+    not; in that case cut where it starts so that it can be coalesced with
+    the next window.
+
+    :Returns:
+        The index of the first piece to split again with the next window
+    """
+    cut = len(pieces) - 1
+    # A piece starting with a bracket is a token (a bracket or a flat
+    # container); only text where no token starts is swept up
+    if pieces[cut][0] in _BRACKETS and pieces[cut][-1] in _CLOSERS:
+        return cut + 1
+    if cut > 0 and pieces[cut - 1][0] in _NUMBER_FIRST_CHARACTERS:
+        cut -= 1
+    for i in range(cut - 1, -1, -1):
+        piece = pieces[i]
+        if piece in _OPENERS:
+            return i
+        if piece[0] in _BRACKETS:
+            break
+    return cut
+
+
+def _extend_window(text, window_end, end):
+    """
+    Move the end of a window to just after the next closing bracket, if one is near.
+
+    A flat container (say, a long array of numbers) which starts in the
+    window then ends in it too, and is matched whole, rather than split into
+    tokens only for them to be split again with the next window.
+    """
+    limit = min(window_end + _WINDOW_SIZE, end)
+    closers = [x for x in (text.find("]", window_end, limit), text.find("}", window_end, limit)) if x >= 0]
+    return min(closers) + 1 if closers else window_end
+
+
+def _split_windows(text, split_re):
+    """Split `text` into lists of token texts, a window at a time."""
+    split = split_re.findall
+    pos = 0
+    end = len(text)
+    window_size = _WINDOW_SIZE
+    while pos < end:
+        window_end = min(pos + window_size, end)
+        if window_end < end:
+            window_end = _extend_window(text, window_end, end)
+        pieces = split(text, pos, window_end)
+        if window_end < end:
+            cut = _find_window_cut(pieces)
+            if cut == 0:
+                window_size *= 2
+                continue
+            window_size = _WINDOW_SIZE
+            window_end -= sum(map(len, pieces[cut:]))
+            del pieces[cut:]
+        elif _FLAT_TOKEN_RE.fullmatch(pieces[-1]) is None:
+            _raise_invalid_token(text, end - len(pieces[-1]))
+        yield pieces
+        pos = window_end
+
+
+def iter_tokens(text, with_whitespace=False, coalesce=False):
+    """
+    Split JSON text into lexical tokens.
+
+    Tokens are not checked for grammatical correctness (e.g., unbalanced
+    brackets); only for lexical correctness.
+
+    :Args:
+        text
+            Raw JSON text
+
+        with_whitespace
+            (optional) Whether to include whitespace tokens (default: `False`)
+
+        coalesce
+            (optional) Whether to yield each array or object holding only
+            scalars (strings, numbers, and literals) as a single token of kind
+            ``KIND_FLAT_ARRAY`` or ``KIND_FLAT_OBJECT`` (default: `False`)
+
+    :Returns:
+        An iterator of tuples::
+
+            (kind, token_text)
+
+        where `kind` is one of the ``KIND_*`` constants.
+
+    :Raises:
+        `json.JSONDecodeError`:py:exc: if `text` contains an invalid token
+    """
+    kinds = _KINDS_BY_FIRST_CHARACTER
+    ambiguous_kinds = _AMBIGUOUS_KINDS
+    for tokens in _split_windows(text, _FLAT_SPLIT_RE if coalesce else _SPLIT_RE):
+        for token in tokens:
+            kind = kinds[token[0]]
+            if kind in ambiguous_kinds:
+                kind = kind_of(token)
+            elif kind == KIND_WHITESPACE and not with_whitespace:
+                continue
+            yield (kind, token)
+
+
+def _is_incomplete_token(buf, pos):
+    """Tell whether unmatched text at the end of `buf` might yet become a token."""
+    if buf[pos] == '"':
+        return _STRING_PREFIX_RE.match(buf, pos).end() == len(buf)
+    rest = buf[pos:]
+    return any(literal.startswith(rest) for literal in LITERALS)
+
+
+def _may_continue(kind, m, buf):
+    """Tell whether a token matched at the end of `buf` might grow with more input."""
+    if kind == KIND_NUMBER:
+        return _NUMBER_TAIL_RE.match(buf, m.end()).end() == len(buf)
+    if kind in (KIND_WHITESPACE, KIND_LITERAL):
+        return m.end() == len(buf)
+    return False
+
+
+def iter_tokens_from_chunks(chunks, with_whitespace=False):
+    """
+    Split JSON text arriving in chunks into lexical tokens.
+
+    Only the text of the current token plus one chunk is held in memory at a
+    time, so this is suitable for endless streams.  Each token is yielded as
+    soon as it is known to be complete.
+
+    :Args:
+        chunks
+            An iterable of strings of raw JSON text
+
+        with_whitespace
+            (optional) Whether to include whitespace tokens (default: `False`)
+
+    :Returns:
+        An iterator of tuples like those from
+        `~json_indent.tokens.iter_tokens()`:py:func:
+
+    :Raises:
+        `json.JSONDecodeError`:py:exc: if the text contains an invalid token
+    """
+    chunks = iter(chunks)
+    buf = ""
+    pos = 0
+    eof = False
+    match = _TOKEN_RE.match
+    while True:
+        m = match(buf, pos) if pos < len(buf) else None
+        kind = None if m is None else kind_of(m.group())
+        if not eof and (
+            pos >= len(buf)
+            or (m is None and _is_incomplete_token(buf, pos))
+            or (m is not None and _may_continue(kind, m, buf))
+        ):
+            chunk = next(chunks, None)
+            if chunk is None:
+                eof = True
+            else:
+                buf = buf[pos:] + chunk
+                pos = 0
+            continue
+        if m is None:
+            if pos >= len(buf):
+                return
+            _raise_invalid_token(buf, pos)
+        pos = m.end()
+        if kind != KIND_WHITESPACE or with_whitespace:
+            yield (kind, m.group())
+
+
+def iter_documents(tokens):
+    """
+    Group a stream of tokens into the texts of consecutive top-level values.
+
+    :Args:
+        tokens
+            An iterable of tokens, as from
+            `~json_indent.tokens.iter_tokens_from_chunks()`:py:func:
+
+    :Returns:
+        An iterator of strings, each the compacted text of one top-level JSON
+        value.  If the tokens end in the middle of a value, the incomplete
+        text is yielded last so that parsing it reports the problem.
+
+    :Raises:
+        `json.JSONDecodeError`:py:exc: if a token cannot start or continue a
+        top-level value
+    """
+    depth = 0
+    parts = []
+    for kind, token in tokens:
+        if kind == KIND_WHITESPACE:
+            if depth > 0:
+                parts.append(token)
+            continue
+        if kind in (KIND_BEGIN_OBJECT, KIND_BEGIN_ARRAY):
+            depth += 1
+        elif kind in (KIND_END_OBJECT, KIND_END_ARRAY):
+            depth -= 1
+        elif depth == 0 and kind in (KIND_NAME_SEPARATOR, KIND_VALUE_SEPARATOR):
+            depth = -1
+        if depth < 0:
+            text = "".join(parts) + token
+            raise json.JSONDecodeError("Extra data", text, len(text) - len(token))
+        parts.append(token)
+        if depth == 0:
+            yield "".join(parts)
+            parts = []
+    if parts:
+        yield "".join(parts)
@@ -2,6 +2,12 @@
 Provide utility functions for strings, dicts, etc.
 """
 
+import json
+import mmap
+
+# Types of bytes-like objects which hold JSON text to be decoded
+BYTES_LIKE_TYPES = (bytes, bytearray, memoryview, mmap.mmap)
+
 
 def is_string(an_object):
     """
@@ -22,6 +28,48 @@ def is_string(an_object):
         return isinstance(an_object, str)
 
 
+def is_bytes_like(an_object):
+    """
+    Tell whether a given object is a bytes-like buffer holding encoded text.
+
+    :Args:
+        an_object
+            a given Python object
+
+    :Returns:
+        `True`-ish if `an_object` is one of ``BYTES_LIKE_TYPES``, `False`
+        otherwise
+    """
+    return isinstance(an_object, BYTES_LIKE_TYPES)
+
+
+def decode_json_bytes(buffer):
+    """
+    Decode JSON text from a bytes-like buffer.
+
+    As with `json.loads()`:py:func:, the encoding (UTF-8, UTF-16, or UTF-32,
+    with or without a byte order mark) is detected from the first bytes.
+    Contiguous buffers (such as memory views of socket buffers or memory maps)
+    are decoded where they are, without being copied to `bytes` first.
+
+    :Args:
+        buffer
+            One of ``BYTES_LIKE_TYPES``
+
+    :Returns:
+        The decoded text
+
+    :Raises:
+        `UnicodeDecodeError`:py:exc: if `buffer` is not validly encoded
+    """
+    with memoryview(buffer) as view:
+        if not view.c_contiguous:
+            return decode_json_bytes(view.tobytes())
+        with view.cast("B") as octets:
+            encoding = json.detect_encoding(octets[:4].tobytes())
+            return str(octets, encoding, "surrogatepass")
+
+
 def to_unicode(text):
     """
     Convert the given string to a unicode string, if applicable.
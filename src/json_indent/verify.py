@@ -0,0 +1,328 @@
+"""
+Provide checking whether JSON text is already formatted, without decoding it.
+
+Most files handed to a formatter (say, in a pre-commit hook) are already
+formatted.  Rather than decoding each into Python objects and encoding it
+again only to find the same text, `is_formatted()`:py:func: walks the text
+once, checking that the whitespace and separators between tokens are those
+the formatter would write, and that each number and string is written the way
+`json.dumps()`:py:func: would write it.
+"""
+
+from __future__ import absolute_import
+
+import re
+import sys
+from json.decoder import scanstring
+from json.encoder import encode_basestring, encode_basestring_ascii
+
+from json_indent.formatter import Layout
+
+# Keyword arguments of `json.dumps()`:py:func: which `is_formatted()`:py:func: supports
+IS_FORMATTED_KWARGS = frozenset(["indent", "separators", "sort_keys", "ensure_ascii", "allow_nan"])
+
+# Each match is the whitespace and separators before a token, then the token
+# (anything but a string or bracket is swept up up to the next separator, and
+# looked at more closely later)
+_TOKEN_RE = re.compile(r'([ \t\n\r,:]*)("[^"\\]*(?:\\[\s\S][^"\\]*)*"|[^ \t\n\r,:\[\]{}"]+|[\[\]{}])')
+
+# Integers with more digits than this cannot be decoded (see
+# `sys.set_int_max_str_digits()`:py:func:), or 0 if there is no limit
+_INT_MAX_STR_DIGITS = getattr(sys, "get_int_max_str_digits", lambda: 0)()
+
+_NUMBER_RE = re.compile(r"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?")
+
+_CONTROL_RE = re.compile(r"[\x00-\x1f]")
+
+# Strings needing no escapes, numbers and literals, which a run of items made
+# of nothing else can be matched (and mostly checked) in one go
+_SIMPLE_STRING = r'"[ !#-\[\]-~]*"'
+_NUMBER_END = r"(?![-+.0-9eE])"
+_LOSSLESS_ITEM = r"(?:{}|-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?{}|true|false|null)".format(
+    _SIMPLE_STRING, _NUMBER_END
+)
+# (numbers but integers are shaped as `float.__repr__()`:py:meth: writes them,
+# and are in a group if the run needs them checked later)
+_INTEGER = r"-?[1-9][0-9]{}|0".format("{{0,{}}}".format(_INT_MAX_STR_DIGITS - 1) if _INT_MAX_STR_DIGITS else "*")
+_FLOAT = r"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+(?:e[-+][0-9]+)?|e[-+][0-9]+)"
+_ITEM = r"(?:{}|(?:{}|({})){}|true|false|null)".format(_SIMPLE_STRING, _INTEGER, _FLOAT, _NUMBER_END)
+_KEY_ITEM = r"(?:{}|(?:{}|{}){}|true|false|null)".format(_SIMPLE_STRING, _INTEGER, _FLOAT, _NUMBER_END)
+# Each match is a string (with an empty group) or a number which is not an integer
+_FLOAT_RE = re.compile(r'"[^"]*"|(-?[0-9]+[.e][-+.0-9e]*)')
+# Separators which keep runs of items unambiguous
+_RUN_SEPARATOR_CHARS = frozenset(" \t\n\r,:")
+
+_OPENERS = frozenset("[{")
+_CLOSERS = frozenset("]}")
+_LITERALS = frozenset(["true", "false", "null"])
+_NAN_LITERALS = frozenset(["NaN", "Infinity", "-Infinity"])
+
+# What the last token was
+(_START, _OPENED, _VALUE, _KEY) = range(4)
+
+
+def _decode_string(token):
+    """Decode a string token; return `None` if it is not valid."""
+    try:
+        (value, end) = scanstring(token, 1)
+    except ValueError:
+        return None
+    return value if end == len(token) else None
+
+
+class _Checker(object):
+    """Provide the checks on keys and scalars behind `is_formatted()`:py:func:."""
+
+    def __init__(self, layout, newline, lossless, sort_keys, ensure_ascii, allow_nan):
+        self.layout = layout
+        self.newline = newline
+        # Runs of simple items are only unambiguous if their separators are
+        self.fast = (
+            "," in layout.item_separator
+            and ":" in layout.key_separator
+            and _RUN_SEPARATOR_CHARS.issuperset(layout.item_separator + layout.key_separator + (layout.indent or ""))
+        )
+        # What `level()`:py:meth: returns, at each depth so far
+        self.levels = []
+        self.lossless = lossless
+        self.sort_keys = sort_keys
+        self.ensure_ascii = ensure_ascii
+        self.encode_string = encode_basestring_ascii if ensure_ascii else encode_basestring
+        self.allow_nan = allow_nan
+
+    def level(self, depth):
+        """
+        Return what is expected in an object or array at a depth.
+
+        :Returns:
+            A tuple of the text expected before a token, by what the last
+            token was, and the patterns for runs of items (or `None` if runs
+            are not looked for)
+        """
+        layout = self.layout
+        while len(self.levels) <= depth:
+            level = len(self.levels)
+            line_start = layout.newline_indent(level).replace("\n", self.newline)
+            item_break = layout.item_break(level).replace("\n", self.newline)
+            patterns = self.run_patterns(line_start, item_break, layout.key_separator) if self.fast else None
+            self.levels.append((("", line_start, item_break, layout.key_separator), patterns))
+        return self.levels[depth]
+
+    def new_keys(self):
+        """Return what an object starts with for `key_is_ok()`:py:meth: to check its keys against."""
+        if self.sort_keys:
+            return [None]
+        return None if self.lossless else set()
+
+    def key_is_ok(self, keys, token):
+        """Tell whether a key is written as expected, given the object's keys so far."""
+        if token[0] != '"':
+            return False
+        simple = self._is_simple_string(token)
+        if not simple and not self._string_is_ok(token):
+            return False
+        if self.sort_keys:
+            key = token[1:-1] if simple else _decode_string(token)
+            previous = keys[0]
+            keys[0] = key
+            # Without decoding, a key cannot be given twice; losslessly, it keeps its place
+            return previous is None or previous < key or (self.lossless and previous == key)
+        if keys is None:
+            return True
+        if token in keys:
+            return False
+        keys.add(token)
+        return True
+
+    def run_patterns(self, line_start, item_break, key_separator):
+        """
+        Compile the patterns which match runs of simple items in an array or object.
+
+        :Returns:
+            A list of patterns for a run in an array, then in an object, each
+            first starting with the object's or array's first item, then
+            following an item; and a pattern finding the keys in a run
+        """
+        if self.lossless:
+            (item, key_item) = (_LOSSLESS_ITEM, _LOSSLESS_ITEM)
+        else:
+            (item, key_item) = (_ITEM, _KEY_ITEM)
+        member = _SIMPLE_STRING + re.escape(key_separator) + item
+        patterns = []
+        for element in [item, member]:
+            separated = "(?:{}{})".format(re.escape(item_break), element)
+            patterns.append(re.compile("{}{}{}*".format(re.escape(line_start), element, separated)))
+            patterns.append(re.compile("{}+".format(separated)))
+        patterns.append(re.compile("({}){}{}".format(_SIMPLE_STRING, re.escape(key_separator), key_item)))
+        return patterns
+
+    def skip_run(self, text, pos, patterns, in_object, after_item, keys):
+        """
+        Skip a run of simple items in an array or object, checking them.
+
+        :Args:
+            patterns
+                The patterns from `run_patterns()`:py:meth: for the depth of
+                the array or object
+
+        :Returns:
+            The position after the run (which is `pos` if there is none), or
+            -1 if its items are not written as expected
+        """
+        run = patterns[2 * in_object + after_item].match(text, pos)
+        if run is None:
+            return pos
+        end = run.end()
+        if run.lastindex is not None:
+            for token in _FLOAT_RE.findall(text, pos, end):
+                if token and float.__repr__(float(token)) != token:
+                    return -1
+        if in_object and keys is not None and not self._run_keys_are_ok(patterns[4].findall(text, pos, end), keys):
+            return -1
+        return end
+
+    def _run_keys_are_ok(self, tokens, keys):
+        if self.sort_keys:
+            previous = keys[0]
+            for token in tokens:
+                key = token[1:-1]
+                if not (previous is None or previous < key or (self.lossless and previous == key)):
+                    return False
+                previous = key
+            keys[0] = previous
+            return True
+        count = len(keys)
+        keys.update(tokens)
+        return len(keys) == count + len(tokens)
+
+    def _is_simple_string(self, token):
+        """Tell whether a string token holds nothing which is (or would be) escaped."""
+        if "\\" in token:
+            return False
+        if self.ensure_ascii or self.lossless:
+            return token.isascii() and token.isprintable()
+        return _CONTROL_RE.search(token) is None
+
+    def _string_is_ok(self, token):
+        value = _decode_string(token)
+        return value is not None and (self.lossless or self.encode_string(value) == token)
+
+    def scalar_is_ok(self, token):
+        """Tell whether a scalar is written as expected."""
+        first = token[0]
+        if first == '"':
+            return self._is_simple_string(token) or self._string_is_ok(token)
+        if token in _LITERALS or token in _NAN_LITERALS:
+            return token in _LITERALS or self.lossless or self.allow_nan
+        if _NUMBER_RE.fullmatch(token) is None:
+            return False
+        return self.lossless or self._number_is_ok(token)
+
+    def _number_is_ok(self, token):
+        """Tell whether a (valid) number is written as `json.dumps()`:py:func: would write it."""
+        digits = token[1:] if token[0] == "-" else token
+        if digits.isdigit():
+            # Integers are written without leading zeros, and zero without a
+            # sign, and cannot be decoded if too long
+            if _INT_MAX_STR_DIGITS and len(digits) > _INT_MAX_STR_DIGITS:
+                return False
+            return digits[0] != "0" or len(token) == 1
+        return float.__repr__(float(token)) == token
+
+
+def is_formatted(text, newline="\n", lossless=False, **kwargs):
+    """
+    Tell whether JSON text is already formatted.
+
+    :Args:
+        text
+            Raw JSON text
+
+        newline
+            (optional) The newline which the formatted text would use
+
+        lossless
+            (optional) Whether to check against lossless formatting (see
+            `~json_indent.format_json_text()`:py:func:), which copies numbers
+            and strings as they are, and keeps duplicate keys
+
+        kwargs
+            (optional) Keyword arguments with the same meanings as for
+            `json.dumps()`:py:func:; only those in ``IS_FORMATTED_KWARGS``
+            are supported
+
+    :Returns:
+        `True` if formatting `text` (and adding a final newline) would give
+        `text` back; else (including when `text` is not valid JSON) `False`
+
+    :Raises:
+        `TypeError`:py:exc: if an unsupported keyword argument is given
+    """
+    unsupported = sorted(set(kwargs) - IS_FORMATTED_KWARGS)
+    if unsupported:
+        raise TypeError("unsupported keyword argument(s) for is_formatted(): {}".format(", ".join(unsupported)))
+    checker = _Checker(
+        Layout(indent=kwargs.get("indent"), separators=kwargs.get("separators")),
+        newline,
+        lossless,
+        kwargs.get("sort_keys", False),
+        kwargs.get("ensure_ascii", True),
+        kwargs.get("allow_nan", True),
+    )
+    # For the innermost object or array: whether it is an object, its keys
+    # so far, the text expected before each token and before its end, and
+    # the patterns for runs of its items (at the top level, nothing may
+    # follow the value, and the start of the line is only there for the end
+    # of an object or array to go by)
+    top_gaps = ("", checker.level(0)[0][_OPENED], None, None)
+    (in_object, keys, gaps, end_gap, patterns) = (False, None, top_gaps, None, None)
+    # The same for the objects and arrays around it
+    stack = []
+    state = _START
+    pos = 0
+    match = _TOKEN_RE.match
+    while True:
+        if patterns is not None and state in (_OPENED, _VALUE):
+            end = checker.skip_run(text, pos, patterns, in_object, state == _VALUE, keys)
+            if end < 0:
+                return False
+            if end != pos:
+                (pos, state) = (end, _VALUE)
+        m = match(text, pos)
+        if m is None:
+            break
+        pos = m.end()
+        (gap, token) = m.groups()
+        first = token[0]
+        if first in _CLOSERS:
+            ok = stack and (first == "}") == in_object and state != _KEY
+            ok = ok and gap == ("" if state == _OPENED else end_gap)
+            if ok:
+                (in_object, keys, gaps, end_gap, patterns) = stack.pop()
+                state = _VALUE
+        elif gap != gaps[state]:
+            ok = False
+        elif in_object and state != _KEY:
+            # Most keys need no escapes, which all modes write the same way
+            if type(keys) is set and "\\" not in token and token.isascii() and token.isprintable():
+                ok = first == '"' and token not in keys
+                keys.add(token)
+            else:
+                ok = checker.key_is_ok(keys, token)
+            state = _KEY
+        elif first in _OPENERS:
+            stack.append((in_object, keys, gaps, end_gap, patterns))
+            end_gap = gaps[_OPENED]
+            (gaps, patterns) = checker.level(len(stack))
+            in_object = first == "{"
+            keys = checker.new_keys() if in_object else None
+            (ok, state) = (True, _OPENED)
+        else:
+            # ...as do most strings
+            ok = (first == '"' and "\\" not in token and token.isascii() and token.isprintable()) or (
+                checker.scalar_is_ok(token)
+            )
+            state = _VALUE
+        if not ok:
+            return False
+    return state == _VALUE and not stack and text[pos:] == newline
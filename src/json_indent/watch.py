@@ -0,0 +1,354 @@
+"""
+Provide watching of files and directories for changes.
+
+On Linux, changes are reported by inotify as soon as a file is closed after
+writing; elsewhere (or if inotify is unavailable), files are polled.
+"""
+
+from __future__ import absolute_import
+
+import abc
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import time
+
+logger = logging.getLogger(__name__)
+
+JSON_SUFFIX = ".json"
+
+# Time (in seconds) without further changes before a burst of changes is handled
+DEFAULT_DEBOUNCE = 0.01
+
+# Time (in seconds) between scans when polling
+DEFAULT_POLL_INTERVAL = 0.25
+
+# Longest time (in seconds) to wait for changes before checking whether to stop
+STOP_CHECK_INTERVAL = 0.1
+
+# Flags and event masks (from <sys/inotify.h>)
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+# Header of each event read from an inotify file descriptor: wd, mask, cookie, len
+EVENT_HEADER = struct.Struct("iIII")
+
+READ_SIZE = 64 * 1024
+
+
+def _stat_signature(path):
+    """Return what identifies the current version of a file, or `None` if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _is_json_name(name):
+    return name.lower().endswith(JSON_SUFFIX)
+
+
+class Watcher(abc.ABC):
+    """
+    Provide the abstract base class of watchers.
+
+    Directories are watched (recursively) for files whose names end in
+    ``.json``; files are watched whatever their names.
+
+    :Args:
+        paths
+            Paths of the files and directories to watch
+    """
+
+    def __init__(self, paths):
+        self.files = set(os.path.abspath(path) for path in paths if not os.path.isdir(path))
+        self.dirs = set(os.path.abspath(path) for path in paths if os.path.isdir(path))
+        self.own_writes = {}
+
+    def is_watched(self, path):
+        """Tell whether changes to a file are of interest."""
+        if path in self.files:
+            return True
+        return _is_json_name(path) and self.is_watched_dir(os.path.dirname(path))
+
+    def is_watched_dir(self, dir_path):
+        """Tell whether a directory is (or is below) a watched directory."""
+        while dir_path not in self.dirs:
+            (dir_path, child) = (os.path.dirname(dir_path), dir_path)
+            if dir_path == child:
+                return False
+        return True
+
+    def iter_watched_files(self):
+        """Yield the paths of existing files which are being watched."""
+        for path in sorted(self.files):
+            if os.path.isfile(path):
+                yield path
+        for top in sorted(self.dirs):
+            for dir_path, _dir_names, file_names in os.walk(top):
+                for name in sorted(file_names):
+                    if _is_json_name(name):
+                        yield os.path.join(dir_path, name)
+
+    def ignore_own_writes(self, paths):
+        """
+        Note that files have just been written by the caller.
+
+        Changes to them are not reported, unless they change again.
+        """
+        for path in paths:
+            self.own_writes[path] = _stat_signature(path)
+
+    def _filter(self, paths):
+        """Leave out files which are missing, or unchanged since they were written by the caller."""
+        changed = set()
+        for path in paths:
+            signature = _stat_signature(path)
+            if signature is None:
+                continue
+            if path in self.own_writes and self.own_writes.pop(path) == signature:
+                continue
+            changed.add(path)
+        return changed
+
+    @abc.abstractmethod
+    def wait(self, timeout):
+        """
+        Wait for files to change.
+
+        :Args:
+            timeout
+                Longest time (in seconds) to wait
+
+        :Returns:
+            A set of the paths of files which have changed (empty if none
+            changed before the timeout)
+        """
+
+    def close(self):  # noqa: B027
+        """Stop watching (by default, there is nothing to release)."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PollingWatcher(Watcher):
+    """
+    Provide a watcher which scans for changes.
+
+    :Args:
+        paths
+            Paths of the files and directories to watch
+
+        interval
+            (optional) Time (in seconds) between scans
+    """
+
+    def __init__(self, paths, interval=DEFAULT_POLL_INTERVAL):
+        super(PollingWatcher, self).__init__(paths)
+        self.interval = interval
+        self.signatures = self._scan()
+        self.next_scan = time.monotonic() + interval
+
+    def _scan(self):
+        return {path: _stat_signature(path) for path in self.iter_watched_files()}
+
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            time.sleep(max(0.0, min(self.next_scan, deadline) - time.monotonic()))
+            now = time.monotonic()
+            if now >= self.next_scan:
+                self.next_scan = now + self.interval
+                signatures = self._scan()
+                paths = set(path for path, signature in signatures.items() if self.signatures.get(path) != signature)
+                self.signatures = signatures
+                changed = self._filter(paths)
+                if changed:
+                    return changed
+            if now >= deadline:
+                return set()
+
+
+class InotifyWatcher(Watcher):
+    """
+    Provide a watcher which is notified of changes by Linux inotify.
+
+    Watching the directory holding each file (rather than the file itself)
+    catches editors which save by renaming a new file into place.
+
+    :Args:
+        paths
+            Paths of the files and directories to watch
+
+    :Raises:
+        `OSError`:py:exc: if inotify is unavailable
+    """
+
+    def __init__(self, paths):
+        super(InotifyWatcher, self).__init__(paths)
+        libc_name = ctypes.util.find_library("c")
+        try:
+            libc = ctypes.CDLL(libc_name, use_errno=True)
+            self.inotify_init1 = libc.inotify_init1
+            self.inotify_add_watch = libc.inotify_add_watch
+        except (OSError, AttributeError) as e:
+            raise OSError(errno.ENOSYS, "inotify is unavailable: {}".format(e))
+        self.fd = self.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            self._raise_errno("inotify_init1")
+        self.watched_dirs = {}
+        for path in self.files:
+            self._add_watch(os.path.dirname(path))
+        for top in self.dirs:
+            self._add_watches(top)
+
+    def _raise_errno(self, function_name):
+        code = ctypes.get_errno()
+        raise OSError(code, "{}: {}".format(function_name, os.strerror(code)))
+
+    def _add_watch(self, dir_path):
+        wd = self.inotify_add_watch(self.fd, os.fsencode(dir_path), WATCH_MASK)
+        if wd < 0:
+            self._raise_errno("inotify_add_watch")
+        self.watched_dirs[wd] = dir_path
+
+    def _add_watches(self, top):
+        """Watch a directory and all directories below it; return the files found in them."""
+        found = []
+        for dir_path, _dir_names, file_names in os.walk(top):
+            self._add_watch(dir_path)
+            found.extend(os.path.join(dir_path, name) for name in file_names)
+        return found
+
+    def _read_events(self):
+        """Read pending events; return the paths they concern, or `None` if events were lost."""
+        try:
+            data = os.read(self.fd, READ_SIZE)
+        except BlockingIOError:
+            return set()
+        paths = set()
+        offset = 0
+        while offset < len(data):
+            (wd, mask, _cookie, name_length) = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset : offset + name_length].rstrip(b"\0")
+            offset += name_length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if mask & IN_IGNORED:
+                self.watched_dirs.pop(wd, None)
+                continue
+            if wd not in self.watched_dirs:
+                continue
+            path = os.path.join(self.watched_dirs[wd], os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and self.is_watched_dir(path):
+                    # Files may have been written before the new directory was watched
+                    paths.update(self._add_watches(path))
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                paths.add(path)
+        return paths
+
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            (readable, _writable, _exceptional) = select.select(
+                [self.fd], [], [], max(0.0, deadline - time.monotonic())
+            )
+            if not readable:
+                return set()
+            paths = self._read_events()
+            if paths is None:
+                logger.debug("Events were lost; rescanning watched files")
+                paths = set(self.iter_watched_files())
+            changed = self._filter(path for path in paths if self.is_watched(path))
+            if changed:
+                return changed
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def open_watcher(paths, use_inotify=True, poll_interval=DEFAULT_POLL_INTERVAL):
+    """
+    Start watching files and directories, with inotify if possible.
+
+    :Args:
+        paths
+            Paths of the files and directories to watch
+
+        use_inotify
+            (optional) If `False`, poll even where inotify is available
+
+        poll_interval
+            (optional) Time (in seconds) between scans when polling
+
+    :Returns:
+        A `Watcher`:py:class:
+    """
+    if use_inotify:
+        try:
+            return InotifyWatcher(paths)
+        except OSError as e:
+            logger.debug("Polling for changes, as inotify failed: {e}".format(e=e))
+    return PollingWatcher(paths, interval=poll_interval)
+
+
+def watch_paths(paths, handle_changes, debounce=DEFAULT_DEBOUNCE, should_stop=None, **kwargs):
+    """
+    Watch files and directories, handling each burst of changes once it is over.
+
+    Files written by `handle_changes` are not reported again unless they
+    change afterwards, so rewriting changed files in place does not loop.
+
+    :Args:
+        paths
+            Paths of the files and directories to watch
+
+        handle_changes
+            A function to call with a sorted list of the paths of files which
+            have changed
+
+        debounce
+            (optional) Time (in seconds) without further changes before a
+            burst of changes is handled
+
+        should_stop
+            (optional) A function returning `True` when watching should stop
+            (default: watch until interrupted)
+
+        kwargs
+            (optional) Keyword arguments for `open_watcher()`:py:func:
+    """
+    should_stop = should_stop or (lambda: False)
+    with open_watcher(paths, **kwargs) as watcher:
+        while not should_stop():
+            changed = watcher.wait(STOP_CHECK_INTERVAL)
+            if not changed:
+                continue
+            while True:
+                more = watcher.wait(debounce)
+                if not more:
+                    break
+                changed.update(more)
+            changed = sorted(changed)
+            handle_changes(changed)
+            watcher.ignore_own_writes(changed)
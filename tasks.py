@@ -149,6 +149,24 @@ def tests(context, test_name_pattern, quiet=False, failfast=False, catch=False,
     context.run("uv run python3 -m unittest discover -s tests -t . {}".format(" ".join(args)))
 
 
+@task(iterable=["case"])
+def benchmarks(context, case, repeat=5, parallel=False, allocations=False, io=False, keys=False):
+    """Time json-indent against Python's json module (or its threads, allocations, I/O, or key cache)"""
+    progress(benchmarks)
+    if parallel:
+        module = "benchmarks.run_parallel"
+    elif allocations:
+        module = "benchmarks.run_allocations"
+    elif io:
+        module = "benchmarks.run_io"
+    elif keys:
+        module = "benchmarks.run_key_cache"
+    else:
+        module = "benchmarks.run_benchmarks"
+    with context.cd(git_repo_root(context)):
+        context.run("uv run python3 -m {} --repeat {} {}".format(module, repeat, " ".join(case)))
+
+
 @task
 @echo_on
 def version(
@@ -238,4 +256,5 @@ ns.add_task(clean_docs)
 ns.add_task(clean)
 ns.add_task(build)
 ns.add_task(tests)
+ns.add_task(benchmarks)
 ns.add_task(version)
@@ -0,0 +1,132 @@
+"""Tests for json_indent.aio"""
+
+from __future__ import absolute_import
+
+import asyncio
+import concurrent.futures
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import json_indent.aio as jia
+import json_indent.json_indent as ji
+
+DUMMY_JSON_TEXT = '{"b": [1, 2.5, "three"], "a": {"c": null}}'
+
+DUMMY_KWARGS = {"indent": 4, "sort_keys": True}
+
+
+class CountingExecutor(concurrent.futures.ThreadPoolExecutor):
+    """Count the calls submitted to a thread pool, holding each one until released."""
+
+    def __init__(self):
+        super(CountingExecutor, self).__init__(max_workers=8)
+        self.lock = threading.Lock()
+        self.release = threading.Event()
+        self.running = 0
+        self.most_running = 0
+        self.submitted = 0
+
+    def submit(self, fn, *args, **kwargs):
+        def counted():
+            with self.lock:
+                self.running += 1
+                self.most_running = max(self.most_running, self.running)
+            self.release.wait()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self.lock:
+                    self.running -= 1
+
+        self.submitted += 1
+        return super(CountingExecutor, self).submit(counted)
+
+
+class TestAio(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "input.json")
+        with open(self.path, "w") as f:
+            f.write(DUMMY_JSON_TEXT)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_AIO_000_text(self):
+        expected_text = ji.format_json_text(DUMMY_JSON_TEXT, **DUMMY_KWARGS)
+        self.assertEqual(asyncio.run(jia.format_text_async(DUMMY_JSON_TEXT, **DUMMY_KWARGS)), expected_text)
+        self.assertEqual(
+            asyncio.run(jia.format_text_async(DUMMY_JSON_TEXT, lossless=True, **DUMMY_KWARGS)), expected_text
+        )
+        data = asyncio.run(jia.load_json_text_async(DUMMY_JSON_TEXT))
+        self.assertEqual(data, ji.load_json_text(DUMMY_JSON_TEXT))
+        self.assertEqual(asyncio.run(jia.dump_json_text_async(data, **DUMMY_KWARGS)), expected_text)
+
+        with self.assertRaises(ji.JsonParseError) as context:  # noqa: F841
+            asyncio.run(jia.format_text_async(DUMMY_JSON_TEXT + "]", filename="dummy.json"))
+        self.assertTrue(context.exception.args[0].startswith("dummy.json: "))
+
+    def test_AIO_010_file(self):
+        expected_text = ji.format_json_text(DUMMY_JSON_TEXT, **DUMMY_KWARGS)
+        self.assertEqual(asyncio.run(jia.format_file_async(self.path, **DUMMY_KWARGS)), expected_text)
+        with open(self.path, "r") as f:
+            self.assertEqual(f.read(), DUMMY_JSON_TEXT)
+
+        # Formatting in place replaces the file atomically
+        os.chmod(self.path, 0o604)
+        inode = os.stat(self.path).st_ino
+        asyncio.run(jia.format_file_async(self.path, output_path=self.path, newline="\r\n", **DUMMY_KWARGS))
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), expected_text.replace("\n", "\r\n").encode("utf-8"))
+        self.assertNotEqual(os.stat(self.path).st_ino, inode)
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o604)
+        self.assertListEqual(os.listdir(self.temp_dir), ["input.json"])
+
+    def test_AIO_020_process_executor(self):
+        expected_text = ji.format_json_text(DUMMY_JSON_TEXT, **DUMMY_KWARGS)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+            output_text = asyncio.run(jia.format_file_async(self.path, executor=executor, **DUMMY_KWARGS))
+            self.assertEqual(output_text, expected_text)
+            # Errors come back from the other process intact
+            with self.assertRaises(ji.JsonParseError) as context:  # noqa: F841
+                asyncio.run(jia.format_text_async("[", filename="dummy.json", executor=executor))
+            self.assertEqual(context.exception.filename, "dummy.json")
+
+    def test_AIO_030_max_concurrency(self):
+        executor = CountingExecutor()
+        formatter = jia.AsyncJsonFormatter(executor, max_concurrency=2)
+
+        async def format_all():
+            tasks = [asyncio.ensure_future(formatter.format_text(DUMMY_JSON_TEXT)) for _ in range(6)]
+            await asyncio.sleep(0.1)
+            self.assertEqual(executor.submitted, 2)
+            executor.release.set()
+            return await asyncio.gather(*tasks)
+
+        with executor:
+            self.assertEqual(len(asyncio.run(format_all())), 6)
+        self.assertEqual(executor.most_running, 2)
+
+    def test_AIO_040_cancellation(self):
+        executor = CountingExecutor()
+        formatter = jia.AsyncJsonFormatter(executor, max_concurrency=1)
+        output_path = os.path.join(self.temp_dir, "output.json")
+
+        async def cancel_waiting():
+            running = asyncio.ensure_future(formatter.format_text(DUMMY_JSON_TEXT))
+            waiting = asyncio.ensure_future(formatter.format_file(self.path, output_path=output_path))
+            await asyncio.sleep(0.1)
+            waiting.cancel()
+            executor.release.set()
+            with self.assertRaises(asyncio.CancelledError) as context:  # noqa: F841
+                await waiting
+            return await running
+
+        with executor:
+            asyncio.run(cancel_waiting())
+        # The cancelled call never reached the executor, or wrote its file
+        self.assertEqual(executor.submitted, 1)
+        self.assertFalse(os.path.exists(output_path))
@@ -0,0 +1,56 @@
+"""Tests for json_indent.decoder"""
+
+from __future__ import absolute_import
+
+import collections
+import decimal
+import json
+import math
+import unittest
+
+import json_indent.decoder as jid
+
+DUMMY_JSON_TEXT = """
+{
+  "a": [1, -2.5e3, "\\u00e9", true, false, null, [], {}],
+  "b": {"x": [{"y": NaN}], "x": -Infinity},
+  "c": [[[["deep"]]], 10000000000000000000000]
+}
+"""
+
+INVALID_JSON_TEXTS = ["[1,]", '{"a":1,}', '{"a" 1}', "[1 2]", "{1:2}", "[", "]", "", "1 2", "[}", "tru", "[01]"]
+
+
+class TestDecoder(unittest.TestCase):
+    def assertSameAsStandard(self, text, **kwargs):
+        self.assertEqual(repr(jid.decode_json(text, **kwargs)), repr(json.loads(text, **kwargs)))
+
+    def test_JID_000_decode(self):
+        self.assertSameAsStandard(DUMMY_JSON_TEXT)
+        self.assertSameAsStandard(DUMMY_JSON_TEXT, object_pairs_hook=collections.OrderedDict)
+        self.assertSameAsStandard(DUMMY_JSON_TEXT, object_hook=lambda o: sorted(o.items()))
+        self.assertSameAsStandard(DUMMY_JSON_TEXT, parse_float=decimal.Decimal, parse_int=str, parse_constant=repr)
+        for text in ["1", '"x"', "null", " [ ] ", "{}"]:
+            self.assertSameAsStandard(text)
+
+    def test_JID_010_constants(self):
+        data = jid.decode_json("[NaN, Infinity, -Infinity]")
+        self.assertTrue(math.isnan(data[0]))
+        self.assertEqual(data[1:], [float("inf"), float("-inf")])
+
+    def test_JID_100_deep(self):
+        depth = 20000
+        data = jid.decode_json('{"a": [' * depth + "1" + "]}" * depth)
+        for _ in range(depth):
+            data = data["a"][0]
+        self.assertEqual(data, 1)
+
+    def test_JID_200_invalid(self):
+        for text in INVALID_JSON_TEXTS:
+            with self.assertRaises(json.JSONDecodeError) as context:  # noqa: F841
+                jid.decode_json(text)
+
+    def test_JID_210_unsupported_kwargs(self):
+        with self.assertRaises(TypeError) as context:  # noqa: F841
+            jid.decode_json("[]", strict=False)
+        self.assertIn("strict", context.exception.args[0])
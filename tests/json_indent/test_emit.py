@@ -0,0 +1,57 @@
+"""Tests for json_indent.emit"""
+
+from __future__ import absolute_import
+
+import hashlib
+import os
+import unittest
+
+import json_indent.emit as je
+
+
+class TestEmit(unittest.TestCase):
+    def test_EMI_000_parse_emit_spec(self):
+        self.assertEqual(je.parse_emit_spec("pretty:out.json"), je.EmitSpec("pretty", "out.json"))
+        self.assertEqual(je.parse_emit_spec("compact:C:/{stem}.{hash}.json"), ("compact", "C:/{stem}.{hash}.json"))
+        for text, expected_errmsg in [
+            ("out.json", "out.json: emit must be given as VARIANT:PATH (e.g., 'compact:{dir}/{stem}.min.json')"),
+            ("compact:", "compact:: emit must be given as VARIANT:PATH (e.g., 'compact:{dir}/{stem}.min.json')"),
+            ("tiny:out.json", "tiny:out.json: variant must be one of: pretty, compact"),
+            (
+                "pretty:{base}.json",
+                "pretty:{base}.json: path placeholders must be among: {dir}, {name}, {stem}, {hash}",
+            ),
+            ("pretty:{0}.json", "pretty:{0}.json: path placeholders must be among: {dir}, {name}, {stem}, {hash}"),
+            ("pretty:{stem.json", "pretty:{stem.json: path placeholders must be among: {dir}, {name}, {stem}, {hash}"),
+        ]:
+            with self.assertRaises(ValueError) as context:  # noqa: F841
+                je.parse_emit_spec(text)
+            self.assertEqual(context.exception.args[0], expected_errmsg)
+
+    def test_EMI_010_variant_dump_kwargs(self):
+        self.assertDictEqual(
+            je.variant_dump_kwargs("pretty", 4, sort_keys=True),
+            {"indent": 4, "separators": (",", ": "), "sort_keys": True},
+        )
+        self.assertDictEqual(
+            je.variant_dump_kwargs("compact", 4),
+            {"indent": None, "separators": (",", ":"), "sort_keys": False},
+        )
+
+    def test_EMI_020_emit_path(self):
+        contents = b"[]\n"
+        digest = hashlib.sha256(contents).hexdigest()[:16]
+        input_filename = os.path.join("data", "a.b.json")
+        for template, expected_path in [
+            ("{dir}/{stem}.min.json", "data/a.b.min.json"),
+            ("dist/{name}", "dist/a.b.json"),
+            ("{stem}.{hash}.json", "a.b.{}.json".format(digest)),
+        ]:
+            self.assertEqual(je.emit_path(template, input_filename, contents), expected_path.replace("/", os.sep, 1))
+        # Files in the current directory, and stdin, are in "."
+        self.assertEqual(je.emit_path("{dir}/{stem}.x", "a.json", contents), "./a.x".replace("/", os.sep))
+        self.assertEqual(je.emit_path("{dir}/{name}.x", "-", contents), "./stdin.x".replace("/", os.sep))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""Tests for json_indent.encoder"""
+
+from __future__ import absolute_import
+
+import collections
+import enum
+import json
+import unittest
+
+import json_indent.encoder as jie
+
+
+class DummyIntEnum(enum.IntEnum):
+    A = 1
+
+
+class DummyString(str):
+    pass
+
+
+DUMMY_DATA = collections.OrderedDict(
+    [
+        ("b", [1, -2.5, "é", True, False, None, [], {}, (), [[1, 2]]]),
+        ("a", {"y": [{"z": float("nan")}], "x": float("-inf"), 1: 2, 1.5: None, None: True, False: [0]}),
+        (DummyString("c"), [DummyIntEnum.A, DummyString("s"), 10**30]),
+    ]
+)
+
+DUMMY_KWARGS = [
+    {},
+    {"indent": 2},
+    {"indent": 0},
+    {"indent": "\t", "separators": (";", "=")},
+    {"indent": 2, "ensure_ascii": False},
+    {"indent": 2, "check_circular": False},
+]
+
+
+class TestEncoder(unittest.TestCase):
+    def assertSameAsStandard(self, data, **kwargs):
+        self.assertEqual(jie.encode_json(data, **kwargs), json.dumps(data, **kwargs))
+
+    def assertSameErrorAsStandard(self, data, exception_class, **kwargs):
+        with self.assertRaises(exception_class) as context:  # noqa: F841
+            json.dumps(data, **kwargs)
+        expected_message = context.exception.args[0]
+        with self.assertRaises(exception_class) as context:  # noqa: F841
+            jie.encode_json(data, **kwargs)
+        self.assertEqual(context.exception.args[0], expected_message)
+
+    def test_JIE_000_encode(self):
+        for kwargs in DUMMY_KWARGS:
+            self.assertSameAsStandard(DUMMY_DATA, **kwargs)
+        for data in [1, "x", None, [], {}, [[]], [{}]]:
+            self.assertSameAsStandard(data, indent=2)
+
+    def test_JIE_010_sort_keys(self):
+        data = {"b": [{"d": 1, "c": 2}], "a": {}}
+        self.assertSameAsStandard(data, indent=2, sort_keys=True)
+        self.assertSameErrorAsStandard({"a": 1, 1: 2}, TypeError, indent=2, sort_keys=True)
+
+    def test_JIE_020_keys(self):
+        data = {(1, 2): 3, "a": 4}
+        self.assertSameAsStandard(data, indent=2, skipkeys=True)
+        self.assertSameErrorAsStandard(data, TypeError, indent=2)
+
+    def test_JIE_030_default(self):
+        data = [1, {"a": object()}]
+        self.assertSameAsStandard(data, indent=2, default=lambda o: [o.__class__.__name__, {"x": 1}])
+        self.assertSameErrorAsStandard(data, TypeError, indent=2)
+
+    def test_JIE_040_out_of_range_floats(self):
+        self.assertSameErrorAsStandard([1.0, float("inf")], ValueError, indent=2, allow_nan=False)
+
+    def test_JIE_050_circular_references(self):
+        shared = [1]
+        self.assertSameAsStandard([shared, shared], indent=2)
+
+        circular = [1]
+        circular.append({"a": circular})
+        self.assertSameErrorAsStandard(circular, ValueError, indent=2)
+
+        def default(o):
+            return o
+
+        self.assertSameErrorAsStandard(object(), ValueError, indent=2, default=default)
+
+    def test_JIE_100_deep(self):
+        depth = 20000
+        data = None
+        for _ in range(depth):
+            data = {"a": [data]}
+        self.assertEqual(jie.encode_json(data), '{"a": [' * depth + "null" + "]}" * depth)
+
+    def test_JIE_110_iter_encode(self):
+        for kwargs in DUMMY_KWARGS:
+            for piece_size in [1, 10, jie.DEFAULT_PIECE_SIZE]:
+                pieces = list(jie.iter_encode_json(DUMMY_DATA, piece_size, **kwargs))
+                self.assertEqual("".join(pieces), json.dumps(DUMMY_DATA, **kwargs))
+                self.assertTrue(all(len(piece) >= piece_size for piece in pieces[:-1]))
+        self.assertGreater(len(list(jie.iter_encode_json(DUMMY_DATA, 1, indent=2))), 1)
+        self.assertListEqual(list(jie.iter_encode_json([1, 2])), ["[1, 2]"])
+
+    def test_JIE_120_number_arrays(self):
+        size = jie.BULK_MIN_SIZE
+        for data in [
+            list(range(-size, size)),
+            [10**30] * size,
+            [i / 7.0 for i in range(size)] + [1e300, -0.0, 5e-324],
+            [1.5] * size + [float("nan")],
+            [float("-inf")] + [1.5] * size,
+            [1] * size + [2.5],
+            [1.5] * size + [True],
+            [True] * size,
+            [DummyIntEnum.A] * size,
+            [1] * (size - 1),
+            (1,) * size,
+        ]:
+            for kwargs in DUMMY_KWARGS:
+                self.assertSameAsStandard(data, **kwargs)
+                self.assertSameAsStandard({"a": data}, **kwargs)
+        self.assertSameErrorAsStandard([1.5] * size + [float("nan")], ValueError, indent=2, allow_nan=False)
+
+    def test_JIE_200_unsupported_kwargs(self):
+        with self.assertRaises(TypeError) as context:  # noqa: F841
+            jie.encode_json([], cls=json.JSONEncoder)
+        self.assertIn("cls", context.exception.args[0])
+        with self.assertRaises(TypeError) as context:  # noqa: F841
+            jie.iter_encode_json([], cls=json.JSONEncoder)
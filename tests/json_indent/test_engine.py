@@ -0,0 +1,52 @@
+"""Tests for json_indent.engine"""
+
+from __future__ import absolute_import
+
+import unittest
+from unittest import mock
+
+import json_indent.engine as jen
+import json_indent.iofile as jio
+
+
+class TestEngine(unittest.TestCase):
+    def test_ENG_000_physical_memory(self):
+        memory = jen.physical_memory()
+        if memory is not None:
+            self.assertGreater(memory, 0)
+        with mock.patch.object(jen.os, "sysconf", side_effect=ValueError("unknown")):
+            self.assertIsNone(jen.physical_memory())
+
+    def test_ENG_010_default_memory_budget(self):
+        with mock.patch.object(jen, "physical_memory", return_value=8000):
+            self.assertEqual(jen.default_memory_budget(), 4000)
+            self.assertEqual(jen.default_memory_budget(4), 1000)
+            self.assertEqual(jen.default_memory_budget(10000), 1)
+        with mock.patch.object(jen, "physical_memory", return_value=None):
+            self.assertEqual(jen.default_memory_budget(4), jen.DEFAULT_MEMORY_LIMIT)
+
+    def test_ENG_020_choose_engine(self):
+        budget = jen.estimate_memory(1000)
+        self.assertEqual(jen.choose_engine(1000, budget), jen.ENGINE_MEMORY)
+        self.assertEqual(jen.choose_engine(1001, budget), jen.ENGINE_BOUNDED)
+        # Sizes which are unknown, and budgets which are unlimited, fit
+        self.assertEqual(jen.choose_engine(None, budget), jen.ENGINE_MEMORY)
+        self.assertEqual(jen.choose_engine(1001, None), jen.ENGINE_MEMORY)
+        for engine in [jen.ENGINE_MEMORY, jen.ENGINE_BOUNDED]:
+            self.assertEqual(jen.choose_engine(1, budget, engine), engine)
+            self.assertEqual(jen.choose_engine(10**9, budget, engine), engine)
+
+    def test_ENG_030_bounded_memory_limit(self):
+        budget = 64 * 1024 * 1024
+        self.assertEqual(jen.bounded_memory_limit(budget), budget - jen.BOUNDED_ENGINE_RESERVE)
+        # Bigger chunks and buffers leave less for holding objects
+        limits = [jen.bounded_memory_limit(budget, jio.IO_PROFILES[name]) for name in jio.IO_PROFILES]
+        self.assertListEqual(limits, sorted(limits, reverse=True))
+        self.assertLess(limits[0], budget - jen.BOUNDED_ENGINE_RESERVE)
+        # Small budgets are split
+        self.assertEqual(jen.bounded_memory_limit(1000), 500)
+        self.assertEqual(jen.bounded_memory_limit(1), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+"""Tests for json_indent.events"""
+
+from __future__ import absolute_import
+
+import unittest
+
+import json_indent.events as jev
+import json_indent.json_indent as ji
+
+DUMMY_JSON_TEXT = '{"a": [1, 2]}'
+
+
+class TestEvents(unittest.TestCase):
+    def test_EVT_000_observers(self):
+        events = []
+        self.assertFalse(jev.is_observed())
+        jev.emit(jev.EVENT_LOAD, "unseen")
+        with jev.observing(events.append):
+            self.assertTrue(jev.is_observed())
+            jev.emit(jev.EVENT_LOAD, "a.json", size=2, seconds=0.5)
+        self.assertFalse(jev.is_observed())
+        self.assertListEqual(events, [jev.Event("load", "a.json", {"size": 2, "seconds": 0.5})])
+        with self.assertRaises(ValueError) as context:  # noqa: F841
+            jev.remove_observer(events.append)
+
+    def test_EVT_010_load_and_dump(self):
+        events = []
+        with jev.observing(events.append):
+            data = ji.load_json(DUMMY_JSON_TEXT)
+            text = ji.dump_json(data, indent=2)
+            ji.format_json_text(DUMMY_JSON_TEXT, filename="x.json", lossless=True, indent=2)
+        self.assertListEqual(
+            [(x.kind, x.filename) for x in events], [("load", "<text>"), ("dump", None), ("reformat", "x.json")]
+        )
+        self.assertEqual(events[0].data["size"], len(DUMMY_JSON_TEXT))
+        self.assertEqual(events[1].data["size"], len(text))
+        self.assertEqual(events[2].data["output_size"], len(text))
+        for event in events:
+            self.assertGreaterEqual(event.data["seconds"], 0)
+
+    def test_EVT_020_syntax_error(self):
+        events = []
+        with jev.observing(events.append):
+            for lossless in [False, True]:
+                with self.assertRaises(ji.JsonParseError) as context:  # noqa: F841
+                    ji.format_json_text("[1,", filename="bad.json", lossless=lossless)
+                self.assertEqual(events[-1], jev.Event("syntax-error", "bad.json", {"message": str(context.exception)}))
+        self.assertEqual(len(events), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""Tests for json_indent.extsort"""
+
+from __future__ import absolute_import
+
+import json
+import tracemalloc
+import unittest
+from unittest import mock
+
+import json_indent.extsort as jes
+from json_indent.json_indent import format_json_text
+from json_indent.tokens import iter_tokens_from_chunks
+
+DUMMY_CHUNK_SIZE = 7
+
+DUMMY_JSON_TEXT_NESTED = """{
+  "b": {"z": [1, 2.50, 1E400, -0, {}], "y": {"k": "\\u00e9\\/", "j": []}},
+  "a": [{"d": true, "c": null}, "café", "\\ud800"],
+  "b": {"x": 1},
+  "é": -1.0e-3
+}"""
+
+DUMMY_KWARGS = [
+    {"indent": 2},
+    {"indent": None},
+    {"indent": "\t", "separators": (",", ":")},
+    {"indent": 4, "ensure_ascii": False},
+]
+
+MEMORY_LIMITS = [1, 64, jes.DEFAULT_MEMORY_LIMIT]
+
+
+def format_sorted_text(text, **kwargs):
+    chunks = [text[i : i + DUMMY_CHUNK_SIZE] for i in range(0, len(text), DUMMY_CHUNK_SIZE)]
+    output = []
+    jes.format_sorted(iter_tokens_from_chunks(chunks), output.append, **kwargs)
+    return "".join(output) + "\n"
+
+
+def scrambled_members(count):
+    """Return the text of a flat object with many members, out of order, some with the same keys."""
+    members = []
+    for i in range(count):
+        value = {"i": i, "s": "v" * ((i * 31) % 41)}
+        members.append('"k{}": {}'.format((i * 7919) % (count // 4), json.dumps(value)))
+    return "{" + ", ".join(members) + "}"
+
+
+class TestExtSort(unittest.TestCase):
+    def test_EXT_000_parse_size(self):
+        for text, expected_size in [("1", 1), ("64k", 64 * 1024), ("3M", 3 * 1024**2), ("2G", 2 * 1024**3)]:
+            self.assertEqual(jes.parse_size(text), expected_size)
+        for text in ["", "0", "-1", "1.5M", "1T", "M"]:
+            with self.assertRaises(ValueError) as context:  # noqa: F841
+                jes.parse_size(text)
+            self.assertEqual(
+                context.exception.args[0],
+                "{}: size must be a positive whole number, optionally followed by K, M, or G".format(text),
+            )
+
+    def test_EXT_010_same_as_sort_keys(self):
+        for memory_limit in MEMORY_LIMITS:
+            for kwargs in DUMMY_KWARGS:
+                self.assertEqual(
+                    format_sorted_text(DUMMY_JSON_TEXT_NESTED, memory_limit=memory_limit, **kwargs),
+                    format_json_text(DUMMY_JSON_TEXT_NESTED, sort_keys=True, **kwargs),
+                )
+
+    def test_EXT_020_spilled_runs(self):
+        text = scrambled_members(2000)
+        expected_text = format_json_text(text, sort_keys=True, indent=2)
+        for memory_limit in MEMORY_LIMITS:
+            self.assertEqual(format_sorted_text(text, memory_limit=memory_limit, indent=2), expected_text)
+        # With more runs than are merged at once
+        with mock.patch.object(jes, "MAX_MERGE_RUNS", 3):
+            self.assertEqual(format_sorted_text(text, memory_limit=1, indent=2), expected_text)
+
+    def test_EXT_025_keys_in_order(self):
+        for memory_limit in MEMORY_LIMITS:
+            for kwargs in DUMMY_KWARGS:
+                self.assertEqual(
+                    format_sorted_text(DUMMY_JSON_TEXT_NESTED, memory_limit=memory_limit, sort_keys=False, **kwargs),
+                    format_json_text(DUMMY_JSON_TEXT_NESTED, **kwargs),
+                )
+        text = scrambled_members(2000)
+        expected_text = format_json_text(text, indent=2)
+        with mock.patch.object(jes, "MAX_MERGE_RUNS", 3):
+            self.assertEqual(format_sorted_text(text, memory_limit=1, sort_keys=False, indent=2), expected_text)
+
+    def test_EXT_050_memory_limit(self):
+        # Many small members take several times their text in memory
+        text = "{" + ", ".join('"key{:06d}": {}'.format((i * 7919) % 10000, i) for i in range(10000)) + "}"
+        memory_limit = 1024 * 1024
+        for sort_keys in [True, False]:
+            output_size = [0]
+
+            def write(piece, output_size=output_size):
+                output_size[0] += len(piece)
+
+            chunks = (text[i : i + 4096] for i in range(0, len(text), 4096))
+            tracemalloc.start()
+            try:
+                jes.format_sorted(
+                    iter_tokens_from_chunks(chunks), write, memory_limit=memory_limit, sort_keys=sort_keys, indent=2
+                )
+                (_, peak) = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            # (Beyond the limit, some room goes to tokens and temporary files)
+            self.assertLess(peak, memory_limit * 1.25, sort_keys)
+            self.assertEqual(output_size[0] + 1, len(format_json_text(text, sort_keys=sort_keys, indent=2)))
+
+    def test_EXT_030_scalars(self):
+        for text in ['"\\u00e9"', "1.0", "12345678901234567890", "true", "null", "NaN", "-Infinity", "[]", "{}"]:
+            self.assertEqual(format_sorted_text(text, memory_limit=1), format_json_text(text, sort_keys=True))
+
+    def test_EXT_040_errors(self):
+        for text in ["", "{", '{"a" 1}', "[1,]", "{} {}"]:
+            with self.assertRaises(json.JSONDecodeError) as context:  # noqa: F841
+                format_sorted_text(text, memory_limit=1)
+        with self.assertRaises(ValueError) as context:  # noqa: F841
+            format_sorted_text("[NaN]", allow_nan=False)
+        with self.assertRaises(TypeError) as context:  # noqa: F841
+            format_sorted_text("[]", default=str)
+        self.assertEqual(context.exception.args[0], "unsupported keyword argument(s) for format_sorted(): default")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+"""Tests for json_indent.formatter"""
+
+from __future__ import absolute_import
+
+import json
+import unittest
+
+import json_indent.formatter as jif
+import json_indent.tokens as jit
+
+DUMMY_JSON_TEXT = '{"b": [1.50, 1E400, "\\u00e9"], "a": {"y": {}, "x": []}, "b": [ ]}'
+
+DUMMY_JSON_TEXT_FORMATTED = """{
+  "b": [
+    1.50,
+    1E400,
+    "\\u00e9"
+  ],
+  "a": {
+    "y": {},
+    "x": []
+  },
+  "b": []
+}"""
+
+DUMMY_JSON_TEXT_SORTED = """{
+  "a": {
+    "x": [],
+    "y": {}
+  },
+  "b": [
+    1.50,
+    1E400,
+    "\\u00e9"
+  ],
+  "b": []
+}"""
+
+DUMMY_JSON_TEXT_COMPACT = '{"b":[1.50,1E400,"\\u00e9"],"a":{"y":{},"x":[]},"b":[]}'
+
+INVALID_JSON_TEXTS = ["[1,]", '{"a":1,}', '{"a" 1}', "[1 2]", "{1:2}", "[", "]", "", "1 2", '{"a":}', "[}", '{"a":1]']
+
+
+class TestFormatter(unittest.TestCase):
+    def reformat(self, text, coalesce, **kwargs):
+        sort_keys = kwargs.pop("sort_keys", False)
+        layout = jif.Layout(**kwargs)
+        return "".join(jif.reformat_tokens(jit.iter_tokens(text, coalesce=coalesce), layout, sort_keys=sort_keys))
+
+    def test_JIF_000_layout(self):
+        layout = jif.Layout(indent=2)
+        self.assertEqual(layout.newline_indent(0), "\n")
+        self.assertEqual(layout.newline_indent(2), "\n    ")
+        self.assertEqual(layout.item_break(1), ",\n  ")
+        self.assertEqual(layout.key_separator, ": ")
+
+        layout = jif.Layout(indent="\t", separators=(";", "="))
+        self.assertEqual(layout.newline_indent(2), "\n\t\t")
+        self.assertEqual(layout.item_break(1), ";\n\t")
+
+        layout = jif.Layout()
+        self.assertEqual(layout.newline_indent(3), "")
+        self.assertEqual(layout.item_break(3), ", ")
+
+    def test_JIF_100_reformat_tokens(self):
+        for coalesce in [False, True]:
+            self.assertEqual(self.reformat(DUMMY_JSON_TEXT, coalesce, indent=2), DUMMY_JSON_TEXT_FORMATTED)
+            self.assertEqual(self.reformat(DUMMY_JSON_TEXT, coalesce, indent=2, sort_keys=True), DUMMY_JSON_TEXT_SORTED)
+            self.assertEqual(self.reformat(DUMMY_JSON_TEXT, coalesce, separators=(",", ":")), DUMMY_JSON_TEXT_COMPACT)
+
+    def test_JIF_110_reformat_tokens_matches_json_dumps(self):
+        data = {"z": [1, 2.5, None, True, "x"], "y": [[], {}, [{"b": 1, "a": [False]}]], "": {"q": "r"}}
+        for kwargs in [{"indent": 4}, {"indent": "\t", "sort_keys": True}, {"indent": 0}, {}]:
+            expected_text = json.dumps(data, **kwargs)
+            for coalesce in [False, True]:
+                self.assertEqual(self.reformat(json.dumps(data), coalesce, **kwargs), expected_text)
+
+    def test_JIF_120_reformat_tokens_deeply_nested(self):
+        depth = 100000
+        text = "[" * depth + "]" * depth
+        self.assertEqual(self.reformat(text, True, separators=(",", ":")), text)
+
+    def test_JIF_200_reformat_tokens_invalid(self):
+        for text in INVALID_JSON_TEXTS:
+            for coalesce in [False, True]:
+                with self.assertRaises(json.JSONDecodeError) as context:  # noqa: F841
+                    self.reformat(text, coalesce, indent=2)
@@ -0,0 +1,149 @@
+"""Tests for json_indent.git"""
+
+from __future__ import absolute_import
+
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from unittest import mock
+
+import json_indent.git as jig
+
+GIT_IS_AVAILABLE = shutil.which("git") is not None
+
+DUMMY_FILES = {
+    "a.json": b'{"a": 1}',
+    "b.JSON": b"[]",
+    "c.txt": b"not JSON",
+    os.path.join("sub", "d.json"): b'"d"',
+    os.path.join("sub", "e f.json"): b"null",
+}
+
+
+def run_git(repo_dir, *args):
+    subprocess.run(["git"] + list(args), cwd=repo_dir, check=True, stdout=subprocess.PIPE)  # noqa: S603
+
+
+def make_git_repo(files):
+    """Create a temporary git repository with the given files staged; return its path."""
+    repo_dir = tempfile.mkdtemp()
+    run_git(repo_dir, "init", "-q")
+    for path, contents in files.items():
+        full_path = os.path.join(repo_dir, path)
+        if not os.path.isdir(os.path.dirname(full_path)):
+            os.makedirs(os.path.dirname(full_path))
+        with open(full_path, "wb") as f:
+            f.write(contents)
+    run_git(repo_dir, "add", "--", *files)
+    return repo_dir
+
+
+@unittest.skipUnless(GIT_IS_AVAILABLE, "git is not available")
+class TestGit(unittest.TestCase):
+    def setUp(self):
+        self.repo_dir = make_git_repo(DUMMY_FILES)
+
+    def tearDown(self):
+        shutil.rmtree(self.repo_dir)
+
+    def test_GIT_000_list_staged_files(self):
+        staged_files = jig.list_staged_files(cwd=self.repo_dir)
+        self.assertListEqual(sorted(x.path for x in staged_files), ["a.json", "b.JSON", "sub/d.json", "sub/e f.json"])
+
+        staged_files = jig.list_staged_files(cwd=os.path.join(self.repo_dir, "sub"))
+        self.assertListEqual(sorted(x.path for x in staged_files), ["d.json", "e f.json"])
+
+        staged_files = jig.list_staged_files(["c.txt", "sub/e f.json", "missing.json"], cwd=self.repo_dir)
+        self.assertListEqual(sorted(x.path for x in staged_files), ["c.txt", "sub/e f.json"])
+
+    def test_GIT_001_list_staged_files_changes(self):
+        with open(os.path.join(self.repo_dir, "a.json"), "wb") as f:
+            f.write(b"unstaged")
+        os.remove(os.path.join(self.repo_dir, "b.JSON"))
+        run_git(self.repo_dir, "rm", "-q", "--cached", "b.JSON")
+        staged_files = jig.list_staged_files(cwd=self.repo_dir)
+        self.assertListEqual(sorted(x.path for x in staged_files), ["a.json", "sub/d.json", "sub/e f.json"])
+
+    def test_GIT_010_blob_reader(self):
+        staged_files = jig.list_staged_files(cwd=self.repo_dir)
+        with jig.BlobReader(cwd=self.repo_dir) as blob_reader:
+            for staged_file in staged_files:
+                self.assertEqual(blob_reader.read(staged_file.blob_id), DUMMY_FILES[os.path.normpath(staged_file.path)])
+            self.assertEqual(blob_reader.read(":c.txt"), DUMMY_FILES["c.txt"])
+            with self.assertRaises(jig.GitError) as context:  # noqa: F841
+                blob_reader.read(":missing.json")
+            self.assertIn("missing", context.exception.args[0])
+            # The reader is still usable after a missing object
+            self.assertEqual(blob_reader.read(":a.json"), DUMMY_FILES["a.json"])
+
+    def test_GIT_020_index_entries(self):
+        (top_level_dir, git_path) = jig.get_repo_paths("json-indent", cwd=os.path.join(self.repo_dir, "sub"))
+        self.assertEqual(top_level_dir, os.path.realpath(self.repo_dir))
+        self.assertEqual(git_path, os.path.join(top_level_dir, ".git", "json-indent"))
+
+        entries = jig.list_index_entries(["a.json", "c.txt", "sub", "missing.json"], cwd=self.repo_dir)
+        self.assertListEqual(
+            sorted(os.path.relpath(path, top_level_dir) for path in entries),
+            ["a.json", "c.txt", os.path.join("sub", "d.json"), os.path.join("sub", "e f.json")],
+        )
+        with jig.BlobReader(cwd=self.repo_dir) as blob_reader:
+            for path, blob_id in entries.items():
+                contents = blob_reader.read(blob_id)
+                self.assertEqual(contents, DUMMY_FILES[os.path.relpath(path, top_level_dir)])
+                self.assertEqual(jig.compute_blob_id(contents, blob_id), blob_id)
+
+        # Entries git is told to ignore changes to are left out
+        run_git(self.repo_dir, "update-index", "--assume-unchanged", "a.json")
+        entries = jig.list_index_entries(["a.json", "c.txt"], cwd=self.repo_dir)
+        self.assertListEqual(list(entries), [os.path.join(top_level_dir, "c.txt")])
+
+    def test_GIT_021_modified_files(self):
+        top_level_dir = os.path.realpath(self.repo_dir)
+        self.assertSetEqual(jig.list_modified_files([], cwd=self.repo_dir), set())
+        with open(os.path.join(self.repo_dir, "sub", "d.json"), "wb") as f:
+            f.write(b'"modified"')
+        modified_path = os.path.join(top_level_dir, "sub", "d.json")
+        self.assertSetEqual(jig.list_modified_files([], cwd=self.repo_dir), {modified_path})
+        self.assertSetEqual(
+            jig.list_modified_files(["d.json"], cwd=os.path.join(self.repo_dir, "sub")), {modified_path}
+        )
+        self.assertSetEqual(jig.list_modified_files(["a.json"], cwd=self.repo_dir), set())
+
+    def test_GIT_022_many_paths(self):
+        top_level_dir = os.path.realpath(self.repo_dir)
+        sub_dir = os.path.join(self.repo_dir, "sub")
+        with open(os.path.join(sub_dir, "d.json"), "wb") as f:
+            f.write(b'"modified"')
+        cases = [
+            (["a.json", "c.txt", "sub", "missing.json"], self.repo_dir),
+            ([os.curdir], self.repo_dir),
+            (["d.json", os.path.join(os.pardir, "a.json")], sub_dir),
+            ([os.curdir, "missing.json"], sub_dir),
+            ([os.path.join(top_level_dir, "b.JSON")], sub_dir),
+        ]
+        for paths, cwd in cases:
+            entries = jig.list_index_entries(paths, cwd=cwd)
+            modified_paths = jig.list_modified_files(paths, cwd=cwd)
+            # Filtering a list of every file gives what git gives for the paths
+            with mock.patch.object(jig, "MAX_PATHSPEC_BYTES", 0):
+                self.assertDictEqual(jig.list_index_entries(paths, cwd=cwd), entries)
+                self.assertSetEqual(jig.list_modified_files(paths, cwd=cwd), modified_paths)
+        # Far more paths than fit on a command line
+        paths = ["{}-{:06d}.json".format("x" * 200, i) for i in range(20000)] + ["a.json", "sub"]
+        entries = jig.list_index_entries(paths, cwd=self.repo_dir)
+        self.assertListEqual(
+            sorted(os.path.relpath(path, top_level_dir) for path in entries),
+            ["a.json", os.path.join("sub", "d.json"), os.path.join("sub", "e f.json")],
+        )
+        modified_path = os.path.join(top_level_dir, "sub", "d.json")
+        self.assertSetEqual(jig.list_modified_files(paths, cwd=self.repo_dir), {modified_path})
+
+    def test_GIT_100_outside_repository(self):
+        not_a_repo_dir = tempfile.mkdtemp()
+        try:
+            with self.assertRaises(jig.GitError) as context:  # noqa: F841
+                jig.list_staged_files(cwd=not_a_repo_dir)
+        finally:
+            shutil.rmtree(not_a_repo_dir)
@@ -0,0 +1,76 @@
+"""Tests for json_indent.gitcache"""
+
+from __future__ import absolute_import
+
+import os
+import shutil
+import unittest
+
+import json_indent.gitcache as jgc
+
+from tests.json_indent.test_git import GIT_IS_AVAILABLE, make_git_repo
+
+DUMMY_FILES = {
+    "a.json": b'{"a": 1}\n',
+    "b.json": b"[]\n",
+}
+
+DUMMY_OPTIONS = {"indent": 2}
+
+
+@unittest.skipUnless(GIT_IS_AVAILABLE, "git is not available")
+class TestFormattedBlobCache(unittest.TestCase):
+    def setUp(self):
+        self.repo_dir = make_git_repo(DUMMY_FILES)
+
+    def tearDown(self):
+        shutil.rmtree(self.repo_dir)
+
+    def open_cache(self, options=DUMMY_OPTIONS, **kwargs):
+        return jgc.FormattedBlobCache(list(DUMMY_FILES), options, cwd=self.repo_dir, **kwargs)
+
+    def test_GCA_000_compute_options_key(self):
+        key = jgc.compute_options_key(DUMMY_OPTIONS)
+        self.assertEqual(key, jgc.compute_options_key(dict(DUMMY_OPTIONS)))
+        self.assertNotEqual(key, jgc.compute_options_key({"indent": 4}))
+
+    def test_GCA_010_add_and_save(self):
+        cache = self.open_cache()
+        self.assertFalse(cache.is_formatted("a.json"))
+        cache.add("a.json", DUMMY_FILES["a.json"])
+        # Contents other than what is staged are not recorded
+        cache.add("b.json", b"[ ]\n")
+        # Neither are files git does not track
+        cache.add("c.json", b"[]\n")
+        self.assertTrue(cache.is_formatted("a.json"))
+        self.assertFalse(cache.is_formatted("b.json"))
+        self.assertFalse(cache.is_formatted("c.json"))
+        cache.save()
+
+        self.assertTrue(self.open_cache().is_formatted("a.json"))
+        self.assertFalse(self.open_cache(options={"indent": 4}).is_formatted("a.json"))
+
+    def test_GCA_020_modified_files(self):
+        cache = self.open_cache()
+        cache.add("a.json", DUMMY_FILES["a.json"])
+        cache.add("b.json", DUMMY_FILES["b.json"])
+        cache.save()
+
+        # Touched, but not changed: git suspects the file, but its contents are still known
+        path = os.path.join(self.repo_dir, "a.json")
+        os.utime(path, (0, 0))
+        cache = self.open_cache()
+        self.assertFalse(cache.is_formatted("a.json"))
+        self.assertTrue(cache.contents_are_formatted("a.json", DUMMY_FILES["a.json"]))
+        self.assertFalse(cache.contents_are_formatted("a.json", b'{"a": 2}\n'))
+        self.assertTrue(cache.is_formatted("b.json"))
+
+    def test_GCA_030_max_entries(self):
+        cache = self.open_cache(max_entries=1)
+        cache.add("a.json", DUMMY_FILES["a.json"])
+        cache.add("b.json", DUMMY_FILES["b.json"])
+        cache.save()
+        # Only the newest entry is kept
+        cache = self.open_cache()
+        self.assertFalse(cache.is_formatted("a.json"))
+        self.assertTrue(cache.is_formatted("b.json"))
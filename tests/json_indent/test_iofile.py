@@ -3,9 +3,11 @@
 from __future__ import absolute_import
 
 import os
+import stat as stat_module
 import sys
 import tempfile
 import unittest
+from unittest import mock
 
 import json_indent.iofile as iof
 
@@ -15,6 +17,20 @@ DUMMY_PURPOSE = "DummyPurpose"
 DUMMY_IO_PROPERTY = "DummyIOProperty"
 
 
+def _stat_with_owner(stat, temp_path):
+    """Return a stand-in for `os.stat()`:py:func: which makes a temporary file look as if it had another owner."""
+
+    def stat_with_owner(path):
+        stat_result = stat(path)
+        if path != temp_path:
+            return stat_result
+        fields = list(stat_result)
+        fields[stat_module.ST_UID] += 1
+        return os.stat_result(fields)
+
+    return stat_with_owner
+
+
 class TestIOFile(unittest.TestCase):
     def setUp(self):
         # Create temporary file for read/write testing
@@ -159,3 +175,126 @@ class TestIOFile(unittest.TestCase):
         with self.assertRaises(iof.IOFileOpenError) as context:  # noqa: F841
             x.open_for_input()
         x.close()
+
+    def _temp_files(self):
+        directory = os.path.dirname(self.testfile.name)
+        prefix = "." + os.path.basename(self.testfile.name)
+        return [name for name in os.listdir(directory) if name.startswith(prefix)]
+
+    def test_IOF_200_atomic_output(self):
+        os.chmod(self.testfile.name, 0o604)
+        inode = os.stat(self.testfile.name).st_ino
+        x = iof.IOFile(self.testfile.name, atomic=True)
+        x.open_for_output().write("new")
+        # Until closed, the file keeps what it held
+        self.assertEqual(os.path.getsize(self.testfile.name), 0)
+        self.assertEqual(len(self._temp_files()), 1)
+        x.close()
+        with open(self.testfile.name) as f:
+            self.assertEqual(f.read(), "new")
+        stat_result = os.stat(self.testfile.name)
+        self.assertNotEqual(stat_result.st_ino, inode)
+        self.assertEqual(stat_result.st_mode & 0o777, 0o604)
+        self.assertListEqual(self._temp_files(), [])
+        # Discarding output leaves the file as it was
+        x.open_for_output().write("newer")
+        x.discard()
+        with open(self.testfile.name) as f:
+            self.assertEqual(f.read(), "new")
+        self.assertListEqual(self._temp_files(), [])
+
+    def test_IOF_210_atomic_output_in_place(self):
+        # Files with other hard links, or whose owner cannot be kept, are rewritten in place
+        link_path = self.testfile.name + ".link"
+        os.link(self.testfile.name, link_path)
+        try:
+            self.assertFalse(iof.can_write_atomically(self.testfile.name))
+            x = iof.IOFile(self.testfile.name, atomic=True, fsync=iof.FSYNC_ALWAYS)
+            x.open_for_output().write("linked")
+            x.close()
+            with open(link_path) as f:
+                self.assertEqual(f.read(), "linked")
+        finally:
+            os.remove(link_path)
+        self.assertTrue(iof.can_write_atomically(self.testfile.name))
+        inode = os.stat(self.testfile.name).st_ino
+        (fd, temp_path) = iof.make_temp_file(self.testfile.name)
+        with os.fdopen(fd, "w") as f:
+            f.write("owned")
+        with mock.patch.object(os, "stat", side_effect=_stat_with_owner(os.stat, temp_path)):
+            with mock.patch.object(os, "chown", side_effect=PermissionError) as chown:
+                iof.replace_file(temp_path, self.testfile.name)
+        self.assertTrue(chown.called)
+        self.assertEqual(os.stat(self.testfile.name).st_ino, inode)
+        with open(self.testfile.name) as f:
+            self.assertEqual(f.read(), "owned")
+        self.assertListEqual(self._temp_files(), [])
+
+    @unittest.skipUnless(hasattr(os, "sync"), "os.sync() is not available")
+    def test_IOF_215_fsync_batch(self):
+        calls = []
+        with mock.patch.object(os, "sync", side_effect=lambda: calls.append("sync")):
+            with mock.patch.object(os, "replace", side_effect=lambda *args: calls.append("replace")):
+                with iof.fsync_batch(iof.FSYNC_BATCH):
+                    for text in ["one", "two"]:
+                        x = iof.IOFile(self.testfile.name, atomic=True, fsync=iof.FSYNC_BATCH)
+                        x.open_for_output().write(text)
+                        x.close()
+                    # Nothing replaces the original until the batch is flushed
+                    self.assertListEqual(calls, [])
+                    self.assertEqual(len(self._temp_files()), 2)
+        self.assertListEqual(calls, ["sync", "replace", "replace", "sync"])
+        for temp_file in self._temp_files():
+            os.remove(os.path.join(os.path.dirname(self.testfile.name), temp_file))
+        # The replacements happen in order
+        with iof.fsync_batch(iof.FSYNC_BATCH):
+            for text in ["one", "two"]:
+                x = iof.IOFile(self.testfile.name, atomic=True, fsync=iof.FSYNC_BATCH)
+                x.open_for_output().write(text)
+                x.close()
+        with open(self.testfile.name) as f:
+            self.assertEqual(f.read(), "two")
+        self.assertListEqual(self._temp_files(), [])
+        # Outside a batch (as in another process), each file is flushed by itself
+        with mock.patch.object(os, "fsync", wraps=os.fsync) as os_fsync:
+            with mock.patch.object(os, "sync") as os_sync:
+                x = iof.IOFile(self.testfile.name, atomic=True, fsync=iof.FSYNC_BATCH)
+                x.open_for_output().write("three")
+                x.close()
+        self.assertTrue(os_fsync.called)
+        self.assertFalse(os_sync.called)
+        with open(self.testfile.name) as f:
+            self.assertEqual(f.read(), "three")
+
+    def test_IOF_220_io_profile(self):
+        large = iof.IO_PROFILES[iof.IO_PROFILE_LARGE]
+        x = iof.IOFile(self.testfile.name, io_profile=large, output_size=1 << 16)
+        x.open_for_output().write("short")
+        x.close()
+        # What was preallocated beyond the output is cut off
+        self.assertEqual(os.path.getsize(self.testfile.name), len("short"))
+        if hasattr(os, "posix_fadvise"):
+            with mock.patch.object(os, "posix_fadvise") as fadvise:
+                x.open_for_input()
+                self.assertEqual(x.file.read(), "short")
+                x.close()
+            advice = [call[0][3] for call in fadvise.call_args_list]
+            self.assertListEqual(advice, [os.POSIX_FADV_SEQUENTIAL, os.POSIX_FADV_DONTNEED])
+        # The default profile gives no advice
+        x = iof.IOFile(self.testfile.name)
+        with mock.patch.object(os, "posix_fadvise", create=True) as fadvise:
+            x.open_for_input()
+            x.close()
+        self.assertFalse(fadvise.called)
+
+    def test_IOF_230_read_text_chunks(self):
+        text = "é€\U0001f600" * 100
+        with open(self.testfile.name, "w", encoding="utf-8") as f:
+            f.write(text)
+        for chunk_size in [1, 2, 7, 4096]:
+            with open(self.testfile.name, encoding="utf-8") as f:
+                self.assertEqual("".join(iof.read_text_chunks(f, chunk_size)), text)
+        # The read buffer is shared by all files read in a thread
+        buffer = iof.shared_read_buffer(16)
+        self.assertIs(iof.shared_read_buffer(8), buffer)
+        self.assertGreaterEqual(len(iof.shared_read_buffer(32)), 32)
@@ -4,15 +4,30 @@ from __future__ import absolute_import
 
 import argparse
 import collections
+import hashlib
 import io
+import json
 import os
 import os.path
+import shutil
 import sys
 import tempfile
+import threading
+import time
+import tracemalloc
 import unittest
+from unittest import mock
 
+import json_indent.engine as jen
+import json_indent.events as jev
 import json_indent.json_indent as ji
+import json_indent.lazy as jl
+import json_indent.parallel as jip
 import json_indent.pyversion as pv
+import json_indent.shard as jsh
+import json_indent.tape as jt
+
+from tests.json_indent.test_git import GIT_IS_AVAILABLE, make_git_repo, run_git
 
 DUMMY_KEY_1 = "DummyKey1"
 DUMMY_KEY_2 = "DummyKey2"
@@ -59,6 +74,21 @@ INDENT_KWARGS = {"indent": " " * 4, "separators": PLAIN_SEPARATORS}
 SORTED_KWARGS = {"sort_keys": True, "indent": 4, "separators": PLAIN_SEPARATORS}
 COMPACT_KWARGS = {"indent": None, "separators": COMPACT_SEPARATORS}
 
+DUMMY_JSON_TEXT_STREAM = '{0}{0} {1}\n"{2}"'.format(
+    DUMMY_JSON_TEXT_UNFORMATTED.strip(), DUMMY_JSON_TEXT_COMPACT.strip(), DUMMY_VALUE_1
+)
+
+DUMMY_JSON_TEXT_STREAM_FORMATTED = (DUMMY_JSON_TEXT_FORMATTED * 3) + '"{}"\n'.format(DUMMY_VALUE_1)
+
+DUMMY_JSON_TEXT_LOSSLESS = '{"big": 123456789012345678901234567890e-1, "s": "\\u00e9\\/", "f": 1.50}\n'
+
+DUMMY_JSON_TEXT_LOSSLESS_FORMATTED = """{
+    "big": 123456789012345678901234567890e-1,
+    "s": "\\u00e9\\/",
+    "f": 1.50
+}
+"""
+
 DUMMY_PROGRAM_NAME = "DummyProgramName"
 DUMMY_PROGRAM_ARGS = [DUMMY_VALUE_1, DUMMY_VALUE_2]
 
@@ -67,12 +97,30 @@ CLI_OPTIONS = {
     "help": ["-h", "--help"],
     "output_filename": ["-o", "--output"],
     "inplace": ["-I", "--inplace", "--in-place"],
+    "stream": ["--stream"],
+    "git_staged": ["--git-staged"],
+    "git_cache": ["--git-cache"],
+    "watch": ["--watch"],
+    "fsync": ["--fsync"],
+    "io_profile": ["--io-profile"],
+    "emit": ["--emit"],
+    "concat": ["--concat"],
+    "tag_paths": ["--tag-paths"],
+    "output_dir": ["--output-dir"],
+    "shard": ["--shard"],
+    "shard_by": ["--shard-by"],
+    "jobs": ["-j", "--jobs"],
+    "parallel_backend": ["--parallel-backend"],
+    "progress": ["--progress"],
     "pre_commit": ["--pre-commit"],
     "show_changed": ["-C", "--changed", "--show-changed"],
     "show_diff": ["-D", "--diff", "--show-diff"],
     "compact": ["-c", "--compact"],
     "indent": ["-n", "--indent"],
+    "lossless": ["--lossless"],
     "sort_keys": ["-s", "--sort-keys"],
+    "memory_limit": ["--memory-limit"],
+    "engine": ["--engine"],
     "debug": ["--debug"],
     "completion_help": ["--completion-help"],
     "bash_completion": ["--bash-completion"],
@@ -173,10 +221,30 @@ class TestJsonIndent(unittest.TestCase):
             input_filenames=[],
             output_filename=None,
             inplace=False,
+            stream=False,
+            git_staged=False,
+            git_cache=False,
+            watch=False,
+            fsync="never",
+            io_profile="default",
+            emit=None,
+            concat=None,
+            tag_paths=False,
+            output_dir=None,
+            shard=None,
+            shard_by="hash",
+            jobs=1,
+            parallel_backend="auto",
+            progress=False,
+            show_changed=False,
+            show_diff=False,
             newlines="native",
             compact=False,
+            lossless=False,
             indent=2,
             sort_keys=False,
+            memory_limit=None,
+            engine="auto",
             debug=False,
         )
 
@@ -310,6 +378,104 @@ class TestJsonIndent(unittest.TestCase):
             json_data = ji.load_json_text(json_text, sort_keys=not ordered)
             self.assertDictishEqual(json_data, expected_data, ordered=ordered)
 
+    def test_JSI_104_load_json_stream(self):
+        with open(self.infile.name, "w") as f:
+            f.write(DUMMY_JSON_TEXT_STREAM)
+
+        for chunk_size in [1, 5, 4096]:
+            with open(self.infile.name, "r") as f:
+                documents = list(ji.load_json_stream(f, chunk_size=chunk_size))
+            self.assertEqual(len(documents), 4)
+            for json_data in documents[:3]:
+                self.assertDictishEqual(json_data, DUMMY_JSON_DATA_ORDERED_DICT, ordered=True)
+            self.assertEqual(documents[3], DUMMY_VALUE_1)
+
+        with open(self.infile.name, "w") as f:
+            f.write(DUMMY_JSON_TEXT_COMPACT + "[1,")
+
+        with open(self.infile.name, "r") as f:
+            documents = ji.load_json_stream(f)
+            self.assertDictishEqual(next(documents), DUMMY_JSON_DATA_ORDERED_DICT, ordered=True)
+            with self.assertRaises(ji.JsonParseError) as context:  # noqa: F841
+                next(documents)
+            self.assertEqual(context.exception.filename, self.infile.name)
+
+    def test_JSI_105_load_json_text_deep(self):
+        depth = 20000
+        text = '{"a": [' * depth + "1" + "]}" * depth
+        for kwargs in [{}, {"unordered": True}, {"sort_keys": True}]:
+            data = ji.load_json_text(text, **kwargs)
+            for _ in range(depth):
+                self.assertIs(type(data), dict if kwargs.get("unordered") else collections.OrderedDict)
+                data = data["a"][0]
+            self.assertEqual(data, 1)
+
+        with self.assertRaises(ji.JsonParseError) as context:  # noqa: F841
+            ji.load_json_text("[" * depth + "]" * (depth - 1))
+
+    def test_JSI_106_load_json_tape(self):
+        with open(self.infile.name, "w") as f:
+            f.write(DUMMY_JSON_TEXT_UNFORMATTED)
+        with open(self.infile.name, "r") as f:
+            json_data = ji.load_json(f, model="tape")
+        self.assertIsInstance(json_data, jt.TapeObject)
+        self.assertListEqual(list(json_data), [DUMMY_KEY_2, DUMMY_KEY_1])
+        self.assertEqual(json_data, DUMMY_JSON_DATA_ORDERED_DICT)
+
+        with self.assertRaises(ji.JsonParseError) as context:  # noqa: F841
+            ji.load_json_text("[", model="tape")
+        with self.assertRaises(TypeError) as context:  # noqa: F841
+            ji.load_json_text("[]", model="tape", parse_float=str)
+        self.assertEqual(context.exception.args[0], "unsupported keyword argument(s) for the tape model: parse_float")
+        with self.assertRaises(ValueError) as context:  # noqa: F841
+            ji.load_json_text("[]", model="objects")
+        self.assertEqual(context.exception.args[0], "objects: unknown model (choose from: python, tape)")
+
+    def test_JSI_107_load_json_lazy(self):
+        with open(self.infile.name, "w") as f:
+            f.write(DUMMY_JSON_TEXT_UNFORMATTED)
+        with mock.patch.object(jl, "LAZY_MIN_SIZE", 1):
+            with open(self.infile.name, "r") as f:
+                json_data = ji.load_json(f, lazy=True)
+            self.assertIsInstance(json_data, jl.LazyObject)
+            self.assertListEqual(list(json_data), [DUMMY_KEY_2, DUMMY_KEY_1])
+            self.assertIsInstance(json_data[DUMMY_KEY_1], jl.LazyArray)
+            self.assertEqual(json_data, DUMMY_JSON_DATA_ORDERED_DICT)
+
+            with self.assertRaises(ji.JsonParseError) as context:  # noqa: F841
+                ji.load_json_text("[", lazy=True)
+            with self.assertRaises(ValueError) as context:  # noqa: F841
+                ji.load_json_text("[]", lazy=True, model="tape")
+            self.assertEqual(context.exception.args[0], "a tape cannot be loaded lazily")
+        # Small documents are decoded at once
+        json_data = ji.load_json_text(DUMMY_JSON_TEXT_UNFORMATTED, lazy=True)
+        self.assertIsInstance(json_data, collections.OrderedDict)
+        self.assertEqual(json_data, DUMMY_JSON_DATA_ORDERED_DICT)
+
+    def test_JSI_108_dump_lazily_loaded_json(self):
+        with mock.patch.object(jl, "LAZY_MIN_SIZE", 1):
+            json_data = ji.load_json_text(DUMMY_JSON_TEXT_UNFORMATTED, lazy=True)
+        for kwargs, expected_json_text in [
+            (PLAIN_KWARGS, DUMMY_JSON_TEXT_FORMATTED),
+            (SORTED_KWARGS, DUMMY_JSON_TEXT_SORTED),
+            (COMPACT_KWARGS, DUMMY_JSON_TEXT_COMPACT),
+        ]:
+            self.assertEqual(ji.dump_json_text(json_data, **kwargs), expected_json_text)
+
+    def test_JSI_109_load_json_bytes(self):
+        for encoding in ["utf-8", "utf-8-sig", "utf-16", "utf-16-be", "utf-32", "utf-32-le"]:
+            encoded = DUMMY_JSON_TEXT_UNFORMATTED.encode(encoding)
+            for thing in [encoded, bytearray(encoded), memoryview(b" " + encoded)[1:]]:
+                (json_data, json_text) = ji.load_json(thing, with_text=True)
+                self.assertDictishEqual(json_data, DUMMY_JSON_DATA_ORDERED_DICT, ordered=True)
+                self.assertIs(json_text, thing)
+                for kwargs in [{"model": "tape"}, {"lazy": True}]:
+                    self.assertEqual(ji.load_json_text(thing, **kwargs), DUMMY_JSON_DATA_ORDERED_DICT)
+                self.assertEqual(ji.format_json_text(thing, lossless=True, **PLAIN_KWARGS), DUMMY_JSON_TEXT_FORMATTED)
+        with self.assertRaises(ji.JsonParseError) as context:  # noqa: F841
+            ji.load_json_text(b'["\xff"]', filename="bad.json")
+        self.assertTrue(context.exception.msg.startswith("bad.json: 'utf-8' codec can't decode"))
+
     def test_JSI_110_dump_json(self):
         with open(self.outfile.name, "w") as f:
             # Ensure file exists and is empty
@@ -459,6 +625,121 @@ class TestJsonIndent(unittest.TestCase):
                 text = ji.dump_json_text(json_data, **kwargs)
                 self.assertEqual(text, expected_json_text)
 
+    def test_JSI_118_dump_json_text_deep(self):
+        depth = 20000
+        data = None
+        for _ in range(depth):
+            data = collections.OrderedDict([("b", 1), ("a", [data])])
+        text = ji.dump_json_text(data, separators=(",", ":"), sort_keys=True)
+        self.assertEqual(text, '{"a":[' * depth + "null" + '],"b":1}' * depth + "\n")
+
+        depth = 1000
+        data = []
+        for _ in range(depth - 1):
+            data = [data]
+        text = ji.dump_json_text(data, indent=1)
+        self.assertEqual(text.count("\n"), 2 * depth - 1)
+        self.assertEqual(text.splitlines()[depth - 1], " " * (depth - 1) + "[]")
+
+    def test_JSI_119_dump_json_text_tape(self):
+        json_data = ji.load_json_text(DUMMY_JSON_TEXT_UNFORMATTED, model="tape")
+        for kwargs, expected_json_text in [
+            (PLAIN_KWARGS, DUMMY_JSON_TEXT_FORMATTED),
+            (SORTED_KWARGS, DUMMY_JSON_TEXT_SORTED),
+            (COMPACT_KWARGS, DUMMY_JSON_TEXT_COMPACT),
+        ]:
+            self.assertEqual(ji.dump_json_text(json_data, **kwargs), expected_json_text)
+        # Arguments which only json.dumps() supports are still honored
+        expected_json_text = DUMMY_JSON_TEXT_COMPACT.replace(DUMMY_VALUE_2, DUMMY_VALUE_2.upper())
+
+        class UpperEncoder(json.JSONEncoder):
+            def encode(self, o):
+                return super(UpperEncoder, self).encode(o).replace(DUMMY_VALUE_2, DUMMY_VALUE_2.upper())
+
+        self.assertEqual(ji.dump_json_text(json_data, cls=UpperEncoder, **COMPACT_KWARGS), expected_json_text)
+
+    def test_JSI_123_dump_json_bytes(self):
+        json_data = ji.load_json_text(DUMMY_JSON_TEXT_UNFORMATTED)
+        tape = ji.load_json_text(DUMMY_JSON_TEXT_UNFORMATTED, model="tape")
+        for kwargs, expected_json_text in [
+            (PLAIN_KWARGS, DUMMY_JSON_TEXT_FORMATTED),
+            (SORTED_KWARGS, DUMMY_JSON_TEXT_SORTED),
+            (COMPACT_KWARGS, DUMMY_JSON_TEXT_COMPACT),
+        ]:
+            expected_bytes = expected_json_text.encode("utf-8")
+            for data in [json_data, tape]:
+                self.assertEqual(ji.dump_json_bytes(data, **kwargs), expected_bytes)
+                self.assertEqual(b"".join(ji.iter_json_bytes(data, piece_size=8, **kwargs)), expected_bytes)
+            outfile = io.BytesIO()
+            self.assertEqual(ji.dump_json_bytes(json_data, outfile, fp=None, **kwargs), len(expected_bytes))
+            self.assertEqual(outfile.getvalue(), expected_bytes)
+        self.assertEqual(ji.dump_json_bytes(["é"], ensure_ascii=False, indent=None), '["é"]\n'.encode("utf-8"))
+
+    def test_JSI_120_format_json_text(self):
+        for kwargs, expected_json_text in [
+            (PLAIN_KWARGS, DUMMY_JSON_TEXT_FORMATTED),
+            (SORTED_KWARGS, DUMMY_JSON_TEXT_SORTED),
+            (COMPACT_KWARGS, DUMMY_JSON_TEXT_COMPACT),
+        ]:
+            for lossless in [False, True]:
+                text = ji.format_json_text(DUMMY_JSON_TEXT_UNFORMATTED, lossless=lossless, **kwargs)
+                self.assertEqual(text, expected_json_text)
+
+        text = ji.format_json_text(DUMMY_JSON_TEXT_LOSSLESS, lossless=True, **PLAIN_KWARGS)
+        self.assertEqual(text, DUMMY_JSON_TEXT_LOSSLESS_FORMATTED)
+
+        with self.assertRaises(TypeError) as context:  # noqa: F841
+            ji.format_json_text(DUMMY_JSON_TEXT_LOSSLESS, lossless=True, ensure_ascii=False)
+
+        for lossless in [False, True]:
+            with self.assertRaises(ji.JsonParseError) as context:  # noqa: F841
+                ji.format_json_text('{"a": 1,}', filename=DUMMY_PATH_1, lossless=lossless)
+            self.assertEqual(context.exception.filename, DUMMY_PATH_1)
+            self.assertEqual(context.exception.exception.pos, 8)
+
+    def test_JSI_121_format_texts(self):
+        texts = [DUMMY_JSON_TEXT_UNFORMATTED, DUMMY_JSON_TEXT_SORTED, DUMMY_JSON_TEXT_COMPACT] * 3
+        # Bytes-like texts are decoded, even those which cannot be sent to other processes as they are
+        texts[1:3] = [DUMMY_JSON_TEXT_SORTED.encode("utf-16"), memoryview(DUMMY_JSON_TEXT_COMPACT.encode("utf-8"))]
+        for backend in jip.BACKENDS:
+            self.assertListEqual(
+                ji.format_texts(texts, jobs=2, backend=backend, **SORTED_KWARGS), [DUMMY_JSON_TEXT_SORTED] * len(texts)
+            )
+            with self.assertRaises(ji.JsonParseError) as context:  # noqa: F841
+                ji.format_texts(texts + ["["], jobs=2, backend=backend)
+
+    def test_JSI_122_format_files(self):
+        temp_dir = tempfile.mkdtemp()
+        paths = [os.path.join(temp_dir, "{}.json".format(i)) for i in range(5)]
+        try:
+            for backend in jip.BACKENDS:
+                for path in paths:
+                    with open(path, "w") as f:
+                        f.write(DUMMY_JSON_TEXT_UNFORMATTED)
+                with open(paths[1], "w") as f:
+                    f.write("[")
+                results = ji.format_files(
+                    paths + [os.path.join(temp_dir, "missing.json")],
+                    inplace=True,
+                    jobs=2,
+                    backend=backend,
+                    **PLAIN_KWARGS,
+                )
+                self.assertListEqual([x.path for x in results], paths + [os.path.join(temp_dir, "missing.json")])
+                self.assertIsInstance(results[1].error, ji.JsonParseError)
+                self.assertIsInstance(results[-1].error, OSError)
+                for i, path in enumerate(paths):
+                    if i == 1:
+                        continue
+                    result = results[i]
+                    self.assertIsNone(result.error)
+                    self.assertEqual(result.input_text, DUMMY_JSON_TEXT_UNFORMATTED)
+                    self.assertEqual(result.output_text, DUMMY_JSON_TEXT_FORMATTED)
+                    with open(path, "r") as f:
+                        self.assertEqual(f.read(), DUMMY_JSON_TEXT_FORMATTED)
+        finally:
+            shutil.rmtree(temp_dir)
+
     def test_JSI_200_check_program_args(self):
         (_prog, program_args) = ji._check_program_args(DUMMY_PROGRAM_ARGS)
         self.assertListEqual(program_args, DUMMY_PROGRAM_ARGS)
@@ -557,6 +838,253 @@ class TestJsonIndent(unittest.TestCase):
         errmsg = context.exception.args[0]
         self.assertEqual(errmsg, "reading from stdin does not make sense with '--inplace'")
 
+    def test_JSI_240_check_stream_args(self):
+        cli_args = self.dummy_cli_args()
+        cli_args.stream = True
+        ji._check_stream_args(cli_args)
+        cli_args.inplace = True
+        with self.assertRaises(RuntimeError) as context:  # noqa: F841
+            ji._check_stream_args(cli_args)
+        errmsg = context.exception.args[0]
+        self.assertEqual(errmsg, "'--stream' does not make sense with '--inplace'")
+
+    def test_JSI_250_check_git_staged_args(self):
+        cli_args = self.dummy_cli_args()
+        ji._check_git_staged_args(cli_args)
+        cli_args.git_staged = True
+        cli_args.inplace = True
+        ji._check_git_staged_args(cli_args)
+        for attribute, value, expected_errmsg in [
+            ("stream", True, "'--git-staged' does not make sense with '--stream'"),
+            ("output_filename", self.outfile.name, "output files do not make sense with '--git-staged'"),
+            ("input_filenames", ["-"], "reading from stdin does not make sense with '--git-staged'"),
+        ]:
+            cli_args = self.dummy_cli_args()
+            cli_args.git_staged = True
+            setattr(cli_args, attribute, value)
+            with self.assertRaises(RuntimeError) as context:  # noqa: F841
+                ji._check_git_staged_args(cli_args)
+            errmsg = context.exception.args[0]
+            self.assertEqual(errmsg, expected_errmsg)
+
+    def test_JSI_251_check_git_cache_args(self):
+        cli_args = self.dummy_cli_args()
+        ji._check_git_cache_args(cli_args)
+        cli_args.git_cache = True
+        cli_args.inplace = True
+        ji._check_git_cache_args(cli_args)
+        for attribute, value, expected_errmsg in [
+            ("inplace", False, "'--git-cache' only makes sense with '--inplace'"),
+            ("git_staged", True, "'--git-cache' does not make sense with '--git-staged'"),
+        ]:
+            cli_args = self.dummy_cli_args()
+            cli_args.git_cache = True
+            cli_args.inplace = True
+            setattr(cli_args, attribute, value)
+            with self.assertRaises(RuntimeError) as context:  # noqa: F841
+                ji._check_git_cache_args(cli_args)
+            errmsg = context.exception.args[0]
+            self.assertEqual(errmsg, expected_errmsg)
+
+    def test_JSI_252_check_watch_args(self):
+        cli_args = self.dummy_cli_args()
+        ji._check_watch_args(cli_args)
+        self.assertFalse(cli_args.inplace)
+        cli_args.watch = True
+        cli_args.input_filenames = [DUMMY_PATH_1]
+        ji._check_watch_args(cli_args)
+        self.assertTrue(cli_args.inplace)
+        for attribute, value, expected_errmsg in [
+            ("stream", True, "'--watch' does not make sense with '--stream'"),
+            ("git_staged", True, "'--watch' does not make sense with '--git-staged'"),
+            ("git_cache", True, "'--watch' does not make sense with '--git-cache'"),
+            ("input_filenames", [], "'--watch' needs files or directories to watch"),
+        ]:
+            cli_args = self.dummy_cli_args()
+            cli_args.watch = True
+            cli_args.input_filenames = [DUMMY_PATH_1]
+            setattr(cli_args, attribute, value)
+            with self.assertRaises(RuntimeError) as context:  # noqa: F841
+                ji._check_watch_args(cli_args)
+            errmsg = context.exception.args[0]
+            self.assertEqual(errmsg, expected_errmsg)
+
+    def test_JSI_253_check_shard_args(self):
+        cli_args = self.dummy_cli_args()
+        ji._check_shard_args(cli_args)
+        cli_args.shard = "2/3"
+        cli_args.inplace = True
+        cli_args.input_filenames = [DUMMY_PATH_1]
+        ji._check_shard_args(cli_args)
+        self.assertEqual(cli_args.shard, (2, 3))
+        for attribute, value, expected_errmsg in [
+            ("inplace", False, "'--shard' only makes sense with '--inplace' or '--git-staged'"),
+            ("watch", True, "'--shard' does not make sense with '--watch'"),
+            ("input_filenames", [], "'--shard' needs input files or directories"),
+            ("shard", "4/3", "4/3: shard index must be between 1 and the shard count"),
+        ]:
+            cli_args = self.dummy_cli_args()
+            cli_args.shard = "2/3"
+            cli_args.inplace = True
+            cli_args.input_filenames = [DUMMY_PATH_1]
+            setattr(cli_args, attribute, value)
+            with self.assertRaises(RuntimeError) as context:  # noqa: F841
+                ji._check_shard_args(cli_args)
+            errmsg = context.exception.args[0]
+            self.assertEqual(errmsg, expected_errmsg)
+
+    def test_JSI_258_check_emit_args(self):
+        cli_args = self.dummy_cli_args()
+        ji._check_emit_args(cli_args)
+        self.assertIsNone(cli_args.emit)
+        cli_args.emit = ["pretty:{dir}/{stem}.json", "compact:out/{hash}.json"]
+        ji._check_emit_args(cli_args)
+        self.assertListEqual(cli_args.emit, [("pretty", "{dir}/{stem}.json"), ("compact", "out/{hash}.json")])
+        for attribute, value, expected_errmsg in [
+            ("stream", True, "'--emit' does not make sense with '--stream'"),
+            ("git_staged", True, "'--emit' does not make sense with '--git-staged'"),
+            ("git_cache", True, "'--emit' does not make sense with '--git-cache'"),
+            ("watch", True, "'--emit' does not make sense with '--watch'"),
+            ("engine", "bounded", "'--emit' does not make sense with '--engine=bounded'"),
+            ("emit", ["tiny:x.json"], "tiny:x.json: variant must be one of: pretty, compact"),
+        ]:
+            cli_args = self.dummy_cli_args()
+            cli_args.emit = ["compact:x.json"]
+            setattr(cli_args, attribute, value)
+            with self.assertRaises(RuntimeError) as context:  # noqa: F841
+                ji._check_emit_args(cli_args)
+            self.assertEqual(context.exception.args[0], expected_errmsg)
+
+    def test_JSI_259_check_concat_args(self):
+        cli_args = self.dummy_cli_args()
+        ji._check_concat_args(cli_args)
+        cli_args.concat = "ndjson"
+        cli_args.tag_paths = True
+        ji._check_concat_args(cli_args)
+        for attribute, value, expected_errmsg in [
+            ("concat", None, "'--tag-paths' only makes sense with '--concat'"),
+            ("inplace", True, "'--concat' does not make sense with '--inplace'"),
+            ("stream", True, "'--concat' does not make sense with '--stream'"),
+            ("git_staged", True, "'--concat' does not make sense with '--git-staged'"),
+            ("watch", True, "'--concat' does not make sense with '--watch'"),
+            ("emit", ["compact:x.json"], "'--concat' does not make sense with '--emit'"),
+            ("engine", "bounded", "'--concat' does not make sense with '--engine=bounded'"),
+        ]:
+            cli_args = self.dummy_cli_args()
+            cli_args.concat = "framed"
+            cli_args.tag_paths = True
+            setattr(cli_args, attribute, value)
+            with self.assertRaises(RuntimeError) as context:  # noqa: F841
+                ji._check_concat_args(cli_args)
+            self.assertEqual(context.exception.args[0], expected_errmsg)
+        # Any number of input files may go to the one output, but not into one of them
+        cli_args = self.dummy_cli_args()
+        cli_args.concat = "framed"
+        cli_args.input_filenames = [DUMMY_PATH_1, DUMMY_PATH_2]
+        ji._check_input_and_output_filenames(cli_args)
+        self.assertEqual(cli_args.output_filename, "-")
+        cli_args.output_filename = DUMMY_PATH_2
+        with self.assertRaises(RuntimeError) as context:  # noqa: F841
+            ji._check_input_and_output_filenames(cli_args)
+        self.assertEqual(context.exception.args[0], "the output file is also an input file")
+
+    def test_JSI_257_check_output_dir_args(self):
+        cli_args = self.dummy_cli_args()
+        ji._check_output_dir_args(cli_args)
+        cli_args.output_dir = DUMMY_PATH_2
+        ji._check_output_dir_args(cli_args)
+        for attribute, value, expected_errmsg in [
+            ("output_filename", DUMMY_PATH_1, "output files do not make sense with '--output-dir'"),
+            ("inplace", True, "'--output-dir' does not make sense with '--inplace'"),
+            ("stream", True, "'--output-dir' does not make sense with '--stream'"),
+            ("watch", True, "'--output-dir' does not make sense with '--watch'"),
+            ("concat", "ndjson", "'--output-dir' does not make sense with '--concat'"),
+            ("engine", "bounded", "'--output-dir' does not make sense with '--engine=bounded'"),
+        ]:
+            cli_args = self.dummy_cli_args()
+            cli_args.output_dir = DUMMY_PATH_2
+            setattr(cli_args, attribute, value)
+            with self.assertRaises(RuntimeError) as context:  # noqa: F841
+                ji._check_output_dir_args(cli_args)
+            self.assertEqual(context.exception.args[0], expected_errmsg)
+        cli_args = self.dummy_cli_args()
+        cli_args.output_dir = DUMMY_PATH_2
+        with self.assertRaises(RuntimeError) as context:  # noqa: F841
+            ji._check_input_and_output_filenames(cli_args)
+        self.assertEqual(context.exception.args[0], "reading from stdin does not make sense with '--output-dir'")
+
+    def test_JSI_254_check_jobs_args(self):
+        cli_args = self.dummy_cli_args()
+        ji._check_jobs_args(cli_args)
+        cli_args.jobs = 0
+        with self.assertRaises(RuntimeError) as context:  # noqa: F841
+            ji._check_jobs_args(cli_args)
+        self.assertEqual(context.exception.args[0], "'--jobs' must be at least 1")
+
+    def test_JSI_260_check_progress_args(self):
+        cli_args = self.dummy_cli_args()
+        cli_args.progress = True
+        ji._check_progress_args(cli_args)
+        for option in ["stream", "git_staged", "watch"]:
+            cli_args = self.dummy_cli_args()
+            cli_args.progress = True
+            setattr(cli_args, option, True)
+            with self.assertRaises(RuntimeError) as context:  # noqa: F841
+                ji._check_progress_args(cli_args)
+            self.assertEqual(
+                context.exception.args[0],
+                "'--progress' does not make sense with '--{}'".format(option.replace("_", "-")),
+            )
+
+    def test_JSI_255_check_memory_limit_args(self):
+        cli_args = self.dummy_cli_args()
+        with mock.patch.object(ji, "default_memory_budget", return_value=12345) as default_memory_budget:
+            ji._check_memory_limit_args(cli_args)
+        default_memory_budget.assert_called_once_with(cli_args.jobs)
+        self.assertEqual(cli_args.memory_limit, 12345)
+        cli_args.memory_limit = "64K"
+        ji._check_memory_limit_args(cli_args)
+        self.assertEqual(cli_args.memory_limit, 64 * 1024)
+        for attribute, value, expected_errmsg in [
+            ("lossless", True, "'--memory-limit' does not make sense with '--lossless'"),
+            ("stream", True, "'--memory-limit' does not make sense with '--stream'"),
+            ("git_staged", True, "'--memory-limit' does not make sense with '--git-staged'"),
+            ("git_cache", True, "'--memory-limit' does not make sense with '--git-cache'"),
+            (
+                "memory_limit",
+                "lots",
+                "lots: size must be a positive whole number, optionally followed by K, M, or G",
+            ),
+        ]:
+            cli_args = self.dummy_cli_args()
+            cli_args.memory_limit = "64K"
+            setattr(cli_args, attribute, value)
+            with self.assertRaises(RuntimeError) as context:  # noqa: F841
+                ji._check_memory_limit_args(cli_args)
+            errmsg = context.exception.args[0]
+            self.assertEqual(errmsg, expected_errmsg)
+
+    def test_JSI_256_check_engine_args(self):
+        for engine in ["auto", "memory", "bounded"]:
+            cli_args = self.dummy_cli_args()
+            cli_args.engine = engine
+            ji._check_engine_args(cli_args)
+        for option, expected_errmsg in [
+            ("lossless", "'--engine=bounded' does not make sense with '--lossless'"),
+            ("stream", "'--engine=bounded' does not make sense with '--stream'"),
+            ("git_staged", "'--engine=bounded' does not make sense with '--git-staged'"),
+            ("git_cache", "'--engine=bounded' does not make sense with '--git-cache'"),
+        ]:
+            cli_args = self.dummy_cli_args()
+            cli_args.engine = "bounded"
+            setattr(cli_args, option, True)
+            with self.assertRaises(RuntimeError) as context:  # noqa: F841
+                ji._check_engine_args(cli_args)
+            self.assertEqual(context.exception.args[0], expected_errmsg)
+            # Any other engine is fine
+            cli_args.engine = "auto"
+            ji._check_engine_args(cli_args)
+
     def test_JSI_300_cli(self):
         for test_args, expected_json_text in [
             (ARGS_PLAIN, DUMMY_JSON_TEXT_FORMATTED),
@@ -631,6 +1159,628 @@ class TestJsonIndent(unittest.TestCase):
                 with io.open(self.outfile.name, "rt", newline="") as f:
                     self.assertEqual(f.read(), expected_json_text)
 
+    def test_JSI_305_cli_stream(self):
+        with open(self.infile.name, "w") as f:
+            f.write(DUMMY_JSON_TEXT_STREAM)
+        args = (
+            ["--stream"]
+            + ARGS_PLAIN
+            + ARGS_DEBUG
+            + ["--newlines=linux", "--output", self.outfile.name, self.infile.name]
+        )
+        self.assertEqual(ji.cli(*args), ji.STATUS_OK)
+        with open(self.outfile.name, "r") as f:
+            self.assertEqual(f.read(), DUMMY_JSON_TEXT_STREAM_FORMATTED)
+
+        with open(self.infile.name, "w") as f:
+            f.write(DUMMY_JSON_TEXT_COMPACT + "]")
+        args = (
+            ["--stream"]
+            + ARGS_COMPACT
+            + ARGS_DEBUG
+            + ["--newlines=linux", "--output", self.outfile.name, self.infile.name]
+        )
+        with self.assertRaises(SystemExit) as context:  # noqa: F841
+            ji.cli(*args)
+        with open(self.outfile.name, "r") as f:
+            self.assertEqual(f.read(), DUMMY_JSON_TEXT_COMPACT)
+
+    def test_JSI_306_cli_lossless(self):
+        for test_args, result_filename in [
+            (["--inplace", self.infile.name], self.infile.name),
+            (["--output", self.outfile.name, self.infile.name], self.outfile.name),
+        ]:
+            with open(self.infile.name, "w") as f:
+                f.write(DUMMY_JSON_TEXT_LOSSLESS)
+            args = ["--lossless"] + ARGS_PLAIN + ARGS_DEBUG + ["--newlines=linux"] + test_args
+            self.assertEqual(ji.cli(*args), ji.STATUS_OK)
+            with open(result_filename, "r") as f:
+                self.assertEqual(f.read(), DUMMY_JSON_TEXT_LOSSLESS_FORMATTED)
+
+    @unittest.skipUnless(GIT_IS_AVAILABLE, "git is not available")
+    def test_JSI_307_cli_git_staged(self):
+        staged_texts = {
+            "formatted.json": DUMMY_JSON_TEXT_FORMATTED,
+            "unformatted.json": DUMMY_JSON_TEXT_UNFORMATTED,
+            "partly-staged.json": DUMMY_JSON_TEXT_UNFORMATTED,
+            "invalid.json": DUMMY_JSON_TEXT_UNFORMATTED + "]",
+        }
+        repo_dir = make_git_repo({path: text.encode("utf-8") for (path, text) in staged_texts.items()})
+        with open(os.path.join(repo_dir, "partly-staged.json"), "w") as f:
+            f.write(DUMMY_JSON_TEXT_FORMATTED + " ")
+        with open(os.path.join(repo_dir, "formatted.json"), "w") as f:
+            f.write(DUMMY_JSON_TEXT_UNFORMATTED)
+        working_texts = dict(staged_texts)
+        working_texts["partly-staged.json"] = DUMMY_JSON_TEXT_FORMATTED + " "
+        working_texts["formatted.json"] = DUMMY_JSON_TEXT_UNFORMATTED
+
+        saved_cwd = os.getcwd()
+        os.chdir(repo_dir)
+        try:
+            common_args = ["--git-staged", "--newlines=linux"] + ARGS_PLAIN + ARGS_DEBUG
+
+            # Check only: nothing is written
+            self.assertEqual(ji.cli(*common_args), ji.STATUS_SYNTAX_ERROR)
+            self.assertEqual(ji.cli(*common_args + ["formatted.json"]), ji.STATUS_OK)
+            self.assertEqual(ji.cli(*common_args + ["formatted.json", "unformatted.json"]), ji.STATUS_CHANGED)
+            for path, text in working_texts.items():
+                with open(path, "r") as f:
+                    self.assertEqual(f.read(), text)
+
+            # Rewrite working-tree files which match what is staged
+            args = common_args + ["--pre-commit", "formatted.json", "unformatted.json", "partly-staged.json"]
+            self.assertEqual(ji.cli(*args), ji.STATUS_CHANGED)
+            working_texts["unformatted.json"] = DUMMY_JSON_TEXT_FORMATTED
+            for path, text in working_texts.items():
+                with open(path, "r") as f:
+                    self.assertEqual(f.read(), text)
+
+            run_git(repo_dir, "add", "unformatted.json")
+            self.assertEqual(ji.cli(*common_args + ["unformatted.json"]), ji.STATUS_OK)
+        finally:
+            os.chdir(saved_cwd)
+            shutil.rmtree(repo_dir)
+
+    @unittest.skipUnless(GIT_IS_AVAILABLE, "git is not available")
+    def test_JSI_308_cli_git_cache(self):
+        repo_dir = make_git_repo(
+            {
+                "formatted.json": DUMMY_JSON_TEXT_FORMATTED.encode("utf-8"),
+                "unformatted.json": DUMMY_JSON_TEXT_UNFORMATTED.encode("utf-8"),
+            }
+        )
+        saved_cwd = os.getcwd()
+        os.chdir(repo_dir)
+        try:
+            args = ["--git-cache", "--pre-commit", "--newlines=linux"] + ARGS_PLAIN + ARGS_DEBUG
+            args += ["formatted.json", "unformatted.json"]
+            self.assertEqual(ji.cli(*args), ji.STATUS_CHANGED)
+            run_git(repo_dir, "add", "unformatted.json")
+            self.assertEqual(ji.cli(*args), ji.STATUS_OK)
+
+            # Both files are now known to be formatted, so neither is opened
+            with mock.patch.object(ji, "TextIOFile", side_effect=AssertionError("file was opened")):
+                self.assertEqual(ji.cli(*args), ji.STATUS_OK)
+            # ... even with too many paths to pass to git as arguments
+            with mock.patch("json_indent.git.MAX_PATHSPEC_BYTES", 0):
+                with mock.patch.object(ji, "TextIOFile", side_effect=AssertionError("file was opened")):
+                    self.assertEqual(ji.cli(*args), ji.STATUS_OK)
+
+            # A modified file is not skipped
+            with open("formatted.json", "w") as f:
+                f.write(DUMMY_JSON_TEXT_UNFORMATTED)
+            self.assertEqual(ji.cli(*args), ji.STATUS_CHANGED)
+            with open("formatted.json", "r") as f:
+                self.assertEqual(f.read(), DUMMY_JSON_TEXT_FORMATTED)
+
+            # Other options use another store
+            self.assertEqual(ji.cli(*args + ["--compact"]), ji.STATUS_CHANGED)
+        finally:
+            os.chdir(saved_cwd)
+            shutil.rmtree(repo_dir)
+
+    def test_JSI_309_cli_watch(self):
+        watch_dir = tempfile.mkdtemp()
+        path = os.path.join(watch_dir, "watched.json")
+        cli_args = self.dummy_cli_args()
+        cli_args.watch = True
+        cli_args.newlines = "linux"
+        cli_args.indent = 4
+        cli_args.input_filenames = [watch_dir]
+        ji._check_watch_args(cli_args)
+        (load_kwargs, dump_kwargs) = ji._compose_kwargs(cli_args)
+        stop = threading.Event()
+        thread = threading.Thread(target=ji._cli_watch, args=(cli_args, load_kwargs, dump_kwargs, stop.is_set))
+        thread.start()
+        try:
+            time.sleep(0.2)
+            with open(path, "w") as f:
+                f.write(DUMMY_JSON_TEXT_UNFORMATTED)
+            deadline = time.monotonic() + 5.0
+            while time.monotonic() < deadline:
+                with open(path, "r") as f:
+                    if f.read() == DUMMY_JSON_TEXT_FORMATTED:
+                        break
+                time.sleep(0.01)
+            with open(path, "r") as f:
+                self.assertEqual(f.read(), DUMMY_JSON_TEXT_FORMATTED)
+        finally:
+            stop.set()
+            thread.join()
+            shutil.rmtree(watch_dir)
+
+    def test_JSI_311_cli_shard(self):
+        shard_dir = tempfile.mkdtemp()
+        paths = [os.path.join(shard_dir, "sub{}".format(i % 2), "{}.json".format(i)) for i in range(12)]
+        paths.append(os.path.join(shard_dir, "ignored.txt"))
+        for path in paths:
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+        count = 3
+        try:
+            for shard_by in ["hash", "size"]:
+                changed = []
+                for index in range(1, count + 1):
+                    # Each shard starts from the same files, as on separate machines
+                    for path in paths:
+                        with open(path, "w") as f:
+                            f.write(DUMMY_JSON_TEXT_UNFORMATTED)
+                    args = ["--inplace", "--newlines=linux", "--shard-by", shard_by] + ARGS_PLAIN + ARGS_DEBUG
+                    args += ["--shard", "{}/{}".format(index, count), shard_dir]
+                    ji.cli(*args)
+                    formatted = []
+                    for path in paths:
+                        with open(path, "r") as f:
+                            if f.read() == DUMMY_JSON_TEXT_FORMATTED:
+                                formatted.append(path)
+                    changed.append(formatted)
+                # Each shard formats some of the files, and every file is formatted once
+                self.assertTrue(all(changed))
+                self.assertListEqual(sorted(sum(changed, [])), sorted(paths[:-1]))
+            # An empty shard is fine, and does not fall back to reading stdin
+            other_shard = "{}/2".format(3 - jsh.hash_shard(paths[0], 2))
+            self.assertEqual(ji.cli("--inplace", "--shard", other_shard, paths[0]), ji.STATUS_OK)
+        finally:
+            shutil.rmtree(shard_dir)
+
+    def test_JSI_312_cli_jobs(self):
+        temp_dir = tempfile.mkdtemp()
+        paths = [os.path.join(temp_dir, "{}.json".format(i)) for i in range(6)]
+        try:
+            for backend in jip.BACKENDS:
+                for path in paths:
+                    with open(path, "w") as f:
+                        f.write(DUMMY_JSON_TEXT_UNFORMATTED)
+                with open(paths[0], "w") as f:
+                    f.write(DUMMY_JSON_TEXT_FORMATTED)
+                args = ["--pre-commit", "--newlines=linux", "--jobs", "3", "--parallel-backend", backend]
+                args += ARGS_PLAIN + ARGS_DEBUG + paths
+                self.assertEqual(ji.cli(*args), ji.STATUS_CHANGED)
+                for path in paths:
+                    with open(path, "r") as f:
+                        self.assertEqual(f.read(), DUMMY_JSON_TEXT_FORMATTED)
+                self.assertEqual(ji.cli(*args), ji.STATUS_OK)
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_JSI_313_cli_memory_limit(self):
+        args = ARGS_SORTED + ARGS_DEBUG + ["--newlines=linux", "--memory-limit", "1"]
+        with open(self.infile.name, "w") as f:
+            f.write(DUMMY_JSON_TEXT_UNFORMATTED)
+        ji.cli(*(args + ["--output", self.outfile.name, self.infile.name]))
+        with open(self.outfile.name, "r") as f:
+            self.assertEqual(f.read(), DUMMY_JSON_TEXT_SORTED)
+        os.chmod(self.infile.name, 0o640)
+        self.assertEqual(ji.cli(*(args + ["--pre-commit", self.infile.name])), ji.STATUS_CHANGED)
+        with open(self.infile.name, "r") as f:
+            self.assertEqual(f.read(), DUMMY_JSON_TEXT_SORTED)
+        self.assertEqual(os.stat(self.infile.name).st_mode & 0o777, 0o640)
+        self.assertEqual(ji.cli(*(args + ["--pre-commit", self.infile.name])), ji.STATUS_OK)
+        # A file which cannot be parsed is left as it was, with no temporary file beside it
+        with open(self.infile.name, "w") as f:
+            f.write("{")
+        self.assertEqual(ji.cli(*(args + ["--inplace", self.infile.name])), ji.STATUS_SYNTAX_ERROR)
+        with open(self.infile.name, "r") as f:
+            self.assertEqual(f.read(), "{")
+        temp_dir = os.path.dirname(self.infile.name)
+        self.assertListEqual(
+            [x for x in os.listdir(temp_dir) if x.startswith("." + os.path.basename(self.infile.name))], []
+        )
+        with self.assertRaises(SystemExit) as context:  # noqa: F841
+            ji.cli(*(args + ["--output", self.outfile.name, self.infile.name]))
+
+    def test_JSI_314_cli_engine(self):
+        args = ARGS_PLAIN + ARGS_DEBUG + ["--newlines=linux"]
+        with open(self.infile.name, "w") as f:
+            f.write(DUMMY_JSON_TEXT_UNFORMATTED)
+        size = os.path.getsize(self.infile.name)
+        for memory_limit, expected_engine in [(size * 1000, "memory"), (size, "bounded")]:
+            with mock.patch.object(ji, "_cli_file_bounded", wraps=ji._cli_file_bounded) as cli_file_bounded:
+                memory_args = ["--memory-limit", str(memory_limit), "--output", self.outfile.name, self.infile.name]
+                self.assertEqual(ji.cli(*(args + memory_args)), ji.STATUS_OK)
+            self.assertEqual(cli_file_bounded.called, expected_engine == "bounded")
+            with open(self.outfile.name, "r") as f:
+                self.assertEqual(f.read(), DUMMY_JSON_TEXT_FORMATTED)
+        # Running out of memory falls back to the bounded engine, before anything is written
+        with mock.patch.object(ji, "load_json_text", side_effect=MemoryError):
+            status = ji.cli(*(args + ["--engine", "memory", "--pre-commit", self.infile.name]))
+        self.assertEqual(status, ji.STATUS_CHANGED)
+        with open(self.infile.name, "r") as f:
+            self.assertEqual(f.read(), DUMMY_JSON_TEXT_FORMATTED)
+        # ... which cannot format losslessly
+        with open(self.infile.name, "w") as f:
+            f.write(DUMMY_JSON_TEXT_UNFORMATTED)
+        with mock.patch.object(ji, "reformat_tokens", side_effect=MemoryError):
+            with self.assertRaises(MemoryError) as context:  # noqa: F841
+                ji.cli(*(args + ["--lossless", "--inplace", self.infile.name]))
+
+    def test_JSI_315_cli_already_formatted(self):
+        formatted = DUMMY_JSON_TEXT_FORMATTED.replace("\n", "\r\n")
+        for test_args in NEWLINE_ARGS_MICROSOFT:
+            with io.open(self.infile.name, "wt", newline="") as f:
+                f.write(formatted)
+            os.utime(self.infile.name, ns=(0, 0))
+            args = test_args + ARGS_PLAIN + ARGS_DEBUG
+            # Files which are already formatted are neither decoded nor rewritten
+            with mock.patch.object(ji, "load_json_text", side_effect=AssertionError):
+                self.assertEqual(ji.cli(*(args + ["--pre-commit", self.infile.name])), ji.STATUS_OK)
+                self.assertEqual(os.stat(self.infile.name).st_mtime_ns, 0)
+                self.assertEqual(ji.cli(*(args + ["--output", self.outfile.name, self.infile.name])), ji.STATUS_OK)
+            with io.open(self.outfile.name, "rt", newline="") as f:
+                self.assertEqual(f.read(), formatted)
+            # ... but others are
+            self.assertEqual(ji.cli(*(args + ["--sort-keys", "--pre-commit", self.infile.name])), ji.STATUS_CHANGED)
+            with io.open(self.infile.name, "rt", newline="") as f:
+                self.assertEqual(f.read(), DUMMY_JSON_TEXT_SORTED.replace("\n", "\r\n"))
+        # Invalid numbers laid out as formatted are still invalid
+        for token in ["nan", "inf", "-inf", "9" * 5000]:
+            with open(self.infile.name, "w") as f:
+                f.write('{\n    "a": ' + token + "\n}\n")
+            with self.assertRaises(SystemExit) as context:  # noqa: F841
+                ji.cli(*(ARGS_PLAIN + ARGS_DEBUG + ["--output", self.outfile.name, self.infile.name]))
+            self.assertEqual(
+                ji.cli(*(ARGS_PLAIN + ARGS_DEBUG + ["--pre-commit", self.infile.name])), ji.STATUS_SYNTAX_ERROR
+            )
+
+    def test_JSI_316_cli_emit(self):
+        (directory, name) = os.path.split(self.infile.name)
+        stem = os.path.splitext(name)[0]
+        digest = hashlib.sha256(DUMMY_JSON_TEXT_SORTED.encode("utf-8")).hexdigest()[:16]
+        compact_path = os.path.join(directory, stem + ".min.json")
+        hashed_path = os.path.join(directory, "{}.{}.json".format(stem, digest))
+        compact = json.dumps(json.loads(DUMMY_JSON_TEXT_UNFORMATTED), sort_keys=True, separators=(",", ":")) + "\n"
+        args = ARGS_SORTED + ["-L"] + ARGS_DEBUG
+        args += ["--emit", "compact:{dir}/{stem}.min.json", "--emit", "pretty:{dir}/{stem}.{hash}.json"]
+        try:
+            for more_args, expected_text in [
+                ([], DUMMY_JSON_TEXT_UNFORMATTED),
+                (["--inplace"], DUMMY_JSON_TEXT_SORTED),
+                (["--lossless", "--inplace"], DUMMY_JSON_TEXT_SORTED),
+            ]:
+                with open(self.infile.name, "w") as f:
+                    f.write(DUMMY_JSON_TEXT_UNFORMATTED)
+                # Each file is parsed once, however many variants are written
+                with mock.patch.object(ji, "load_json_text", wraps=ji.load_json_text) as load_json_text:
+                    self.assertEqual(ji.cli(*(args + more_args + [self.infile.name])), ji.STATUS_OK)
+                self.assertEqual(load_json_text.call_count, 0 if "--lossless" in more_args else 1)
+                for path, expected_variant in [(self.infile.name, expected_text), (compact_path, compact)]:
+                    with open(path) as f:
+                        self.assertEqual(f.read(), expected_variant)
+                with open(hashed_path) as f:
+                    self.assertEqual(f.read(), DUMMY_JSON_TEXT_SORTED)
+        finally:
+            for path in (compact_path, hashed_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def test_JSI_317_cli_concat(self):
+        with open(self.infile.name, "w") as f:
+            f.write(DUMMY_JSON_TEXT_UNFORMATTED)
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as bad_file:
+            bad_file.write("[1,")
+        try:
+            args = ARGS_PLAIN + ["-L"] + ARGS_DEBUG + ["--output", self.outfile.name]
+            inputs = [self.infile.name, bad_file.name, self.infile.name]
+            # Files which cannot be parsed are reported and left out
+            self.assertEqual(ji.cli(*(args + ["--concat", "ndjson"] + inputs)), ji.STATUS_SYNTAX_ERROR)
+            with open(self.outfile.name) as f:
+                self.assertEqual(f.read(), DUMMY_JSON_TEXT_COMPACT * 2)
+            self.assertEqual(ji.cli(*(args + ["--concat", "framed", "--jobs", "2"] + inputs[::2])), ji.STATUS_OK)
+            with open(self.outfile.name) as f:
+                self.assertEqual(f.read(), DUMMY_JSON_TEXT_FORMATTED * 2)
+            # Tagged documents are wrapped, and laid out like the rest
+            for concat_args in [["--concat", "ndjson"], ["--concat", "framed"], ["--concat", "framed", "-s"]]:
+                self.assertEqual(ji.cli(*(args + concat_args + ["--tag-paths", self.infile.name])), ji.STATUS_OK)
+                expected_data = collections.OrderedDict(
+                    [("path", self.infile.name), ("data", json.loads(DUMMY_JSON_TEXT_UNFORMATTED))]
+                )
+                kwargs = (
+                    COMPACT_KWARGS if "ndjson" in concat_args else dict(PLAIN_KWARGS, sort_keys="-s" in concat_args)
+                )
+                with open(self.outfile.name) as f:
+                    self.assertEqual(f.read(), json.dumps(expected_data, **kwargs) + "\n")
+        finally:
+            os.remove(bad_file.name)
+
+    def test_JSI_318_cli_output_dir(self):
+        tempdir = tempfile.mkdtemp()
+        try:
+            input_dir = os.path.join(tempdir, "in")
+            output_dir = os.path.join(tempdir, "out")
+            os.makedirs(os.path.join(input_dir, "sub"))
+            for name, text in [("a.json", DUMMY_JSON_TEXT_UNFORMATTED), ("bad.json", "[1,")]:
+                with open(os.path.join(input_dir, "sub", name), "w") as f:
+                    f.write(text)
+            args = ARGS_PLAIN + ["-L"] + ARGS_DEBUG + ["--output-dir", output_dir, input_dir]
+            self.assertEqual(ji.cli(*args), ji.STATUS_SYNTAX_ERROR)
+            with open(os.path.join(output_dir, "sub", "a.json")) as f:
+                self.assertEqual(f.read(), DUMMY_JSON_TEXT_FORMATTED)
+            self.assertFalse(os.path.exists(os.path.join(output_dir, "sub", "bad.json")))
+            os.remove(os.path.join(input_dir, "sub", "bad.json"))
+            # Copies already made are not made again, even from touched inputs...
+            os.utime(os.path.join(input_dir, "sub", "a.json"), ns=(0, 0))
+            with mock.patch.object(ji, "load_json_text", side_effect=AssertionError):
+                self.assertEqual(ji.cli(*args), ji.STATUS_OK)
+            with mock.patch.object(ji, "read_input", side_effect=AssertionError):
+                self.assertEqual(ji.cli(*args), ji.STATUS_OK)
+            # ... unless the options have changed
+            self.assertEqual(ji.cli(*(args + ["--sort-keys"])), ji.STATUS_OK)
+            with open(os.path.join(output_dir, "sub", "a.json")) as f:
+                self.assertEqual(f.read(), DUMMY_JSON_TEXT_SORTED)
+        finally:
+            shutil.rmtree(tempdir)
+
+    def test_JSI_319_cli_atomic_inplace(self):
+        with open(self.infile.name, "w") as f:
+            f.write(DUMMY_JSON_TEXT_UNFORMATTED)
+        os.chmod(self.infile.name, 0o640)
+        link_path = self.infile.name + ".link"
+        os.symlink(self.infile.name, link_path)
+        try:
+            for fsync in ["never", "batch", "always"]:
+                with open(self.infile.name, "w") as f:
+                    f.write(DUMMY_JSON_TEXT_UNFORMATTED)
+                args = ARGS_PLAIN + ["-L"] + ARGS_DEBUG + ["--fsync", fsync, "--inplace", link_path]
+                with mock.patch.object(os, "fsync", wraps=os.fsync) as os_fsync:
+                    with mock.patch.object(os, "sync", wraps=os.sync) as os_sync:
+                        self.assertEqual(ji.cli(*args), ji.STATUS_OK)
+                self.assertEqual(os_fsync.called, fsync == "always")
+                self.assertEqual(os_sync.called, fsync == "batch")
+                # The link still points at the file, which keeps its mode
+                self.assertTrue(os.path.islink(link_path))
+                self.assertEqual(os.stat(self.infile.name).st_mode & 0o777, 0o640)
+                with open(self.infile.name) as f:
+                    self.assertEqual(f.read(), DUMMY_JSON_TEXT_FORMATTED)
+            # A failed write leaves the file as it was, and no temporary file behind
+            with open(self.infile.name, "w") as f:
+                f.write(DUMMY_JSON_TEXT_UNFORMATTED)
+            with mock.patch.object(ji, "dump_json_text", return_value=DUMMY_JSON_TEXT_FORMATTED + "\udc80"):
+                with self.assertRaises(UnicodeEncodeError) as context:  # noqa: F841
+                    ji.cli(*(ARGS_PLAIN + ["--inplace", self.infile.name]))
+            with open(self.infile.name) as f:
+                self.assertEqual(f.read(), DUMMY_JSON_TEXT_UNFORMATTED)
+            directory = os.path.dirname(self.infile.name)
+            name = os.path.basename(self.infile.name)
+            self.assertListEqual([x for x in os.listdir(directory) if x.startswith("." + name)], [])
+        finally:
+            os.remove(link_path)
+
+    def test_JSI_321_cli_output_dir_bad_encoding(self):
+        tempdir = tempfile.mkdtemp()
+        try:
+            input_dir = os.path.join(tempdir, "in")
+            output_dir = os.path.join(tempdir, "out")
+            os.makedirs(input_dir)
+            for name, contents in [
+                ("a.json", DUMMY_JSON_TEXT_UNFORMATTED.encode("utf-8")),
+                ("b.json", '{"a": "caf\u00e9"}'.encode("latin-1")),
+                ("c.json", DUMMY_JSON_TEXT_UNFORMATTED.encode("utf-8")),
+            ]:
+                with open(os.path.join(input_dir, name), "wb") as f:
+                    f.write(contents)
+            args = ARGS_PLAIN + ARGS_DEBUG + ["--output-dir", output_dir, input_dir]
+            # The file which is not UTF-8 is reported, and the others copied
+            self.assertEqual(ji.cli(*args), ji.STATUS_SYNTAX_ERROR)
+            self.assertFalse(os.path.exists(os.path.join(output_dir, "b.json")))
+            for name in ["a.json", "c.json"]:
+                with open(os.path.join(output_dir, name)) as f:
+                    self.assertEqual(f.read(), DUMMY_JSON_TEXT_FORMATTED)
+            # ... and only it is tried again
+            with mock.patch.object(ji, "load_json_text", side_effect=AssertionError):
+                self.assertEqual(ji.cli(*args), ji.STATUS_SYNTAX_ERROR)
+        finally:
+            shutil.rmtree(tempdir)
+
+    def test_JSI_322_cli_engine_memory_budget(self):
+        # Too big an object for the memory engine within the budget
+        data = collections.OrderedDict(("key{:06d}".format((i * 7919) % 12000), i) for i in range(12000))
+        with open(self.infile.name, "w") as f:
+            json.dump(data, f)
+        budget = 4 * 1024 * 1024
+        self.assertGreater(jen.estimate_memory(os.path.getsize(self.infile.name)), budget)
+        args = ARGS_SORTED + ARGS_DEBUG + ["--newlines=linux", "--output", self.outfile.name, self.infile.name]
+        with mock.patch.object(jen, "physical_memory", return_value=2 * budget):
+            with mock.patch.object(ji, "_cli_file_bounded", wraps=ji._cli_file_bounded) as cli_file_bounded:
+                tracemalloc.start()
+                try:
+                    self.assertEqual(ji.cli(*args), ji.STATUS_OK)
+                    (_, peak) = tracemalloc.get_traced_memory()
+                finally:
+                    tracemalloc.stop()
+        self.assertTrue(cli_file_bounded.called)
+        self.assertLess(peak, budget)
+        with open(self.outfile.name, "r") as f:
+            self.assertEqual(f.read(), json.dumps(data, indent=4, sort_keys=True) + "\n")
+
+    def test_JSI_323_cli_fsync_batch_changed(self):
+        # Files are only replaced when the batch ends, but changes are still reported
+        for engine in ["memory", "bounded"]:
+            for option in ["--pre-commit", "--show-changed"]:
+                with open(self.infile.name, "w") as f:
+                    f.write(DUMMY_JSON_TEXT_UNFORMATTED)
+                args = ARGS_PLAIN + ARGS_DEBUG + ["--newlines=linux", "--engine", engine, "--fsync", "batch"]
+                if option != "--pre-commit":
+                    args.append("--inplace")
+                with mock.patch.object(sys, "stderr", io.StringIO()) as stderr:
+                    status = ji.cli(*(args + [option, self.infile.name]))
+                self.assertEqual(status, ji.STATUS_CHANGED)
+                self.assertIn("Reformatted " + self.infile.name, stderr.getvalue())
+                with open(self.infile.name) as f:
+                    self.assertEqual(f.read(), DUMMY_JSON_TEXT_FORMATTED)
+                with mock.patch.object(sys, "stderr", io.StringIO()) as stderr:
+                    self.assertEqual(ji.cli(*(args + [option, self.infile.name])), ji.STATUS_OK)
+                self.assertNotIn("Reformatted", stderr.getvalue())
+
+    def test_JSI_324_cli_output_dir_several_inputs(self):
+        tempdir = tempfile.mkdtemp()
+        saved_cwd = os.getcwd()
+        try:
+            for name in ["work/d1", "work/d2", "elsewhere/d1"]:
+                os.makedirs(os.path.join(tempdir, name))
+                with open(os.path.join(tempdir, name, "a.json"), "w") as f:
+                    f.write('{{"{}": 1}}'.format(os.path.basename(name)))
+            os.chdir(os.path.join(tempdir, "work"))
+            args = ARGS_PLAIN + ARGS_DEBUG + ["--newlines=linux", "--output-dir", "out"]
+            # Inputs with the same names are copied apart
+            self.assertEqual(ji.cli(*(args + ["d1", "d2"])), ji.STATUS_OK)
+            for name in ["d1", "d2"]:
+                with open(os.path.join("out", name, "a.json")) as f:
+                    self.assertEqual(f.read(), '{\n    "' + name + '": 1\n}\n')
+            # ... and different files which would be copied to the same path are refused
+            with self.assertRaises(SystemExit) as context:  # noqa: F841
+                ji.cli(*(args + ["d1", os.path.join(os.getcwd(), "d1"), os.path.join(tempdir, "elsewhere", "d1")]))
+            self.assertIn("would both be copied to", str(context.exception))
+
+            # An input which cannot be read is reported, and the others still copied and recorded
+            os.symlink("missing.json", os.path.join("d1", "dangling.json"))
+            with open(os.path.join("d1", "b.json"), "w") as f:
+                f.write(DUMMY_JSON_TEXT_UNFORMATTED)
+            with mock.patch.object(sys, "stderr", io.StringIO()) as stderr:
+                self.assertEqual(ji.cli(*(args + ["d1", "d2"])), ji.STATUS_SYNTAX_ERROR)
+            self.assertIn("dangling.json", stderr.getvalue())
+            with open(os.path.join("out", "d1", "b.json")) as f:
+                self.assertEqual(f.read(), DUMMY_JSON_TEXT_FORMATTED)
+            with mock.patch.object(ji, "load_json_text", side_effect=AssertionError):
+                with mock.patch.object(sys, "stderr", io.StringIO()):
+                    self.assertEqual(ji.cli(*(args + ["d1", "d2"])), ji.STATUS_SYNTAX_ERROR)
+        finally:
+            os.chdir(saved_cwd)
+            shutil.rmtree(tempdir)
+
+    def test_JSI_325_cli_bounded_inplace(self):
+        def temp_files():
+            (directory, name) = os.path.split(os.path.realpath(self.infile.name))
+            return [x for x in os.listdir(directory) if x.startswith("." + name + ".")]
+
+        args = ARGS_PLAIN + ["--newlines=linux", "--engine", "bounded", "--inplace", self.infile.name]
+        # A file which is already formatted is left alone
+        with open(self.infile.name, "w") as f:
+            f.write(DUMMY_JSON_TEXT_FORMATTED)
+        with mock.patch.object(ji, "replace_file", wraps=ji.replace_file) as replace_file:
+            self.assertEqual(ji.cli(*args), ji.STATUS_OK)
+            self.assertFalse(replace_file.called)
+            self.assertEqual(ji.cli(*(args + ["--show-changed"])), ji.STATUS_OK)
+            self.assertFalse(replace_file.called)
+        self.assertListEqual(temp_files(), [])
+        # The temporary file is removed whatever goes wrong
+        with open(self.infile.name, "w") as f:
+            f.write(DUMMY_JSON_TEXT_UNFORMATTED)
+        for name in ["format_sorted", "replace_file"]:
+            with mock.patch.object(ji, name, side_effect=KeyboardInterrupt):
+                with self.assertRaises(KeyboardInterrupt) as context:  # noqa: F841
+                    ji.cli(*args)
+            self.assertListEqual(temp_files(), [])
+            with open(self.infile.name) as f:
+                self.assertEqual(f.read(), DUMMY_JSON_TEXT_UNFORMATTED)
+
+    @unittest.skipUnless(GIT_IS_AVAILABLE, "git is not available")
+    def test_JSI_326_cli_decode_error_names_file(self):
+        contents = b'{"a": "\xff"}'
+        repo_dir = make_git_repo({"latin1.json": contents})
+        saved_cwd = os.getcwd()
+        os.chdir(repo_dir)
+        try:
+            for args in [["-I"], ["--git-staged"], ["--output-dir", "out"]]:
+                with mock.patch.object(sys, "stderr", io.StringIO()) as stderr:
+                    self.assertEqual(ji.cli(*(ARGS_PLAIN + args + ["latin1.json"])), ji.STATUS_SYNTAX_ERROR)
+                self.assertIn("latin1.json: 'utf-8' codec can't decode", stderr.getvalue())
+            with open("latin1.json", "rb") as f:
+                self.assertEqual(f.read(), contents)
+        finally:
+            os.chdir(saved_cwd)
+            shutil.rmtree(repo_dir)
+
+    def test_JSI_330_cli_io_profile(self):
+        for engine in ["memory", "bounded"]:
+            with open(self.outfile.name, "w") as f:
+                f.write(DUMMY_JSON_TEXT_FORMATTED * 100)
+            with open(self.infile.name, "w") as f:
+                f.write(DUMMY_JSON_TEXT_UNFORMATTED)
+            args = ARGS_PLAIN + ["--engine", engine, "--io-profile", "large", "-o", self.outfile.name]
+            self.assertEqual(ji.cli(*(args + [self.infile.name])), ji.STATUS_OK)
+            with open(self.outfile.name) as f:
+                self.assertEqual(f.read(), DUMMY_JSON_TEXT_FORMATTED)
+            self.assertEqual(ji.cli(*(ARGS_PLAIN + ["--io-profile", "large", "-I", self.infile.name])), ji.STATUS_OK)
+            with open(self.infile.name) as f:
+                self.assertEqual(f.read(), DUMMY_JSON_TEXT_FORMATTED)
+
+    def test_JSI_331_cli_progress(self):
+        for engine in ["memory", "bounded"]:
+            for backend in ["serial", "threads", "processes"]:
+                with open(self.infile.name, "w") as f:
+                    f.write(DUMMY_JSON_TEXT_UNFORMATTED)
+                with open(self.outfile.name, "w") as f:
+                    f.write(DUMMY_JSON_TEXT_UNFORMATTED)
+                args = ARGS_PLAIN + ["--engine", engine, "--progress", "-j", "2", "--parallel-backend", backend]
+                with mock.patch.object(sys, "stderr", io.StringIO()) as stderr:
+                    self.assertEqual(ji.cli(*(args + ["-I", self.infile.name, self.outfile.name])), ji.STATUS_OK)
+                # Reports go on lines of their own, as stderr is not a terminal
+                self.assertRegex(
+                    stderr.getvalue(), r"^2/2 files, 0\.0/0\.0 MiB, [0-9.?]+ MiB/s, done in 0:00:0[0-9]\n$"
+                )
+                # Each file's bytes count once, whether as it is read or once it is done
+                size = os.path.getsize(self.infile.name) + os.path.getsize(self.outfile.name)
+                with mock.patch.object(ji.Progress, "close", autospec=True) as close:
+                    ji.cli(*(args + ["-I", self.infile.name, self.outfile.name]))
+                self.assertEqual(close.call_args[0][0].bytes_done, size)
+        with mock.patch.object(sys, "stderr", io.StringIO()) as stderr:
+            self.assertEqual(ji.cli(*(ARGS_PLAIN + ["--progress", "--concat", "ndjson", self.infile.name])), 0)
+        self.assertTrue(stderr.getvalue().startswith("1/1 files, "))
+
+    def test_JSI_332_cli_events(self):
+        for engine in ["memory", "bounded"]:
+            with open(self.infile.name, "w") as f:
+                f.write(DUMMY_JSON_TEXT_UNFORMATTED)
+            with open(self.outfile.name, "w") as f:
+                f.write("[1,")
+            events = []
+            with jev.observing(events.append):
+                with mock.patch.object(sys, "stderr", io.StringIO()):
+                    args = ARGS_PLAIN + ["--engine", engine, "-I", self.infile.name, self.outfile.name]
+                    self.assertEqual(ji.cli(*args), ji.STATUS_SYNTAX_ERROR)
+                    self.assertEqual(ji.cli(*(ARGS_PLAIN + ["--engine", engine, "-I", self.infile.name])), 0)
+            kinds = [(x.kind, x.filename) for x in events if x.kind not in ("load", "dump")]
+            self.assertListEqual(
+                kinds,
+                [
+                    ("file-start", self.infile.name),
+                    ("changed", self.infile.name),
+                    ("file-end", self.infile.name),
+                    ("file-start", self.outfile.name),
+                    ("syntax-error", self.outfile.name),
+                    ("file-end", self.outfile.name),
+                    ("file-start", self.infile.name),
+                    ("unchanged", self.infile.name),
+                    ("file-end", self.infile.name),
+                ],
+            )
+            self.assertEqual(events[0].data, {"size": len(DUMMY_JSON_TEXT_UNFORMATTED), "engine": engine})
+            statuses = [x.data["status"] for x in events if x.kind == "file-end"]
+            self.assertListEqual(statuses, [ji.STATUS_OK, ji.STATUS_SYNTAX_ERROR, ji.STATUS_OK])
+            # The memory engine parses and serializes each document whole (but an already formatted one not at all)
+            whole = [x.kind for x in events if x.kind in ("load", "dump")]
+            self.assertListEqual(whole, ["load", "dump"] if engine == "memory" else [])
+
     def test_JSI_310_cli_version(self):
         with self.assertRaises(SystemExit) as context:  # noqa: F841
             ji.cli(*["--version"])
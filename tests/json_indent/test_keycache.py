@@ -0,0 +1,68 @@
+"""Tests for json_indent.keycache"""
+
+from __future__ import absolute_import
+
+import collections
+import unittest
+
+import json_indent.json_indent as ji
+import json_indent.keycache as jk
+
+
+def _copy(text):
+    """Return an equal string which is not the same object."""
+    return "".join(list(text))
+
+
+class TestKeyCache(unittest.TestCase):
+    def test_KEY_000_intern_shape(self):
+        cache = jk.KeyCache()
+        shape = cache.intern_shape((_copy("id"), _copy("name")))
+        self.assertEqual(shape, ("id", "name"))
+        # Equal shapes, and keys shared with other shapes, are one copy
+        again = cache.intern_shape((_copy("id"), _copy("name")))
+        self.assertIs(again, shape)
+        other = cache.intern_shape((_copy("name"), _copy("tags")))
+        self.assertIs(other[0], shape[1])
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        cache.clear()
+        self.assertIsNot(cache.intern_shape(("id", "name")), shape)
+
+    def test_KEY_010_eviction(self):
+        cache = jk.KeyCache(max_keys=3, max_shapes=2)
+        first = cache.intern_shape((_copy("a"),))
+        cache.intern_shape(("b",))
+        cache.intern_shape(("a",))
+        cache.intern_shape(("c", "d"))
+        # (Keys of shapes found in the cache are not looked up again)
+        self.assertListEqual(list(cache.keys), ["b", "c", "d"])
+        self.assertListEqual(list(cache.shapes), [("a",), ("c", "d")])
+        # The least recently used shape was evicted, not the first one cached
+        self.assertIs(cache.intern_shape(("a",)), first)
+        # Objects with too many keys leave no shape behind
+        cache.intern_shape(tuple("k{}".format(i) for i in range(jk.MAX_SHAPE_SIZE + 1)))
+        self.assertEqual(len(cache.shapes), 2)
+
+    def test_KEY_020_load_json(self):
+        cache = jk.KeyCache()
+        texts = ['{"id": 1, "tags": {"id": 2}}', '[{"id": 3, "tags": {}}, {}]']
+        for unordered in [False, True]:
+            loaded = [ji.load_json(text, key_cache=cache, unordered=unordered) for text in texts]
+            self.assertEqual(loaded, [ji.load_json(text) for text in texts])
+            object_type = dict if unordered else collections.OrderedDict
+            self.assertIs(type(loaded[0]), object_type)
+            self.assertIs(type(loaded[1][1]), object_type)
+            self.assertIs(list(loaded[0])[0], list(loaded[1][0])[0])
+            self.assertIs(list(loaded[0]["tags"])[0], list(loaded[1][0])[0])
+        # Other keyword arguments are still passed on
+        self.assertEqual(ji.load_json('{"x": 1.5}', key_cache=cache, parse_float=str), {"x": "1.5"})
+        for kwargs in [{"lazy": True}, {"model": "tape"}]:
+            with self.assertRaises(ValueError) as context:  # noqa: F841
+                ji.load_json("{}", key_cache=cache, **kwargs)
+            self.assertEqual(context.exception.args[0], "keys can be cached only when loading the python model eagerly")
+        with self.assertRaises(ji.JsonParseError) as context:  # noqa: F841
+            ji.load_json('{"x": }', key_cache=cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+"""Tests for json_indent.lazy"""
+
+from __future__ import absolute_import
+
+import collections
+import decimal
+import json
+import tracemalloc
+import unittest
+
+import json_indent.lazy as jl
+
+DUMMY_JSON_TEXT = """{
+  "b": {"x": 0},
+  "a": [{"d": true, "c": null}, "caf\\u00e9 ]}", "\\"[{", -Infinity],
+  "b": {"x": 1, "x": [2]},
+  "d": {"z": [1, 2.50, 1E400, -0, {}, []], "y": {"k": "\\u00e9\\/", "j": [[]]}},
+  "e": -1.0e-3
+}"""
+
+DEEP_DEPTH = 100000
+
+
+def loads(text):
+    return json.loads(text, object_pairs_hook=collections.OrderedDict)
+
+
+class TestLazy(unittest.TestCase):
+    def test_LAZ_000_load_lazy(self):
+        view = jl.load_lazy(DUMMY_JSON_TEXT, min_size=1)
+        self.assertIsInstance(view, jl.LazyObject)
+        self.assertFalse(view.is_decoded)
+        self.assertEqual(json.dumps(view.to_python()), json.dumps(loads(DUMMY_JSON_TEXT)))
+        # Scalars, and documents too small to be worth it, are decoded at once
+        for text in ['"x"', " 1.5 ", "-0", "true", "null", '[{"a": 1}]']:
+            self.assertEqual(jl.load_lazy(text), json.loads(text))
+        self.assertIsInstance(jl.load_lazy(' {"a": [1]} '), collections.OrderedDict)
+        self.assertIs(type(jl.load_lazy('{"a": 1}', unordered=True)), dict)
+
+    def test_LAZ_010_object_proxy(self):
+        view = jl.load_lazy(DUMMY_JSON_TEXT, min_size=1)
+        data = loads(DUMMY_JSON_TEXT)
+        # The last of several values wins, and the key keeps its first position
+        self.assertListEqual(list(view), ["b", "a", "d", "e"])
+        self.assertTrue(view.is_decoded)
+        self.assertIsInstance(view["b"], jl.LazyObject)
+        self.assertFalse(view["d"].is_decoded)
+        self.assertEqual(view["b"]["x"], [2])
+        self.assertEqual(view["e"], -1.0e-3)
+        self.assertIn("a", view)
+        self.assertNotIn("z", view)
+        with self.assertRaises(KeyError) as context:  # noqa: F841
+            view["z"]
+        # Decoded levels are kept
+        self.assertIs(view["d"], view["d"])
+        self.assertEqual(view["d"]["y"], data["d"]["y"])
+        self.assertEqual(len(view["d"]), 2)
+        self.assertEqual(view, data)
+
+    def test_LAZ_020_array_proxy(self):
+        view = jl.load_lazy(DUMMY_JSON_TEXT, min_size=1)["a"]
+        self.assertIsInstance(view, jl.LazyArray)
+        self.assertEqual(len(view), 4)
+        self.assertEqual(view[0], {"d": True, "c": None})
+        self.assertListEqual(view[1:3], ["café ]}", '"[{'])
+        self.assertEqual(view[-1], float("-inf"))
+        with self.assertRaises(IndexError) as context:  # noqa: F841
+            view[4]
+        z = jl.load_lazy(DUMMY_JSON_TEXT, min_size=1)["d"]["z"]
+        self.assertEqual(z, [1, 2.5, float("inf"), 0, {}, []])
+        self.assertNotEqual(z, [1])
+        with self.assertRaises(TypeError) as context:  # noqa: F841
+            hash(z)
+
+    def test_LAZ_030_small_containers_decoded_with_parent(self):
+        text = json.dumps({"small": [1, {"x": 2}], "large": {"k": "v" * 100, "n": [3]}})
+        view = jl.load_lazy(text, min_size=50)
+        self.assertIsInstance(view["small"], list)
+        self.assertIsInstance(view["small"][1], collections.OrderedDict)
+        self.assertIsInstance(view["large"], jl.LazyObject)
+        self.assertIsInstance(view["large"]["n"], list)
+        self.assertEqual(view, json.loads(text))
+        # Only large containers, and the ones directly in them, are recorded
+        self.assertEqual(len(view._document.starts), 4)
+
+    def test_LAZ_035_array_chunks(self):
+        records = [{"id": i, "name": "user, {}]".format(i), "tags": ["a", "b"]} for i in range(20000)]
+        text = json.dumps({"records": records, "strings": [x["name"] for x in records], "numbers": list(range(20000))})
+        tracemalloc.start()
+        try:
+            json.loads(text)
+            (_, eager_peak) = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            view = jl.load_lazy(text)
+            # Touching one element decodes only the chunk holding it
+            self.assertEqual(view["records"][12345], records[12345])
+            self.assertEqual(view["strings"][-2], records[-2]["name"])
+            self.assertEqual(view["numbers"][7777], 7777)
+            (_, peak) = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak, eager_peak // 5)
+        for key in ["records", "strings", "numbers"]:
+            self.assertEqual(len(view[key]), 20000)
+            self.assertFalse(view[key].is_decoded)
+            self.assertEqual(len([x for x in view[key]._chunks if x is not None]), 1)
+        # Elements are the same however they are reached
+        self.assertListEqual(view["records"][19990:], records[19990:])
+        self.assertListEqual(list(view["strings"]), [x["name"] for x in records])
+        self.assertTrue(view["strings"].is_decoded)
+        self.assertEqual(view, json.loads(text))
+        # Passing over the chunks keeps none of them
+        numbers = jl.load_lazy(text)["numbers"]
+        self.assertListEqual([x for chunk in numbers.iter_chunks() for x in chunk], list(range(20000)))
+        self.assertFalse(any(numbers._chunks))
+
+    def test_LAZ_040_views_have_no_dict(self):
+        view = jl.load_lazy(DUMMY_JSON_TEXT, min_size=1)
+        for thing in [view, view["a"]]:
+            with self.assertRaises(AttributeError) as context:  # noqa: F841
+                thing.__dict__  # noqa: B018
+        self.assertEqual(repr(view["d"]), "<LazyObject (not yet decoded)>")
+
+    def test_LAZ_050_deep(self):
+        text = "[" * DEEP_DEPTH + '{"a": 1}' + "]" * DEEP_DEPTH
+        view = jl.load_lazy(text, min_size=DEEP_DEPTH)
+        inner = view
+        while isinstance(inner, jl.LazyArray):
+            inner = inner[0]
+        while isinstance(inner, list):
+            inner = inner[0]
+        self.assertEqual(inner["a"], 1)
+        self.assertEqual(len(view.to_python()), 1)
+
+    def test_LAZ_060_kwargs(self):
+        view = jl.load_lazy(DUMMY_JSON_TEXT, min_size=1, parse_float=decimal.Decimal)
+        self.assertEqual(view["e"], decimal.Decimal("-1.0e-3"))
+        self.assertEqual(view["d"]["z"][1], decimal.Decimal("2.50"))
+        with self.assertRaises(TypeError) as context:  # noqa: F841
+            jl.load_lazy("[]", object_hook=dict)
+        self.assertEqual(context.exception.args[0], "unsupported keyword argument(s) for load_lazy(): object_hook")
+
+    def test_LAZ_070_errors(self):
+        # Unbalanced brackets are found up front
+        for text in ["", "{", "[}", "]", '{"a": 1}}', "{} {}", "{} 1", "1 {}"]:
+            with self.assertRaises(json.JSONDecodeError) as context:  # noqa: F841
+                jl.load_lazy(text, min_size=1)
+        # Other errors are found in the level (or chunk of an array) which is accessed
+        text = '{"a": [1, 2,], "b": {"c": 3}, "d": [4, , 5]}'
+        view = jl.load_lazy(text, min_size=1)
+        self.assertEqual(view["b"]["c"], 3)
+        self.assertEqual(view["a"][0], 1)
+        with self.assertRaises(json.JSONDecodeError) as context:  # noqa: F841
+            view["a"][2]
+        self.assertEqual(context.exception.pos, text.index("]"))
+        with self.assertRaises(json.JSONDecodeError) as context:  # noqa: F841
+            list(view["d"])
+        self.assertEqual(context.exception.pos, text.index(", 5"))
+        with self.assertRaises(json.JSONDecodeError) as context:  # noqa: F841
+            jl.load_lazy('{"a" [1]}', min_size=1)["a"]
+        self.assertEqual(context.exception.pos, 5)
+        # A value replaced by a later one for the same key is still checked
+        text = '{"a": [1 2], "a": 3}'
+        with self.assertRaises(json.JSONDecodeError) as context:  # noqa: F841
+            jl.load_lazy(text, min_size=1)["a"]
+        self.assertEqual(context.exception.pos, text.index("2]"))
+
+
+if __name__ == "__main__":
+    unittest.main()
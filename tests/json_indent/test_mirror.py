@@ -0,0 +1,119 @@
+"""Tests for json_indent.mirror"""
+
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import json_indent.mirror as jm
+
+DUMMY_OPTIONS = {"dump": {"indent": 2}}
+
+
+class TestMirror(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.input_dir = os.path.join(self.tempdir, "in")
+        self.output_dir = os.path.join(self.input_dir, "out")
+        for name in ["a.json", "b.txt", os.path.join("sub", "c.JSON"), os.path.join("out", "d.json")]:
+            path = os.path.join(self.input_dir, name)
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, "w") as f:
+                f.write("[]")
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_MIR_000_mirror_paths(self):
+        # The only input directory is mirrored from its top ...
+        pairs = jm.mirror_paths([self.input_dir], self.output_dir)
+        self.assertListEqual(
+            pairs,
+            [
+                (os.path.join(self.input_dir, "a.json"), "a.json"),
+                (os.path.join(self.input_dir, "sub", "c.JSON"), os.path.join("sub", "c.JSON")),
+            ],
+        )
+        # ... but among several inputs, each keeps its path (or its name, if outside the current directory)
+        pairs = jm.mirror_paths([self.input_dir, "x.json", os.path.join("..", "y.json")], self.output_dir)
+        self.assertListEqual(
+            pairs,
+            [
+                (os.path.join(self.input_dir, "a.json"), os.path.join("in", "a.json")),
+                (os.path.join(self.input_dir, "sub", "c.JSON"), os.path.join("in", "sub", "c.JSON")),
+                ("x.json", "x.json"),
+                (os.path.join("..", "y.json"), "y.json"),
+            ],
+        )
+
+    def test_MIR_001_mirror_paths_collisions(self):
+        other_dir = os.path.join(self.tempdir, "other")
+        os.makedirs(os.path.join(other_dir, "in"))
+        for path in [os.path.join(other_dir, "a.json"), os.path.join(other_dir, "in", "a.json")]:
+            with open(path, "w") as f:
+                f.write("[]")
+        saved_cwd = os.getcwd()
+        os.chdir(self.tempdir)
+        try:
+            # Directories with the same files in them are kept apart
+            pairs = jm.mirror_paths(["in", "other"], self.output_dir)
+            self.assertListEqual(
+                [output_path for (_, output_path) in pairs],
+                [
+                    os.path.join("in", "a.json"),
+                    os.path.join("in", "sub", "c.JSON"),
+                    os.path.join("other", "a.json"),
+                    os.path.join("other", "in", "a.json"),
+                ],
+            )
+            # A file listed again (however it is named) is copied once
+            pairs = jm.mirror_paths(["in", os.path.join("in", "a.json"), os.path.abspath("in")], self.output_dir)
+            self.assertEqual(len(pairs), 2)
+            # Different files which would be copied to the same path are refused
+            os.chdir(other_dir)
+            for input_filenames in [["in", self.input_dir], ["a.json", os.path.join(self.input_dir, "a.json")]]:
+                with self.assertRaises(ValueError) as context:  # noqa: F841
+                    jm.mirror_paths(input_filenames, self.output_dir)
+                self.assertIn("would both be copied to", context.exception.args[0])
+        finally:
+            os.chdir(saved_cwd)
+
+    def test_MIR_010_make_dirs(self):
+        output_dir = os.path.join(self.tempdir, "new")
+        jm.make_dirs(output_dir, ["a.json", os.path.join("b", "c", "d.json"), os.path.join("b", "e.json")])
+        self.assertTrue(os.path.isdir(os.path.join(output_dir, "b", "c")))
+
+    def test_MIR_020_manifest(self):
+        input_path = os.path.join(self.input_dir, "a.json")
+        output_path = os.path.join("sub", "a.json")
+        jm.make_dirs(self.output_dir, [output_path])
+        (stat_data, contents) = jm.read_input(input_path)
+        digest = jm.hash_contents(contents)
+        manifest = jm.MirrorManifest(self.output_dir, DUMMY_OPTIONS)
+        self.assertFalse(manifest.is_up_to_date(input_path, output_path))
+        with open(os.path.join(self.output_dir, output_path), "w") as f:
+            f.write("[]\n")
+        manifest.add(stat_data, output_path, digest)
+        manifest.save()
+        # The manifest holds for the same options only
+        manifest = jm.MirrorManifest(self.output_dir, DUMMY_OPTIONS)
+        self.assertTrue(manifest.is_up_to_date(input_path, output_path))
+        self.assertFalse(jm.MirrorManifest(self.output_dir, {}).is_up_to_date(input_path, output_path))
+        # A touched input is out of date, but holds the same contents
+        os.utime(input_path, ns=(0, 0))
+        self.assertFalse(manifest.is_up_to_date(input_path, output_path))
+        (stat_data, contents) = jm.read_input(input_path)
+        self.assertTrue(manifest.contents_are_unchanged(stat_data, output_path, jm.hash_contents(contents)))
+        self.assertTrue(manifest.is_up_to_date(input_path, output_path))
+        self.assertFalse(manifest.contents_are_unchanged(stat_data, output_path, jm.hash_contents(b"{}")))
+        # A changed copy is out of date
+        with open(os.path.join(self.output_dir, output_path), "w") as f:
+            f.write("[ ]\n")
+        self.assertFalse(manifest.is_up_to_date(input_path, output_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+"""Tests for json_indent.parallel"""
+
+from __future__ import absolute_import
+
+import sys
+import unittest
+
+import json_indent.parallel as jip
+
+
+def square(x):
+    return x * x
+
+
+class TestParallel(unittest.TestCase):
+    def test_PLL_000_gil_enabled(self):
+        is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+        self.assertIs(jip.gil_enabled(), True if is_gil_enabled is None else is_gil_enabled())
+
+    def test_PLL_010_choose_backend(self):
+        automatic = jip.BACKEND_PROCESSES if jip.gil_enabled() else jip.BACKEND_THREADS
+        self.assertEqual(jip.choose_backend(jip.BACKEND_AUTO, 4), automatic)
+        self.assertEqual(jip.choose_backend(jip.BACKEND_THREADS, 4), jip.BACKEND_THREADS)
+        self.assertEqual(jip.choose_backend(jip.BACKEND_PROCESSES, 4), jip.BACKEND_PROCESSES)
+        self.assertEqual(jip.choose_backend(jip.BACKEND_SERIAL, 4), jip.BACKEND_SERIAL)
+        for backend in jip.BACKENDS:
+            self.assertEqual(jip.choose_backend(backend, 1), jip.BACKEND_SERIAL)
+
+    def test_PLL_020_map_parallel(self):
+        items = list(range(50))
+        for backend in jip.BACKENDS:
+            self.assertListEqual(jip.map_parallel(square, items, jobs=3, backend=backend), [x * x for x in items])
+            self.assertListEqual(jip.map_parallel(square, [], jobs=3, backend=backend), [])
+
+    def test_PLL_030_map_parallel_callback(self):
+        items = list(range(50))
+        for backend in jip.BACKENDS:
+            results = []
+            jip.map_parallel(square, items, jobs=3, backend=backend, callback=results.append)
+            self.assertListEqual(results, [x * x for x in items])
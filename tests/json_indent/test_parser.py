@@ -0,0 +1,92 @@
+"""Tests for json_indent.parser"""
+
+from __future__ import absolute_import
+
+import json
+import unittest
+
+import json_indent.parser as jip
+import json_indent.tokens as jit
+
+
+class RecordingParser(jip.TokenParser):
+    def __init__(self):
+        super(RecordingParser, self).__init__()
+        self.events = []
+
+    def begin_container(self, frame, token):
+        self.events.append(("begin", token, len(self.stack)))
+
+    def end_container(self, frame, token):
+        self.events.append(("end", token, frame[1]))
+
+    def begin_item(self, frame):
+        self.events.append(("item", frame[1]))
+
+    def key(self, frame, token):
+        self.events.append(("key", token))
+
+    def value(self, kind, token):
+        self.events.append(("value", kind, token))
+
+
+class TestTokenParser(unittest.TestCase):
+    def parse(self, text, coalesce=False):
+        parser = RecordingParser()
+        parser.feed(jit.iter_tokens(text, with_whitespace=True, coalesce=coalesce))
+        parser.finish()
+        return parser.events
+
+    def test_PAR_000_events(self):
+        events = self.parse('{"a": [1, true], "b": {}}')
+        self.assertListEqual(
+            events,
+            [
+                ("begin", "{", 1),
+                ("key", '"a"'),
+                ("begin", "[", 2),
+                ("item", 0),
+                ("value", jit.KIND_NUMBER, "1"),
+                ("item", 1),
+                ("value", jit.KIND_LITERAL, "true"),
+                ("end", "]", 2),
+                ("key", '"b"'),
+                ("begin", "{", 2),
+                ("end", "}", 0),
+                ("end", "}", 2),
+            ],
+        )
+
+    def test_PAR_010_flat_tokens(self):
+        events = self.parse('[[1, 2], {"a": "b"}]', coalesce=True)
+        self.assertListEqual(
+            events,
+            [
+                ("begin", "[", 1),
+                ("item", 0),
+                ("value", jit.KIND_FLAT_ARRAY, "[1, 2]"),
+                ("item", 1),
+                ("value", jit.KIND_FLAT_OBJECT, '{"a": "b"}'),
+                ("end", "]", 2),
+            ],
+        )
+
+    def test_PAR_100_deep(self):
+        depth = 20000
+        events = self.parse("[" * depth + "]" * depth)
+        self.assertEqual(len(events), 3 * depth - 1)
+        self.assertEqual(events[-1], ("end", "]", 1))
+
+    def test_PAR_200_invalid(self):
+        for text, message in [
+            ("", "Expecting value"),
+            ("[1,]", "Expecting value"),
+            ('{"a" 1}', "Expecting ':' delimiter"),
+            ('{"a":1,}', "Expecting property name enclosed in double quotes"),
+            ("[1 2]", "Expecting ',' delimiter"),
+            ("[1}", "Expecting ',' delimiter"),
+            ("1 2", "Extra data"),
+        ]:
+            with self.assertRaises(json.JSONDecodeError) as context:  # noqa: F841
+                self.parse(text)
+            self.assertEqual(context.exception.msg, message)
@@ -0,0 +1,73 @@
+"""Tests for json_indent.progress"""
+
+from __future__ import absolute_import
+
+import io
+import unittest
+
+import json_indent.progress as jp
+
+MIB = 1 << 20
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeTerminal(io.StringIO):
+    def isatty(self):
+        return True
+
+
+class TestProgress(unittest.TestCase):
+    def test_PRO_000_format_duration(self):
+        self.assertEqual(jp.format_duration(0), "0:00:00")
+        self.assertEqual(jp.format_duration(59.6), "0:01:00")
+        self.assertEqual(jp.format_duration(3 * 3600 + 25 * 60 + 7), "3:25:07")
+
+    def test_PRO_010_report_lines(self):
+        clock = FakeClock()
+        stream = io.StringIO()
+        progress = jp.Progress(4, 40 * MIB, stream=stream, clock=clock)
+        self.assertEqual(progress.interval, jp.LINE_INTERVAL)
+        progress.file_done(10 * MIB)
+        # Nothing is reported before the interval is up
+        clock.now += 1
+        progress.add_bytes(10 * MIB)
+        self.assertEqual(stream.getvalue(), "")
+        clock.now += 9
+        progress.file_done()
+        self.assertEqual(stream.getvalue(), "2/4 files, 20.0/40.0 MiB, 2.0 MiB/s, ETA 0:00:10\n")
+        clock.now += 10
+        progress.file_done(10 * MIB)
+        self.assertEqual(stream.getvalue().splitlines()[-1], "3/4 files, 30.0/40.0 MiB, 1.7 MiB/s, ETA 0:00:06")
+        progress.file_done(10 * MIB)
+        progress.close()
+        self.assertEqual(stream.getvalue().splitlines()[-1], "4/4 files, 40.0/40.0 MiB, 2.0 MiB/s, done in 0:00:20")
+
+    def test_PRO_020_report_on_terminal(self):
+        clock = FakeClock()
+        stream = FakeTerminal()
+        # Without the total bytes, the time left goes by files
+        progress = jp.Progress(100, stream=stream, clock=clock)
+        self.assertEqual(progress.interval, jp.TTY_INTERVAL)
+        clock.now += 1
+        progress.file_done(MIB)
+        clock.now += 1
+        progress.file_done(MIB)
+        clock.now += 1
+        progress.close()
+        self.assertEqual(
+            stream.getvalue(),
+            "\r1/100 files, 1.0 MiB, 1.0 MiB/s, ETA 0:01:39"
+            "\r2/100 files, 2.0 MiB, 1.0 MiB/s, ETA 0:01:38"
+            "\r2/100 files, 2.0 MiB, 0.7 MiB/s, done in 0:00:03\n",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+"""Tests for json_indent.shard"""
+
+from __future__ import absolute_import
+
+import os
+import unittest
+
+import json_indent.shard as jsh
+
+DUMMY_PATHS = ["file{}.json".format(i) for i in range(100)]
+
+DUMMY_SIZES = {path: (i * 7919) % 1000 for (i, path) in enumerate(DUMMY_PATHS)}
+
+
+class TestShard(unittest.TestCase):
+    def test_SHA_000_parse_shard_spec(self):
+        self.assertEqual(jsh.parse_shard_spec("1/1"), jsh.ShardSpec(1, 1))
+        self.assertEqual(jsh.parse_shard_spec("3/4"), jsh.ShardSpec(3, 4))
+        for text, expected_errmsg in [
+            ("1", "1: shard must be given as INDEX/COUNT (e.g., '1/4')"),
+            ("a/4", "a/4: shard must be given as INDEX/COUNT (e.g., '1/4')"),
+            ("1/2/3", "1/2/3: shard must be given as INDEX/COUNT (e.g., '1/4')"),
+            ("0/4", "0/4: shard index must be between 1 and the shard count"),
+            ("5/4", "5/4: shard index must be between 1 and the shard count"),
+        ]:
+            with self.assertRaises(ValueError) as context:  # noqa: F841
+                jsh.parse_shard_spec(text)
+            self.assertEqual(context.exception.args[0], expected_errmsg)
+
+    def test_SHA_010_hash_shards(self):
+        count = 4
+        shards = [jsh.select_shard(DUMMY_PATHS, jsh.ShardSpec(i, count)) for i in range(1, count + 1)]
+        # Each path is in exactly one shard, in the original order
+        self.assertListEqual(sorted(sum(shards, []), key=DUMMY_PATHS.index), DUMMY_PATHS)
+        for shard in shards:
+            self.assertListEqual(shard, sorted(shard, key=DUMMY_PATHS.index))
+            self.assertGreater(len(shard), 0)
+        # Assignment depends only on the (normalized) path
+        self.assertEqual(jsh.hash_shard("a/b.json", count), jsh.hash_shard(os.path.join("a", ".", "b.json"), count))
+        self.assertListEqual(jsh.select_shard(DUMMY_PATHS[::-1], jsh.ShardSpec(1, count))[::-1], shards[0])
+
+    def test_SHA_020_size_shards(self):
+        count = 3
+        shards = jsh.size_shards(DUMMY_PATHS, count, get_size=DUMMY_SIZES.get)
+        self.assertSetEqual(set(shards), set(DUMMY_PATHS))
+        loads = [sum(DUMMY_SIZES[path] for path in shards if shards[path] == i) for i in range(1, count + 1)]
+        self.assertLessEqual(max(loads) - min(loads), max(DUMMY_SIZES.values()))
+        # Assignment does not depend on the order of the paths
+        self.assertDictEqual(jsh.size_shards(DUMMY_PATHS[::-1], count, get_size=DUMMY_SIZES.get), shards)
+
+    def test_SHA_030_select_shard_items(self):
+        items = [(path, None) for path in DUMMY_PATHS]
+        for strategy in jsh.SHARD_STRATEGIES:
+            selected = jsh.select_shard(items, jsh.ShardSpec(2, 2), strategy=strategy, get_path=lambda x: x[0])
+            expected = jsh.select_shard(DUMMY_PATHS, jsh.ShardSpec(2, 2), strategy=strategy)
+            self.assertListEqual([x[0] for x in selected], expected)
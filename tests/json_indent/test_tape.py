@@ -0,0 +1,171 @@
+"""Tests for json_indent.tape"""
+
+from __future__ import absolute_import
+
+import collections
+import json
+import tracemalloc
+import unittest
+
+import json_indent.tape as jt
+
+DUMMY_JSON_TEXT = """{
+  "b": {"x": 0},
+  "a": [{"d": true, "c": null}, "café", "\\ud800", -Infinity],
+  "b": {"x": 1, "x": 2},
+  "d": {"z": [1, 2.50, 1E400, -0, {}, []], "y": {"k": "\\u00e9\\/", "j": [[]]}},
+  "e": -1.0e-3,
+  "s": "café"
+}"""
+
+DUMMY_JSON_TEXT_NAN = '[NaN, {"n": NaN}]'
+
+DUMMY_KWARGS = [
+    {},
+    {"indent": 2},
+    {"indent": 4, "sort_keys": True},
+    {"indent": "\t", "separators": (",", ":"), "ensure_ascii": False},
+]
+
+DEEP_DEPTH = 100000
+
+
+def loads(text):
+    return json.loads(text, object_pairs_hook=collections.OrderedDict)
+
+
+class TestTape(unittest.TestCase):
+    def assertSameAsJson(self, view, text):
+        """Assert that a view stands for the same data as `json.loads()` would give."""
+        self.assertEqual(json.dumps(view.to_python()), json.dumps(loads(text)))
+
+    def test_TAP_000_load_tape(self):
+        view = jt.load_tape(DUMMY_JSON_TEXT)
+        self.assertIsInstance(view, jt.TapeObject)
+        self.assertSameAsJson(view, DUMMY_JSON_TEXT)
+        for text in ['"x"', "1.5", "-0", "true", "null"]:
+            self.assertEqual(jt.load_tape(text), json.loads(text))
+
+    def test_TAP_010_object_view(self):
+        view = jt.load_tape(DUMMY_JSON_TEXT)
+        data = loads(DUMMY_JSON_TEXT)
+        # The last of several values wins, and the key keeps its first position
+        self.assertListEqual(list(view), list(data))
+        self.assertListEqual(list(view.keys()), ["b", "a", "d", "e", "s"])
+        self.assertEqual(len(view), 5)
+        self.assertEqual(view["b"]["x"], 2)
+        self.assertEqual(len(view["b"]), 1)
+        self.assertEqual(view["s"], "café")
+        self.assertIn("e", view)
+        self.assertNotIn("z", view)
+        self.assertEqual(view.get("z", 3), 3)
+        with self.assertRaises(KeyError) as context:  # noqa: F841
+            view["z"]
+        self.assertEqual(view, data)
+        # Large objects are indexed rather than searched
+        text = json.dumps({"k{}".format(i): i for i in range(100)})
+        large_view = jt.load_tape(text)
+        self.assertEqual(large_view["k99"], 99)
+        self.assertEqual(large_view, json.loads(text))
+
+    def test_TAP_020_array_view(self):
+        view = jt.load_tape(DUMMY_JSON_TEXT)["a"]
+        self.assertIsInstance(view, jt.TapeArray)
+        self.assertEqual(len(view), 4)
+        self.assertEqual(view[0], {"d": True, "c": None})
+        self.assertEqual(view[-1], float("-inf"))
+        self.assertListEqual(view[1:3], ["café", "\ud800"])
+        with self.assertRaises(IndexError) as context:  # noqa: F841
+            view[4]
+        z = jt.load_tape(DUMMY_JSON_TEXT)["d"]["z"]
+        self.assertEqual(z, [1, 2.5, float("inf"), 0, {}, []])
+        self.assertEqual(z[4], {})
+        self.assertEqual(z[5], [])
+        self.assertNotEqual(z, [1])
+
+    def test_TAP_030_views_have_no_dict(self):
+        view = jt.load_tape(DUMMY_JSON_TEXT)
+        for thing in [view, view["a"], view.tape]:
+            with self.assertRaises(AttributeError) as context:  # noqa: F841
+                thing.__dict__  # noqa: B018
+
+    def test_TAP_040_shared_strings(self):
+        view = jt.load_tape('[{"name": "x", "name2": "x"}, {"name": "x"}, ["x", "name"]]')
+        self.assertListEqual(sorted(view.tape.strings), ["name", "name2", "x"])
+
+    def test_TAP_050_encode_tape(self):
+        view = jt.load_tape(DUMMY_JSON_TEXT)
+        data = loads(DUMMY_JSON_TEXT)
+        for kwargs in DUMMY_KWARGS:
+            self.assertEqual(jt.encode_tape(view, **kwargs), json.dumps(data, **kwargs))
+            self.assertEqual(jt.encode_tape(view["a"], **kwargs), json.dumps(data["a"], **kwargs))
+        nan_view = jt.load_tape(DUMMY_JSON_TEXT_NAN)
+        self.assertEqual(jt.encode_tape(nan_view), json.dumps(loads(DUMMY_JSON_TEXT_NAN)))
+        with self.assertRaises(ValueError) as context:  # noqa: F841
+            jt.encode_tape(nan_view, allow_nan=False)
+        with self.assertRaises(ValueError) as context:  # noqa: F841
+            jt.encode_tape(view, allow_nan=False)
+        with self.assertRaises(TypeError) as context:  # noqa: F841
+            jt.encode_tape(view, cls=json.JSONEncoder)
+        self.assertEqual(context.exception.args[0], "unsupported keyword argument(s) for encode_tape(): cls")
+
+    def test_TAP_060_deep(self):
+        text = "[" * DEEP_DEPTH + '{"a": 1}' + "]" * DEEP_DEPTH
+        view = jt.load_tape(text)
+        self.assertEqual(jt.encode_tape(view), text)
+        inner = view
+        for _ in range(DEEP_DEPTH):
+            inner = inner[0]
+        self.assertEqual(inner["a"], 1)
+        self.assertEqual(len(view.to_python()), 1)
+
+    def test_TAP_070_errors(self):
+        for text in ["", "{", '{"a" 1}', "[1,]", "{} {}", "[01]"]:
+            with self.assertRaises(json.JSONDecodeError) as context:  # noqa: F841
+                jt.load_tape(text)
+        # Also in large documents, wherever the error is
+        text = json.dumps({"a": list(range(5000)), "b": [{"c": [1, 2]}] * 1000})
+        for bad_text in [text.replace("2500,", "2500"), text[:-2] + ",}", text.replace('"c"', '"c":', 1)]:
+            with self.assertRaises(json.JSONDecodeError) as context:  # noqa: F841
+                jt.load_tape(bad_text)
+
+    def test_TAP_080_large(self):
+        records = [
+            collections.OrderedDict([("id", i), ("name", "name {}".format(i % 100)), ("tags", ["a"] if i % 2 else [])])
+            for i in range(20000)
+        ]
+        data = collections.OrderedDict(
+            [
+                ("records", records),
+                ("ints", list(range(-5000, 5000)) + [2**40, 10**30]),
+                ("floats", [i / 7 for i in range(10000)]),
+                ("strings", ["s{}".format(i % 10) for i in range(10000)]),
+            ]
+        )
+        text = json.dumps(data)
+        tracemalloc.start()
+        try:
+            json.loads(text, object_pairs_hook=collections.OrderedDict)
+            (_, eager_peak) = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            view = jt.load_tape(text)
+            (_, peak) = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        # The document is never held as Python objects all at once
+        self.assertLess(peak, eager_peak // 3)
+        self.assertEqual(view["records"][12345]["name"], "name 45")
+        self.assertEqual(view["ints"][-2:], [2**40, 10**30])
+        self.assertEqual(view["floats"][7], 1.0)
+        self.assertEqual(len(view.tape.strings), 3 + 100 + 1 + 10 + 4)
+        for key in ["ints", "floats", "strings"]:
+            self.assertTrue(view.tape.is_flat(view[key].index))
+        self.assertFalse(view.tape.is_flat(view["records"].index))
+        self.assertEqual(jt.encode_tape(view), text)
+        # Duplicate keys are merged as json.loads() would, also in large objects
+        text = json.dumps(data).replace('"floats"', '"ints"')
+        self.assertSameAsJson(jt.load_tape(text), text)
+
+
+if __name__ == "__main__":
+    unittest.main()
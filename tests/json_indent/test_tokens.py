@@ -0,0 +1,155 @@
+"""Tests for json_indent.tokens"""
+
+from __future__ import absolute_import
+
+import json
+import unittest
+
+import json_indent.tokens as jit
+
+DUMMY_JSON_TEXT = '{"a": [1, -2.5e3, true, null], "b\\n": "c"}'
+
+DUMMY_TOKENS = [
+    ("{", "{"),
+    ("s", '"a"'),
+    (":", ":"),
+    ("[", "["),
+    ("n", "1"),
+    (",", ","),
+    ("n", "-2.5e3"),
+    (",", ","),
+    ("l", "true"),
+    (",", ","),
+    ("l", "null"),
+    ("]", "]"),
+    (",", ","),
+    ("s", '"b\\n"'),
+    (":", ":"),
+    ("s", '"c"'),
+    ("}", "}"),
+]
+
+
+def chunked(text, size):
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+class TestTokens(unittest.TestCase):
+    def test_TOK_000_iter_tokens(self):
+        self.assertListEqual(list(jit.iter_tokens(DUMMY_JSON_TEXT)), DUMMY_TOKENS)
+
+    def test_TOK_010_iter_tokens_with_whitespace(self):
+        tokens = list(jit.iter_tokens(DUMMY_JSON_TEXT, with_whitespace=True))
+        self.assertEqual("".join(token for (_kind, token) in tokens), DUMMY_JSON_TEXT)
+        self.assertIn((jit.KIND_WHITESPACE, " "), tokens)
+
+    def test_TOK_020_iter_tokens_invalid(self):
+        for text in ['{"a": tru}', '"unterminated', '"bad\x01char"', "01x"]:
+            with self.assertRaises(json.JSONDecodeError) as context:  # noqa: F841
+                list(jit.iter_tokens(text))
+
+    def test_TOK_030_iter_tokens_coalesced(self):
+        text = '[{"a": 1, "b": "x"}, [1, "]", null], [], [[2]], {"c": {}}]'
+        tokens = list(jit.iter_tokens(text, coalesce=True))
+        self.assertListEqual(
+            tokens,
+            [
+                ("[", "["),
+                ("O", '{"a": 1, "b": "x"}'),
+                (",", ","),
+                ("A", '[1, "]", null]'),
+                (",", ","),
+                ("A", "[]"),
+                (",", ","),
+                ("[", "["),
+                ("A", "[2]"),
+                ("]", "]"),
+                (",", ","),
+                ("{", "{"),
+                ("s", '"c"'),
+                (":", ":"),
+                ("O", "{}"),
+                ("}", "}"),
+                ("]", "]"),
+            ],
+        )
+
+    def test_TOK_040_iter_tokens_across_windows(self):
+        text = '{"key": [1.5e+20, -Infinity, "a b", true], "x": [{"y": [-1]}, "\\u00e9"]}'
+        saved_window_size = jit._WINDOW_SIZE
+        try:
+            for window_size in [1, 2, 3, 5, 8]:
+                jit._WINDOW_SIZE = window_size
+                for coalesce in [False, True]:
+                    tokens = list(jit.iter_tokens(text, with_whitespace=True, coalesce=coalesce))
+                    self.assertEqual("".join(token for (_kind, token) in tokens), text)
+                    for kind, token in tokens:
+                        self.assertEqual(kind, jit.kind_of(token))
+                with self.assertRaises(json.JSONDecodeError) as context:  # noqa: F841
+                    list(jit.iter_tokens(text + " x"))
+        finally:
+            jit._WINDOW_SIZE = saved_window_size
+
+    def test_TOK_045_flat_containers_across_windows(self):
+        text = "[[" + ", ".join(map(str, range(20))) + '], {"a": [1, 2]}, [3]]'
+        saved_window_size = jit._WINDOW_SIZE
+        try:
+            jit._WINDOW_SIZE = 8
+            # The window is extended to match each flat array whole
+            tokens = list(jit.iter_tokens(text, with_whitespace=True, coalesce=True))
+            self.assertEqual("".join(token for (_kind, token) in tokens), text)
+            self.assertEqual(tokens[1], ("A", "[" + ", ".join(map(str, range(20))) + "]"))
+            self.assertIn(("A", "[1, 2]"), tokens)
+            self.assertIn(("A", "[3]"), tokens)
+        finally:
+            jit._WINDOW_SIZE = saved_window_size
+
+    def test_TOK_050_kind_of(self):
+        for token, expected_kind in [
+            ("-1", jit.KIND_NUMBER),
+            ("-Infinity", jit.KIND_LITERAL),
+            ("Infinity", jit.KIND_LITERAL),
+            ("[", jit.KIND_BEGIN_ARRAY),
+            ("[1]", jit.KIND_FLAT_ARRAY),
+            ("{}", jit.KIND_FLAT_OBJECT),
+            ('"x"', jit.KIND_STRING),
+            (" ", jit.KIND_WHITESPACE),
+        ]:
+            self.assertEqual(jit.kind_of(token), expected_kind)
+
+    def test_TOK_100_iter_tokens_from_chunks(self):
+        for size in range(1, len(DUMMY_JSON_TEXT) + 1):
+            tokens = list(jit.iter_tokens_from_chunks(chunked(DUMMY_JSON_TEXT, size)))
+            self.assertListEqual(tokens, DUMMY_TOKENS)
+
+    def test_TOK_110_iter_tokens_from_chunks_invalid(self):
+        for text in ['{"a": tru}', '"unterminated', '"bad\x01char"', "-Inf"]:
+            for size in [1, 3, 64]:
+                with self.assertRaises(json.JSONDecodeError) as context:  # noqa: F841
+                    list(jit.iter_tokens_from_chunks(chunked(text, size)))
+
+    def test_TOK_120_iter_tokens_from_chunks_is_incremental(self):
+        def chunks():
+            yield '{"a": 1}'
+            raise AssertionError("read too far")
+
+        tokens = jit.iter_tokens_from_chunks(chunks())
+        self.assertListEqual([next(tokens) for _ in range(5)], list(jit.iter_tokens('{"a": 1}')))
+
+    def test_TOK_200_iter_documents(self):
+        text = '{"a": [1, 2]}{"b": null}\n 3 "x"\t[ ]-1.5'
+        for size in [1, 2, 7, len(text)]:
+            tokens = jit.iter_tokens_from_chunks(chunked(text, size), with_whitespace=True)
+            self.assertListEqual(
+                list(jit.iter_documents(tokens)),
+                ['{"a": [1, 2]}', '{"b": null}', "3", '"x"', "[ ]", "-1.5"],
+            )
+
+    def test_TOK_210_iter_documents_incomplete(self):
+        documents = list(jit.iter_documents(jit.iter_tokens('[1] {"a": ')))
+        self.assertListEqual(documents, ["[1]", '{"a":'])
+
+    def test_TOK_220_iter_documents_extra_data(self):
+        for text in ["[1], [2]", "1 : 2", "[1]]"]:
+            with self.assertRaises(json.JSONDecodeError) as context:  # noqa: F841
+                list(jit.iter_documents(jit.iter_tokens(text)))
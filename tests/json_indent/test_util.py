@@ -88,6 +88,29 @@ class TestJsonIndentUtil(unittest.TestCase):
                 self.assertEqual(result, expected)
             # fmt: on
 
+    def test_JIU_210_is_bytes_like(self):
+        for thing, expected in [
+            (b"x", True),
+            (bytearray(b"x"), True),
+            (memoryview(b"x"), True),
+            ("x", False),
+            ([1], False),
+            (None, False),
+        ]:
+            self.assertEqual(jiu.is_bytes_like(thing), expected)
+
+    def test_JIU_220_decode_json_bytes(self):
+        text = '{"caf\u00e9": ["\U0001f600"]}'
+        for encoding in ["utf-8", "utf-8-sig", "utf-16", "utf-16-le", "utf-16-be", "utf-32", "utf-32-le", "utf-32-be"]:
+            encoded = text.encode(encoding)
+            for thing in [encoded, bytearray(encoded), memoryview(encoded), memoryview(b"  " + encoded)[2:]]:
+                self.assertEqual(jiu.decode_json_bytes(thing), text)
+        # Views of other shapes and item sizes are decoded by their bytes
+        self.assertEqual(jiu.decode_json_bytes(memoryview(b"[1, 2]").cast("H", [3])), "[1, 2]")
+        self.assertEqual(jiu.decode_json_bytes(memoryview(b"[_1_,_2_]")[::2]), "[1,2]")
+        with self.assertRaises(UnicodeDecodeError) as context:  # noqa: F841
+            jiu.decode_json_bytes(b'"\xff"')
+
     def test_JIU_300_padded(self):
         for original, n, expected in [
             ([], 2, [None, None]),
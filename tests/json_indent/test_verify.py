@@ -0,0 +1,109 @@
+"""Tests for json_indent.verify"""
+
+from __future__ import absolute_import
+
+import json
+import unittest
+
+import json_indent.verify as jv
+from json_indent.json_indent import format_json_text
+
+DUMMY_JSON_TEXT = """{
+  "b": {"x": 0, "z": [1, 2.5, 1e+16, -0.0, {}, [], "caf\\u00e9"]},
+  "a": [{"d": true, "c": null}, "x y", "\\"[{", -Infinity, 10, -3],
+  "e": -0.001
+}"""
+
+KWARGS_SETS = [
+    {"indent": 2},
+    {"indent": 4, "sort_keys": True},
+    {"indent": "\t", "ensure_ascii": False},
+    {"indent": None, "separators": (",", ":")},
+    {},
+]
+
+
+class TestVerify(unittest.TestCase):
+    def test_VER_000_formatted(self):
+        for kwargs in KWARGS_SETS:
+            for newline in ["\n", "\r\n"]:
+                text = json.dumps(json.loads(DUMMY_JSON_TEXT), **kwargs).replace("\n", newline) + newline
+                self.assertTrue(jv.is_formatted(text, newline=newline, **kwargs))
+                self.assertFalse(jv.is_formatted(text, newline="\r" if newline == "\n" else "\n", **kwargs))
+        for text in ['"x"\n', "0\n", "[]\n", "{}\n", "null\n"]:
+            self.assertTrue(jv.is_formatted(text, indent=2))
+
+    def test_VER_010_not_formatted(self):
+        text = json.dumps(json.loads(DUMMY_JSON_TEXT), indent=2) + "\n"
+        for old, new in [
+            ("\n", ""),
+            ("  ", " "),
+            (": ", ":"),
+            ("\n}", "}"),
+            ("2.5", "2.50"),
+            ("1e+16", "1E16"),
+            ("10", "010"),
+            ("-0.0", "-0"),
+            ("-3", "-3.00"),
+            ("x y", "x\\u0020y"),
+            ("\\u00e9", "\\u00E9"),
+            ('"d": true', '"c": true'),
+            ("null", "nil"),
+            ("[]", "[ ]"),
+            ("{}", "{\n}"),
+        ]:
+            self.assertFalse(jv.is_formatted(text.replace(old, new, 1), indent=2), (old, new))
+        for text in ["", "\n", "0", "0\n\n", " 0\n", "[1]\n", "[\n  1,\n]\n", '{"a"}\n', "]\n", "1\n2\n"]:
+            self.assertFalse(jv.is_formatted(text, indent=2), text)
+
+    def test_VER_020_sort_keys(self):
+        for text, expected in [
+            ('{"a": 1, "b": 2}\n', True),
+            ('{"b": 1, "a": 2}\n', False),
+            ('{"a": 1, "a": 2}\n', False),
+            ('{"a": 1, "a b": [2], "a!": 3}\n', True),
+            ('{"a": 1, "a\\u0000": 2}\n', True),
+        ]:
+            self.assertEqual(jv.is_formatted(text, sort_keys=True), expected, text)
+        self.assertTrue(jv.is_formatted('{"b": 1, "a": 2}\n'))
+        self.assertFalse(jv.is_formatted('{"b": 1, "b": 2}\n'))
+
+    def test_VER_030_nan(self):
+        text = "[NaN, Infinity, -Infinity]\n"
+        self.assertTrue(jv.is_formatted(text))
+        self.assertFalse(jv.is_formatted(text, allow_nan=False))
+        self.assertTrue(jv.is_formatted(text, lossless=True, allow_nan=False))
+
+    def test_VER_035_invalid_numbers(self):
+        for token in ["nan", "inf", "-inf", "Inf", "1_000", "+1", ".5", "1.", "0x10"]:
+            for kwargs in [{}, {"indent": 2}, {"lossless": True}]:
+                self.assertFalse(jv.is_formatted('{"a": ' + token + "}\n", **kwargs), (token, kwargs))
+                self.assertFalse(jv.is_formatted("[" + token + "]\n", **kwargs), (token, kwargs))
+
+    def test_VER_036_long_integers(self):
+        # Too long to decode (see sys.set_int_max_str_digits()), in a run of items or not
+        for text in ["9" * 5000 + "\n", "[1, " + "9" * 5000 + "]\n", '{"a": -' + "9" * 5000 + "}\n"]:
+            self.assertFalse(jv.is_formatted(text), text[:10])
+            # Losslessly, numbers are copied as they are
+            self.assertTrue(jv.is_formatted(text, lossless=True), text[:10])
+        self.assertTrue(jv.is_formatted("[1, " + "9" * 4000 + "]\n"))
+
+    def test_VER_040_lossless(self):
+        for kwargs_set in KWARGS_SETS:
+            kwargs = {key: value for key, value in kwargs_set.items() if key != "ensure_ascii"}
+            text = format_json_text(DUMMY_JSON_TEXT.replace("2.5", "2.50"), lossless=True, **kwargs)
+            self.assertTrue(jv.is_formatted(text, lossless=True, **kwargs))
+            self.assertFalse(jv.is_formatted(text, **kwargs))
+        # Duplicate keys are kept, in their places among sorted keys
+        self.assertTrue(jv.is_formatted('{"a": 1, "a": 0, "b": 2}\n', lossless=True, sort_keys=True))
+        self.assertFalse(jv.is_formatted('{"a": 1, "b": 0, "a": 2}\n', lossless=True, sort_keys=True))
+        self.assertFalse(jv.is_formatted("[1.]\n", lossless=True))
+
+    def test_VER_050_unsupported_kwargs(self):
+        with self.assertRaises(TypeError) as context:  # noqa: F841
+            jv.is_formatted("[]\n", default=str, cls=json.JSONEncoder)
+        self.assertEqual(context.exception.args[0], "unsupported keyword argument(s) for is_formatted(): cls, default")
+
+
+if __name__ == "__main__":
+    unittest.main()
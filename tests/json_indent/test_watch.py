@@ -0,0 +1,154 @@
+"""Tests for json_indent.watch"""
+
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import json_indent.watch as jiw
+
+# Longest time (in seconds) to wait for a change to be handled
+HANDLE_TIMEOUT = 5.0
+
+# Time (in seconds) to wait to be sure nothing more is handled
+QUIET_TIME = 0.2
+
+POLL_INTERVAL = 0.02
+
+
+def write_file(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+class WatchThread(object):
+    """Run `watch_paths()` in a thread, recording each batch of changed paths."""
+
+    def __init__(self, paths, handle_path=None, **kwargs):
+        self.batches = []
+        self.handled = threading.Condition()
+        self.stop = threading.Event()
+        self.handle_path = handle_path
+        self.thread = threading.Thread(
+            target=jiw.watch_paths,
+            args=(paths, self._handle_changes),
+            kwargs=dict(should_stop=self.stop.is_set, poll_interval=POLL_INTERVAL, **kwargs),
+        )
+        self.thread.start()
+
+    def _handle_changes(self, paths):
+        if self.handle_path is not None:
+            for path in paths:
+                self.handle_path(path)
+        with self.handled:
+            self.batches.append(paths)
+            self.handled.notify_all()
+
+    def wait_for_batches(self, count, timeout=HANDLE_TIMEOUT):
+        with self.handled:
+            self.handled.wait_for(lambda: len(self.batches) >= count, timeout)
+        return self.batches
+
+    def close(self):
+        self.stop.set()
+        self.thread.join()
+
+
+class WatchTestMixin(object):
+    use_inotify = None
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.sub_dir = os.path.join(self.temp_dir, "sub")
+        os.makedirs(self.sub_dir)
+        self.file_path = os.path.join(self.temp_dir, "file.txt")
+        write_file(self.file_path, "")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def start_watching(self, paths, **kwargs):
+        watch_thread = WatchThread(paths, use_inotify=self.use_inotify, **kwargs)
+        # Give the watcher time to start (and, when polling, to take its first scan)
+        time.sleep(QUIET_TIME)
+        return watch_thread
+
+    def test_WAT_000_changes(self):
+        watch_thread = self.start_watching([self.file_path, self.sub_dir])
+        try:
+            new_path = os.path.join(self.sub_dir, "new.json")
+            write_file(new_path, "[]")
+            write_file(os.path.join(self.sub_dir, "ignored.txt"), "[]")
+            write_file(os.path.join(self.temp_dir, "outside.json"), "[]")
+            self.assertListEqual(watch_thread.wait_for_batches(1), [[new_path]])
+
+            write_file(self.file_path, "{}")
+            self.assertListEqual(watch_thread.wait_for_batches(2)[1:], [[self.file_path]])
+        finally:
+            watch_thread.close()
+
+    def test_WAT_010_new_directory(self):
+        watch_thread = self.start_watching([self.sub_dir])
+        try:
+            new_dir = os.path.join(self.sub_dir, "new")
+            os.makedirs(new_dir)
+            time.sleep(QUIET_TIME)
+            new_path = os.path.join(new_dir, "new.json")
+            write_file(new_path, "[]")
+            self.assertListEqual(watch_thread.wait_for_batches(1), [[new_path]])
+        finally:
+            watch_thread.close()
+
+    def test_WAT_020_own_writes(self):
+        def rewrite(path):
+            with open(path, "a") as f:
+                f.write("\n")
+
+        watch_thread = self.start_watching([self.file_path], handle_path=rewrite)
+        try:
+            write_file(self.file_path, "{}")
+            self.assertListEqual(watch_thread.wait_for_batches(1), [[self.file_path]])
+            # The rewrite is not reported as a change
+            time.sleep(QUIET_TIME)
+            self.assertEqual(len(watch_thread.batches), 1)
+
+            write_file(self.file_path, "[]")
+            self.assertEqual(len(watch_thread.wait_for_batches(2)), 2)
+            with open(self.file_path) as f:
+                self.assertEqual(f.read(), "[]\n")
+        finally:
+            watch_thread.close()
+
+    def test_WAT_030_debounce(self):
+        watch_thread = self.start_watching([self.sub_dir], debounce=QUIET_TIME)
+        try:
+            paths = [os.path.join(self.sub_dir, "{}.json".format(i)) for i in range(3)]
+            for path in paths:
+                write_file(path, "[]")
+            self.assertListEqual(watch_thread.wait_for_batches(1), [paths])
+        finally:
+            watch_thread.close()
+
+
+class TestPollingWatcher(WatchTestMixin, unittest.TestCase):
+    use_inotify = False
+
+    def test_WAT_040_abstract_base(self):
+        # Every watcher must say how it waits
+        with self.assertRaises(TypeError) as context:  # noqa: F841
+            jiw.Watcher([self.temp_dir])
+
+
+@unittest.skipUnless(os.path.exists("/proc/sys/fs/inotify"), "inotify is not available")
+class TestInotifyWatcher(WatchTestMixin, unittest.TestCase):
+    use_inotify = True
+
+    def test_WAT_100_open_watcher(self):
+        with jiw.open_watcher([self.temp_dir]) as watcher:
+            self.assertIsInstance(watcher, jiw.InotifyWatcher)
+        with jiw.open_watcher([self.temp_dir], use_inotify=False) as watcher:
+            self.assertIsInstance(watcher, jiw.PollingWatcher)